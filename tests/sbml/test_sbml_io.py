@@ -8,10 +8,13 @@
 
 from math import isnan
 from six import iteritems
+import io
 import mock
 import os
+import resource
 import shutil
 import tempfile
+import time
 import unittest
 import warnings
 
@@ -23,13 +26,17 @@ from libsbml import Reaction as libsbmlReaction
 from libsbml import Model as libsbmlModel
 from libsbml import Objective as libsbmlObjective
 
+from obj_model import Validator
 from obj_model.utils import get_component_by_id
-from wc_lang import (SubmodelAlgorithm, Model, DfbaObjective,
-                     Species, DfbaObjReaction, Parameter)
+from wc_lang import (SubmodelAlgorithm, Model, DfbaObjective, DfbaObjectiveExpression,
+                     Species, Reaction, DfbaObjReaction, Parameter, SpeciesTypeType,
+                     Observable, Function, ObservableExpression, FunctionExpression,
+                     RateLawExpression, RateLawDirection)
 from wc_lang.transform.prep_for_wc_sim import PrepareForWcSimTransform
 from wc_lang.transform.split_reversible_reactions import SplitReversibleReactionsTransform
 
 from wc_lang.sbml.util import wrap_libsbml, get_SBML_compatibility_method
+import wc_lang.sbml.util
 from wc_lang.io import Reader
 import wc_lang.sbml.io as sbml_io
 
@@ -195,3 +202,519 @@ class TestSbml(unittest.TestCase):
         with mock.patch('libsbml.writeSBMLToFile', return_value=False):
             with self.assertRaisesRegex(ValueError, ' could not be written to '):
                 sbml_io.Writer.run(self.model, path=self.dirname)
+
+
+class ParallelWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.model = build_genome_scale_dfba_model(n_submodels=3, n_species=20, n_rxns=10)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_write_strings(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            sbml_documents = sbml_io.Writer.run(self.model)
+
+            # documents which are returned rather than written are built in this process
+            with mock.patch('multiprocessing.get_context', side_effect=Exception('Pool should not be used')):
+                parallel_sbml_documents = sbml_io.Writer.run(self.model, workers=2)
+
+        self.assertEqual(list(parallel_sbml_documents.keys()), ['submodel_0', 'submodel_1', 'submodel_2'])
+        for submodel_id, sbml_document in sbml_documents.items():
+            self.assertEqual(parallel_sbml_documents[submodel_id].toSBML(), sbml_document.toSBML())
+
+    def test_write_files(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            paths = sbml_io.Writer.run(self.model, path=os.path.join(self.dirname, 'seq'))
+            parallel_paths = sbml_io.Writer.run(self.model, path=os.path.join(self.dirname, 'par'), workers=2)
+
+        self.assertEqual(parallel_paths, [os.path.join(self.dirname, 'par-submodel_{}.sbml'.format(i_submodel))
+                                          for i_submodel in range(3)])
+        for path, parallel_path in zip(paths, parallel_paths):
+            with open(path, 'r') as file:
+                sbml = file.read()
+            with open(parallel_path, 'r') as file:
+                self.assertEqual(file.read(), sbml)
+
+    def test_write_in_parent(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            with mock.patch('multiprocessing.get_all_start_methods', return_value=['spawn']):
+                with mock.patch('multiprocessing.get_context', side_effect=Exception('Pool should not be used')):
+                    paths = sbml_io.Writer.run(self.model, path=os.path.join(self.dirname, 'model'), workers=2)
+        self.assertEqual(len(paths), 3)
+
+    def test_write_errors(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            with mock.patch('libsbml.writeSBMLToFile', return_value=False):
+                with self.assertRaisesRegex(ValueError, ' could not be written to '):
+                    sbml_io.Writer.run(self.model, path=os.path.join(self.dirname, 'model'), workers=2)
+
+
+class ReaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_round_trip(self):
+        model = build_genome_scale_dfba_model(n_submodels=1, n_species=20, n_rxns=10)
+        submodel = model.submodels[0]
+        submodel.comments = 'submodel comments'
+        model.parameters.create(id='param_1', name='parameter 1', value=2., units='s')
+
+        objs = {
+            Reaction: {rxn.id: rxn for rxn in submodel.reactions},
+            DfbaObjReaction: {},
+        }
+        expression, error = DfbaObjectiveExpression.deserialize('r_0_1 + 2.5 * r_0_2', objs)
+        assert error is None, str(error)
+        model.dfba_objs.create(id=DfbaObjective.gen_id(submodel.id), submodel=submodel, expression=expression)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            sbml_document = sbml_io.SBMLExchange.write_submodel(submodel)
+        path = os.path.join(self.dirname, 'model.sbml')
+        self.assertTrue(libsbml.writeSBMLToFile(sbml_document, path))
+        read_model = sbml_io.Reader.run(path)
+
+        read_submodel = read_model.submodels[0]
+        self.assertEqual(read_submodel.id, submodel.id)
+        self.assertEqual(read_submodel.algorithm, SubmodelAlgorithm.dfba)
+        self.assertEqual(read_submodel.comments, 'submodel comments')
+
+        self.assertEqual([comp.id for comp in read_model.compartments], ['c'])
+        self.assertEqual(sorted(spec.id for spec in read_model.species), sorted(spec.id for spec in model.species))
+        self.assertEqual(sorted(species_type.id for species_type in read_model.species_types),
+                         sorted(species_type.id for species_type in model.species_types))
+        read_species = read_model.species.get_one(id='s1[c]')
+        self.assertEqual(read_species.species_type.name, 'species 1')
+        self.assertEqual(read_species.distribution_init_concentration.mean, 1e-3)
+
+        self.assertEqual([rxn.id for rxn in read_submodel.reactions], [rxn.id for rxn in submodel.reactions])
+        for rxn, read_rxn in zip(submodel.reactions, read_submodel.reactions):
+            self.assertEqual(read_rxn.name, rxn.name)
+            self.assertEqual(read_rxn.reversible, rxn.reversible)
+            self.assertEqual(read_rxn.flux_min, rxn.flux_min)
+            self.assertEqual(read_rxn.flux_max, rxn.flux_max)
+            self.assertEqual(sorted((part.species.id, part.coefficient) for part in read_rxn.participants),
+                             sorted((part.species.id, part.coefficient) for part in rxn.participants))
+
+        self.assertEqual([(param.id, param.name, param.value, param.units) for param in read_model.parameters],
+                         [('param_1', 'parameter 1', 2., 's')])
+
+        read_expression = read_submodel.dfba_obj.expression
+        self.assertEqual(read_submodel.dfba_obj.id, DfbaObjective.gen_id(submodel.id))
+        self.assertEqual(read_expression._parsed_expression.lin_coeffs[Reaction], {
+            read_model.reactions.get_one(id='r_0_1'): 1.,
+            read_model.reactions.get_one(id='r_0_2'): 2.5,
+        })
+
+    def test_read_example_model(self):
+        model = Reader().run(TestSbml.MODEL_FILENAME)
+        transform = PrepareForWcSimTransform()
+        transform.transforms.remove(SplitReversibleReactionsTransform)
+        transform.run(model)
+
+        for submodel in model.get_submodels():
+            if submodel.algorithm == SubmodelAlgorithm.dfba:
+                sbml_document = sbml_io.SBMLExchange.write_submodel(submodel)
+                read_model = sbml_io.SBMLExchange.read(sbml_document)
+                read_submodel = read_model.submodels[0]
+
+                self.assertEqual(sorted(rxn.id for rxn in read_submodel.reactions),
+                                 sorted(rxn.id for rxn in submodel.reactions))
+                self.assertEqual(sorted(rxn.id for rxn in read_submodel.dfba_obj_reactions),
+                                 sorted(rxn.id for rxn in submodel.dfba_obj_reactions))
+                self.assertEqual(sorted(spec.id for spec in read_model.species),
+                                 sorted(spec.id for spec in submodel.get_species()))
+                for dfba_obj_reaction in submodel.dfba_obj_reactions:
+                    read_dfba_obj_reaction = read_submodel.dfba_obj_reactions.get_one(id=dfba_obj_reaction.id)
+                    self.assertEqual(
+                        sorted((dfba_obj_species.species.id, dfba_obj_species.value)
+                               for dfba_obj_species in read_dfba_obj_reaction.dfba_obj_species),
+                        sorted((dfba_obj_species.species.id, dfba_obj_species.value)
+                               for dfba_obj_species in dfba_obj_reaction.dfba_obj_species))
+
+    def test_read_errors(self):
+        with self.assertRaisesRegex(ValueError, 'could not be read'):
+            sbml_io.Reader.run(os.path.join(self.dirname, 'no_such_file.sbml'))
+
+        with self.assertRaisesRegex(ValueError, 'does not contain a model'):
+            sbml_io.SBMLExchange.read(libsbml.SBMLDocument(3, 1))
+
+        sbml_document = libsbml.SBMLDocument(3, 1)
+        sbml_model = sbml_document.createModel()
+        sbml_species = sbml_model.createSpecies()
+        sbml_species.setIdAttribute('a__c__')
+        sbml_species.setCompartment('c')
+        with self.assertRaisesRegex(ValueError, 'undefined compartment'):
+            sbml_io.SBMLExchange.read(sbml_document)
+
+        sbml_model.createCompartment().setIdAttribute('c')
+        sbml_reaction = sbml_model.createReaction()
+        sbml_reaction.setIdAttribute('rxn')
+        sbml_reaction.createReactant().setSpecies('b__c__')
+        with self.assertRaisesRegex(ValueError, 'undefined species'):
+            sbml_io.SBMLExchange.read(sbml_document)
+
+
+class ValidationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model = build_genome_scale_dfba_model(n_submodels=3, n_species=20, n_rxns=10)
+        self.model.parameters.create(id='param_1', value=1., units='s')
+
+    def test_group_objects(self):
+        comp = self.model.compartments[0]
+        submodel_0, submodel_1, _ = self.model.submodels
+        rxn_0, rxn_1 = submodel_0.reactions[0:2]
+        grouped_objects = sbml_io.SBMLExchange.group_objects([comp, rxn_0, submodel_1, rxn_1, comp, submodel_0, rxn_0])
+        self.assertEqual(list(grouped_objects.keys()), [type(comp), type(rxn_0), type(submodel_0)])
+        self.assertEqual(grouped_objects[type(comp)], [comp])
+        self.assertEqual(grouped_objects[type(rxn_0)], [rxn_0, rxn_1])
+        self.assertEqual(grouped_objects[type(submodel_0)], [submodel_1, submodel_0])
+
+    def test_validate(self):
+        objects = list(self.model.compartments) + list(self.model.parameters)
+        validated_objects = set()
+        with mock.patch.object(Validator, 'run', side_effect=Validator.run, autospec=True) as mock_run:
+            sbml_io.SBMLExchange.validate(objects, validated_objects)
+            self.assertEqual(mock_run.call_count, 1)
+            self.assertEqual(validated_objects, set(objects))
+
+            sbml_io.SBMLExchange.validate(objects, validated_objects)
+            self.assertEqual(mock_run.call_count, 1)
+
+            sbml_io.SBMLExchange.validate(objects + list(self.model.species), validated_objects)
+            self.assertEqual(mock_run.call_count, 2)
+            self.assertEqual(mock_run.call_args[0][1], list(self.model.species))
+
+            sbml_io.SBMLExchange.validate(objects)
+            self.assertEqual(mock_run.call_count, 3)
+
+    def test_validate_warning(self):
+        self.model.parameters.create(id='param_1', value=1., units='s')
+        validated_objects = set()
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter('always')
+            sbml_io.SBMLExchange.validate(self.model.parameters, validated_objects)
+            sbml_io.SBMLExchange.validate(self.model.parameters, validated_objects)
+        messages = [str(warning.message) for warning in caught_warnings
+                    if 'objects are not valid' in str(warning.message)]
+        self.assertEqual(len(messages), 1)
+
+    def test_writer_validates_each_object_once(self):
+        for workers in [1, 2]:
+            validated_objects = []
+
+            def run(validator, objects, *args, **kwargs):
+                validated_objects.extend(objects)
+                return Validator.run(validator, objects, *args, **kwargs)
+
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                with mock.patch.object(Validator, 'run', side_effect=run, autospec=True):
+                    dirname = tempfile.mkdtemp()
+                    try:
+                        sbml_io.Writer.run(self.model, path=os.path.join(dirname, 'model'), workers=workers)
+                    finally:
+                        shutil.rmtree(dirname)
+
+            self.assertEqual(len(validated_objects), len(set(validated_objects)))
+            self.assertEqual(len([obj for obj in validated_objects if obj in self.model.compartments]), 1)
+
+
+class KineticLawTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+
+        self.model = model = Model(id='model', version='0.0.1', wc_lang_version='0.0.1')
+        comp = model.compartments.create(id='c')
+        st_a = model.species_types.create(id='a', type=SpeciesTypeType.metabolite)
+        st_b = model.species_types.create(id='b', type=SpeciesTypeType.metabolite)
+        spec_a = model.species.create(id='a[c]', species_type=st_a, compartment=comp)
+        spec_b = model.species.create(id='b[c]', species_type=st_b, compartment=comp)
+        k_f = model.parameters.create(id='k_f', value=1., units='s^-1')
+        k_b = model.parameters.create(id='k_b', value=2., units='s^-1')
+
+        expression, error = ObservableExpression.deserialize('a[c] + b[c]', {
+            Species: {'a[c]': spec_a, 'b[c]': spec_b}})
+        assert error is None, str(error)
+        obs = model.observables.create(id='total', expression=expression)
+
+        expression, error = FunctionExpression.deserialize('k_b * total', {
+            Parameter: {'k_b': k_b}, Observable: {'total': obs}})
+        assert error is None, str(error)
+        func = model.functions.create(id='inhibition', expression=expression, units='molecule s^-1')
+
+        self.submodel = submodel = model.submodels.create(id='submodel', algorithm=SubmodelAlgorithm.ode)
+        objs = {
+            Species: {'a[c]': spec_a, 'b[c]': spec_b},
+            Parameter: {'k_f': k_f, 'k_b': k_b},
+            Observable: {'total': obs},
+            Function: {'inhibition': func},
+        }
+        # the expressions are shared by the rate laws of the reactions
+        expressions = {}
+        for direction, expression in [(RateLawDirection.forward, 'k_f * a[c]'),
+                                      (RateLawDirection.backward, 'k_b * b[c] ** 2 / inhibition')]:
+            expressions[direction], error = RateLawExpression.deserialize(expression, objs)
+            assert error is None, str(error)
+
+        for i_rxn in range(2):
+            rxn = model.reactions.create(id='rxn_{}'.format(i_rxn), submodel=submodel, reversible=True)
+            rxn.participants.create(species=spec_a, coefficient=-1.)
+            rxn.participants.create(species=spec_b, coefficient=1.)
+            for direction, expression in expressions.items():
+                model.rate_laws.create(id='{}-{}'.format(rxn.id, direction.name), reaction=rxn,
+                                       direction=direction, expression=expression)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def check_sbml_doc(self, sbml_document):
+        # the units of the kinetic laws can't be fully checked, so only errors are checked
+        sbml_document.checkConsistency()
+        errors = [sbml_document.getError(i).getMessage() for i in range(sbml_document.getNumErrors())
+                  if sbml_document.getError(i).isError() or sbml_document.getError(i).isFatal()]
+        self.assertEqual(errors, [])
+
+    def check_sbml_model(self, sbml_model):
+        self.assertEqual([rxn.getIdAttribute() for rxn in sbml_model.getListOfReactions()], ['rxn_0', 'rxn_1'])
+        for sbml_reaction in sbml_model.getListOfReactions():
+            self.assertTrue(sbml_reaction.isSetKineticLaw())
+            self.assertEqual(libsbml.formulaToL3String(sbml_reaction.getKineticLaw().getMath()),
+                             'parameter_k_f * a__c__ - parameter_k_b * b__c__^2 / function_inhibition')
+
+        self.assertEqual({rule.getVariable(): libsbml.formulaToL3String(rule.getMath())
+                          for rule in sbml_model.getListOfRules()}, {
+            'observable_total': 'a__c__ + b__c__',
+            'function_inhibition': 'parameter_k_b * observable_total',
+        })
+        for id in ['observable_total', 'function_inhibition']:
+            self.assertFalse(sbml_model.getParameter(id).getConstant())
+
+    def test_write(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            sbml_documents = sbml_io.Writer.run(self.model, algorithms=[SubmodelAlgorithm.ode])
+        sbml_document = sbml_documents['submodel']
+        self.check_sbml_doc(sbml_document)
+        self.check_sbml_model(sbml_document.getModel())
+
+    def test_translate_each_expression_once(self):
+        with mock.patch('wc_lang.sbml.util.get_sbml_id', side_effect=wc_lang.sbml.util.get_sbml_id) as mock_get_sbml_id:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', UserWarning)
+                sbml_io.Writer.run(self.model, algorithms=[SubmodelAlgorithm.ode])
+
+        # the ids of the terms of the observable (2), the function (2), and the shared forward (2) and
+        # backward (3) rate law expressions, as well as the ids of the observable and the function
+        self.assertEqual(mock_get_sbml_id.call_count, 2 + 2 + 2 + 3 + 2)
+
+    def test_stream(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            path, = sbml_io.Writer.run(self.model, algorithms=[SubmodelAlgorithm.ode],
+                                       path=os.path.join(self.dirname, 'model'), stream=True)
+        sbml_document = libsbml.SBMLReader().readSBML(path)
+        self.check_sbml_doc(sbml_document)
+        self.check_sbml_model(sbml_document.getModel())
+
+    def test_read(self):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            sbml_document = sbml_io.Writer.run(self.model, algorithms=[SubmodelAlgorithm.ode])['submodel']
+        model = sbml_io.SBMLExchange.read(sbml_document)
+        self.assertEqual(sorted(parameter.id for parameter in model.parameters), ['k_b', 'k_f'])
+
+
+class SBMLStreamWriterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.model = Reader().run(TestSbml.MODEL_FILENAME)
+        transform = PrepareForWcSimTransform()
+        transform.transforms.remove(SplitReversibleReactionsTransform)
+        transform.run(self.model)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_write(self):
+        for submodel in self.model.get_submodels():
+            if submodel.algorithm == SubmodelAlgorithm.dfba:
+                objects = sbml_io.Writer.get_submodel_objects(submodel)
+                file = io.StringIO()
+                sbml_io.SBMLStreamWriter(file).write(objects)
+                sbml_document = libsbml.readSBMLFromString(file.getvalue())
+
+                TestSbml.check_sbml_doc(self, sbml_document)
+                self.assertEqual(wrap_libsbml(get_SBML_compatibility_method(sbml_document), returns_int=True), 0)
+                check_document_against_model(sbml_document, self.model, self)
+
+                # the streamed document is equivalent to the document built with libSBML
+                dom_sbml_document = sbml_io.SBMLExchange.write(objects)
+                sbml_model = sbml_document.getModel()
+                dom_sbml_model = dom_sbml_document.getModel()
+                self.assertEqual(sbml_model.getIdAttribute(), dom_sbml_model.getIdAttribute())
+                for get_list in ['getListOfUnitDefinitions', 'getListOfCompartments', 'getListOfSpecies',
+                                 'getListOfParameters', 'getListOfReactions']:
+                    self.assertEqual([obj.getIdAttribute() for obj in getattr(sbml_model, get_list)()],
+                                     [obj.getIdAttribute() for obj in getattr(dom_sbml_model, get_list)()])
+                for parameter, dom_parameter in zip(sbml_model.getListOfParameters(),
+                                                    dom_sbml_model.getListOfParameters()):
+                    self.assertEqual(parameter.getValue(), dom_parameter.getValue())
+                    self.assertEqual(parameter.getUnits(), dom_parameter.getUnits())
+                for rxn, dom_rxn in zip(sbml_model.getListOfReactions(), dom_sbml_model.getListOfReactions()):
+                    self.assertEqual(
+                        [(ref.getSpecies(), ref.getStoichiometry()) for ref in rxn.getListOfReactants()],
+                        [(ref.getSpecies(), ref.getStoichiometry()) for ref in dom_rxn.getListOfReactants()])
+                    self.assertEqual(
+                        [(ref.getSpecies(), ref.getStoichiometry()) for ref in rxn.getListOfProducts()],
+                        [(ref.getSpecies(), ref.getStoichiometry()) for ref in dom_rxn.getListOfProducts()])
+                    self.assertEqual(rxn.getPlugin('fbc').getLowerFluxBound(),
+                                     dom_rxn.getPlugin('fbc').getLowerFluxBound())
+                objective = sbml_model.getPlugin('fbc').getActiveObjective()
+                dom_objective = dom_sbml_model.getPlugin('fbc').getActiveObjective()
+                self.assertEqual(
+                    [(flux_obj.getReaction(), flux_obj.getCoefficient())
+                     for flux_obj in objective.getListOfFluxObjectives()],
+                    [(flux_obj.getReaction(), flux_obj.getCoefficient())
+                     for flux_obj in dom_objective.getListOfFluxObjectives()])
+
+    def test_writer(self):
+        paths = sbml_io.Writer.run(self.model, path=os.path.join(self.dirname, 'dom'))
+        stream_paths = sbml_io.Writer.run(self.model, path=os.path.join(self.dirname, 'stream'), stream=True)
+        self.assertEqual(len(stream_paths), len(paths))
+        for path, stream_path in zip(paths, stream_paths):
+            document = libsbml.SBMLReader().readSBML(path)
+            stream_document = libsbml.SBMLReader().readSBML(stream_path)
+            TestSbml.check_sbml_doc(self, stream_document)
+            self.assertEqual(sbml_io.SBMLExchange.read(stream_document).reactions[0].id,
+                             sbml_io.SBMLExchange.read(document).reactions[0].id)
+
+    def test_duplicate_parameter_ids(self):
+        model = Model(id='model')
+        model.parameters.create(id='param_1', units='s')
+        model.parameters.create(id='param_1', units='s')
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            with self.assertRaisesRegex(ValueError, 'is already in use as a Parameter id'):
+                sbml_io.SBMLStreamWriter(io.StringIO()).write(list(model.parameters))
+
+    def test_format(self):
+        self.assertEqual(sbml_io.format_sbml_double(float('inf')), 'INF')
+        self.assertEqual(sbml_io.format_sbml_double(-float('inf')), '-INF')
+        self.assertEqual(sbml_io.format_sbml_double(float('nan')), 'NaN')
+        self.assertEqual(sbml_io.format_sbml_double(1e-3), '0.001')
+        attrs = [('a', True), ('b', None), ('c', ''), ('d', 'x "<y>" & z'), ('e', 2.)]
+        self.assertEqual(sbml_io.format_xml_attrs(attrs), ' a="true" d="x &quot;&lt;y&gt;&quot; &amp; z" e="2.0"')
+
+
+class BenchmarkTestCase(unittest.TestCase):
+
+    @unittest.skipUnless(os.getenv('BENCHMARK'), 'Set BENCHMARK to run benchmarks')
+    def test_round_trip(self):
+        model = build_genome_scale_dfba_model(n_submodels=1, n_species=2000, n_rxns=10000)
+        dirname = tempfile.mkdtemp()
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            start = time.time()
+            path, = sbml_io.Writer.run(model, path=os.path.join(dirname, 'model'))
+            print('Wrote 10000 reactions in {:.1f} s'.format(time.time() - start))
+
+        start = time.time()
+        read_model = sbml_io.Reader.run(path)
+        print('Read 10000 reactions in {:.1f} s'.format(time.time() - start))
+
+        shutil.rmtree(dirname)
+
+        self.assertEqual(len(read_model.reactions), 10000)
+        self.assertEqual(len(read_model.species), 2000)
+
+    @unittest.skipUnless(os.getenv('BENCHMARK'), 'Set BENCHMARK to run benchmarks')
+    def test_stream(self):
+        model = build_genome_scale_dfba_model(n_submodels=1, n_species=10000, n_rxns=100000)
+        dirname = tempfile.mkdtemp()
+
+        # stream first, because the peak memory of this process can only increase
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            for method, stream in [('streaming', True), ('libSBML', False)]:
+                max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                start = time.time()
+                sbml_io.Writer.run(model, path=os.path.join(dirname, method), stream=stream)
+                print('Wrote 100000 reactions with {} in {:.1f} s, increasing the peak memory by {} kB'.format(
+                    method, time.time() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - max_rss))
+
+        shutil.rmtree(dirname)
+
+    @unittest.skipUnless(os.getenv('BENCHMARK'), 'Set BENCHMARK to run benchmarks')
+    def test_write_submodel(self):
+        submodel = build_genome_scale_dfba_model(n_submodels=1, n_species=2000, n_rxns=10000).submodels[0]
+
+        durations = {}
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+
+            # export with the checks and error messages of `wrap_libsbml` for every libSBML call
+            with mock.patch.object(wc_lang.sbml.util, 'call_libsbml', wc_lang.sbml.util.wrap_libsbml):
+                start = time.time()
+                wrapped_document = sbml_io.SBMLExchange.write_submodel(submodel)
+                durations['wrap_libsbml'] = time.time() - start
+
+            start = time.time()
+            sbml_document = sbml_io.SBMLExchange.write_submodel(submodel)
+            durations['call_libsbml'] = time.time() - start
+
+        for method, duration in durations.items():
+            print('Exported 10000 reactions with {} in {:.1f} s'.format(method, duration))
+
+        self.assertEqual(sbml_document.toSBML(), wrapped_document.toSBML())
+        self.assertEqual(wrap_libsbml(sbml_document.getModel().getNumReactions, returns_int=True), 10000)
+
+
+def build_genome_scale_dfba_model(n_submodels, n_species, n_rxns):
+    """ Build a model with dFBA submodels with many reactions among many species
+
+    Args:
+        n_submodels (:obj:`int`): number of submodels
+        n_species (:obj:`int`): number of species
+        n_rxns (:obj:`int`): number of reactions of each submodel
+
+    Returns:
+        :obj:`Model`: model
+    """
+    model = Model(id='model')
+    comp = model.compartments.create(id='c', name='cytosol')
+
+    species = []
+    for i_species in range(n_species):
+        species_type = model.species_types.create(id='s{}'.format(i_species), name='species {}'.format(i_species),
+                                                  type=SpeciesTypeType.metabolite)
+        spec = model.species.create(id='s{}[c]'.format(i_species), species_type=species_type, compartment=comp)
+        model.distribution_init_concentrations.create(id='dist-init-conc-' + spec.id, species=spec, mean=1e-3)
+        species.append(spec)
+
+    for i_submodel in range(n_submodels):
+        submodel = model.submodels.create(id='submodel_{}'.format(i_submodel), algorithm=SubmodelAlgorithm.dfba)
+        for i_rxn in range(n_rxns):
+            rxn = model.reactions.create(id='r_{}_{}'.format(i_submodel, i_rxn), name='reaction {}'.format(i_rxn),
+                                         submodel=submodel, reversible=i_rxn % 2 == 0,
+                                         flux_min=-1e3 if i_rxn % 2 == 0 else 0., flux_max=1e3)
+            for i_part, coefficient in enumerate([-1., -2., 1., 1.]):
+                spec = species[(i_rxn * 7 + i_part * 13 + i_submodel) % n_species]
+                rxn.participants.append(model.get_species_coefficient_pool().get_or_create(spec, coefficient))
+
+    return model
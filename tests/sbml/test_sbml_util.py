@@ -18,9 +18,16 @@ from libsbml import (LIBSBML_OPERATION_SUCCESS, SBMLDocument, OperationReturnVal
                      UnitDefinition, SBMLNamespaces, UNIT_KIND_SECOND, UNIT_KIND_MOLE, UNIT_KIND_AMPERE,
                      UNIT_KIND_AVOGADRO)
 
-from wc_lang.sbml.util import (wrap_libsbml, LibSBMLError, create_sbml_doc_w_fbc, add_sbml_unit,
-                               create_sbml_parameter, init_sbml_model, SBML_LEVEL, SBML_VERSION, FBC_VERSION,
-                               get_SBML_compatibility_method)
+from wc_lang.sbml.util import (wrap_libsbml, call_libsbml, get_libsbml_call_str, LibSBMLError,
+                               create_sbml_doc_w_fbc, add_sbml_unit, create_sbml_parameter, create_sbml_species,
+                               create_sbml_reactions, add_sbml_species_references, init_sbml_model,
+                               create_sbml_assignment_rule, str_to_xmlstr, xmlstr_to_str, get_sbml_id,
+                               SBMLMathTranslator, SBML_LEVEL, SBML_VERSION, FBC_VERSION,
+                               get_SBML_compatibility_method, get_metrics)
+from wc_lang import (Model, Species, Parameter, Observable, Function, ObservableExpression, FunctionExpression,
+                     RateLawExpression, RateLawDirection)
+from wc_lang.util import metrics, MemoryMetricsSink
+import libsbml
 
 
 class TestSbml(unittest.TestCase):
@@ -69,6 +76,40 @@ class TestSbml(unittest.TestCase):
             wrap_libsbml(self.document.getAnnotation)
         self.assertIn('libSBML returned None when executing', str(context.exception))
 
+    def test_call_libsbml(self):
+        self.assertEqual(call_libsbml(self.document.setIdAttribute, 'test_id'), LIBSBML_OPERATION_SUCCESS)
+        self.assertEqual(call_libsbml(self.document.getIdAttribute), 'test_id')
+        model = call_libsbml(self.document.createModel)
+        self.assertEqual(call_libsbml(self.document.getModel), model)
+
+        with self.assertRaisesRegex(LibSBMLError, "in libSBML method call 'method: .*; args: no arg'"):
+            call_libsbml(self.document.getNumErrors, 'no arg')
+
+        with self.assertRaisesRegex(LibSBMLError,
+                                    "LibSBML returned error code .* when executing 'method: .*; args: \\.\\.'"):
+            call_libsbml(self.document.setIdAttribute, '..')
+
+        with self.assertRaisesRegex(LibSBMLError, 'libSBML returned None when executing'):
+            call_libsbml(self.document.getAnnotation)
+
+    def test_count_libsbml_calls(self):
+        sink = MemoryMetricsSink()
+        metrics.add_sink(sink)
+        try:
+            model = wrap_libsbml(self.document.getModel)
+            call_libsbml(self.document.setLevelAndVersion, SBML_LEVEL, SBML_VERSION)
+        finally:
+            metrics.remove_sink(sink)
+        wrap_libsbml(self.document.getModel)
+
+        self.assertEqual(sink.counters[('wc_lang_sbml_libsbml_calls_total', (('method', 'getModel'),))], 1)
+        self.assertEqual(sink.counters[('wc_lang_sbml_libsbml_calls_total', (('method', 'setLevelAndVersion'),))], 1)
+        self.assertIs(get_metrics(), metrics)
+
+    def test_get_libsbml_call_str(self):
+        self.assertEqual(get_libsbml_call_str('method', ()), 'method: method')
+        self.assertEqual(get_libsbml_call_str('method', ('a', 1)), 'method: method; args: a, 1')
+
     def test_returns_int(self):
         sbml_model = wrap_libsbml(self.document.createModel)
         avogadro_unit_def = wrap_libsbml(sbml_model.createUnitDefinition)
@@ -223,6 +264,172 @@ class TestLibsbmlInterface(unittest.TestCase):
             parameter = create_sbml_parameter(self.sbml_model, id, value, units=self.per_second_id)
         self.assertIn("is already in use as a Parameter id", str(context.exception))
 
+    def test_create_sbml_species(self):
+        compartment = wrap_libsbml(self.sbml_model.createCompartment)
+        wrap_libsbml(compartment.setIdAttribute, 'c')
+
+        species = create_sbml_species(self.sbml_model, [
+            ('a__c__', 'A', None, 'c', 1.5, 'M'),
+            ('b__c__', 'B', 'comments', 'c', 2.5, 'M'),
+        ])
+        self.assertEqual([wrap_libsbml(s.getIdAttribute) for s in species], ['a__c__', 'b__c__'])
+        self.assertEqual([wrap_libsbml(s.getName) for s in species], ['A', 'B'])
+        self.assertEqual([wrap_libsbml(s.getCompartment) for s in species], ['c', 'c'])
+        self.assertEqual([wrap_libsbml(s.getInitialConcentration) for s in species], [1.5, 2.5])
+        self.assertEqual([wrap_libsbml(s.getSubstanceUnits) for s in species], ['M', 'M'])
+        self.assertFalse(species[0].isSetNotes())
+        self.assertTrue(species[1].isSetNotes())
+        self.assertEqual(wrap_libsbml(self.sbml_model.getNumSpecies, returns_int=True), 2)
+
+        self.assertEqual(create_sbml_species(self.sbml_model, []), [])
+
+    def test_create_sbml_reactions(self):
+        reactions = create_sbml_reactions(self.sbml_model, [
+            ('rxn_1', 'Reaction 1', True, None, [('a__c__', -2.), ('b__c__', 1.), ('c__c__', 0.)]),
+            ('rxn_2', 'Reaction 2', False, 'comments', []),
+        ])
+        self.assertEqual([wrap_libsbml(r.getIdAttribute) for r in reactions], ['rxn_1', 'rxn_2'])
+        self.assertEqual([wrap_libsbml(r.getName) for r in reactions], ['Reaction 1', 'Reaction 2'])
+        self.assertEqual([r.getReversible() for r in reactions], [True, False])
+        self.assertEqual([r.getFast() for r in reactions], [False, False])
+        self.assertTrue(reactions[1].isSetNotes())
+
+        self.assertEqual(wrap_libsbml(reactions[0].getNumReactants, returns_int=True), 1)
+        self.assertEqual(wrap_libsbml(reactions[0].getNumProducts, returns_int=True), 1)
+        reactant = wrap_libsbml(reactions[0].getReactant, 0)
+        self.assertEqual(wrap_libsbml(reactant.getSpecies), 'a__c__')
+        self.assertEqual(wrap_libsbml(reactant.getStoichiometry), 2.)
+        self.assertTrue(reactant.getConstant())
+        product = wrap_libsbml(reactions[0].getProduct, 0)
+        self.assertEqual(wrap_libsbml(product.getSpecies), 'b__c__')
+        self.assertEqual(wrap_libsbml(product.getStoichiometry), 1.)
+
+        self.assertEqual(wrap_libsbml(reactions[1].getNumReactants, returns_int=True), 0)
+        self.assertEqual(wrap_libsbml(reactions[1].getNumProducts, returns_int=True), 0)
+
+    def test_add_sbml_species_references(self):
+        reaction = wrap_libsbml(self.sbml_model.createReaction)
+        references = add_sbml_species_references(reaction, [('a__c__', -1.), ('b__c__', 0.), ('c__c__', 3.)])
+        self.assertEqual([wrap_libsbml(ref.getSpecies) for ref in references], ['a__c__', 'c__c__'])
+        self.assertEqual([wrap_libsbml(ref.getStoichiometry) for ref in references], [1., 3.])
+
+    def test_create_sbml_assignment_rule(self):
+        math = libsbml.parseL3Formula('2 * x')
+        rule = create_sbml_assignment_rule(self.sbml_model, 'function_f', math, name='f')
+        self.assertEqual(wrap_libsbml(rule.getVariable), 'function_f')
+        self.assertEqual(libsbml.formulaToL3String(rule.getMath()), '2 * x')
+        parameter = wrap_libsbml(self.sbml_model.getParameter, 'function_f')
+        self.assertEqual(wrap_libsbml(parameter.getName), 'f')
+        self.assertFalse(wrap_libsbml(parameter.getConstant, returns_int=True))
+
+        with self.assertRaisesRegex(ValueError, 'is already in use as a Parameter id'):
+            create_sbml_assignment_rule(self.sbml_model, 'function_f', math)
+
+
+class TestSBMLMathTranslator(unittest.TestCase):
+
+    def setUp(self):
+        self.model = model = Model(id='model')
+        comp = model.compartments.create(id='c')
+        st_a = model.species_types.create(id='a')
+        self.spec_a = spec_a = model.species.create(id='a[c]', species_type=st_a, compartment=comp)
+        self.k = k = model.parameters.create(id='k', value=1., units='s^-1')
+        self.k_2 = k_2 = model.parameters.create(id='k_2', value=2., units='dimensionless')
+
+        expression, error = ObservableExpression.deserialize('2 * a[c]', {Species: {'a[c]': spec_a}})
+        assert error is None, str(error)
+        self.obs = obs = model.observables.create(id='obs', expression=expression)
+
+        expression, error = FunctionExpression.deserialize('k_2 * obs', {
+            Parameter: {'k_2': k_2}, Observable: {'obs': obs}})
+        assert error is None, str(error)
+        self.func = func = model.functions.create(id='func', expression=expression, units='molecule')
+
+        self.rxn = rxn = model.reactions.create(id='rxn')
+        objs = {
+            Species: {'a[c]': spec_a},
+            Parameter: {'k': k, 'k_2': k_2},
+            Observable: {'obs': obs},
+            Function: {'func': func},
+        }
+        expression, error = RateLawExpression.deserialize('k_2 * k * a[c] ** 2 + func + log(obs)', objs)
+        assert error is None, str(error)
+        self.forward = rxn.rate_laws.create(id='rxn-forward', direction=RateLawDirection.forward,
+                                            expression=expression)
+        self.backward_expression, error = RateLawExpression.deserialize('k * obs', objs)
+        assert error is None, str(error)
+
+    def test_get_sbml_id(self):
+        self.assertEqual(get_sbml_id(self.spec_a), 'a__c__')
+        self.assertEqual(get_sbml_id(self.k), 'parameter_k')
+        self.assertEqual(get_sbml_id(self.obs), 'observable_obs')
+        self.assertEqual(get_sbml_id(self.func), 'function_func')
+        self.assertEqual(get_sbml_id(self.spec_a.compartment), 'c')
+
+    def test_get_infix(self):
+        translator = SBMLMathTranslator()
+        infix = translator.get_infix(self.forward.expression)
+        self.assertEqual(infix.replace(' ', ''),
+                         'parameter_k_2*parameter_k*a__c__^2+function_func+log(observable_obs)')
+        self.assertEqual(translator.get_infix(self.obs.expression).replace(' ', ''), '2*a__c__')
+        self.assertEqual(translator.get_infix(self.func.expression).replace(' ', ''), 'parameter_k_2*observable_obs')
+
+        # translations are cached
+        self.forward.expression._parsed_expression = None
+        self.assertEqual(translator.get_infix(self.forward.expression), infix)
+
+        with self.assertRaisesRegex(ValueError, 'must be parsed'):
+            translator.get_infix(RateLawExpression(expression='k'))
+
+    def test_get_infix_of_ids_equal_to_function_names(self):
+        exp = self.model.parameters.create(id='exp', value=1., units='dimensionless')
+        expression, error = RateLawExpression.deserialize('exp(k_2) * exp + k', {
+            Parameter: {'exp': exp, 'k': self.k, 'k_2': self.k_2},
+        })
+        assert error is None, str(error)
+
+        infix = SBMLMathTranslator().get_infix(expression)
+        self.assertEqual(infix.replace(' ', ''), 'exp(parameter_k_2)*parameter_exp+parameter_k')
+        self.assertEqual(SBMLMathTranslator().parse(infix).getType(), libsbml.AST_PLUS)
+
+    def test_get_rate_law_infix(self):
+        translator = SBMLMathTranslator()
+        forward_infix = translator.get_infix(self.forward.expression)
+        self.assertEqual(translator.get_rate_law_infix(self.rxn), forward_infix)
+
+        self.rxn.rate_laws.create(id='rxn-backward', direction=RateLawDirection.backward,
+                                  expression=self.backward_expression)
+        self.assertEqual(translator.get_rate_law_infix(self.rxn),
+                         '({}) - (parameter_k * observable_obs)'.format(forward_infix))
+
+        self.assertEqual(translator.get_rate_law_infix(self.model.reactions.create(id='rxn_2')), None)
+
+    def test_parse(self):
+        translator = SBMLMathTranslator()
+        ast = translator.parse(translator.get_rate_law_infix(self.rxn))
+        self.assertEqual(ast.getType(), libsbml.AST_PLUS)
+
+        # log is the natural logarithm
+        self.assertEqual(translator.parse('log(x)').getType(), libsbml.AST_FUNCTION_LN)
+
+        with self.assertRaisesRegex(LibSBMLError, 'could not be translated to SBML'):
+            translator.parse('x +')
+
+    def test_get_mathml(self):
+        translator = SBMLMathTranslator()
+        mathml = translator.get_mathml('2 * x')
+        self.assertTrue(mathml.startswith('<math'))
+        self.assertIn('<ci> x </ci>', mathml)
+        self.assertEqual(libsbml.formulaToL3String(libsbml.readMathMLFromString(mathml)), '2 * x')
+
+
+class TestNotes(unittest.TestCase):
+
+    def test_xmlstr_to_str(self):
+        self.assertEqual(xmlstr_to_str(str_to_xmlstr('comments')), 'comments')
+        self.assertEqual(xmlstr_to_str('<notes>\n  <body xmlns="http://www.w3.org/1999/xhtml">\n'
+                                       '    <p>a &lt; b &amp; c</p>\n  </body>\n</notes>'), 'a < b & c')
+
 
 class TestDebug(unittest.TestCase):
 
@@ -0,0 +1,193 @@
+""" Benchmarks of the time and peak memory of reading, writing, validating, transforming, exporting, and
+comparing synthetic models of several sizes
+
+The benchmarks are skipped unless the `BENCHMARK` environment variable is set. The sizes of the models
+can be selected with the `BENCHMARK_SIZES` environment variable (e.g., `BENCHMARK_SIZES=small,medium,large`),
+and the results can be saved to a JSON file, e.g., to track a performance baseline, by setting the
+`BENCHMARK_RESULTS` environment variable to the path of the file::
+
+    BENCHMARK=1 BENCHMARK_RESULTS=benchmarks.json python -m pytest tests/test_benchmarks.py -s
+
+The time of each operation is measured without tracing memory. The peak memory is measured in a separate run
+of the operation with :obj:`tracemalloc`, and therefore only includes memory allocated by Python (e.g., not
+memory allocated by libSBML).
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from capturer import CaptureOutput
+from shutil import rmtree
+from tempfile import mkdtemp
+from wc_lang import __main__
+from wc_lang import SubmodelAlgorithm, Validator
+from wc_lang.io import Reader, Writer
+from wc_lang.synthetic import SyntheticModelGenerator
+from wc_lang.transform import get_transforms
+from wc_lang.util import get_model_summary
+import collections
+import gc
+import json
+import os
+import time
+import tracemalloc
+import unittest
+import warnings
+import wc_lang.sbml.io
+
+SIZES = collections.OrderedDict([
+    ('small', dict(n_species_types=30, n_reactions=100, n_observables=10, n_functions=10, n_parameters=10)),
+    ('medium', dict(n_species_types=300, n_reactions=1000, n_observables=100, n_functions=100, n_parameters=100)),
+    ('large', dict(n_species_types=3000, n_reactions=10000, n_observables=1000, n_functions=1000,
+                   n_parameters=1000)),
+])
+# :obj:`collections.OrderedDict`: dictionary which maps the names of the sizes of the synthetic models to the
+# options of :obj:`SyntheticModelGenerator`
+
+TRANSFORM_ARGS = {
+    'ChangeValue': ((('parameters', {'id': 'param_0'}), 'value'), 0.5),
+    'ChangeValues': ([(('parameters', {'id': 'param_0'}), 'value'), (('parameters', {'id': 'param_1'}), 'value')],
+                     [0.5, 0.25]),
+}
+# :obj:`dict`: dictionary which maps the ids of the transforms which require arguments to their arguments
+
+RESULTS = []
+# :obj:`list` of :obj:`dict`: name, size, time (s), and peak memory (bytes) of each benchmark
+
+
+def get_sizes():
+    """ Get the names of the sizes of the models to benchmark
+
+    Returns:
+        :obj:`list` of :obj:`str`: names of sizes
+    """
+    return [size.strip() for size in os.getenv('BENCHMARK_SIZES', 'small,medium').split(',') if size.strip()]
+
+
+def gen_model(size):
+    """ Generate a synthetic model
+
+    Args:
+        size (:obj:`str`): name of the size of the model
+
+    Returns:
+        :obj:`wc_lang.core.Model`: model
+    """
+    return SyntheticModelGenerator(seed=0, **SIZES[size]).run()
+
+
+def measure(setup, func):
+    """ Measure the time and peak memory of an operation
+
+    Args:
+        setup (:obj:`callable`): function which returns the arguments of the operation; this is called before
+            each run of the operation, and isn't measured
+        func (:obj:`callable`): operation
+
+    Returns:
+        :obj:`tuple`: time (s) and peak memory (bytes) of the operation
+    """
+    args = setup()
+    gc.collect()
+    start = time.time()
+    func(*args)
+    duration = time.time() - start
+
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return duration, peak_memory
+
+
+def tearDownModule():
+    """ Print a summary of the results of the benchmarks, and save them to the path set by `BENCHMARK_RESULTS` """
+    if not RESULTS:
+        return
+
+    print('\n{:<50} {:<8} {:>10} {:>16}'.format('Benchmark', 'Size', 'Time (s)', 'Peak memory (MB)'))
+    for result in RESULTS:
+        print('{:<50} {:<8} {:>10.3f} {:>16.1f}'.format(result['name'], result['size'], result['time'],
+                                                        result['peak_memory'] / 2 ** 20))
+
+    path = os.getenv('BENCHMARK_RESULTS')
+    if path:
+        with open(path, 'w') as file:
+            json.dump(RESULTS, file, indent=2)
+
+
+@unittest.skipUnless(os.getenv('BENCHMARK'), 'Set BENCHMARK to run benchmarks')
+class BenchmarkTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tempdir = mkdtemp()
+        cls.models = {}
+        cls.paths = {}
+        for size in get_sizes():
+            cls.models[size] = model = gen_model(size)
+            cls.paths[size] = path = os.path.join(cls.tempdir, 'model-{}.xlsx'.format(size))
+            Writer().run(model, path, set_repo_metadata_from_path=False)
+
+    @classmethod
+    def tearDownClass(cls):
+        rmtree(cls.tempdir)
+
+    def benchmark(self, name, size, setup, func):
+        duration, peak_memory = measure(setup, func)
+        RESULTS.append({'name': name, 'size': size, 'time': duration, 'peak_memory': peak_memory})
+        print('{} ({}): {:.3f} s, {:.1f} MB'.format(name, size, duration, peak_memory / 2 ** 20))
+
+    def test_read(self):
+        for size in get_sizes():
+            self.benchmark('io.Reader.run', size, lambda: (self.paths[size],), lambda path: Reader().run(path))
+
+    def test_write(self):
+        for size in get_sizes():
+            path = os.path.join(self.tempdir, 'written-model-{}.xlsx'.format(size))
+            self.benchmark('io.Writer.run', size, lambda: (self.models[size], path),
+                           lambda model, path: Writer().run(model, path, set_repo_metadata_from_path=False))
+
+    def test_validate(self):
+        for size in get_sizes():
+            self.benchmark('Validator.run', size, lambda: (self.models[size],),
+                           lambda model: Validator().run(model, get_related=True))
+
+    def test_transforms(self):
+        for size in get_sizes():
+            for id, transform_cls in sorted(get_transforms().items()):
+                args = TRANSFORM_ARGS.get(id, ())
+                self.benchmark('transform.{}'.format(id), size, lambda: (gen_model(size),),
+                               lambda model: transform_cls(*args).run(model))
+
+    def test_sbml_export(self):
+        algorithms = list(SubmodelAlgorithm)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            for size in get_sizes():
+                self.benchmark('sbml.io.Writer.run', size, lambda: (self.models[size],),
+                               lambda model: wc_lang.sbml.io.Writer.run(model, algorithms=algorithms))
+
+    def test_get_model_summary(self):
+        for size in get_sizes():
+            self.benchmark('util.get_model_summary', size, lambda: (self.models[size],), get_model_summary)
+
+    def test_difference(self):
+        for size in get_sizes():
+            model = gen_model(size)
+            model.parameters.get_one(id='param_0').value += 1.
+            path = os.path.join(self.tempdir, 'changed-model-{}.xlsx'.format(size))
+            Writer().run(model, path, set_repo_metadata_from_path=False)
+
+            def difference(path_1, path_2):
+                with CaptureOutput(relay=False):
+                    with __main__.App(argv=['difference', path_1, path_2]) as app:
+                        app.run()
+            self.benchmark('difference', size, lambda: (self.paths[size], path), difference)
@@ -29,7 +29,7 @@ from wc_lang.core import (TimeUnit, VolumeUnit, ConcentrationUnit, DensityUnit,
                           Reaction, Compartment,
                           CompartmentPhysicalType, CompartmentBiologicalType, CompartmentGeometry,
                           SpeciesType, SpeciesTypeType, Species,
-                          SpeciesCoefficient, Parameter, Reference, ReferenceType,
+                          SpeciesCoefficient, SpeciesCoefficientPool, Parameter, Reference, ReferenceType,
                           DatabaseReference,
                           RateLaw, RateLawExpression, RateLawDirection,
                           Function, FunctionExpression,
@@ -820,14 +820,13 @@ class TestCore(unittest.TestCase):
         self.assertEqual(part, None)
 
         val = '(2) spec_0'
+        species = objs[Species]['spec_0[c_0]']
         objs[SpeciesCoefficient] = {
-            '(2) spec_0[c_0]': SpeciesCoefficient(
-                species=Species(id='spec_0[c_0]', species_type=objs[SpeciesType]['spec_0'], compartment=objs[Compartment]['c_0']),
-                coefficient=2)
+            (species, 2.): SpeciesCoefficient(species=species, coefficient=2)
         }
         part, error = SpeciesCoefficient.deserialize(val, objs, compartment=objs[Compartment]['c_0'])
         self.assertEqual(error, None)
-        self.assertEqual(part, objs[SpeciesCoefficient]['(2) spec_0[c_0]'])
+        self.assertIs(part, objs[SpeciesCoefficient][(species, 2.)])
 
     def test_validate_reaction_balance(self):
         c = Compartment()
@@ -2565,6 +2564,80 @@ class TestCoreFromFile(unittest.TestCase):
         ]))
 
 
+class SpeciesCoefficientPoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.model = model = Model()
+        comp = model.compartments.create(id='c')
+        species_type = model.species_types.create(id='st')
+        self.species = model.species.create(id='st[c]', species_type=species_type, compartment=comp)
+        self.part = SpeciesCoefficient(species=self.species, coefficient=-1.)
+
+    def test_get(self):
+        pool = SpeciesCoefficientPool()
+        self.assertIs(pool.get(self.species, -1), self.part)
+        self.assertEqual(pool.get(self.species, 1.), None)
+
+        # re-indexed when participants are created outside of the pool
+        part_2 = SpeciesCoefficient(species=self.species, coefficient=2.)
+        self.assertIs(pool.get(self.species, 2.), part_2)
+
+        # re-indexed when an indexed participant has changed
+        self.part.coefficient = 5.
+        self.assertEqual(pool.get(self.species, -1.), None)
+        self.assertIs(pool.get(self.species, 5.), self.part)
+
+        part_2.species = None
+        part_3 = SpeciesCoefficient(species=self.species, coefficient=2.)
+        self.assertIs(pool.get(self.species, 2.), part_3)
+
+        # explicitly invalidated
+        self.part.coefficient = 6.
+        pool.invalidate(self.species)
+        self.assertIs(pool.get(self.species, 6.), self.part)
+        self.part.coefficient = 7.
+        pool.invalidate()
+        self.assertIs(pool.get(self.species, 7.), self.part)
+
+    def test_get_or_create(self):
+        pool = SpeciesCoefficientPool()
+        self.assertIs(pool.get_or_create(self.species, -1.), self.part)
+
+        part = pool.get_or_create(self.species, 3.)
+        self.assertEqual(part.species, self.species)
+        self.assertEqual(part.coefficient, 3.)
+        self.assertIs(pool.get_or_create(self.species, 3.), part)
+        self.assertEqual(len(self.species.species_coefficients), 2)
+
+    def test_add(self):
+        pool = SpeciesCoefficientPool()
+        duplicate = SpeciesCoefficient(species=self.species, coefficient=-1.)
+        self.assertIs(pool.add(duplicate), self.part)
+        self.assertEqual(duplicate.species, None)
+        self.assertEqual(self.species.species_coefficients, [self.part])
+
+        # duplicates which are already used by reactions remain attached to their species
+        rxn = self.model.reactions.create(id='rxn')
+        duplicate = rxn.participants.create(species=self.species, coefficient=-1.)
+        self.assertIs(pool.add(duplicate), self.part)
+        self.assertEqual(duplicate.species, self.species)
+        rxn.participants.remove(duplicate)
+        duplicate.species = None
+
+        part = SpeciesCoefficient(species=self.species, coefficient=4.)
+        self.assertIs(pool.add(part), part)
+        self.assertIs(pool.get(self.species, 4.), part)
+
+        pool.clear()
+        self.assertIs(pool.get(self.species, 4.), part)
+
+    def test_model_pool(self):
+        pool = self.model.get_species_coefficient_pool()
+        self.assertIsInstance(pool, SpeciesCoefficientPool)
+        self.assertIs(self.model.get_species_coefficient_pool(), pool)
+        self.assertIs(pool.get(self.species, -1.), self.part)
+
+
 class TestTaxonRank(unittest.TestCase):
 
     def test(self):
@@ -0,0 +1,195 @@
+""" Tests of the array representations of dFBA submodels
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from shutil import rmtree
+from tempfile import mkdtemp
+from wc_lang import (Model, SubmodelAlgorithm, ReactionFluxBoundUnit, Reaction, DfbaObjReaction,
+                     DfbaObjectiveExpression)
+from wc_lang.dfba import DfbaFluxBounds, DfbaLinearProgram, format_number, format_lp_terms
+import math
+import numpy
+import os
+import unittest
+
+
+class DfbaFluxBoundsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.model = model = Model()
+        self.submodel = submodel = model.submodels.create(id='submodel', algorithm=SubmodelAlgorithm.dfba)
+        self.rxn_1 = model.reactions.create(id='rxn_1', submodel=submodel, reversible=True,
+                                            flux_min=None, flux_max=None)
+        self.rxn_2 = model.reactions.create(id='rxn_2', submodel=submodel, reversible=False,
+                                            flux_min=float('nan'), flux_max=float('nan'))
+        self.rxn_3 = model.reactions.create(id='rxn_3', submodel=submodel, reversible=True,
+                                            flux_min=-1e3, flux_max=1e3)
+        self.rxn_4 = model.reactions.create(id='rxn_4', submodel=submodel, reversible=False,
+                                            flux_min=-1e1, flux_max=1e1)
+        self.config = {'dfba': {
+            'flux_min_bound_reversible': -2e2,
+            'flux_min_bound_irreversible': 0.,
+            'flux_max_bound': 1e2,
+        }}
+
+    def test_from_submodel(self):
+        bounds = DfbaFluxBounds.from_submodel(self.submodel)
+        self.assertEqual(bounds.reactions, [self.rxn_1, self.rxn_2, self.rxn_3, self.rxn_4])
+        numpy.testing.assert_array_equal(bounds.lower, [numpy.nan, numpy.nan, -1e3, -1e1])
+        numpy.testing.assert_array_equal(bounds.upper, [numpy.nan, numpy.nan, 1e3, 1e1])
+        numpy.testing.assert_array_equal(bounds.reversible, [True, False, True, False])
+
+        bounds = DfbaFluxBounds.from_submodel(self.submodel, reactions=[self.rxn_4, self.rxn_3])
+        numpy.testing.assert_array_equal(bounds.lower, [-1e1, -1e3])
+
+        with self.assertRaisesRegex(ValueError, 'must equal the number of reactions'):
+            DfbaFluxBounds([self.rxn_1], numpy.zeros(2), numpy.zeros(2), numpy.zeros(2, dtype=numpy.bool_))
+
+    def test_clip(self):
+        bounds = DfbaFluxBounds.from_submodel(self.submodel)
+        self.assertIs(bounds.clip(self.config), bounds)
+        numpy.testing.assert_array_equal(bounds.lower, [-2e2, 0., -2e2, 0.])
+        numpy.testing.assert_array_equal(bounds.upper, [1e2, 1e2, 1e2, 1e1])
+
+        self.assertEqual(bounds.get_bounds('rxn_4'), (0., 1e1))
+        self.assertEqual(bounds.get_reaction_index(), {'rxn_1': 0, 'rxn_2': 1, 'rxn_3': 2, 'rxn_4': 3})
+
+        # the reactions are not changed until the bounds are written
+        self.assertEqual(self.rxn_1.flux_min, None)
+        self.assertTrue(math.isnan(self.rxn_2.flux_min))
+
+    def test_write(self):
+        bounds = DfbaFluxBounds.from_submodel(self.submodel).clip(self.config)
+        bounds.write()
+        self.assertEqual([rxn.flux_min for rxn in self.submodel.reactions], [-2e2, 0., -2e2, 0.])
+        self.assertEqual([rxn.flux_max for rxn in self.submodel.reactions], [1e2, 1e2, 1e2, 1e1])
+        self.assertIsInstance(self.rxn_1.flux_min, float)
+        for rxn in self.submodel.reactions:
+            self.assertEqual(rxn.flux_bound_units, ReactionFluxBoundUnit['M s^-1'])
+
+
+class DfbaLinearProgramTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = mkdtemp()
+
+        self.model = model = Model()
+        comp = model.compartments.create(id='c')
+        st_a = model.species_types.create(id='a')
+        st_b = model.species_types.create(id='b')
+        self.spec_a = model.species.create(id='a[c]', species_type=st_a, compartment=comp)
+        self.spec_b = model.species.create(id='b[c]', species_type=st_b, compartment=comp)
+
+        self.submodel = submodel = model.submodels.create(id='submodel', algorithm=SubmodelAlgorithm.dfba)
+        self.ex_a = model.reactions.create(id='ex_a', submodel=submodel, reversible=True, flux_min=-10., flux_max=10.)
+        self.ex_a.participants.create(species=self.spec_a, coefficient=1.)
+        self.rxn = model.reactions.create(id='rxn', submodel=submodel, reversible=False, flux_min=None, flux_max=None)
+        self.rxn.participants.create(species=self.spec_a, coefficient=-2.)
+        self.rxn.participants.create(species=self.spec_b, coefficient=1.)
+
+        self.biomass = model.dfba_obj_reactions.create(id='biomass', submodel=submodel)
+        self.biomass.dfba_obj_species.create(species=self.spec_b, value=-1.)
+
+        objs = {
+            Reaction: {'ex_a': self.ex_a, 'rxn': self.rxn},
+            DfbaObjReaction: {'biomass': self.biomass},
+        }
+        expression, error = DfbaObjectiveExpression.deserialize('biomass + 0.5 * rxn', objs)
+        assert error is None, str(error)
+        model.dfba_objs.create(id='dfba-obj-submodel', submodel=submodel, expression=expression)
+
+    def tearDown(self):
+        rmtree(self.tempdir)
+
+    def test_from_submodel(self):
+        lp = DfbaLinearProgram.from_submodel(self.submodel)
+        self.assertEqual(lp.variables, [self.ex_a, self.rxn, self.biomass])
+        self.assertEqual(lp.constraints, [self.spec_a, self.spec_b])
+        numpy.testing.assert_array_equal(lp.stoichiometry.toarray(), [
+            [1., -2., 0.],
+            [0., 1., -1.],
+        ])
+        numpy.testing.assert_array_equal(lp.lower, [-10., -numpy.inf, 0.])
+        numpy.testing.assert_array_equal(lp.upper, [10., numpy.inf, numpy.inf])
+        numpy.testing.assert_array_equal(lp.objective, [0., 0.5, 1.])
+        self.assertEqual(lp.get_variable_names(), ['ex_a', 'rxn', 'biomass'])
+        self.assertEqual(lp.get_constraint_names(), ['a__c__', 'b__c__'])
+
+        bounds = DfbaFluxBounds.from_submodel(self.submodel).clip({'dfba': {
+            'flux_min_bound_reversible': -100.,
+            'flux_min_bound_irreversible': 0.,
+            'flux_max_bound': 100.,
+        }})
+        lp = DfbaLinearProgram.from_submodel(self.submodel, bounds=bounds)
+        numpy.testing.assert_array_equal(lp.lower, [-10., 0., 0.])
+        numpy.testing.assert_array_equal(lp.upper, [10., 100., numpy.inf])
+
+    def test_from_submodel_without_objective(self):
+        self.submodel.dfba_obj.submodel = None
+        lp = DfbaLinearProgram.from_submodel(self.submodel)
+        numpy.testing.assert_array_equal(lp.objective, [0., 0., 0.])
+
+    def test_from_submodel_with_invalid_objective(self):
+        other_rxn = Reaction(id='other')
+        objs = {Reaction: {'other': other_rxn}, DfbaObjReaction: {}}
+        self.submodel.dfba_obj.expression, error = DfbaObjectiveExpression.deserialize('other', objs)
+        with self.assertRaisesRegex(ValueError, 'must be a function of its reactions'):
+            DfbaLinearProgram.from_submodel(self.submodel)
+
+    def test_write_mps(self):
+        path = os.path.join(self.tempdir, 'submodel.mps')
+        DfbaLinearProgram.from_submodel(self.submodel).write(path)
+        with open(path, 'r') as file:
+            self.assertEqual(file.read(), '\n'.join([
+                'NAME submodel',
+                'ROWS',
+                ' N obj',
+                ' E a__c__',
+                ' E b__c__',
+                'COLUMNS',
+                ' ex_a a__c__ 1.0',
+                ' rxn obj -0.5',
+                ' rxn a__c__ -2.0',
+                ' rxn b__c__ 1.0',
+                ' biomass obj -1.0',
+                ' biomass b__c__ -1.0',
+                'RHS',
+                'BOUNDS',
+                ' LO bnd ex_a -10.0',
+                ' UP bnd ex_a 10.0',
+                ' FR bnd rxn',
+                ' LO bnd biomass 0.0',
+                'ENDATA',
+            ]) + '\n')
+
+    def test_write_lp(self):
+        path = os.path.join(self.tempdir, 'submodel.lp')
+        DfbaLinearProgram.from_submodel(self.submodel).write(path)
+        with open(path, 'r') as file:
+            self.assertEqual(file.read(), '\n'.join([
+                '\\ dFBA submodel submodel',
+                'Maximize',
+                ' obj: 0.5 rxn + 1.0 biomass',
+                'Subject To',
+                ' a__c__: 1.0 ex_a - 2.0 rxn = 0',
+                ' b__c__: 1.0 rxn - 1.0 biomass = 0',
+                'Bounds',
+                ' -10.0 <= ex_a <= 10.0',
+                ' rxn free',
+                ' 0.0 <= biomass <= +inf',
+                'End',
+            ]) + '\n')
+
+    def test_write_unsupported_format(self):
+        with self.assertRaisesRegex(ValueError, 'Unsupported format'):
+            DfbaLinearProgram.from_submodel(self.submodel).write(os.path.join(self.tempdir, 'submodel.txt'))
+
+    def test_format(self):
+        self.assertEqual(format_number(numpy.inf), '+inf')
+        self.assertEqual(format_number(-numpy.inf), '-inf')
+        self.assertEqual(format_number(2), '2.0')
+        self.assertEqual(format_lp_terms([], ['x']), '0 x')
+        self.assertEqual(format_lp_terms([], []), '0')
+        self.assertEqual(format_lp_terms([(-1., 'x'), (2., 'y'), (-3., 'z')], ['x', 'y', 'z']), '-1.0 x + 2.0 y - 3.0 z')
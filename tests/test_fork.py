@@ -0,0 +1,104 @@
+""" Tests of copy-on-write variants of models
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from os import path
+from shutil import rmtree
+from tempfile import mkdtemp
+from wc_lang import Model, Validator
+from wc_lang.fork import ModelFork
+from wc_lang.io import Writer, Reader
+import unittest
+
+
+class ModelForkTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = mkdtemp()
+
+        self.model = model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.1')
+        self.param_1 = model.parameters.create(id='param_1', value=1., units='dimensionless')
+        self.param_2 = model.parameters.create(id='param_2', value=2., units='dimensionless')
+
+    def tearDown(self):
+        rmtree(self.tempdir)
+
+    def test_set_get(self):
+        fork = ModelFork(self.model)
+        fork.set((('parameters', {'id': 'param_1'}), 'value'), 3.)
+        fork.set('name', 'fork')
+
+        self.assertEqual(fork.get((('parameters', {'id': 'param_1'}), 'value')), 3.)
+        self.assertEqual(fork.get((('parameters', {'id': 'param_2'}), 'value')), 2.)
+        self.assertEqual(fork.get('name'), 'fork')
+        self.assertEqual(self.param_1.value, 1.)
+        self.assertEqual(self.model.name, 'test model')
+        self.assertEqual(len(fork.get_changes()), 2)
+
+        with self.assertRaisesRegex(ValueError, 'does not refer to an object'):
+            fork.set((('parameters', {'id': 'param_3'}), 'value'), 3.)
+        with self.assertRaisesRegex(ValueError, 'does not refer to an attribute'):
+            fork.set((('parameters', {'id': 'param_1'}), 'unknown'), 3.)
+
+    def test_activate(self):
+        fork = ModelFork(self.model)
+        fork.set((('parameters', {'id': 'param_1'}), 'value'), 3.)
+
+        with fork as model:
+            self.assertIs(model, self.model)
+            self.assertTrue(fork.is_active())
+            self.assertEqual(self.param_1.value, 3.)
+            self.assertEqual(self.param_2.value, 2.)
+
+            with self.assertRaisesRegex(ValueError, 'cannot be modified'):
+                fork.set((('parameters', {'id': 'param_2'}), 'value'), 3.)
+
+            with self.assertRaisesRegex(ValueError, 'already active'):
+                ModelFork(self.model).activate()
+
+            self.assertEqual(Validator().run(model), None)
+
+            filename = path.join(self.tempdir, 'model.xlsx')
+            Writer().run(model, filename, set_repo_metadata_from_path=False)
+
+        self.assertFalse(fork.is_active())
+        self.assertEqual(self.param_1.value, 1.)
+        self.assertEqual(Reader().run(filename).parameters.get_one(id='param_1').value, 3.)
+
+        fork.deactivate()
+        self.assertEqual(self.param_1.value, 1.)
+
+    def test_fork(self):
+        fork_1 = ModelFork(self.model)
+        fork_1.set((('parameters', {'id': 'param_1'}), 'value'), 3.)
+        fork_1.set((('parameters', {'id': 'param_2'}), 'value'), 4.)
+
+        fork_2 = fork_1.fork()
+        fork_2.set((('parameters', {'id': 'param_2'}), 'value'), 5.)
+        self.assertEqual(fork_2.get((('parameters', {'id': 'param_1'}), 'value')), 3.)
+        self.assertEqual(len(fork_2.changes), 1)
+
+        with fork_2:
+            self.assertEqual(self.param_1.value, 3.)
+            self.assertEqual(self.param_2.value, 5.)
+        with fork_1:
+            self.assertEqual(self.param_1.value, 3.)
+            self.assertEqual(self.param_2.value, 4.)
+        self.assertEqual(self.param_1.value, 1.)
+        self.assertEqual(self.param_2.value, 2.)
+
+    def test_many_forks(self):
+        forks = []
+        for i_fork in range(1000):
+            fork = ModelFork(self.model)
+            fork.set((('parameters', {'id': 'param_1'}), 'value'), float(i_fork))
+            forks.append(fork)
+
+        for i_fork, fork in enumerate(forks):
+            with fork:
+                self.assertEqual(self.param_1.value, float(i_fork))
+        self.assertEqual(self.param_1.value, 1.)
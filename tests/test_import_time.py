@@ -0,0 +1,64 @@
+""" Tests that the heavyweight dependencies of wc_lang are imported on first use
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+import subprocess
+import sys
+import unittest
+
+
+@unittest.skipIf(sys.version_info < (3, 7), 'Requires Python >= 3.7')
+class ImportTimeTestCase(unittest.TestCase):
+    HEAVY_MODULES = ('libsbml', 'networkx', 'natsort', 'wc_lang.io', 'wc_lang.sbml', 'wc_lang.util')
+
+    @staticmethod
+    def get_import_times(code):
+        """ Get the cumulative time to import each module imported by a Python program
+
+        Args:
+            code (:obj:`str`): Python program
+
+        Returns:
+            :obj:`dict`: dictionary which maps the names of the imported modules to their
+                cumulative import times (us)
+        """
+        process = subprocess.Popen([sys.executable, '-X', 'importtime', '-c', code],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, err = process.communicate()
+        if process.returncode != 0:
+            raise Exception(err.decode())
+
+        times = {}
+        for line in err.decode().split('\n'):
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            times[name.strip()] = int(cumulative)
+        return times
+
+    def test_import_wc_lang(self):
+        times = self.get_import_times('import wc_lang')
+        self.assertIn('wc_lang.core', times)
+        for module in self.HEAVY_MODULES:
+            self.assertNotIn(module, times)
+
+    def test_import_cli(self):
+        times = self.get_import_times('import wc_lang.__main__')
+        self.assertIn('wc_lang.transform', times)
+        for module in self.HEAVY_MODULES:
+            self.assertNotIn(module, times)
+
+    def test_lazy_modules(self):
+        times = self.get_import_times('import wc_lang; wc_lang.io; wc_lang.sbml.util')
+        self.assertIn('wc_lang.io', times)
+        self.assertIn('libsbml', times)
+
+    def test_benchmark(self):
+        lazy_time = self.get_import_times('import wc_lang')['wc_lang']
+        eager_time = self.get_import_times('import wc_lang, wc_lang.io, wc_lang.sbml.io')
+        eager_time = sum(eager_time[module] for module in ['wc_lang', 'wc_lang.io', 'wc_lang.sbml'])
+        self.assertLess(lazy_time, eager_time)
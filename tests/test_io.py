@@ -22,12 +22,16 @@ from wc_lang import io
 from wc_lang.io import Writer, Reader, convert, create_template
 from wc_utils.util.chem import EmpiricalFormula
 from wc_utils.workbook.io import read as read_workbook, write as write_workbook
+import mock
 import obj_model.io
 import os
 import re
 import shutil
 import tempfile
+import tracemalloc
 import unittest
+import wc_lang
+import zipfile
 
 
 class TestCreateTemplate(unittest.TestCase):
@@ -254,6 +258,109 @@ class TestSimpleModel(unittest.TestCase):
         self.assertTrue(model.is_equal(self.model))
         self.assertEqual(self.model.difference(model), '')
 
+    def test_write_read_archive(self):
+        filename = os.path.join(self.dirname, 'model.zip')
+
+        Writer().run(self.model, filename, set_repo_metadata_from_path=False)
+        model = Reader().run(filename)
+        self.assertEqual(model.validate(), None)
+
+        self.assertTrue(model.is_equal(self.model))
+        self.assertEqual(self.model.difference(model), '')
+
+        archive = io.ModelArchive(filename)
+        manifest = archive.get_manifest()
+        self.assertEqual(manifest['version'], wc_lang.__version__)
+        self.assertIn('Model', archive.get_sheet_names())
+        self.assertEqual(archive.get_sheet_names(models=[SpeciesType]), ['Species types'])
+        self.assertIn('test model', archive.read_sheet('Model'))
+        with self.assertRaisesRegex(ValueError, 'does not contain sheet'):
+            archive.read_sheet('Undefined')
+
+        pattern = archive.extract(self.dirname, sheet_names=['Model'])
+        self.assertTrue(os.path.isfile(pattern.replace('*', 'Model')))
+        self.assertFalse(os.path.isfile(pattern.replace('*', 'Species types')))
+
+        # the archive is opened and its manifest is read once for all of the sheets
+        dirname = os.path.join(self.dirname, 'all-sheets')
+        with mock.patch.object(zipfile, 'ZipFile', wraps=zipfile.ZipFile) as zip_file:
+            with mock.patch.object(io.ModelArchive, '_read_manifest',
+                                   autospec=True, side_effect=io.ModelArchive._read_manifest) as read_manifest:
+                pattern = archive.extract(dirname)
+        self.assertEqual(zip_file.call_count, 1)
+        self.assertEqual(read_manifest.call_count, 1)
+        for sheet_name in archive.get_sheet_names():
+            self.assertTrue(os.path.isfile(pattern.replace('*', sheet_name)))
+        with self.assertRaisesRegex(ValueError, 'does not contain sheet'):
+            archive.extract(dirname, sheet_names=['Model', 'Undefined'])
+
+        filename_xls = os.path.join(self.dirname, 'model.xlsx')
+        convert(filename, filename_xls)
+        self.assertTrue(Reader().run(filename_xls).is_equal(self.model))
+
+    def test_profile(self):
+        filename = os.path.join(self.dirname, 'model.xlsx')
+
+        writer = Writer()
+        writer.run(self.model, filename, set_repo_metadata_from_path=False)
+        self.assertEqual(writer.stats, None)
+
+        writer.run(self.model, filename, set_repo_metadata_from_path=False, profile=True)
+        stats = writer.stats
+        self.assertIsInstance(stats, io.IoStats)
+        self.assertEqual(list(stats.phases.keys()), ['check', 'write'])
+        self.assertEqual(stats.sheets['Species types']['rows'], len(self.model.species_types))
+        self.assertGreater(stats.time, 0.)
+        self.assertGreater(stats.peak_memory, 0)
+        self.assertFalse(tracemalloc.is_tracing())
+
+        reader = Reader()
+        model = reader.run(filename, profile=True)
+        self.assertTrue(model.is_equal(self.model))
+        stats = reader.stats
+        self.assertEqual(list(stats.phases.keys()), ['read', 'implicit_relationships', 'validate'])
+        self.assertGreaterEqual(stats.phases['read']['time'], 0.)
+        self.assertIsInstance(stats.phases['read']['memory'], int)
+        self.assertEqual(stats.sheets['Model']['rows'], 1)
+        self.assertEqual(stats.sheets['Species types']['rows'], len(self.model.species_types))
+        self.assertIn('parse', stats.sheets['Species types']['phases'])
+        self.assertRegex(stats.get_summary(), r'^Total: \d+\.\d+ s, \d+\.\d MB\nread: ')
+        self.assertFalse(tracemalloc.is_tracing())
+
+        reader.run(filename)
+        self.assertEqual(reader.stats, None)
+
+        filename = os.path.join(self.dirname, 'model.zip')
+        writer.run(self.model, filename, set_repo_metadata_from_path=False, profile=True)
+        self.assertEqual(list(writer.stats.phases.keys()), ['check', 'write', 'pack'])
+        reader.run(filename, profile=True)
+        self.assertEqual(list(reader.stats.phases.keys()), ['extract', 'read', 'implicit_relationships', 'validate'])
+
+        read_stats, write_stats = convert(filename, os.path.join(self.dirname, 'model-2.xlsx'), profile=True)
+        self.assertIn('read', read_stats.phases)
+        self.assertIn('write', write_stats.phases)
+
+    def test_profile_without_tracing_memory(self):
+        stats = io.IoStats(trace_memory=False)
+        with stats:
+            with stats.phase('read'):
+                pass
+            with stats.phase('parse', sheet='Species types'):
+                pass
+            stats.count_rows(self.model.species_types)
+        self.assertEqual(stats.peak_memory, None)
+        self.assertEqual(stats.phases['read']['memory'], None)
+        self.assertEqual(stats.sheets['Species types']['rows'], len(self.model.species_types))
+        self.assertRegex(stats.get_summary(), r'\n  Species types: \d+ rows; parse \d+\.\d+ s$')
+
+    def test_read_archive_without_manifest(self):
+        filename = os.path.join(self.dirname, 'model.zip')
+        with zipfile.ZipFile(filename, 'w') as archive:
+            archive.writestr('Model.tsv', '')
+
+        with self.assertRaisesRegex(ValueError, 'does not have a manifest'):
+            Reader().run(filename)
+
     def test_write_with_repo_md(self):
         _, filename = tempfile.mkstemp(suffix='.xlsx', dir='.')
 
@@ -11,13 +11,16 @@ from obj_model import Validator
 from os import path
 from shutil import rmtree
 from tempfile import mkdtemp
-from wc_lang import __main__
+from wc_lang import __main__, transform
 from wc_lang import Model, Parameter
 from wc_lang.io import Writer, Reader
 import datetime
+import json
 import mock
+import os
 import unittest
 import wc_lang
+import wc_lang.config.core
 
 
 class TestCli(unittest.TestCase):
@@ -52,6 +55,19 @@ class TestCli(unittest.TestCase):
                 app.run()
             self.assertEqual(capturer.get_text(), 'Model is valid')
 
+    def test_validate_profile(self):
+        model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.1')
+        filename = path.join(self.tempdir, 'model.xlsx')
+        Writer().run(model, filename, set_repo_metadata_from_path=False)
+
+        with CaptureOutput(relay=False) as capturer:
+            with __main__.App(argv=['validate', filename, '--profile']) as app:
+                app.run()
+            text = capturer.get_text()
+        self.assertRegex(text, r'^Model is valid\nRead:\n  Total: ')
+        self.assertIn('\n  validate: ', text)
+        self.assertIn('\n    Model: 1 rows', text)
+
     def test_validate_exception(self):
         model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.1')
         model.parameters.append(Parameter(id='param_1', value=1., units='dimensionless'))
@@ -103,17 +119,93 @@ class TestCli(unittest.TestCase):
             diff = 'Sheet Model:\n  Row 7:\n    Cell B: 0.0.0 != 0.0.1'
             self.assertEqual(capturer.get_text(), diff)
 
+        with CaptureOutput() as capturer:
+            with __main__.App(argv=['difference', filename1, filename2, '--structural']) as app:
+                app.run()
+            self.assertEqual(capturer.get_text(), 'Models are identical')
+
+        with CaptureOutput() as capturer:
+            with __main__.App(argv=['difference', filename1, filename3, '--structural']) as app:
+                app.run()
+            diff = 'Changed:\n  Model: "model"\n    `wc_lang_version`: 0.0.0 != 0.0.1'
+            self.assertEqual(capturer.get_text(), diff)
+
+        with CaptureOutput() as capturer:
+            with __main__.App(argv=['difference', filename1, filename3, '--json']) as app:
+                app.run()
+            diff = json.loads(capturer.get_text())
+            self.assertEqual(diff, {
+                'added': [],
+                'removed': [],
+                'changed': [{'type': 'Model', 'id': 'model', 'attributes': {'wc_lang_version': ['0.0.0', '0.0.1']}}],
+            })
+
+    def test_merge(self):
+        base = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.0')
+        base.parameters.create(id='param_1', value=1., units='dimensionless')
+        filename_base = path.join(self.tempdir, 'base.xlsx')
+        Writer().run(base, filename_base, set_repo_metadata_from_path=False)
+
+        ours = base.copy()
+        ours.parameters.get_one(id='param_1').value = 2.
+        filename_ours = path.join(self.tempdir, 'ours.xlsx')
+        Writer().run(ours, filename_ours, set_repo_metadata_from_path=False)
+
+        theirs = base.copy()
+        theirs.parameters.create(id='param_2', value=3., units='dimensionless')
+        filename_theirs = path.join(self.tempdir, 'theirs.xlsx')
+        Writer().run(theirs, filename_theirs, set_repo_metadata_from_path=False)
+
+        filename_dest = path.join(self.tempdir, 'merged.xlsx')
+        with CaptureOutput() as capturer:
+            with __main__.App(argv=['merge', filename_base, filename_ours, filename_theirs, filename_dest]) as app:
+                app.run()
+            self.assertEqual(capturer.get_text(), 'Models merged')
+
+        merged = Reader().run(filename_dest)
+        self.assertEqual(merged.parameters.get_one(id='param_1').value, 2.)
+        self.assertEqual(merged.parameters.get_one(id='param_2').value, 3.)
+
+        # conflicts
+        theirs.parameters.get_one(id='param_1').value = 4.
+        Writer().run(theirs, filename_theirs, set_repo_metadata_from_path=False)
+        with self.assertRaisesRegex(SystemExit, '1 conflict\\(s\\):\n  Parameter "param_1": `value`'):
+            with __main__.App(argv=['merge', filename_base, filename_ours, filename_theirs, filename_dest]) as app:
+                app.run()
+
     def test_transform(self):
         source = path.join(self.tempdir, 'source.xlsx')
         model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.0')
         Writer().run(model, source, set_repo_metadata_from_path=False)
 
         dest = path.join(self.tempdir, 'dest.xlsx')
-        with __main__.App(argv=['transform', source, dest, '--transform', 'MergeAlgorithmicallyLikeSubmodels']) as app:
-            app.run()
+        with mock.patch.object(transform.TransformPipeline, 'run', side_effect=transform.TransformPipeline.run,
+                               autospec=True) as mock_run:
+            with CaptureOutput(relay=False) as capturer:
+                with __main__.App(argv=['transform', source, dest,
+                                        '--transform', 'MergeAlgorithmicallyLikeSubmodels']) as app:
+                    app.run()
+                self.assertRegex(capturer.get_text(), r'MergeAlgorithmicallyLikeSubmodels: (run|skipped) in ')
+        self.assertEqual(mock_run.call_count, 1)
+
+        self.assertTrue(path.isfile(dest))
+
+        with CaptureOutput(relay=False) as capturer:
+            with __main__.App(argv=['transform', source, dest,
+                                    '--transform', 'MergeAlgorithmicallyLikeSubmodels',
+                                    '--transform', 'SplitReversibleReactions']) as app:
+                app.run()
+            self.assertRegex(capturer.get_text(), r'MergeAlgorithmicallyLikeSubmodels: run in .*\n'
+                                                  r'SplitReversibleReactions: skipped in ')
 
         self.assertTrue(path.isfile(dest))
 
+        with __main__.App(argv=['transform', source, dest,
+                                '--transform', 'SplitReversibleReactions',
+                                '--workers', '2']) as app:
+            app.run()
+        self.assertTrue(Reader().run(dest).is_equal(model))
+
     def test_transform_exception(self):
         source = path.join(self.tempdir, 'source.xlsx')
         model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.0')
@@ -157,6 +249,38 @@ class TestCli(unittest.TestCase):
 
         self.assertTrue(path.isfile(path.join(self.tempdir, 'model-Model.csv')))
 
+    def test_convert_profile(self):
+        filename_xls = path.join(self.tempdir, 'model.xlsx')
+        filename_csv = path.join(self.tempdir, 'model-*.csv')
+
+        model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.0')
+        Writer().run(model, filename_xls, set_repo_metadata_from_path=False)
+
+        with CaptureOutput(relay=False) as capturer:
+            with __main__.App(argv=['convert', filename_xls, filename_csv, '--profile']) as app:
+                app.run()
+            text = capturer.get_text()
+        self.assertRegex(text, r'^Read:\n  Total: ')
+        self.assertIn('\nWrite:\n  Total: ', text)
+        self.assertTrue(path.isfile(path.join(self.tempdir, 'model-Model.csv')))
+
+    def test_export_lp(self):
+        source = path.join(path.dirname(__file__), 'fixtures', 'test_model.xlsx')
+        dest = path.join(self.tempdir, 'submodel_1.lp')
+
+        with __main__.App(argv=['export-lp', source, 'submodel_1', dest]) as app:
+            app.run()
+        with open(dest, 'r') as file:
+            self.assertRegex(file.read(), r'^\\ dFBA submodel submodel_1\nMaximize\n')
+
+        with self.assertRaisesRegex(SystemExit, 'does not have a dFBA submodel with id "unknown"'):
+            with __main__.App(argv=['export-lp', source, 'unknown', dest]) as app:
+                app.run()
+
+        with self.assertRaisesRegex(SystemExit, 'Unsupported format'):
+            with __main__.App(argv=['export-lp', source, 'submodel_1', path.join(self.tempdir, 'submodel_1.txt')]) as app:
+                app.run()
+
     def test_create_template(self):
         filename = path.join(self.tempdir, 'template.xlsx')
 
@@ -178,6 +302,118 @@ class TestCli(unittest.TestCase):
         model = Reader().run(filename)
         self.assertEqual(model.wc_lang_version, wc_lang.__version__)
 
+    def test_batch_convert(self):
+        filenames = [path.join(self.tempdir, 'model-{}.xlsx'.format(i)) for i in range(3)]
+        for i, filename in enumerate(filenames):
+            model = Model(id='model_{}'.format(i), name='test model', version='0.0.1a', wc_lang_version='0.0.0')
+            Writer().run(model, filename, set_repo_metadata_from_path=False)
+
+        dest_dir = path.join(self.tempdir, 'converted')
+        os.mkdir(dest_dir)
+
+        with CaptureOutput(relay=False) as capturer:
+            with __main__.App(argv=['batch-convert', path.join(self.tempdir, 'model-*.xlsx'),
+                                    '--format', 'zip', '--dest-dir', dest_dir, '--workers', '2']) as app:
+                app.run()
+            self.assertRegex(capturer.get_text(), r'Processed 3 model\(s\) with 2 worker\(s\) in .*: 3 succeeded, 0 failed')
+
+        for i in range(3):
+            model = Reader().run(path.join(dest_dir, 'model-{}.zip'.format(i)))
+            self.assertEqual(model.id, 'model_{}'.format(i))
+
+    def test_batch_convert_error(self):
+        filename = path.join(self.tempdir, 'model.xlsx')
+        model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.0')
+        Writer().run(model, filename, set_repo_metadata_from_path=False)
+
+        with CaptureOutput(relay=False) as capturer:
+            with self.assertRaisesRegex(SystemExit, 'could not be processed'):
+                with __main__.App(argv=['batch-convert', filename, path.join(self.tempdir, 'missing.xlsx'),
+                                        '--format', '.tsv', '--workers', '1']) as app:
+                    app.run()
+            self.assertRegex(capturer.get_text(), '1 succeeded, 1 failed')
+
+        self.assertTrue(path.isfile(path.join(self.tempdir, 'model-Model.tsv')))
+
+    def test_batch_normalize(self):
+        filenames = [path.join(self.tempdir, 'model-{}.xlsx'.format(i)) for i in range(2)]
+        models = []
+        for i, filename in enumerate(filenames):
+            model = Model(id='model_{}'.format(i), name='test model', version='0.0.1a', wc_lang_version='0.0.0')
+            Writer().run(model, filename, set_repo_metadata_from_path=False)
+            models.append(model)
+
+        with CaptureOutput(relay=False):
+            with __main__.App(argv=['batch-normalize'] + filenames) as app:
+                app.run()
+
+        for filename, model in zip(filenames, models):
+            self.assertTrue(Reader().run(filename).is_equal(model))
+
+    def test_batch_setup_in_parent(self):
+        filenames = [path.join(self.tempdir, 'model-{}.xlsx'.format(i)) for i in range(2)]
+        for i, filename in enumerate(filenames):
+            model = Model(id='model_{}'.format(i), name='test model', version='0.0.1a', wc_lang_version='0.0.0')
+            Writer().run(model, filename, set_repo_metadata_from_path=False)
+
+        calls = []
+        with mock.patch('wc_lang.config.core.get_config', side_effect=wc_lang.config.core.get_config) as get_config:
+            orig_pool = __main__.multiprocessing.Pool
+
+            def pool(*args, **kwargs):
+                calls.append(get_config.call_count)
+                return orig_pool(*args, **kwargs)
+
+            with mock.patch.object(__main__.multiprocessing, 'Pool', side_effect=pool):
+                with CaptureOutput(relay=False):
+                    __main__.run_batch(__main__.normalize, [(filename,) for filename in filenames], workers=2)
+        self.assertEqual(len(calls), 1)
+        self.assertGreaterEqual(calls[0], 1)
+
+    def test_batch_update_version_metadata(self):
+        filenames = [path.join(self.tempdir, 'model-{}.xlsx'.format(i)) for i in range(2)]
+        for i, filename in enumerate(filenames):
+            model = Model(id='model_{}'.format(i), name='test model', version='0.0.1a', wc_lang_version='0.0.0')
+            Writer().run(model, filename, set_repo_metadata_from_path=False)
+
+        with CaptureOutput(relay=False):
+            with __main__.App(argv=['batch-update-version-metadata', path.join(self.tempdir, '*.xlsx'),
+                                    '--ignore-repo-metadata', '--workers', '2']) as app:
+                app.run()
+
+        for filename in filenames:
+            self.assertEqual(Reader().run(filename).wc_lang_version, wc_lang.__version__)
+
+    def test_expand_paths(self):
+        for filename in ['model-1.xlsx', 'model-2.xlsx', 'model-Model.tsv', 'model-Taxon.tsv']:
+            open(path.join(self.tempdir, filename), 'w').close()
+
+        self.assertEqual(__main__.expand_paths([path.join(self.tempdir, 'model-*.xlsx'),
+                                                path.join(self.tempdir, 'model-1.xlsx'),
+                                                path.join(self.tempdir, 'model-*.tsv'),
+                                                path.join(self.tempdir, 'missing-*.xlsx')]),
+                         [path.join(self.tempdir, 'model-1.xlsx'),
+                          path.join(self.tempdir, 'model-2.xlsx'),
+                          path.join(self.tempdir, 'model-*.tsv'),
+                          path.join(self.tempdir, 'missing-*.xlsx')])
+
+    def test_batch_convert_tsv(self):
+        filename = path.join(self.tempdir, 'model-*.tsv')
+        model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.0')
+        Writer().run(model, filename, set_repo_metadata_from_path=False)
+
+        with CaptureOutput(relay=False) as capturer:
+            with __main__.App(argv=['batch-convert', filename, '--format', '.xlsx', '--workers', '1']) as app:
+                app.run()
+            self.assertRegex(capturer.get_text(), r'Processed 1 model\(s\) with 1 worker\(s\) in .*: 1 succeeded')
+
+        self.assertTrue(Reader().run(path.join(self.tempdir, 'model.xlsx')).is_equal(model))
+
+    def test_get_converted_path(self):
+        self.assertEqual(__main__.get_converted_path('/a/model.xlsx', '.zip'), '/a/model.zip')
+        self.assertEqual(__main__.get_converted_path('/a/model.xlsx', '.csv', dest_dir='/b'), '/b/model-*.csv')
+        self.assertEqual(__main__.get_converted_path('/a/model-*.tsv', '.xlsx'), '/a/model.xlsx')
+
     def test_raw_cli(self):
         with mock.patch('sys.argv', ['wc_lang', '--help']):
             with self.assertRaises(SystemExit) as context:
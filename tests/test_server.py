@@ -0,0 +1,231 @@
+""" Tests of the long-running server
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from capturer import CaptureOutput
+from os import path
+from shutil import rmtree
+from tempfile import mkdtemp
+from wc_lang import __main__
+from wc_lang import Model, Parameter
+from wc_lang.io import Writer, Reader
+from wc_lang.server import Server, send_request
+import io
+import json
+import mock
+import os
+import threading
+import time
+import unittest
+
+
+class ServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = mkdtemp()
+
+        self.filename = path.join(self.tempdir, 'model.xlsx')
+        self.model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.1')
+        Writer().run(self.model, self.filename, set_repo_metadata_from_path=False)
+
+        self.invalid_filename = path.join(self.tempdir, 'invalid-model.xlsx')
+        invalid_model = Model(id='model', name='test model', version='0.0.1a', wc_lang_version='0.0.1')
+        invalid_model.parameters.append(Parameter(id='param_1', value=1., units='dimensionless'))
+        invalid_model.parameters.append(Parameter(id='param_1', value=1., units='dimensionless'))
+        Writer().run(invalid_model, self.invalid_filename, set_repo_metadata_from_path=False)
+
+        self.server = Server(workers=2)
+
+    def tearDown(self):
+        self.server.close()
+        rmtree(self.tempdir)
+
+    def test_read_model(self):
+        with mock.patch.object(Reader, 'run', side_effect=Reader.run, autospec=True) as mock_run:
+            model = self.server.read_model(self.filename)
+            self.assertTrue(model.is_equal(self.model))
+            self.assertIs(self.server.read_model(self.filename), model)
+            self.assertEqual(mock_run.call_count, 1)
+
+            # re-read modified files
+            os.utime(self.filename, (time.time() + 10, time.time() + 10))
+            self.assertIsNot(self.server.read_model(self.filename), model)
+            self.assertEqual(mock_run.call_count, 2)
+
+            self.server.clear_cache()
+            self.server.read_model(self.filename)
+            self.assertEqual(mock_run.call_count, 3)
+
+        with self.assertRaises(ValueError):
+            self.server.read_model(self.invalid_filename)
+
+    def test_read_model_rewritten_with_same_mtime(self):
+        self.server.read_model(self.filename)
+        stat = os.stat(self.filename)
+
+        changed_model = Model(id='model', name='changed test model', version='0.0.1a', wc_lang_version='0.0.1')
+        Writer().run(changed_model, self.filename, set_repo_metadata_from_path=False)
+        os.utime(self.filename, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertNotEqual(os.stat(self.filename).st_size, stat.st_size)
+
+        self.assertTrue(self.server.read_model(self.filename).is_equal(changed_model))
+
+    def test_read_model_from_tsv_glob(self):
+        filename = path.join(self.tempdir, 'model-*.tsv')
+        Writer().run(self.model, filename, set_repo_metadata_from_path=False)
+
+        with mock.patch.object(Reader, 'run', side_effect=Reader.run, autospec=True) as mock_run:
+            model = self.server.read_model(filename)
+            self.assertTrue(model.is_equal(self.model))
+            self.assertIs(self.server.read_model(filename), model)
+            self.assertEqual(mock_run.call_count, 1)
+
+            # re-read when any file is modified
+            member = path.join(self.tempdir, 'model-Model.tsv')
+            os.utime(member, (time.time() + 10, time.time() + 10))
+            self.assertIsNot(self.server.read_model(filename), model)
+            self.assertEqual(mock_run.call_count, 2)
+
+        self.assertEqual(self.server.handle({'command': 'validate', 'path': filename}),
+                         {'status': 'ok', 'result': {'valid': True}})
+
+        with self.assertRaisesRegex(ValueError, 'No files match'):
+            self.server.read_model(path.join(self.tempdir, 'missing-*.tsv'))
+
+    def test_read_model_evicts_least_recently_used(self):
+        server = Server(workers=1, cache_size=2)
+        filenames = []
+        for i_model in range(3):
+            filenames.append(path.join(self.tempdir, 'model-{}.xlsx'.format(i_model)))
+            Writer().run(self.model, filenames[-1], set_repo_metadata_from_path=False)
+
+        with mock.patch.object(Reader, 'run', side_effect=Reader.run, autospec=True) as mock_run:
+            model_0 = server.read_model(filenames[0])
+            server.read_model(filenames[1])
+            self.assertIs(server.read_model(filenames[0]), model_0)
+            server.read_model(filenames[2])
+            self.assertEqual(mock_run.call_count, 3)
+            self.assertEqual(list(server._cache.keys()), [path.abspath(filenames[0]), path.abspath(filenames[2])])
+
+            self.assertIs(server.read_model(filenames[0]), model_0)
+            server.read_model(filenames[1])
+            self.assertEqual(mock_run.call_count, 4)
+        server.close()
+
+    def test_read_model_concurrently(self):
+        def read(reader, path):
+            time.sleep(0.2)
+            return Reader.run(reader, path)
+
+        models = []
+        with mock.patch.object(Reader, 'run', side_effect=read, autospec=True) as mock_run:
+            threads = [threading.Thread(target=lambda: models.append(self.server.read_model(self.filename)))
+                       for i_thread in range(3)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(len(models), 3)
+        self.assertIs(models[1], models[0])
+        self.assertIs(models[2], models[0])
+
+    def test_validate(self):
+        self.assertEqual(self.server.handle({'id': 1, 'command': 'validate', 'path': self.filename}),
+                         {'id': 1, 'status': 'ok', 'result': {'valid': True}})
+
+        response = self.server.handle({'id': 2, 'command': 'validate', 'path': self.invalid_filename})
+        self.assertEqual(response['status'], 'error')
+        self.assertRegex(response['error'], '^Model is invalid: ')
+
+    def test_transform(self):
+        dest = path.join(self.tempdir, 'transformed.xlsx')
+        response = self.server.handle({'command': 'transform', 'source': self.filename, 'dest': dest,
+                                       'transforms': ['MergeAlgorithmicallyLikeSubmodels']})
+        self.assertEqual(response, {'status': 'ok', 'result': {'dest': dest}})
+        self.assertTrue(Reader().run(dest).is_equal(self.model))
+
+        response = self.server.handle({'command': 'transform', 'source': self.filename, 'dest': dest,
+                                       'transforms': []})
+        self.assertEqual(response, {'status': 'error', 'error': 'Please select at least one transform'})
+
+        response = self.server.handle({'command': 'transform', 'source': self.filename, 'dest': dest,
+                                       'transforms': ['UnknownTransform']})
+        self.assertEqual(response, {'status': 'error', 'error': 'Transform "UnknownTransform" is not supported'})
+
+    def test_difference(self):
+        response = self.server.handle({'command': 'difference', 'path_1': self.filename, 'path_2': self.filename})
+        self.assertEqual(response, {'status': 'ok', 'result': {'difference': ''}})
+
+    def test_convert(self):
+        dest = path.join(self.tempdir, 'model.zip')
+        with mock.patch.object(Reader, 'run', side_effect=Reader.run, autospec=True) as mock_run:
+            for i_request in range(2):
+                response = self.server.handle({'command': 'convert', 'source': self.filename, 'dest': dest})
+                self.assertEqual(response, {'status': 'ok', 'result': {'dest': dest}})
+            self.assertEqual(mock_run.call_count, 1)
+        self.assertTrue(Reader().run(dest).is_equal(self.model))
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.server.handle({'id': 1})['status'], 'error')
+        self.assertEqual(self.server.handle({'command': 'unknown'})['status'], 'error')
+        self.assertEqual(self.server.handle({'command': 'validate'})['status'], 'error')
+        self.assertRegex(json.loads(self.server.handle_line('{'))['error'], '^Request is not valid JSON')
+
+    def test_serve_stream(self):
+        requests = [
+            {'id': 1, 'command': 'validate', 'path': self.filename},
+            {'id': 2, 'command': 'validate', 'path': self.invalid_filename},
+            {'id': 3, 'command': 'difference', 'path_1': self.filename, 'path_2': self.filename},
+            {'id': 4, 'command': 'shutdown'},
+            {'id': 5, 'command': 'validate', 'path': self.filename},
+        ]
+        in_file = io.StringIO('\n'.join(json.dumps(request) for request in requests) + '\n')
+        out_file = io.StringIO()
+        self.server.serve_stream(in_file, out_file)
+
+        responses = [json.loads(line) for line in out_file.getvalue().strip().split('\n')]
+        responses = {response['id']: response for response in responses}
+        self.assertEqual(sorted(responses.keys()), [1, 2, 3, 4])
+        self.assertEqual(responses[1]['status'], 'ok')
+        self.assertEqual(responses[2]['status'], 'error')
+        self.assertEqual(responses[3]['status'], 'ok')
+        self.assertEqual(responses[4]['status'], 'ok')
+
+    def test_serve_stream_parses_each_request_once(self):
+        in_file = io.StringIO('{\n' + json.dumps({'id': 1, 'command': 'shutdown'}) + '\n')
+        out_file = io.StringIO()
+        with mock.patch('wc_lang.server.json.loads', side_effect=json.loads) as mock_loads:
+            self.server.serve_stream(in_file, out_file)
+        self.assertEqual(mock_loads.call_count, 2)
+
+        responses = [json.loads(line) for line in out_file.getvalue().strip().split('\n')]
+        self.assertEqual(sorted(response['status'] for response in responses), ['error', 'ok'])
+
+    def test_serve_socket(self):
+        socket_path = path.join(self.tempdir, 'wc_lang.sock')
+        thread = threading.Thread(target=self.server.serve_socket, args=(socket_path,))
+        thread.start()
+        while not path.exists(socket_path):
+            time.sleep(0.01)
+
+        response = send_request(socket_path, {'id': 1, 'command': 'validate', 'path': self.filename})
+        self.assertEqual(response, {'id': 1, 'status': 'ok', 'result': {'valid': True}})
+
+        response = send_request(socket_path, {'id': 2, 'command': 'shutdown'})
+        self.assertEqual(response, {'id': 2, 'status': 'ok', 'result': {}})
+
+        thread.join()
+        self.assertFalse(path.exists(socket_path))
+
+    def test_cli(self):
+        request = json.dumps({'id': 1, 'command': 'validate', 'path': self.filename}) + '\n'
+        with mock.patch('sys.stdin', io.StringIO(request)):
+            with CaptureOutput(relay=False) as capturer:
+                with __main__.App(argv=['serve', '--workers', '1']) as app:
+                    app.run()
+                self.assertEqual(json.loads(capturer.get_text()), {'id': 1, 'status': 'ok', 'result': {'valid': True}})
@@ -0,0 +1,109 @@
+""" Tests of the generator of synthetic models
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from shutil import rmtree
+from tempfile import mkdtemp
+from wc_lang import Model, SubmodelAlgorithm, RateLawDirection, Validator
+from wc_lang.io import Reader
+from wc_lang.synthetic import SyntheticModelGenerator
+import collections
+import os
+import unittest
+
+
+class SyntheticModelGeneratorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.tempdir)
+
+    def test_run(self):
+        model = SyntheticModelGenerator(seed=0).run()
+        self.assertIsInstance(model, Model)
+        self.assertEqual(Validator().run(model, get_related=True), None)
+
+        self.assertEqual(len(model.compartments), 2)
+        self.assertEqual(len(model.species_types), 30)
+        self.assertEqual(len(model.species), 60)
+        self.assertEqual(len(model.distribution_init_concentrations), 60)
+        self.assertEqual(len(model.observables), 5)
+        self.assertEqual(len(model.functions), 5)
+        self.assertEqual(len(model.evidences), 5)
+        self.assertEqual(sorted(submodel.id for submodel in model.submodels), ['dfba_0', 'ode_0', 'ssa_0'])
+        self.assertEqual(len(model.reactions), 60)
+
+        for submodel in model.submodels:
+            if submodel.algorithm == SubmodelAlgorithm.dfba:
+                self.assertNotEqual(submodel.dfba_obj, None)
+                self.assertEqual(submodel.get_rate_laws(), [])
+            else:
+                for rxn in submodel.reactions:
+                    self.assertNotEqual(rxn.rate_laws.get_one(direction=RateLawDirection.forward), None)
+                    self.assertEqual(rxn.rate_laws.get_one(direction=RateLawDirection.backward) is not None,
+                                     rxn.reversible)
+
+    def test_reactions_are_balanced(self):
+        model = SyntheticModelGenerator(n_compartments=3, n_species_types=20, n_reactions=50, seed=1).run()
+        for rxn in model.reactions:
+            elements = collections.defaultdict(float)
+            charge = 0.
+            for part in rxn.participants:
+                for element, count in part.species.species_type.empirical_formula.items():
+                    elements[element] += part.coefficient * count
+                charge += part.coefficient * part.species.species_type.charge
+            self.assertEqual({element: count for element, count in elements.items() if count}, {})
+            self.assertEqual(charge, 0.)
+
+    def test_function_depth(self):
+        model = SyntheticModelGenerator(n_functions=7, function_depth=3, seed=0).run()
+        depths = {}
+        for func in model.functions:
+            depths[func.id] = max([depths[other.id] + 1 for other in func.expression.functions] or [1])
+        self.assertEqual(max(depths.values()), 3)
+        self.assertEqual(sorted(depths.values()), [1, 1, 1, 2, 2, 3, 3])
+
+    def test_seed(self):
+        model = SyntheticModelGenerator(seed=2).run()
+        model_2 = SyntheticModelGenerator(seed=2).run()
+        model_2.created = model.created
+        model_2.updated = model.updated
+        self.assertTrue(model_2.is_equal(model))
+
+        model_3 = SyntheticModelGenerator(seed=3).run()
+        model_3.created = model.created
+        model_3.updated = model.updated
+        self.assertFalse(model_3.is_equal(model))
+
+    def test_sizes(self):
+        model = SyntheticModelGenerator(n_submodels={SubmodelAlgorithm.ssa: 3}, n_compartments=1,
+                                        n_species_types=10, n_reactions=4, n_observables=0, n_functions=0,
+                                        n_parameters=0, n_evidence=0, seed=0).run()
+        self.assertEqual(Validator().run(model, get_related=True), None)
+        self.assertEqual(sorted(submodel.id for submodel in model.submodels), ['ssa_0', 'ssa_1', 'ssa_2'])
+        self.assertEqual(len(model.reactions), 12)
+        self.assertEqual(len(model.species), 10)
+        self.assertEqual(len(model.functions), 0)
+
+    def test_write(self):
+        path = os.path.join(self.tempdir, 'model.xlsx')
+        model = SyntheticModelGenerator(n_species_types=9, n_reactions=5, seed=0).run(path=path)
+        self.assertTrue(os.path.isfile(path))
+        self.assertTrue(Reader().run(path).is_equal(model))
+
+    def test_invalid_options(self):
+        with self.assertRaisesRegex(ValueError, 'At least one compartment'):
+            SyntheticModelGenerator(n_compartments=0)
+        with self.assertRaisesRegex(ValueError, 'are required to generate reactions'):
+            SyntheticModelGenerator(n_compartments=1, n_species_types=2)
+        with self.assertRaisesRegex(ValueError, 'required to generate observables'):
+            SyntheticModelGenerator(n_submodels={}, n_species_types=0)
+        with self.assertRaisesRegex(ValueError, 'required to generate functions'):
+            SyntheticModelGenerator(n_observables=0)
+        with self.assertRaisesRegex(ValueError, 'depth of the functions'):
+            SyntheticModelGenerator(function_depth=0)
@@ -18,7 +18,12 @@ from wc_lang.core import (Model, Taxon, Environment, Submodel, SubmodelAlgorithm
                           Evidence,
                           Reference, ReferenceType, DatabaseReference,
                           )
-from wc_lang import util
+from wc_lang import util, Validator
+from wc_lang.io import Reader, Writer
+from wc_lang.synthetic import SyntheticModelGenerator
+from wc_lang.transform import SplitReversibleReactionsTransform, TransformPipeline
+import json
+import os
 import shutil
 import tempfile
 import unittest
@@ -139,6 +144,125 @@ class TestUtil(unittest.TestCase):
         self.assertEqual(set(util.get_models()), non_inline_models | inline_models)
         self.assertEqual(set(util.get_models(inline=False)), non_inline_models)
 
+    def test_get_model_difference(self):
+        model = self.model
+        self.assertEqual(util.get_model_difference(model, model.copy()), {'added': [], 'removed': [], 'changed': []})
+        self.assertEqual(util.format_model_difference(util.get_model_difference(model, model.copy())), '')
+
+        model_2 = model.copy()
+        model_2.parameters.get_one(id='param_0').value = 3.
+        model_2.species_types.get_one(id='spec_type_0').name = 'new name'
+        model_2.parameters.create(id='param_new')
+        model_2.references.get_one(id='ref_2').model = None
+        model_2.parameters.get_one(id='param_2').references = []
+
+        diff = util.get_model_difference(model, model_2)
+        self.assertEqual(diff['added'], [{'type': 'Parameter', 'id': 'param_new'}])
+        self.assertEqual(diff['removed'], [{'type': 'Reference', 'id': 'ref_2'}])
+        changed = {(obj['type'], obj['id']): obj['attributes'] for obj in diff['changed']}
+        self.assertEqual(list(changed[('Parameter', 'param_0')].keys()), ['value'])
+        self.assertEqual(changed[('SpeciesType', 'spec_type_0')], {'name': ['species type 0', 'new name']})
+        self.assertEqual(changed[('Parameter', 'param_2')], {'references': [['ref_2'], []]})
+        self.assertNotIn(('Parameter', 'param_1'), changed)
+
+        text = util.format_model_difference(diff)
+        self.assertIn('Added:\n  Parameter: "param_new"', text)
+        self.assertIn('Removed:\n  Reference: "ref_2"', text)
+        self.assertIn('  SpeciesType: "spec_type_0"\n    `name`: species type 0 != new name', text)
+
+    def test_get_object_content(self):
+        content = util.get_object_content(self.rxn_0)
+        self.assertEqual(content['id'], 'rxn_0')
+        self.assertEqual(content['submodel'], 'submdl_0')
+        self.assertEqual(content['participants'], sorted(part.serialize() for part in self.rxn_0.participants))
+
+        param = Parameter(id='param')
+        self.assertEqual(util.get_object_content(param)['value'], 'NaN')
+
+    def test_merge_models(self):
+        base = self.model
+        base.id = 'model'
+
+        ours = base.copy()
+        ours.parameters.get_one(id='param_0').name = 'ours'
+        ours.parameters.get_one(id='param_1').name = 'ours'
+        ours.parameters.create(id='param_ours')
+        ours.species_types.get_one(id='spec_type_0').name = 'same change'
+
+        theirs = base.copy()
+        theirs.parameters.get_one(id='param_0').units = 's'
+        theirs.parameters.get_one(id='param_2').name = 'theirs'
+        new_param = theirs.parameters.create(id='param_theirs', value=5.)
+        new_param.references.append(theirs.references.get_one(id='ref_0'))
+        theirs.species_types.get_one(id='spec_type_0').name = 'same change'
+        theirs.submodels.get_one(id='submdl_1').name = 'theirs'
+        theirs.reactions.get_one(id='rxn_1').submodel = theirs.submodels.get_one(id='submdl_0')
+        theirs_evidence = theirs.evidences.create(id='evidence_theirs')
+
+        conflicts = util.merge_models(base, ours, theirs)
+        self.assertEqual(conflicts, [])
+
+        self.assertEqual(ours.parameters.get_one(id='param_0').name, 'ours')
+        self.assertEqual(ours.parameters.get_one(id='param_0').units, 's')
+        self.assertEqual(ours.parameters.get_one(id='param_1').name, 'ours')
+        self.assertEqual(ours.parameters.get_one(id='param_2').name, 'theirs')
+        self.assertNotEqual(ours.parameters.get_one(id='param_ours'), None)
+        self.assertEqual(ours.species_types.get_one(id='spec_type_0').name, 'same change')
+        self.assertEqual(ours.submodels.get_one(id='submdl_1').name, 'theirs')
+        self.assertEqual(ours.reactions.get_one(id='rxn_1').submodel, ours.submodels.get_one(id='submdl_0'))
+
+        param = ours.parameters.get_one(id='param_theirs')
+        self.assertEqual(param.value, 5.)
+        self.assertEqual(param.references, [ours.references.get_one(id='ref_0')])
+        self.assertIsNot(param, new_param)
+        self.assertNotEqual(ours.evidences.get_one(id='evidence_theirs'), None)
+        self.assertIsNot(ours.evidences.get_one(id='evidence_theirs'), theirs_evidence)
+
+        self.assertEqual(util.get_model_difference(ours, ours.copy()), {'added': [], 'removed': [], 'changed': []})
+
+    def test_merge_models_removals(self):
+        base = self.model
+        base.id = 'model'
+
+        ours = base.copy()
+        theirs = base.copy()
+        param = theirs.parameters.get_one(id='param_0')
+        param.model = None
+        param.references = []
+
+        conflicts = util.merge_models(base, ours, theirs)
+        self.assertEqual(conflicts, [])
+        self.assertEqual(ours.parameters.get_one(id='param_0'), None)
+        self.assertEqual(ours.references.get_one(id='ref_0').parameters, [])
+
+    def test_merge_models_conflicts(self):
+        base = self.model
+        base.id = 'model'
+
+        ours = base.copy()
+        ours.parameters.get_one(id='param_0').name = 'ours'
+        ours.parameters.get_one(id='param_1').name = 'ours'
+        ours.parameters.create(id='param_new', name='ours')
+
+        theirs = base.copy()
+        theirs.parameters.get_one(id='param_0').name = 'theirs'
+        param = theirs.parameters.get_one(id='param_1')
+        param.model = None
+        param.references = []
+        theirs.parameters.create(id='param_new', name='theirs')
+
+        conflicts = util.merge_models(base, ours, theirs)
+        conflicts = {(conflict['id'], conflict['attribute']): conflict for conflict in conflicts}
+        self.assertEqual(set(conflicts.keys()), set([('param_0', 'name'), ('param_1', None), ('param_new', 'name')]))
+        self.assertEqual(conflicts[('param_0', 'name')], {
+            'type': 'Parameter', 'id': 'param_0', 'attribute': 'name', 'base': '', 'ours': 'ours', 'theirs': 'theirs'})
+        self.assertEqual(conflicts[('param_1', None)]['theirs'], None)
+        self.assertEqual(conflicts[('param_new', 'name')]['base'], None)
+
+        self.assertEqual(ours.parameters.get_one(id='param_0').name, 'ours')
+        self.assertNotEqual(ours.parameters.get_one(id='param_1'), None)
+        self.assertEqual(ours.parameters.get_one(id='param_new').name, 'ours')
+
     def test_set_git_repo_metadata_from_path(self):
         model = Model()
         self.assertEqual(model.url, '')
@@ -161,3 +285,121 @@ class TestUtil(unittest.TestCase):
         self.assertEqual(model.url, '')
 
         shutil.rmtree(tempdir)
+
+
+class MetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.registry = util.MetricsRegistry()
+        self.sink = util.MemoryMetricsSink(buckets=[0.5, 1.])
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        for sink in list(util.metrics.sinks):
+            util.metrics.remove_sink(sink)
+
+    def test_sink_is_abstract(self):
+        with self.assertRaises(TypeError):
+            util.MetricsSink()
+
+    def test_registry_without_sinks(self):
+        self.assertFalse(self.registry.enabled)
+        with self.registry.timer('time_seconds') as timer:
+            pass
+        self.assertNotIsInstance(timer, util.MetricsTimer)
+        self.registry.increment('count_total')
+        self.registry.observe('size', 1.)
+
+    def test_registry(self):
+        self.registry.add_sink(self.sink)
+        self.assertTrue(self.registry.enabled)
+
+        self.registry.increment('count_total', labels={'class': 'Species'})
+        self.registry.increment('count_total', 2, labels={'class': 'Species'})
+        self.registry.increment('count_total', labels={'class': 'Reaction'})
+        self.registry.count_cache_lookup('index', True)
+        self.registry.count_cache_lookup('index', False)
+        self.registry.count_cache_lookup('index', False)
+        self.registry.observe('size', 0.25)
+        self.registry.observe('size', 2.)
+        self.registry.record_time('time_seconds', 0.75)
+        with self.registry.timer('time_seconds') as timer:
+            pass
+        self.assertIsInstance(timer, util.MetricsTimer)
+
+        self.assertEqual(self.sink.counters[('count_total', (('class', 'Species'),))], 3)
+        self.assertEqual(self.sink.counters[('count_total', (('class', 'Reaction'),))], 1)
+        self.assertEqual(self.sink.counters[('wc_lang_cache_lookups_total',
+                                             (('cache', 'index'), ('result', 'miss')))], 2)
+        size = self.sink.histograms[('size', ())]
+        self.assertEqual(size, {'count': 2, 'sum': 2.25, 'min': 0.25, 'max': 2., 'buckets': [1, 1]})
+        self.assertEqual(self.sink.timers[('time_seconds', ())]['count'], 2)
+        self.assertEqual(self.sink.timers[('time_seconds', ())]['buckets'], [1, 2])
+
+        self.registry.remove_sink(self.sink)
+        self.assertFalse(self.registry.enabled)
+        self.registry.increment('count_total', labels={'class': 'Species'})
+        self.assertEqual(self.sink.counters[('count_total', (('class', 'Species'),))], 3)
+
+    def test_memory_sink_formats(self):
+        self.sink.record('counter', 'count_total', 1, {'class': 'Spe"cies'})
+        self.sink.record('counter', 'other_total', 2, {})
+        self.sink.record('counter', 'count_total', 4, {'class': 'Reaction'})
+        self.sink.record('histogram', 'size', 0.75, {})
+
+        self.assertEqual(self.sink.to_prometheus(), '\n'.join([
+            '# TYPE count_total counter',
+            'count_total{class="Spe\\"cies"} 1',
+            'count_total{class="Reaction"} 4',
+            '# TYPE other_total counter',
+            'other_total 2',
+            '# TYPE size histogram',
+            'size_bucket{le="0.5"} 0',
+            'size_bucket{le="1.0"} 1',
+            'size_bucket{le="+Inf"} 1',
+            'size_sum 0.75',
+            'size_count 1',
+        ]) + '\n')
+
+        dump = json.loads(self.sink.to_json())
+        self.assertEqual(dump['counters'][0], {'name': 'count_total', 'labels': {'class': 'Spe"cies'}, 'value': 1})
+        self.assertEqual(dump['timers'], [])
+        self.assertEqual(dump['histograms'][0]['buckets'], [{'le': 0.5, 'count': 0}, {'le': 1., 'count': 1}])
+
+        path = os.path.join(self.tempdir, 'metrics.json')
+        self.sink.dump(path)
+        with open(path, 'r') as file:
+            self.assertEqual(json.load(file), dump)
+
+        path = os.path.join(self.tempdir, 'metrics.prom')
+        self.sink.dump(path)
+        with open(path, 'r') as file:
+            self.assertEqual(file.read(), self.sink.to_prometheus())
+
+        with self.assertRaisesRegex(ValueError, 'Unsupported metrics format'):
+            self.sink.dump(path, format='xml')
+        with self.assertRaisesRegex(ValueError, 'Unsupported metric type'):
+            self.sink.record('gauge', 'size', 1., {})
+
+        self.sink.clear()
+        self.assertEqual(self.sink.to_prometheus(), '')
+
+    def test_instrumentation(self):
+        model = SyntheticModelGenerator(n_species_types=9, n_reactions=5, seed=0).run()
+        path = os.path.join(self.tempdir, 'model.xlsx')
+
+        util.metrics.add_sink(self.sink)
+        Writer().run(model, path, set_repo_metadata_from_path=False)
+        model = Reader().run(path)
+        Validator().run(model)
+        TransformPipeline([SplitReversibleReactionsTransform]).run(model)
+
+        counters = self.sink.counters
+        self.assertEqual(counters[('wc_lang_io_objects_written_total', (('class', 'Reaction'),))], 15)
+        self.assertEqual(counters[('wc_lang_io_objects_read_total', (('class', 'Species'),))], len(model.species))
+        self.assertEqual(self.sink.timers[('wc_lang_io_read_seconds', ())]['count'], 1)
+        self.assertEqual(self.sink.timers[('wc_lang_io_write_seconds', ())]['count'], 1)
+        self.assertEqual(self.sink.timers[('wc_lang_validation_seconds', ())]['count'], 2)
+        self.assertEqual([dict(labels)['transform'] for name, labels in self.sink.timers.keys()
+                          if name == 'wc_lang_transform_seconds'],
+                         [SplitReversibleReactionsTransform.Meta.id])
@@ -8,7 +8,8 @@
 
 from wc_lang import (Model, Compartment, DistributionInitConcentration, Function, FunctionExpression, Parameter,
                      Reaction, RateLawDirection, RateLaw, RateLawExpression, ReactionFluxBoundUnit, Species)
-from wc_lang.transform import ChangeValueTransform
+from wc_lang.transform import ChangeValueTransform, ChangeValuesTransform
+import mock
 import unittest
 
 
@@ -234,3 +235,84 @@ class ChangeValueTransformTestCase(unittest.TestCase):
 
         self.assertNotEqual(t1, 1.)
         self.assertNotEqual(1., t1)
+
+
+class ChangeValuesTransformTestCase(unittest.TestCase):
+    def setUp(self):
+        self.model = model = Model()
+        self.p_1 = model.parameters.create(id='p_1', value=1, units='M')
+        self.p_2 = model.parameters.create(id='p_2', value=2, units='M')
+        self.c = model.compartments.create(id='c', mean_init_volume=1.)
+
+    def test_run(self):
+        transform = ChangeValuesTransform.from_pairs([
+            ((('parameters', {'id': 'p_1'}), 'value'), 3),
+            ((('parameters', {'id': 'p_2'}), 'units'), 'L'),
+            ((('compartments', {'id': 'c'}), 'mean_init_volume'), 2.),
+            ('name', 'changed'),
+        ])
+        transform.run(self.model)
+
+        self.assertEqual(self.p_1.value, 3)
+        self.assertEqual(self.p_2.value, 2)
+        self.assertEqual(self.p_2.units, 'L')
+        self.assertEqual(self.c.mean_init_volume, 2.)
+        self.assertEqual(self.model.name, 'changed')
+
+    def test_resolve(self):
+        transform = ChangeValuesTransform([
+            (('parameters', {'id': 'p_1'}), 'value'),
+            (('parameters', {'id': 'p_2'}), 'value'),
+        ])
+        handles = transform.resolve(self.model)
+        self.assertEqual(len(handles), 2)
+        self.assertEqual(handles.get_values(), [1, 2])
+
+        for i in range(10):
+            handles.apply([i, 2 * i])
+            self.assertEqual(self.p_1.value, i)
+            self.assertEqual(self.p_2.value, 2 * i)
+
+        with self.assertRaisesRegex(ValueError, 'must be equal to the number of attributes'):
+            handles.apply([1])
+
+        transform.attr_paths.append((('parameters', {'id': 'p_3'}), 'value'))
+        with self.assertRaisesRegex(ValueError, 'does not refer to an object of the model'):
+            transform.resolve(self.model)
+
+    def test_resolve_with_index(self):
+        for i in range(3, 10):
+            self.model.parameters.create(id='p_{}'.format(i), value=i, units='M')
+        transform = ChangeValuesTransform([(('parameters', {'id': 'p_{}'.format(i)}), 'value') for i in range(1, 10)])
+
+        with mock.patch.object(type(self.model.parameters), 'get_one', side_effect=Exception('Not indexed')):
+            handles = transform.resolve(self.model)
+        self.assertEqual(handles.get_values(), list(range(1, 10)))
+
+        # multiple matching objects
+        self.model.parameters.create(id='p_1', value=11, units='M')
+        with self.assertRaises(ValueError):
+            transform.resolve(self.model)
+
+        # no matching objects
+        transform.attr_paths.append((('parameters', {'id': 'p_10'}), 'value'))
+        self.model.parameters.get_one(value=11).id = 'p_11'
+        with self.assertRaisesRegex(ValueError, 'does not refer to an object of the model'):
+            transform.resolve(self.model)
+
+        # filters that can't be indexed
+        transform = ChangeValuesTransform([(('parameters', {'id': ['p_1']}), 'value')])
+        with self.assertRaisesRegex(ValueError, 'does not refer to an object of the model'):
+            transform.resolve(self.model)
+
+    def test_attr_paths_to_from_str(self):
+        t1 = ChangeValuesTransform([[['parameters', {'id': 'p_1'}], 'value'], 'name'], [3., 'changed'])
+        t2 = ChangeValuesTransform(ChangeValuesTransform.attr_paths_from_str(t1.attr_paths_to_str()), [3., 'changed'])
+        self.assertEqual(t1, t2)
+        self.assertEqual(t1.attr_paths_to_str().split('\n')[0],
+                         ChangeValueTransform([['parameters', {'id': 'p_1'}], 'value']).attr_path_to_str())
+        self.assertEqual(ChangeValuesTransform.attr_paths_from_str(ChangeValuesTransform().attr_paths_to_str()), [])
+
+        t2.values[0] = 4.
+        self.assertNotEqual(t1, t2)
+        self.assertNotEqual(t1, 1.)
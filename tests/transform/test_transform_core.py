@@ -6,8 +6,15 @@
 :License: MIT
 """
 
-from wc_lang.transform import get_transforms, MergeAlgorithmicallyLikeSubmodelsTransform
+from wc_lang import (Model, SubmodelAlgorithm, Reaction, DfbaObjReaction, DfbaObjectiveExpression)
+from wc_lang.transform import (get_transforms, SubmodelTransform, UndoLog, ChangeValueTransform,
+                               MergeAlgorithmicallyLikeSubmodelsTransform,
+                               SplitReversibleReactionsTransform)
+import obj_model
+import os
+import threading
 import unittest
+import wc_lang.io
 
 
 class TransformCoreTestCase(unittest.TestCase):
@@ -17,3 +24,136 @@ class TransformCoreTestCase(unittest.TestCase):
         transforms = get_transforms()
         self.assertEqual(transforms[MergeAlgorithmicallyLikeSubmodelsTransform.Meta.id],
                          MergeAlgorithmicallyLikeSubmodelsTransform)
+        self.assertNotIn(SubmodelTransform, transforms.values())
+
+
+class UndoLogTestCase(unittest.TestCase):
+    """ Test rolling back transforms """
+
+    def test_rollback_split_reversible_reactions(self):
+        model = Model(id='model', version='0.0.1', wc_lang_version='0.0.1')
+        submodel = model.submodels.create(id='submodel', algorithm=SubmodelAlgorithm.ssa)
+        comp = model.compartments.create(id='c')
+        st_1 = model.species_types.create(id='st_1')
+        st_2 = model.species_types.create(id='st_2')
+        spec_1 = model.species.create(id='st_1[c]', species_type=st_1, compartment=comp)
+        spec_2 = model.species.create(id='st_2[c]', species_type=st_2, compartment=comp)
+        rxn = model.reactions.create(id='rxn', submodel=submodel, reversible=True)
+        rxn.participants.create(species=spec_1, coefficient=-1.)
+        rxn.participants.create(species=spec_2, coefficient=1.)
+        original = model.copy()
+
+        undo_log = SplitReversibleReactionsTransform().run_with_undo_log(model)
+        self.assertEqual(set(r.id for r in model.reactions), set(['rxn_forward', 'rxn_backward']))
+        self.assertGreater(len(undo_log), 0)
+
+        undo_log.rollback()
+        self.assertEqual(len(undo_log), 0)
+        self.assertEqual(model.reactions, [rxn])
+        self.assertEqual(submodel.reactions, [rxn])
+        self.assertEqual(rxn.model, model)
+        self.assertTrue(model.is_equal(original))
+
+    def test_rollback_merge_submodels(self):
+        filename = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'example-model.xlsx')
+        model = wc_lang.io.Reader().run(filename)
+        original = model.copy()
+
+        undo_log = MergeAlgorithmicallyLikeSubmodelsTransform().run_with_undo_log(model)
+        undo_log.rollback()
+        self.assertTrue(model.is_equal(original))
+
+    def test_rollback_merge_submodels_with_related_objects(self):
+        model = Model(id='model', version='0.0.1', wc_lang_version='0.0.1')
+        comp = model.compartments.create(id='c')
+        st = model.species_types.create(id='st')
+        spec = model.species.create(id='st[c]', species_type=st, compartment=comp)
+        submodels = []
+        dfba_objs = []
+        for i in range(2):
+            submodel = model.submodels.create(id='submodel_{}'.format(i), name='submodel {}'.format(i),
+                                              algorithm=SubmodelAlgorithm.dFBA)
+            rxn = model.reactions.create(id='rxn_{}'.format(i), submodel=submodel)
+            rxn.participants.create(species=spec, coefficient=1.)
+            dfba_obj_rxn = model.dfba_obj_reactions.create(id='dfba_obj_rxn_{}'.format(i), submodel=submodel)
+            expression, error = DfbaObjectiveExpression.deserialize('rxn_{0} + dfba_obj_rxn_{0}'.format(i), {
+                Reaction: {rxn.id: rxn},
+                DfbaObjReaction: {dfba_obj_rxn.id: dfba_obj_rxn},
+            })
+            self.assertEqual(error, None)
+            dfba_obj = model.dfba_objs.create(id='dfba_obj_{}'.format(i), submodel=submodel, expression=expression)
+            model.evidences.create(id='evidence_{}'.format(i), submodels=[submodel], dfba_objs=[dfba_obj])
+            model.references.create(id='ref_{}'.format(i), submodels=[submodel], dfba_objs=[dfba_obj])
+            submodel.db_refs.create(id='xref_{}'.format(i), dfba_objs=[dfba_obj])
+            submodels.append(submodel)
+            dfba_objs.append(dfba_obj)
+        model.evidences.create(id='evidence_shared', submodels=submodels)
+        original = model.copy()
+
+        undo_log = MergeAlgorithmicallyLikeSubmodelsTransform().run_with_undo_log(model)
+        self.assertEqual(len(model.submodels), 1)
+        self.assertEqual(submodels[0].evidence, [])
+        self.assertEqual(dfba_objs[0].expression.reactions, [])
+
+        undo_log.rollback()
+        self.assertEqual(model.submodels, submodels)
+        for i, (submodel, dfba_obj) in enumerate(zip(submodels, dfba_objs)):
+            self.assertEqual(set(evidence.id for evidence in submodel.evidence),
+                             set(['evidence_{}'.format(i), 'evidence_shared']))
+            self.assertEqual([ref.id for ref in submodel.references], ['ref_{}'.format(i)])
+            self.assertEqual([db_ref.id for db_ref in submodel.db_refs], ['xref_{}'.format(i)])
+            self.assertEqual(submodel.dfba_obj, dfba_obj)
+            self.assertEqual([evidence.id for evidence in dfba_obj.evidence], ['evidence_{}'.format(i)])
+            self.assertEqual([ref.id for ref in dfba_obj.references], ['ref_{}'.format(i)])
+            self.assertEqual([rxn.id for rxn in dfba_obj.expression.reactions], ['rxn_{}'.format(i)])
+        self.assertTrue(model.is_equal(original))
+
+    def test_recording_is_thread_local(self):
+        orig_setattr = obj_model.Model.__setattr__
+        model = Model(id='model', name='original')
+        param = model.parameters.create(id='param', value=1.)
+
+        def change_in_other_thread():
+            param.value = 2.
+            model.parameters.create(id='other_param')
+        thread = threading.Thread(target=change_in_other_thread)
+
+        with UndoLog() as undo_log:
+            self.assertIsNot(obj_model.Model.__setattr__, orig_setattr)
+            model.name = 'changed'
+            thread.start()
+            thread.join()
+
+        self.assertIs(obj_model.Model.__setattr__, orig_setattr)
+        self.assertEqual(undo_log.created, [])
+        self.assertEqual([change[0:2] for change in undo_log.changes], [(model, 'name')])
+
+        undo_log.rollback()
+        self.assertEqual(model.name, 'original')
+        self.assertEqual(param.value, 2.)
+        self.assertEqual(set(p.id for p in model.parameters), set(['param', 'other_param']))
+
+    def test_recording(self):
+        model = Model(id='model', name='original')
+        param = model.parameters.create(id='param', value=1.)
+
+        with UndoLog() as undo_log:
+            ChangeValueTransform('name', 'changed').run(model)
+            ChangeValueTransform('name', 'changed again').run(model)
+            param.value = 2.
+            new_param = model.parameters.create(id='new_param')
+
+        self.assertEqual(undo_log.created, [new_param])
+        self.assertEqual([(obj, attr_name, value) for obj, attr_name, value in undo_log.changes
+                          if attr_name in ['name', 'value']],
+                         [(model, 'name', 'original'), (param, 'value', 1.)])
+
+        # recording stopped
+        param.value = 3.
+        self.assertEqual(len([change for change in undo_log.changes if change[1] == 'value']), 1)
+
+        undo_log.rollback()
+        self.assertEqual(model.name, 'original')
+        self.assertEqual(param.value, 1.)
+        self.assertEqual(model.parameters, [param])
+        self.assertEqual(new_param.model, None)
@@ -0,0 +1,218 @@
+""" Tests of running sequences of transforms with shared indexes of a model
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from wc_lang import Model, SubmodelAlgorithm
+from wc_lang.transform import (Transform, TransformContext, TransformPipeline, SubmodelTransformExecutor,
+                               CreateImplicitDfbaExchangeReactionsTransform,
+                               CreateImplicitDistributionZeroInitConcentrationsTransform,
+                               PrepareForWcSimTransform,
+                               SetFiniteDfbaFluxBoundsTransform,
+                               SplitReversibleReactionsTransform)
+import mock
+import os
+import unittest
+import wc_lang.io
+
+
+class TransformContextTestCase(unittest.TestCase):
+    def setUp(self):
+        self.model = model = Model()
+        self.comp_c = model.compartments.create(id='c')
+        self.comp_e = model.compartments.create(id='e')
+        st = model.species_types.create(id='st')
+        self.spec_c = model.species.create(id='st[c]', species_type=st, compartment=self.comp_c)
+        self.spec_e = model.species.create(id='st[e]', species_type=st, compartment=self.comp_e)
+        self.submodel = model.submodels.create(id='submodel', algorithm=SubmodelAlgorithm.ssa)
+        self.rxn = model.reactions.create(id='rxn', submodel=self.submodel)
+        self.rxn.participants.create(species=self.spec_c, coefficient=-1.)
+        self.rxn.participants.create(species=self.spec_e, coefficient=1.)
+
+    def test(self):
+        context = TransformContext(self.model)
+        self.assertEqual(context.get_extracellular_compartment(), self.comp_e)
+        self.assertEqual(set(context.get_species()), set([self.spec_c, self.spec_e]))
+        self.assertEqual(set(context.get_submodel_species(self.submodel)), set([self.spec_c, self.spec_e]))
+        self.assertEqual(context.get_submodel_reactions(self.submodel), [self.rxn])
+
+        # cached
+        with mock.patch.object(Model, 'get_species', side_effect=Exception('Not cached')):
+            context.get_species()
+        rxn_2 = self.model.reactions.create(id='rxn_2', submodel=self.submodel)
+        self.assertEqual(context.get_submodel_reactions(self.submodel), [self.rxn])
+
+        # invalidated
+        context.invalidate('submodel_reactions')
+        self.assertEqual(context.get_submodel_reactions(self.submodel), [self.rxn, rxn_2])
+
+        self.model.compartments.remove(self.comp_e)
+        self.assertEqual(context.get_extracellular_compartment(), self.comp_e)
+        context.invalidate()
+        self.assertEqual(context.get_extracellular_compartment(), None)
+
+    def test_get_species_coefficient_pool(self):
+        context = TransformContext(self.model)
+        pool = context.get_species_coefficient_pool()
+        self.assertIs(pool, self.model.get_species_coefficient_pool())
+        self.assertIs(pool.get(self.spec_c, -1.), self.rxn.participants[0])
+
+
+class TransformPipelineTestCase(unittest.TestCase):
+    def test_run(self):
+        model = Model()
+        submodel = model.submodels.create(id='submodel', algorithm=SubmodelAlgorithm.ssa)
+        comp = model.compartments.create(id='c')
+        st = model.species_types.create(id='st')
+        spec = model.species.create(id='st[c]', species_type=st, compartment=comp)
+        rxn = model.reactions.create(id='rxn', submodel=submodel, reversible=True)
+        rxn.participants.create(species=spec, coefficient=-1.)
+
+        pipeline = TransformPipeline([
+            CreateImplicitDistributionZeroInitConcentrationsTransform,
+            SplitReversibleReactionsTransform(),
+        ])
+        self.assertIsInstance(pipeline.transforms[0], CreateImplicitDistributionZeroInitConcentrationsTransform)
+
+        pipeline.run(model)
+        self.assertNotEqual(spec.distribution_init_concentration, None)
+        self.assertEqual(set(r.id for r in model.reactions), set(['rxn_forward', 'rxn_backward']))
+
+        self.assertEqual([stats['id'] for stats in pipeline.stats], [
+            'CreateImplicitDistributionZeroInitConcentrations', 'SplitReversibleReactions'])
+        self.assertEqual([stats['status'] for stats in pipeline.stats], ['run', 'run'])
+        self.assertEqual(pipeline.stats[0]['counts'], {
+            'submodels': 1, 'species': 1, 'distribution_init_concentrations': 1, 'reactions': 1})
+        self.assertEqual(pipeline.stats[1]['counts']['reactions'], 2)
+        self.assertRegex(pipeline.get_stats_summary(),
+                         r'^CreateImplicitDistributionZeroInitConcentrations: run in \d+\.\d+ s '
+                         r'\(1 submodels, 1 species, 1 distribution init concentrations, 1 reactions\)\n')
+
+        # preconditions already met
+        pipeline.run(model)
+        self.assertEqual([stats['status'] for stats in pipeline.stats], ['skipped', 'skipped'])
+
+    def test_transform_without_context(self):
+        class TestTransform(Transform):
+            class Meta(object):
+                id = 'Test'
+                label = 'Test'
+
+            def run(self, model):
+                model.name = 'transformed'
+                return model
+
+        model = Model()
+        context = TransformContext(model)
+        context.get_species()
+        pipeline = TransformPipeline([TestTransform])
+        pipeline.run(model, context=context)
+        self.assertEqual(model.name, 'transformed')
+        self.assertEqual(pipeline.stats[0]['status'], 'run')
+        self.assertEqual(context._cache, {})
+
+    def test_prep_for_wc_sim(self):
+        filename = os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'example-model.xlsx')
+        model = wc_lang.io.Reader().run(filename)
+
+        transform = PrepareForWcSimTransform()
+        transform.run(model)
+        self.assertEqual(len(transform._pipeline.stats), 4)
+
+        # the transform is idempotent
+        n_reactions = len(model.reactions)
+        transform.run(model)
+        self.assertEqual([stats['status'] for stats in transform._pipeline.stats], ['skipped'] * 4)
+        self.assertEqual(len(model.reactions), n_reactions)
+
+
+class SubmodelTransformExecutorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.model = model = Model()
+        comp_c = model.compartments.create(id='c')
+        comp_e = model.compartments.create(id='e')
+        species = []
+        for i_species in range(4):
+            st = model.species_types.create(id='st_{}'.format(i_species))
+            species.append(model.species.create(id='st_{}[c]'.format(i_species), species_type=st, compartment=comp_c))
+            species.append(model.species.create(id='st_{}[e]'.format(i_species), species_type=st, compartment=comp_e))
+
+        for i_submodel in range(6):
+            if i_submodel % 3 == 0:
+                algorithm = SubmodelAlgorithm.dfba
+            else:
+                algorithm = SubmodelAlgorithm.ssa
+            submodel = model.submodels.create(id='submodel_{}'.format(i_submodel), algorithm=algorithm)
+            for i_rxn in range(10):
+                rxn = model.reactions.create(id='rxn_{}_{}'.format(i_submodel, i_rxn), submodel=submodel,
+                                             reversible=i_rxn % 2 == 0, flux_max=1000. * i_rxn)
+                rxn.participants.create(species=species[(i_submodel + i_rxn) % len(species)], coefficient=-1.)
+                rxn.participants.create(species=species[(i_submodel + i_rxn + 1) % len(species)], coefficient=1.)
+
+    def test_run(self):
+        for transform in [SplitReversibleReactionsTransform(),
+                          CreateImplicitDfbaExchangeReactionsTransform(),
+                          SetFiniteDfbaFluxBoundsTransform()]:
+            model = self.model.copy()
+            transform.run(model)
+
+            model_2 = self.model.copy()
+            SubmodelTransformExecutor(workers=3).run(transform, model_2)
+
+            self.assertTrue(model_2.is_equal(model))
+            self.assertEqual([rxn.id for rxn in model_2.reactions], [rxn.id for rxn in model.reactions])
+            for submodel, submodel_2 in zip(model.submodels, model_2.submodels):
+                self.assertEqual([rxn.id for rxn in submodel_2.reactions], [rxn.id for rxn in submodel.reactions])
+
+    def test_run_in_parent(self):
+        model = self.model.copy()
+        SplitReversibleReactionsTransform().run(model)
+
+        model_2 = self.model.copy()
+        with mock.patch('multiprocessing.get_all_start_methods', return_value=['spawn']):
+            SubmodelTransformExecutor(workers=3).run(SplitReversibleReactionsTransform(), model_2)
+        self.assertTrue(model_2.is_equal(model))
+
+    def test_pipeline(self):
+        transforms = [CreateImplicitDfbaExchangeReactionsTransform,
+                      SetFiniteDfbaFluxBoundsTransform,
+                      SplitReversibleReactionsTransform]
+
+        model = self.model.copy()
+        TransformPipeline(transforms).run(model)
+
+        model_2 = self.model.copy()
+        pipeline = TransformPipeline(transforms, workers=2)
+        pipeline.run(model_2)
+        self.assertEqual([stats['status'] for stats in pipeline.stats], ['run'] * 3)
+        self.assertTrue(model_2.is_equal(model))
+        self.assertEqual([rxn.id for rxn in model_2.reactions], [rxn.id for rxn in model.reactions])
+
+    def test_pipeline_computes_edits_once(self):
+        dfba_submodels = [submodel for submodel in self.model.submodels if submodel.algorithm == SubmodelAlgorithm.dfba]
+        for transform in [CreateImplicitDfbaExchangeReactionsTransform, SetFiniteDfbaFluxBoundsTransform]:
+            for workers in [1, 2]:
+                model = self.model.copy()
+                with mock.patch.object(transform, 'get_submodel_edits', autospec=True,
+                                       side_effect=transform.get_submodel_edits) as get_submodel_edits:
+                    pipeline = TransformPipeline([transform], workers=workers)
+                    pipeline.run(model)
+                self.assertEqual(pipeline.stats[0]['status'], 'run')
+                self.assertEqual(get_submodel_edits.call_count, len(dfba_submodels))
+
+    def test_cached_edits_invalidated(self):
+        transform = CreateImplicitDfbaExchangeReactionsTransform()
+        context = TransformContext(self.model)
+        self.assertTrue(transform.is_applicable(self.model, context))
+        self.assertIsNotNone(context._cache['submodel_edits'][transform])
+
+        context.invalidate('submodel_reactions')
+        self.assertEqual(context.pop_submodel_edits(transform), None)
+
+        self.assertTrue(transform.is_applicable(self.model, context))
+        transform.run_with_context(self.model, context)
+        self.assertEqual(context.pop_submodel_edits(transform), None)
+        self.assertFalse(transform.is_applicable(self.model, context))
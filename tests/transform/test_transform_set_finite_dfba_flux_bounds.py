@@ -9,6 +9,7 @@
 
 from test.support import EnvironmentVarGuard
 from wc_lang import Model, SubmodelAlgorithm, ReactionFluxBoundUnit
+from wc_lang.dfba import DfbaFluxBounds
 from wc_lang.transform.set_finite_dfba_flux_bounds import SetFiniteDfbaFluxBoundsTransform
 import mock
 import unittest
@@ -41,7 +42,10 @@ class SetFiniteDfbaFluxBoundsTransformTestCase(unittest.TestCase):
         env.set('CONFIG__DOT__wc_lang__DOT__dfba__DOT__flux_min_bound_irreversible', '0.')
         env.set('CONFIG__DOT__wc_lang__DOT__dfba__DOT__flux_max_bound', '1e2')
         with env:
-            transform.run(model)
+            with mock.patch.object(DfbaFluxBounds, 'write', side_effect=DfbaFluxBounds.write,
+                                   autospec=True) as mock_write:
+                transform.run(model)
+        self.assertEqual(mock_write.call_count, 1)
 
         self.assertEqual(rxn_1.flux_min, -2e2)
         self.assertEqual(rxn_1.flux_max, 1e2)
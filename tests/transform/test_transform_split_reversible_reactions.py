@@ -11,6 +11,8 @@ from wc_lang import (Model, Submodel, Reaction, Parameter, SpeciesType, SpeciesT
                      Species, Compartment, SpeciesCoefficient, RateLawDirection, RateLawExpression, SubmodelAlgorithm)
 from wc_lang.transform import SplitReversibleReactionsTransform
 from obj_model import RelatedAttribute
+import os
+import time
 import unittest
 
 
@@ -110,3 +112,113 @@ class SplitReversibleReactionsTransformTestCase(unittest.TestCase):
             if isinstance(attr, RelatedAttribute):
                 val = getattr(r0, attr_name)
                 self.assertTrue(val is None or (isinstance(val, list) and len(val) == 0))
+
+    def test_same_as_participant_scans(self):
+        model = build_synthetic_model(n_rxns=1000, n_species=20)
+        model2 = model.copy()
+
+        split_reversible_reactions_by_participant_scans(model)
+        SplitReversibleReactionsTransform().run(model2)
+
+        self.assertTrue(model2.is_equal(model))
+        self.assertEqual([rxn.id for rxn in model2.reactions], [rxn.id for rxn in model.reactions])
+        for submodel, submodel2 in zip(model.submodels, model2.submodels):
+            self.assertEqual([rxn.id for rxn in submodel2.reactions], [rxn.id for rxn in submodel.reactions])
+        for species, species2 in zip(model.species, model2.species):
+            self.assertEqual([(part.coefficient, len(part.reactions)) for part in species2.species_coefficients],
+                             [(part.coefficient, len(part.reactions)) for part in species.species_coefficients])
+
+    @unittest.skipUnless(os.getenv('BENCHMARK'), 'Set BENCHMARK to run benchmarks')
+    def test_benchmark(self):
+        model = build_synthetic_model(n_rxns=100000, n_species=100)
+
+        start = time.time()
+        SplitReversibleReactionsTransform().run(model)
+        duration = time.time() - start
+        print('Split 100000 reversible reactions in {:.1f} s'.format(duration))
+
+        self.assertEqual(len(model.reactions), 200000)
+
+
+def build_synthetic_model(n_rxns, n_species):
+    """ Build a model with many reversible reactions among a few species
+
+    Args:
+        n_rxns (:obj:`int`): number of reactions
+        n_species (:obj:`int`): number of species
+
+    Returns:
+        :obj:`Model`: model
+    """
+    model = Model()
+    comp = model.compartments.create(id='c')
+    species = []
+    for i_species in range(n_species):
+        species_type = model.species_types.create(id='s{}'.format(i_species), type=SpeciesTypeType.metabolite)
+        species.append(model.species.create(id='s{}[c]'.format(i_species), species_type=species_type, compartment=comp))
+
+    submodels = [
+        model.submodels.create(id='submodel_0', algorithm=SubmodelAlgorithm.ssa),
+        model.submodels.create(id='submodel_1', algorithm=SubmodelAlgorithm.ode),
+    ]
+
+    for i_rxn in range(n_rxns):
+        rxn = model.reactions.create(id='r{}'.format(i_rxn), reversible=i_rxn % 4 != 0,
+                                     submodel=submodels[i_rxn % 2])
+        for i_part, coefficient in enumerate([-1., -2., 1.]):
+            spec = species[(i_rxn * 7 + i_part * 3) % n_species]
+            rxn.participants.append(model.get_species_coefficient_pool().get_or_create(spec, coefficient))
+        rxn.references.create(id='ref_{}'.format(i_rxn), model=model)
+
+    return model
+
+
+def split_reversible_reactions_by_participant_scans(model):
+    """ Reference implementation of :obj:`SplitReversibleReactionsTransform` which scans the
+    participants of each species and updates the lists of reactions one reaction at a time
+
+    Args:
+        model (:obj:`Model`): model
+    """
+    for submodel in model.submodels:
+        if submodel.algorithm != SubmodelAlgorithm.dFBA:
+            for rxn in list(submodel.reactions):
+                if rxn.reversible:
+                    model.reactions.remove(rxn)
+                    submodel.reactions.remove(rxn)
+
+                    rxn_for = submodel.reactions.create(
+                        model=model,
+                        id='{}_forward'.format(rxn.id),
+                        name='{} (forward)'.format(rxn.name),
+                        reversible=False,
+                        evidence=rxn.evidence,
+                        db_refs=rxn.db_refs,
+                        comments=rxn.comments,
+                        references=rxn.references,
+                    )
+                    rxn_bck = submodel.reactions.create(
+                        model=model,
+                        id='{}_backward'.format(rxn.id),
+                        name='{} (backward)'.format(rxn.name),
+                        reversible=False,
+                        evidence=rxn.evidence,
+                        db_refs=rxn.db_refs,
+                        comments=rxn.comments,
+                        references=rxn.references,
+                    )
+
+                    rxn.evidence = []
+                    rxn.db_refs = []
+                    rxn.references = []
+
+                    for part in rxn.participants:
+                        rxn_for.participants.append(part)
+
+                        part_back = part.species.species_coefficients.get_one(coefficient=-1 * part.coefficient)
+                        if part_back:
+                            rxn_bck.participants.append(part_back)
+                        else:
+                            rxn_bck.participants.create(species=part.species, coefficient=-1 * part.coefficient)
+
+                    rxn.participants = []
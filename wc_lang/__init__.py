@@ -1,4 +1,6 @@
+import importlib
 import pkg_resources
+import sys
 
 with open(pkg_resources.resource_filename('wc_lang', 'VERSION'), 'r') as file:
     __version__ = file.read().strip()
@@ -17,13 +19,36 @@ from .core import (TimeUnit, TaxonRank,
                    SpeciesType, Species, DistributionInitConcentration, DfbaObjective, DfbaObjectiveExpression,
                    Observable, ObservableExpression,
                    Function, FunctionExpression,
-                   Reaction, SpeciesCoefficient, RateLaw, RateLawExpression,
+                   Reaction, SpeciesCoefficient, SpeciesCoefficientPool, RateLaw, RateLawExpression,
                    DfbaObjSpecies, DfbaObjReaction, Parameter,
                    StopCondition, StopConditionExpression, StopConditionUnit,
                    Evidence, DatabaseReference, Reference,
                    Validator)
 from . import config
-from . import io
-from . import sbml
-from . import transform
-from . import util
+
+# The :obj:`dfba`, :obj:`io`, :obj:`sbml`, :obj:`transform`, and :obj:`util` modules, and their dependencies
+# (e.g., libSBML, NumPy), are imported on first use to keep the start up of programs fast
+LAZY_MODULES = ('dfba', 'io', 'sbml', 'transform', 'util')
+# :obj:`tuple` of :obj:`str`: names of the modules which are imported on first use
+
+
+def __getattr__(name):
+    """ Import the lazily-loaded modules on first use
+
+    Args:
+        name (:obj:`str`): name of attribute
+
+    Returns:
+        :obj:`types.ModuleType`: module
+
+    Raises:
+        :obj:`AttributeError`: if the attribute is not a lazily-loaded module
+    """
+    if name in LAZY_MODULES:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+
+
+if sys.version_info < (3, 7):  # pragma: no cover # module-level __getattr__ requires Python >= 3.7
+    for name in LAZY_MODULES:
+        importlib.import_module('.' + name, __name__)
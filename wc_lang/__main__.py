@@ -6,11 +6,17 @@
 :License: MIT
 """
 
+# :obj:`wc_lang.io` and its dependencies (e.g., :obj:`wc_utils.workbook`, Git) are imported
+# by the commands that use them to keep the start up of the command line program fast
 from wc_lang import transform
-from wc_lang.io import Writer, Reader, convert, create_template
-from wc_utils.workbook.io import read as read_workbook
+from wc_utils.util.list import det_dedupe
 import cement
+import glob
+import json
+import multiprocessing
+import os
 import sys
+import time
 import wc_lang
 
 
@@ -39,16 +45,23 @@ class ValidateController(cement.Controller):
         stacked_type = 'nested'
         arguments = [
             (['path'], dict(type=str, help='Path to model definition')),
+            (['--profile'], dict(default=False, action='store_true',
+                                 help=('If true, print the time, numbers of rows, and memory allocated by each phase of '
+                                       'reading and writing models'))),
         ]
 
     @cement.ex(hide=True)
     def _default(self):
+        from wc_lang.io import Reader
         args = self.app.pargs
+        reader = Reader()
         try:
-            Reader().run(args.path)  # reader already does validation
+            reader.run(args.path, profile=args.profile)  # reader already does validation
             print('Model is valid')
         except ValueError as exception:
             raise SystemExit('Model is invalid: ' + str(exception))
+        finally:
+            print_io_stats('Read', reader.stats)
 
 
 class DifferenceController(cement.Controller):
@@ -64,20 +77,37 @@ class DifferenceController(cement.Controller):
             (['path_2'], dict(type=str, help='Path to second model definition')),
             (['--compare-files'], dict(dest='compare_files', default=False, action='store_true',
                                        help='If true, compare models; otherwise compare files directly')),
+            (['--structural'], dict(default=False, action='store_true',
+                                    help=('If true, match the objects of the models by their types and ids and compare '
+                                          'hashes of their content; this is faster for large models'))),
+            (['--json'], dict(default=False, action='store_true',
+                              help='If true, print the structural difference as JSON')),
+            (['--profile'], dict(default=False, action='store_true',
+                                 help=('If true, print the time, numbers of rows, and memory allocated by each phase of '
+                                       'reading and writing models'))),
         ]
 
     @cement.ex(hide=True)
     def _default(self):
         args = self.app.pargs
 
-        if args.compare_files:
+        if args.structural or args.json:
+            from wc_lang.util import get_model_difference, format_model_difference
+            model1, model2 = read_models([args.path_1, args.path_2], profile=args.profile and not args.json)
+            structural_diff = get_model_difference(model1, model2)
+            if args.json:
+                print(json.dumps(structural_diff, indent=2, sort_keys=True, default=str))
+                return
+            diff = format_model_difference(structural_diff)
+
+        elif args.compare_files:
+            from wc_utils.workbook.io import read as read_workbook
             model1 = read_workbook(args.path_1)
             model2 = read_workbook(args.path_2)
             diff = model1.difference(model2)
 
         else:
-            model1 = Reader().run(args.path_1)
-            model2 = Reader().run(args.path_2)
+            model1, model2 = read_models([args.path_1, args.path_2], profile=args.profile)
             diff = model1.difference(model2)
 
         if diff:
@@ -86,6 +116,51 @@ class DifferenceController(cement.Controller):
             print('Models are identical')
 
 
+class MergeController(cement.Controller):
+    """ Merge the changes from a common ancestor to a model into another model """
+
+    class Meta:
+        label = 'merge'
+        description = 'Merge the changes from a common ancestor (base) to a model (theirs) into another model (ours)'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['base'], dict(type=str, help='Path to the common ancestor of the models')),
+            (['ours'], dict(type=str, help='Path to the model to merge the changes into')),
+            (['theirs'], dict(type=str, help='Path to the model whose changes should be merged')),
+            (['dest'], dict(type=str, help='Path to save the merged model')),
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        from wc_lang.io import Reader, Writer
+        from wc_lang.util import merge_models
+        args = self.app.pargs
+
+        base = Reader().run(args.base)
+        ours = Reader().run(args.ours)
+        theirs = Reader().run(args.theirs)
+
+        conflicts = merge_models(base, ours, theirs)
+        if conflicts:
+            msgs = []
+            for conflict in conflicts:
+                if conflict['attribute']:
+                    msgs.append('{} "{}": `{}`: {} (base) / {} (ours) / {} (theirs)'.format(
+                        conflict['type'], conflict['id'], conflict['attribute'],
+                        conflict['base'], conflict['ours'], conflict['theirs']))
+                else:
+                    msgs.append('{} "{}": {} in ours, {} in theirs'.format(
+                        conflict['type'], conflict['id'],
+                        'removed' if conflict['ours'] is None else 'changed',
+                        'removed' if conflict['theirs'] is None else 'changed'))
+            raise SystemExit('The models could not be merged due to {} conflict(s):\n  {}'.format(
+                len(conflicts), '\n  '.join(msgs)))
+
+        Writer().run(ours, args.dest, set_repo_metadata_from_path=False)
+        print('Models merged')
+
+
 transform_list = ''
 for trans in transform.get_transforms().values():
     transform_list += '\n  {}: {}'.format(trans.Meta.id, trans.Meta.label)
@@ -104,27 +179,36 @@ class TransformController(cement.Controller):
             (['dest'], dict(type=str, help='Path to save transformed model definition')),
             (['--transform'], dict(dest='transforms', action='append',
                                    help='Model transform:' + transform_list)),
+            (['--workers'], dict(type=int, default=1,
+                                 help='Number of worker processes for the transforms which change each submodel independently')),
+            (['--profile'], dict(default=False, action='store_true',
+                                 help=('If true, print the time, numbers of rows, and memory allocated by each phase of '
+                                       'reading and writing models'))),
         ]
 
     @cement.ex(hide=True)
     def _default(self):
+        from wc_lang.io import Reader, Writer
         args = self.app.pargs
 
         if not args.transforms:
             raise SystemExit('Please select at least one transform')
 
         # read model
-        model = Reader().run(args.source)
+        reader = Reader()
+        model = reader.run(args.source, profile=args.profile)
+        print_io_stats('Read', reader.stats)
 
-        # apply transforms
+        # apply transforms, sharing the indexes of the model and skipping the transforms which aren't applicable
         transforms = transform.get_transforms()
-        for id in args.transforms:
-            cls = transforms[id]
-            instance = cls()
-            instance.run(model)
+        pipeline = transform.TransformPipeline([transforms[id] for id in args.transforms], workers=args.workers)
+        pipeline.run(model)
+        print(pipeline.get_stats_summary())
 
         # write model
-        Writer().run(model, args.dest, set_repo_metadata_from_path=False)
+        writer = Writer()
+        writer.run(model, args.dest, set_repo_metadata_from_path=False, profile=args.profile)
+        print_io_stats('Write', writer.stats)
 
 
 class NormalizeController(cement.Controller):
@@ -143,31 +227,64 @@ class NormalizeController(cement.Controller):
     @cement.ex(hide=True)
     def _default(self):
         args = self.app.pargs
-        model = Reader().run(args.source)
-        if args.dest:
-            Writer().run(model, args.dest, set_repo_metadata_from_path=False)
-        else:
-            Writer().run(model, args.source, set_repo_metadata_from_path=False)
+        normalize(args.source, dest=args.dest)
 
 
 class ConvertController(cement.Controller):
     """ Convert model definition among Excel (.xlsx), comma separated (.csv), JavaScript Object Notation (.json),
-    tab separated (.tsv), and Yet Another Markup Language (.yaml, .yml) formats """
+    tab separated (.tsv), Yet Another Markup Language (.yaml, .yml), and compressed archive (.zip) formats """
 
     class Meta:
         label = 'convert'
-        description = 'Convert model definition among .csv, .json, .tsv, .xlsx, .yaml, and .yml formats'
+        description = 'Convert model definition among .csv, .json, .tsv, .xlsx, .yaml, .yml, and .zip formats'
         stacked_on = 'base'
         stacked_type = 'nested'
         arguments = [
             (['source'], dict(type=str, help='Path to model definition')),
             (['dest'], dict(type=str, help='Path to save model in converted format')),
+            (['--profile'], dict(default=False, action='store_true',
+                                 help=('If true, print the time, numbers of rows, and memory allocated by each phase of '
+                                       'reading and writing models'))),
         ]
 
     @cement.ex(hide=True)
     def _default(self):
+        from wc_lang.io import convert
         args = self.app.pargs
-        convert(args.source, args.dest)
+        read_stats, write_stats = convert(args.source, args.dest, profile=args.profile)
+        print_io_stats('Read', read_stats)
+        print_io_stats('Write', write_stats)
+
+
+class ExportLpController(cement.Controller):
+    """ Export the linear program of a dFBA submodel to an MPS (.mps) or CPLEX LP (.lp) file """
+
+    class Meta:
+        label = 'export-lp'
+        description = 'Export the linear program of a dFBA submodel to an MPS (.mps) or CPLEX LP (.lp) file'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['source'], dict(type=str, help='Path to model definition')),
+            (['submodel'], dict(type=str, help='Id of dFBA submodel')),
+            (['dest'], dict(type=str, help='Path to save linear program')),
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        from wc_lang.dfba import DfbaLinearProgram
+        from wc_lang.io import Reader
+        args = self.app.pargs
+
+        model = Reader().run(args.source)
+        submodel = model.submodels.get_one(id=args.submodel)
+        if not submodel or submodel.algorithm != wc_lang.SubmodelAlgorithm.dfba:
+            raise SystemExit('Model does not have a dFBA submodel with id "{}"'.format(args.submodel))
+
+        try:
+            DfbaLinearProgram.from_submodel(submodel).write(args.dest)
+        except ValueError as exception:
+            raise SystemExit(str(exception))
 
 
 class CreateTemplateController(cement.Controller):
@@ -187,6 +304,7 @@ class CreateTemplateController(cement.Controller):
 
     @cement.ex(hide=True)
     def _default(self):
+        from wc_lang.io import create_template
         args = self.app.pargs
         create_template(args.path, set_repo_metadata_from_path=args.set_repo_metadata_from_path)
 
@@ -209,9 +327,292 @@ class UpdateVersionMetadataController(cement.Controller):
     @cement.ex(hide=True)
     def _default(self):
         args = self.app.pargs
-        model = Reader().run(args.path)
-        model.wc_lang_version = wc_lang.__version__
-        Writer().run(model, args.path, set_repo_metadata_from_path=args.set_repo_metadata_from_path)
+        update_version_metadata(args.path, set_repo_metadata_from_path=args.set_repo_metadata_from_path)
+
+
+class BatchConvertController(cement.Controller):
+    """ Convert multiple model definitions in parallel """
+
+    class Meta:
+        label = 'batch-convert'
+        description = 'Convert multiple model definitions in parallel'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['sources'], dict(type=str, nargs='+',
+                               help=('Paths or Unix glob patterns of model definitions; patterns of .csv and .tsv '
+                                     'files are the paths of single, multi-sheet models'))),
+            (['--format'], dict(dest='format', type=str, required=True,
+                                help='Extension of the converted format (e.g. .xlsx, .zip)')),
+            (['--dest-dir'], dict(dest='dest_dir', default='', type=str,
+                                  help='Directory to save the converted models; default: directory of each source')),
+            (['--workers'], dict(type=int, default=None, help='Number of worker processes; default: number of CPUs')),
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        from wc_lang.io import convert
+        args = self.app.pargs
+        format = args.format if args.format.startswith('.') else '.' + args.format
+        tasks = []
+        for source in expand_paths(args.sources):
+            tasks.append((source, get_converted_path(source, format, dest_dir=args.dest_dir)))
+        run_batch(convert, tasks, workers=args.workers)
+
+
+class BatchNormalizeController(cement.Controller):
+    """ Normalize multiple model definitions in parallel """
+
+    class Meta:
+        label = 'batch-normalize'
+        description = 'Normalize multiple model definitions in parallel'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['sources'], dict(type=str, nargs='+',
+                               help=('Paths or Unix glob patterns of model definitions; patterns of .csv and .tsv '
+                                     'files are the paths of single, multi-sheet models'))),
+            (['--workers'], dict(type=int, default=None, help='Number of worker processes; default: number of CPUs')),
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        args = self.app.pargs
+        run_batch(normalize, [(source,) for source in expand_paths(args.sources)], workers=args.workers)
+
+
+class BatchUpdateVersionMetadataController(cement.Controller):
+    """ Update the version metadata of multiple models in parallel """
+
+    class Meta:
+        label = 'batch-update-version-metadata'
+        description = 'Update the version metadata (repository URL, branch, revision; wc_lang version) of multiple models in parallel'
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['paths'], dict(type=str, nargs='+',
+                             help=('Paths or Unix glob patterns of models; patterns of .csv and .tsv files are the '
+                                   'paths of single, multi-sheet models'))),
+            (['--ignore-repo-metadata'], dict(dest='set_repo_metadata_from_path', default=True, action='store_false',
+                                              help=('If set, do not set the Git repository metadata for the knowledge base from '
+                                                    'the parent directory of each path'))),
+            (['--workers'], dict(type=int, default=None, help='Number of worker processes; default: number of CPUs')),
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        args = self.app.pargs
+        run_batch(update_version_metadata,
+                  [(path, args.set_repo_metadata_from_path) for path in expand_paths(args.paths)],
+                  workers=args.workers)
+
+
+class ServeController(cement.Controller):
+    """ Handle requests to validate, transform, convert, and compare models with a long-running process """
+
+    class Meta:
+        label = 'serve'
+        description = ('Handle JSON-encoded requests to validate, transform, convert, and compare models, one per line, '
+                       'read from stdin or a local Unix socket')
+        stacked_on = 'base'
+        stacked_type = 'nested'
+        arguments = [
+            (['--socket'], dict(type=str, default='',
+                                help='Path to a Unix socket to listen to; default: read requests from stdin')),
+            (['--workers'], dict(type=int, default=None, help='Number of worker threads')),
+            (['--cache-size'], dict(type=int, default=None, help='Maximum number of models to cache')),
+        ]
+
+    @cement.ex(hide=True)
+    def _default(self):
+        from wc_lang.server import Server
+        args = self.app.pargs
+        server = Server(workers=args.workers, cache_size=args.cache_size)
+        try:
+            if args.socket:
+                server.serve_socket(args.socket)
+            else:
+                server.serve_stream(sys.stdin, sys.stdout)
+        finally:
+            server.close()
+
+
+def normalize(source, dest=''):
+    """ Normalize a model definition
+
+    Args:
+        source (:obj:`str`): path to model definition
+        dest (:obj:`str`, optional): path to save normalized model definition; default: :obj:`source`
+    """
+    from wc_lang.io import Reader, Writer
+    model = Reader().run(source)
+    Writer().run(model, dest or source, set_repo_metadata_from_path=False)
+
+
+def update_version_metadata(path, set_repo_metadata_from_path=True):
+    """ Update the version metadata (repository URL, branch, revision; wc_lang version) of a model
+
+    Args:
+        path (:obj:`str`): path to model
+        set_repo_metadata_from_path (:obj:`bool`, optional): if :obj:`True`, set the Git repository metadata (URL,
+            branch, revision) for the model from the parent directory of :obj:`path`
+    """
+    from wc_lang.io import Reader, Writer
+    model = Reader().run(path)
+    model.wc_lang_version = wc_lang.__version__
+    Writer().run(model, path, set_repo_metadata_from_path=set_repo_metadata_from_path)
+
+
+def read_models(paths, profile=False):
+    """ Read models, and print statistics of reading them if :obj:`profile` is :obj:`True`
+
+    Args:
+        paths (:obj:`list` of :obj:`str`): paths to the models
+        profile (:obj:`bool`, optional): if :obj:`True`, print statistics of reading the models
+
+    Returns:
+        :obj:`list` of :obj:`wc_lang.core.Model`: models
+    """
+    from wc_lang.io import Reader
+    models = []
+    for path in paths:
+        reader = Reader()
+        models.append(reader.run(path, profile=profile))
+        print_io_stats('Read "{}"'.format(path), reader.stats)
+    return models
+
+
+def print_io_stats(label, stats):
+    """ Print a summary of the statistics of reading or writing a model
+
+    Args:
+        label (:obj:`str`): label of the statistics
+        stats (:obj:`wc_lang.io.IoStats`): statistics; if :obj:`None`, nothing is printed
+    """
+    if stats is not None:
+        print('{}:\n  {}'.format(label, stats.get_summary().replace('\n', '\n  ')))
+
+
+def expand_paths(paths):
+    """ Expand Unix glob patterns into paths of models
+
+    A model which is saved in comma or tab separated files is addressed by a glob pattern which matches its
+    sheets (e.g., `model-*.tsv`; see :obj:`wc_lang.io.convert`). Therefore, patterns of .csv and .tsv files
+    are kept as paths of single models rather than expanded. Patterns which do not match any files are kept
+    so that their errors can be reported.
+
+    Args:
+        paths (:obj:`list` of :obj:`str`): paths and Unix glob patterns
+
+    Returns:
+        :obj:`list` of :obj:`str`: paths
+    """
+    expanded_paths = []
+    for path in paths:
+        _, ext = os.path.splitext(path)
+        if ext in ['.csv', '.tsv'] and any(char in path for char in '*?['):
+            expanded_paths.append(path)
+        else:
+            expanded_paths.extend(sorted(glob.glob(path)) or [path])
+    return det_dedupe(expanded_paths)
+
+
+def get_converted_path(source, format, dest_dir=''):
+    """ Get the path to save the conversion of a model definition to another format
+
+    Args:
+        source (:obj:`str`): path to model definition
+        format (:obj:`str`): extension of the converted format
+        dest_dir (:obj:`str`, optional): directory to save the converted model; default: directory of :obj:`source`
+
+    Returns:
+        :obj:`str`: path to save the converted model
+    """
+    dirname, basename = os.path.split(source)
+    root, _ = os.path.splitext(basename)
+    root = root.replace('*', '').rstrip('-')
+    if format in ['.csv', '.tsv']:
+        basename = root + '-*' + format
+    else:
+        basename = root + format
+    return os.path.join(dest_dir or dirname, basename)
+
+
+def run_batch(func, tasks, workers=None):
+    """ Run a function over a batch of models in a pool of worker processes, print the
+    elapsed time for each model and a summary of the batch
+
+    The expensive setup of the workers (importing :obj:`wc_lang.io` and its dependencies, and loading the
+    configuration) is done once in this process before the pool is created, and is inherited by the workers
+    when they are forked.
+
+    Args:
+        func (:obj:`callable`): module-level function whose first argument is the path to a model
+        tasks (:obj:`list` of :obj:`tuple`): list of the arguments for each call to :obj:`func`
+        workers (:obj:`int`, optional): number of worker processes; default: number of CPUs
+
+    Raises:
+        :obj:`SystemExit`: if any of the models could not be processed
+    """
+    start = time.time()
+    calls = [(func, args) for args in tasks]
+
+    if workers is None:
+        workers = multiprocessing.cpu_count()
+    workers = max(1, min(workers, len(calls)))
+
+    if workers == 1:
+        results = map(run_batch_task, calls)
+        pool = None
+    else:
+        from wc_lang.config.core import get_config
+        from wc_lang.io import Reader  # noqa: F401
+        get_config()
+
+        pool = multiprocessing.Pool(processes=workers)
+        results = pool.imap(run_batch_task, calls)
+
+    errors = []
+    try:
+        for i_task, (path, elapsed, error) in enumerate(results):
+            if error:
+                errors.append(path)
+                print('[{}/{}] {}: failed after {:.3f} s: {}'.format(i_task + 1, len(calls), path, elapsed, error))
+            else:
+                print('[{}/{}] {}: {:.3f} s'.format(i_task + 1, len(calls), path, elapsed))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    print('Processed {} model(s) with {} worker(s) in {:.3f} s: {} succeeded, {} failed'.format(
+        len(calls), workers, time.time() - start, len(calls) - len(errors), len(errors)))
+
+    if errors:
+        raise SystemExit('The following model(s) could not be processed:\n  {}'.format('\n  '.join(errors)))
+
+
+def run_batch_task(call):
+    """ Run a task of :obj:`run_batch`
+
+    Args:
+        call (:obj:`tuple`): function and its arguments
+
+    Returns:
+        :obj:`tuple`:
+
+            * :obj:`str`: path to model
+            * :obj:`float`: elapsed time (s)
+            * :obj:`str`: error message or :obj:`None`
+    """
+    func, args = call
+    start = time.time()
+    try:
+        func(*args)
+        error = None
+    except Exception as exception:
+        error = str(exception)
+    return (args[0], time.time() - start, error)
 
 
 class App(cement.App):
@@ -223,11 +624,17 @@ class App(cement.App):
             BaseController,
             ValidateController,
             DifferenceController,
+            MergeController,
             TransformController,
             NormalizeController,
             ConvertController,
+            ExportLpController,
             CreateTemplateController,
             UpdateVersionMetadataController,
+            BatchConvertController,
+            BatchNormalizeController,
+            BatchUpdateVersionMetadataController,
+            ServeController,
         ]
 
 
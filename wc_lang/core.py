@@ -36,7 +36,6 @@ This module also defines numerous classes that serve as attributes of these clas
 
 from enum import Enum, EnumMeta
 from math import ceil, floor, exp, log, log10, isnan
-from natsort import natsorted, ns
 from obj_model import (BooleanAttribute, EnumAttribute,
                        FloatAttribute,
                        IntegerAttribute, PositiveIntegerAttribute,
@@ -49,15 +48,12 @@ from obj_model.expression import (ExpressionOneToOneAttribute, ExpressionManyToO
                                   ExpressionExpressionTermMeta, Expression,
                                   ParsedExpression, ParsedExpressionError)
 from six import with_metaclass
-from wc_lang.sbml.util import (wrap_libsbml, str_to_xmlstr, LibSBMLError,
-                               create_sbml_parameter)
 from wc_utils.util.chem import EmpiricalFormula
 from wc_utils.util.enumerate import CaseInsensitiveEnum, CaseInsensitiveEnumMeta
 from wc_utils.util.list import det_dedupe
 from wc_utils.util.units import unit_registry
 import collections
 import datetime
-import networkx
 import obj_model
 import obj_model.chem
 import pkg_resources
@@ -427,6 +423,8 @@ class ReactionParticipantAttribute(ManyToManyAttribute):
         if not participants:
             return ''
 
+        from natsort import natsorted, ns
+
         comps = set([part.species.compartment for part in participants])
         if len(comps) == 1:
             global_comp = comps.pop()
@@ -560,15 +558,7 @@ class ReactionParticipantAttribute(ManyToManyAttribute):
                     errors.extend(error.messages)
 
                 elif coefficient != 0:
-                    if SpeciesCoefficient not in objects:
-                        objects[SpeciesCoefficient] = {}
-                    serialized_value = SpeciesCoefficient._serialize(species, coefficient)
-                    if serialized_value in objects[SpeciesCoefficient]:
-                        rxn_part = objects[SpeciesCoefficient][serialized_value]
-                    else:
-                        rxn_part = SpeciesCoefficient(species=species, coefficient=coefficient)
-                        objects[SpeciesCoefficient][serialized_value] = rxn_part
-                    parts.append(rxn_part)
+                    parts.append(SpeciesCoefficient.get_or_create(objects, species, coefficient))
 
         return (parts, errors)
 
@@ -827,6 +817,17 @@ class Model(obj_model.Model):
         if 'updated' not in kwargs:
             self.updated = datetime.datetime.now().replace(microsecond=0)
 
+    def get_species_coefficient_pool(self):
+        """ Get the canonical, indexed pool of the participants of the reactions of the model
+
+        Returns:
+            :obj:`SpeciesCoefficientPool`: pool of participants
+        """
+        pool = self.__dict__.get('_species_coefficient_pool', None)
+        if pool is None:
+            pool = self._species_coefficient_pool = SpeciesCoefficientPool()
+        return pool
+
     def validate(self):
         """ Determine if the model is valid
 
@@ -843,6 +844,8 @@ class Model(obj_model.Model):
         else:
             errors = []
 
+        import networkx
+
         # Network of compartments is rooted and acyclic
         digraph = networkx.DiGraph()
         for comp in self.compartments:
@@ -870,6 +873,8 @@ class Model(obj_model.Model):
             :obj:`dict`: dictionary of dictionary of lists of objects with cyclic dependencies,
                 keyed by type
         """
+        import networkx
+
         cyclic_deps = {}
         for model_type in (Observable, Function):
             # get name of attribute that contains instances of model_type
@@ -1517,6 +1522,7 @@ class Submodel(obj_model.Model):
         Raises:
             :obj:`LibSBMLError`: if calling `libsbml` raises an error
         """
+        from wc_lang.sbml.util import wrap_libsbml, str_to_xmlstr
         sbml_model = wrap_libsbml(sbml_document.getModel)
         wrap_libsbml(sbml_model.setIdAttribute, self.id)
         if self.name:
@@ -1709,6 +1715,7 @@ class DfbaObjective(obj_model.Model):
         Raises:
             :obj:`LibSBMLError`: if calling `libsbml` raises an error
         """
+        from wc_lang.sbml.util import wrap_libsbml
         # issue warning if objective function not linear
         if not self.expression._parsed_expression.is_linear:
             warnings.warn("submodel '{}' can't add non-linear objective function to SBML FBC model".format(
@@ -1904,6 +1911,7 @@ class Compartment(obj_model.Model):
         Raises:
             :obj:`LibSBMLError`: if calling `libsbml` raises an error
         """
+        from wc_lang.sbml.util import wrap_libsbml
         sbml_model = wrap_libsbml(sbml_document.getModel)
         sbml_compartment = wrap_libsbml(sbml_model.createCompartment)
         wrap_libsbml(sbml_compartment.setIdAttribute, self.id)
@@ -2107,26 +2115,19 @@ class Species(obj_model.Model):
         Raises:
             :obj:`LibSBMLError`: if calling `libsbml` raises an error
         """
+        from wc_lang.sbml.util import wrap_libsbml, create_sbml_species
         sbml_model = wrap_libsbml(sbml_document.getModel)
-        sbml_species = wrap_libsbml(sbml_model.createSpecies)
-        # initDefaults() isn't wrapped in wrap_libsbml because it returns None
-        sbml_species.initDefaults()
-        wrap_libsbml(sbml_species.setIdAttribute, self.gen_sbml_id())
 
-        # add some SpeciesType data
-        wrap_libsbml(sbml_species.setName, self.species_type.name)
-        if self.species_type.comments:
-            wrap_libsbml(sbml_species.setNotes, self.species_type.comments, True)
-
-        # set Compartment, which must already be in the SBML document
-        wrap_libsbml(sbml_species.setCompartment, self.compartment.id)
-
-        # set the initial concentration
-        wrap_libsbml(sbml_species.setInitialConcentration, self.distribution_init_concentration.mean)
-
-        # set units
+        # add some SpeciesType data; the Compartment must already be in the SBML document
         unit_xml_id = ConcentrationUnit.Meta[self.distribution_init_concentration.units]['xml_id']
-        wrap_libsbml(sbml_species.setSubstanceUnits, unit_xml_id)
+        sbml_species = create_sbml_species(sbml_model, [(
+            self.gen_sbml_id(),
+            self.species_type.name,
+            self.species_type.comments or None,
+            self.compartment.id,
+            self.distribution_init_concentration.mean,
+            unit_xml_id,
+        )])[0]
 
         return sbml_species
 
@@ -2303,6 +2304,28 @@ class Observable(obj_model.Model):
         expression_term_model = ObservableExpression
         expression_term_units = 'units'
 
+    def add_to_sbml_doc(self, sbml_document, translator=None):
+        """ Add this Observable to a libsbml SBML document as a non-constant parameter whose value
+        is set by an assignment rule.
+
+        Args:
+             sbml_document (:obj:`obj`): a `libsbml` SBMLDocument
+             translator (:obj:`wc_lang.sbml.util.SBMLMathTranslator`, optional): translator of expressions into
+                SBML math
+
+        Returns:
+            :obj:`libsbml.AssignmentRule`: the libsbml assignment rule that's created
+
+        Raises:
+            :obj:`LibSBMLError`: if calling `libsbml` raises an error
+        """
+        from wc_lang.sbml.util import wrap_libsbml, create_sbml_assignment_rule, get_sbml_id, SBMLMathTranslator
+        sbml_model = wrap_libsbml(sbml_document.getModel)
+        translator = translator or SBMLMathTranslator()
+        return create_sbml_assignment_rule(sbml_model, get_sbml_id(self),
+                                           translator.parse(translator.get_infix(self.expression)),
+                                           name=self.name or None)
+
 
 class FunctionExpression(obj_model.Model, Expression):
     """ A mathematical expression of Functions, Observbles, Parameters and Python functions
@@ -2402,6 +2425,28 @@ class Function(obj_model.Model):
         expression_term_model = FunctionExpression
         expression_term_units = 'units'
 
+    def add_to_sbml_doc(self, sbml_document, translator=None):
+        """ Add this Function to a libsbml SBML document as a non-constant parameter whose value
+        is set by an assignment rule.
+
+        Args:
+             sbml_document (:obj:`obj`): a `libsbml` SBMLDocument
+             translator (:obj:`wc_lang.sbml.util.SBMLMathTranslator`, optional): translator of expressions into
+                SBML math
+
+        Returns:
+            :obj:`libsbml.AssignmentRule`: the libsbml assignment rule that's created
+
+        Raises:
+            :obj:`LibSBMLError`: if calling `libsbml` raises an error
+        """
+        from wc_lang.sbml.util import wrap_libsbml, create_sbml_assignment_rule, get_sbml_id, SBMLMathTranslator
+        sbml_model = wrap_libsbml(sbml_document.getModel)
+        translator = translator or SBMLMathTranslator()
+        return create_sbml_assignment_rule(sbml_model, get_sbml_id(self),
+                                           translator.parse(translator.get_infix(self.expression)),
+                                           name=self.name or None)
+
     def validate(self):
         """ Check that the Function is valid
 
@@ -2755,11 +2800,17 @@ class Reaction(obj_model.Model):
         """
         return list(set(self.rate_laws.get_one(direction=direction).expression.species) - set(self.get_reactants()))
 
-    def add_to_sbml_doc(self, sbml_document):
+    def add_to_sbml_doc(self, sbml_document, translator=None):
         """ Add this Reaction to a libsbml SBML document.
 
+        For dFBA submodels, the flux bounds of the reaction are written with the FBC package. For other
+        submodels, the difference of the forward and backward rate laws of the reaction is written as
+        its kinetic law.
+
         Args:
              sbml_document (:obj:`obj`): a `libsbml` SBMLDocument
+             translator (:obj:`wc_lang.sbml.util.SBMLMathTranslator`, optional): translator of rate laws into
+                SBML math, which caches the translations of the rate laws
 
         Returns:
             :obj:`libsbml.reaction`: the libsbml reaction that's created
@@ -2767,44 +2818,40 @@ class Reaction(obj_model.Model):
         Raises:
             :obj:`LibSBMLError`: if calling `libsbml` raises an error
         """
+        from wc_lang.sbml.util import (wrap_libsbml, call_libsbml, create_sbml_reactions, create_sbml_parameter,
+                                       SBMLMathTranslator)
         sbml_model = wrap_libsbml(sbml_document.getModel)
 
-        # create SBML reaction in SBML document
-        sbml_reaction = wrap_libsbml(sbml_model.createReaction)
-        wrap_libsbml(sbml_reaction.setIdAttribute, self.id)
-        wrap_libsbml(sbml_reaction.setName, self.name)
-        wrap_libsbml(sbml_reaction.setReversible, self.reversible)
-        wrap_libsbml(sbml_reaction.setFast, False)
-        if self.comments:
-            wrap_libsbml(sbml_reaction.setNotes, self.comments, True)
-
-        # write reaction participants to SBML document
-        for participant in self.participants:
-            if participant.coefficient < 0:
-                species_reference = wrap_libsbml(sbml_reaction.createReactant)
-                wrap_libsbml(species_reference.setStoichiometry, -participant.coefficient)
-            elif 0 < participant.coefficient:
-                species_reference = wrap_libsbml(sbml_reaction.createProduct)
-                wrap_libsbml(species_reference.setStoichiometry, participant.coefficient)
-            wrap_libsbml(species_reference.setSpecies, participant.species.gen_sbml_id())
-            wrap_libsbml(species_reference.setConstant, True)
+        # create SBML reaction, and its participants, in SBML document
+        sbml_reaction = create_sbml_reactions(sbml_model, [(
+            self.id,
+            self.name,
+            self.reversible,
+            self.comments or None,
+            [(participant.species.gen_sbml_id(), participant.coefficient) for participant in self.participants],
+        )])[0]
 
         # for dFBA submodels, write flux bounds to SBML document
         # uses version 2 of the 'Flux Balance Constraints' extension
         if self.submodel.algorithm == SubmodelAlgorithm.dfba:
-            fbc_reaction_plugin = wrap_libsbml(sbml_reaction.getPlugin, 'fbc')
-            for bound in ['lower', 'upper']:
+            fbc_reaction_plugin = call_libsbml(sbml_reaction.getPlugin, 'fbc')
+            for bound, value in [('lower', self.flux_min), ('upper', self.flux_max)]:
                 # make a unique ID for each flux bound parameter
                 # ids for wc_lang Parameters all start with 'parameter'
                 param_id = "_reaction_{}_{}_bound".format(self.id, bound)
-                param = create_sbml_parameter(sbml_model, id=param_id, value=self.flux_min,
-                                              units='mmol_per_gDW_per_hr')
+                create_sbml_parameter(sbml_model, id=param_id, value=value, units='mmol_per_gDW_per_hr')
                 if bound == 'lower':
-                    wrap_libsbml(param.setValue, self.flux_min)
-                    wrap_libsbml(fbc_reaction_plugin.setLowerFluxBound, param_id)
+                    call_libsbml(fbc_reaction_plugin.setLowerFluxBound, param_id)
                 if bound == 'upper':
-                    wrap_libsbml(param.setValue, self.flux_max)
-                    wrap_libsbml(fbc_reaction_plugin.setUpperFluxBound, param_id)
+                    call_libsbml(fbc_reaction_plugin.setUpperFluxBound, param_id)
+
+        # for other submodels, write the net rate law to SBML document
+        elif self.rate_laws:
+            translator = translator or SBMLMathTranslator()
+            infix = translator.get_rate_law_infix(self)
+            if infix is not None:
+                kinetic_law = call_libsbml(sbml_reaction.createKineticLaw)
+                call_libsbml(kinetic_law.setMath, translator.parse(infix))
         return sbml_reaction
 
 
@@ -2907,20 +2954,162 @@ class SpeciesCoefficient(obj_model.Model):
             if error:
                 return (None, error)
 
-            serialized_val = cls._serialize(species, coefficient)
-            if cls not in objects:
-                objects[cls] = {}
-            if serialized_val in objects[cls]:
-                obj = objects[cls][serialized_val]
-            else:
-                obj = cls(species=species, coefficient=coefficient)
-                objects[cls][serialized_val] = obj
-            return (obj, None)
+            return (cls.get_or_create(objects, species, coefficient), None)
 
         else:
             attr = cls.Meta.attributes['species']
             return (None, InvalidAttribute(attr, ['Invalid species coefficient']))
 
+    @classmethod
+    def get_or_create(cls, objects, species, coefficient):
+        """ Get the participant which represents a species with a coefficient from a dictionary of objects,
+        or create it
+
+        The participants are indexed by tuples of their species and coefficients.
+
+        Args:
+            objects (:obj:`dict`): dictionary of objects, grouped by model
+            species (:obj:`Species`): species
+            coefficient (:obj:`float`): coefficient
+
+        Returns:
+            :obj:`SpeciesCoefficient`: participant
+        """
+        key = (species, float(coefficient))
+        index = objects.setdefault(cls, {})
+        obj = index.get(key, None)
+        if obj is None:
+            obj = index[key] = cls(species=species, coefficient=coefficient)
+        return obj
+
+
+class SpeciesCoefficientPool(object):
+    """ Canonical, indexed pool of the participants of the reactions of a model
+
+    The participants are indexed by their species and coefficients. The participants of each species are
+    indexed on first use, and re-indexed if participants have been added to or removed from the species
+    since, so that the pool remains consistent with participants which are created outside of the pool.
+    Each participant found in the index is also checked against its current species and coefficient, and
+    the species is re-indexed if the participant has changed. The species or coefficients of participants
+    which are changed outside of the pool without changing the numbers of participants of their species
+    can't be detected until such a stale participant is found; callers which change them should
+    :obj:`invalidate` the species.
+
+    Attributes:
+        _index (:obj:`dict`): dictionary which maps species to tuples of their numbers of participants and
+            dictionaries which map coefficients to participants
+    """
+
+    def __init__(self):
+        self._index = {}
+
+    def get(self, species, coefficient):
+        """ Get the participant which represents a species with a coefficient
+
+        Args:
+            species (:obj:`Species`): species
+            coefficient (:obj:`float`): coefficient
+
+        Returns:
+            :obj:`SpeciesCoefficient`: participant, or :obj:`None` if the species doesn't have a participant
+                with the coefficient
+        """
+        coefficient = float(coefficient)
+        part = self._get_species_index(species).get(coefficient, None)
+        if part is not None and not self._is_participant(part, species, coefficient):
+            part = self._get_species_index(species, reindex=True).get(coefficient, None)
+        return part
+
+    def get_or_create(self, species, coefficient):
+        """ Get the participant which represents a species with a coefficient, or create it
+
+        Args:
+            species (:obj:`Species`): species
+            coefficient (:obj:`float`): coefficient
+
+        Returns:
+            :obj:`SpeciesCoefficient`: participant
+        """
+        part = self.get(species, coefficient)
+        if part is None:
+            part = self.add(SpeciesCoefficient(species=species, coefficient=coefficient))
+        return part
+
+    def add(self, part):
+        """ Add a participant to the pool
+
+        If the pool already has a participant which represents the species with the coefficient, the pool's
+        participant is returned instead, and `part` is detached from its species, unless `part` is already
+        related to other objects (e.g., reactions).
+
+        Args:
+            part (:obj:`SpeciesCoefficient`): participant
+
+        Returns:
+            :obj:`SpeciesCoefficient`: the participant of the pool which represents the species with the coefficient
+        """
+        species = part.species
+        pool_part = self.get(species, part.coefficient)
+        if pool_part is None or pool_part is part:
+            index = self._get_species_index(species)
+            index[float(part.coefficient)] = part
+            self._index[species] = (len(species.species_coefficients), index)
+            return part
+
+        if not any(getattr(part, attr_name) for attr_name in part.Meta.related_attributes):
+            part.species = None
+            self._index[species] = (len(species.species_coefficients), self._index[species][1])
+        return pool_part
+
+    def invalidate(self, *species):
+        """ Invalidate the indexes of the participants of species
+
+        Args:
+            *species (:obj:`Species`): species whose participants have changed; default: all species
+        """
+        if species:
+            for spec in species:
+                self._index.pop(spec, None)
+        else:
+            self._index.clear()
+
+    def clear(self):
+        """ Clear the index """
+        self.invalidate()
+
+    def _get_species_index(self, species, reindex=False):
+        """ Get the index of the participants of a species by their coefficients
+
+        Args:
+            species (:obj:`Species`): species
+            reindex (:obj:`bool`, optional): if :obj:`True`, re-index the participants of the species
+
+        Returns:
+            :obj:`dict`: dictionary which maps coefficients to participants
+        """
+        n_parts = len(species.species_coefficients)
+        n_indexed_parts, index = self._index.get(species, (None, None))
+        if reindex or n_indexed_parts != n_parts:
+            index = {}
+            for part in species.species_coefficients:
+                index.setdefault(float(part.coefficient), part)
+            self._index[species] = (n_parts, index)
+        return index
+
+    @staticmethod
+    def _is_participant(part, species, coefficient):
+        """ Determine whether a participant still represents a species with a coefficient
+
+        Args:
+            part (:obj:`SpeciesCoefficient`): participant
+            species (:obj:`Species`): species
+            coefficient (:obj:`float`): coefficient
+
+        Returns:
+            :obj:`bool`: :obj:`True` if the participant represents the species with the coefficient
+        """
+        return part.species is species and float(part.coefficient) == coefficient
+
 
 class RateLawExpression(obj_model.Model, Expression):
     """ Rate law expression
@@ -3248,43 +3437,30 @@ class DfbaObjReaction(obj_model.Model):
         Raises:
             :obj:`LibSBMLError`: if calling `libsbml` raises an error
         """
+        from wc_lang.sbml.util import wrap_libsbml, call_libsbml, create_sbml_reactions, create_sbml_parameter
         sbml_model = wrap_libsbml(sbml_document.getModel)
 
-        # create SBML reaction in SBML document
-        sbml_reaction = wrap_libsbml(sbml_model.createReaction)
-        wrap_libsbml(sbml_reaction.setIdAttribute, self.id)
-        wrap_libsbml(sbml_reaction.setName, self.name)
-        wrap_libsbml(sbml_reaction.setReversible, False)
-        wrap_libsbml(sbml_reaction.setFast, False)
-        if self.comments:
-            wrap_libsbml(sbml_reaction.setNotes, self.comments, True)
-
-        # write dFBA objective reaction participants to SBML document
-        for dfba_obj_species in self.dfba_obj_species:
-            if dfba_obj_species.value < 0:
-                species_reference = wrap_libsbml(sbml_reaction.createReactant)
-                wrap_libsbml(species_reference.setStoichiometry, -dfba_obj_species.value)
-            elif 0 < dfba_obj_species.value:
-                species_reference = wrap_libsbml(sbml_reaction.createProduct)
-                wrap_libsbml(species_reference.setStoichiometry, dfba_obj_species.value)
-            id = dfba_obj_species.species.gen_sbml_id()
-            wrap_libsbml(species_reference.setSpecies, id)
-            wrap_libsbml(species_reference.setConstant, True)
+        # create SBML reaction, and the participants of the dFBA objective reaction, in SBML document
+        sbml_reaction = create_sbml_reactions(sbml_model, [(
+            self.id,
+            self.name,
+            False,
+            self.comments or None,
+            [(dfba_obj_species.species.gen_sbml_id(), dfba_obj_species.value)
+             for dfba_obj_species in self.dfba_obj_species],
+        )])[0]
 
         # the dFBA objective reaction does not constrain the optimization, so set its bounds to 0 and INF
-        fbc_reaction_plugin = wrap_libsbml(sbml_reaction.getPlugin, 'fbc')
-        for bound in ['lower', 'upper']:
+        fbc_reaction_plugin = call_libsbml(sbml_reaction.getPlugin, 'fbc')
+        for bound, value in [('lower', 0), ('upper', float('inf'))]:
             # make a unique ID for each flux bound parameter
             # ids for wc_lang Parameters all start with 'parameter'
             param_id = "_dfba_obj_reaction_{}_{}_bound".format(self.id, bound)
-            param = create_sbml_parameter(sbml_model, id=param_id, value=0,
-                                          units='mmol_per_gDW_per_hr')
+            create_sbml_parameter(sbml_model, id=param_id, value=value, units='mmol_per_gDW_per_hr')
             if bound == 'lower':
-                wrap_libsbml(param.setValue, 0)
-                wrap_libsbml(fbc_reaction_plugin.setLowerFluxBound, param_id)
+                call_libsbml(fbc_reaction_plugin.setLowerFluxBound, param_id)
             if bound == 'upper':
-                wrap_libsbml(param.setValue, float('inf'))
-                wrap_libsbml(fbc_reaction_plugin.setUpperFluxBound, param_id)
+                call_libsbml(fbc_reaction_plugin.setUpperFluxBound, param_id)
         return sbml_reaction
 
 
@@ -3341,6 +3517,7 @@ class Parameter(obj_model.Model):
         Raises:
             :obj:`LibSBMLError`: if calling `libsbml` raises an error
         """
+        from wc_lang.sbml.util import wrap_libsbml, create_sbml_parameter
         sbml_model = wrap_libsbml(sbml_document.getModel)
         # prefix id with 'parameter' so ids for wc_lang Parameters don't collide with ids for other libsbml parameters
         sbml_id = "parameter_{}".format(self.id)
@@ -3585,4 +3762,11 @@ class Validator(obj_model.Validator):
         Returns:
             :obj:`InvalidObjectSet` or `None`: list of invalid objects/models and their errors
         """
-        return super(Validator, self).run(model, get_related=get_related)
+        # imported here because :obj:`wc_lang.util` depends on this module
+        from wc_lang.util import metrics
+
+        with metrics.timer('wc_lang_validation_seconds'):
+            errors = super(Validator, self).run(model, get_related=get_related)
+        if errors and metrics.enabled:
+            metrics.increment('wc_lang_validation_errors_total', len(errors.invalid_objects))
+        return errors
@@ -0,0 +1,393 @@
+""" Array representations of dFBA submodels for linear programming solvers
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from wc_lang.core import DfbaObjReaction, Reaction, ReactionFluxBoundUnit
+import numpy
+import scipy.sparse
+import wc_lang.config.core
+
+
+class DfbaFluxBounds(object):
+    """ Lower and upper flux bounds of the reactions of a dFBA submodel, as arrays which are aligned with
+    a list of the reactions
+
+    Undefined bounds are represented by NaN. The arrays can be passed directly to linear programming
+    solvers, and updated in place at each time step of a simulation.
+
+    Attributes:
+        reactions (:obj:`list` of :obj:`wc_lang.core.Reaction`): reactions
+        lower (:obj:`numpy.ndarray`): lower bounds of the fluxes of the reactions
+        upper (:obj:`numpy.ndarray`): upper bounds of the fluxes of the reactions
+        reversible (:obj:`numpy.ndarray`): boolean array which indicates whether each reaction is reversible
+        _reaction_index (:obj:`dict`): dictionary which maps the ids of the reactions to their positions
+    """
+
+    def __init__(self, reactions, lower, upper, reversible):
+        """
+        Args:
+            reactions (:obj:`list` of :obj:`wc_lang.core.Reaction`): reactions
+            lower (:obj:`numpy.ndarray`): lower bounds of the fluxes of the reactions
+            upper (:obj:`numpy.ndarray`): upper bounds of the fluxes of the reactions
+            reversible (:obj:`numpy.ndarray`): boolean array which indicates whether each reaction is reversible
+
+        Raises:
+            :obj:`ValueError`: if the lengths of the arrays are different from the number of reactions
+        """
+        if not (len(lower) == len(upper) == len(reversible) == len(reactions)):
+            raise ValueError('The lengths of the bounds ({}, {}) and reversibilities ({}) must equal the number of reactions ({})'.format(
+                len(lower), len(upper), len(reversible), len(reactions)))
+        self.reactions = reactions
+        self.lower = lower
+        self.upper = upper
+        self.reversible = reversible
+        self._reaction_index = None
+
+    @classmethod
+    def from_submodel(cls, submodel, reactions=None):
+        """ Get the flux bounds of the reactions of a submodel
+
+        Args:
+            submodel (:obj:`wc_lang.core.Submodel`): submodel
+            reactions (:obj:`list` of :obj:`wc_lang.core.Reaction`, optional): reactions of the submodel;
+                default: :obj:`submodel.reactions`
+
+        Returns:
+            :obj:`DfbaFluxBounds`: flux bounds
+        """
+        if reactions is None:
+            reactions = list(submodel.reactions)
+        n_rxns = len(reactions)
+        lower = numpy.fromiter((numpy.nan if rxn.flux_min is None else rxn.flux_min for rxn in reactions),
+                               dtype=numpy.float64, count=n_rxns)
+        upper = numpy.fromiter((numpy.nan if rxn.flux_max is None else rxn.flux_max for rxn in reactions),
+                               dtype=numpy.float64, count=n_rxns)
+        reversible = numpy.fromiter((bool(rxn.reversible) for rxn in reactions),
+                                    dtype=numpy.bool_, count=n_rxns)
+        return cls(reactions, lower, upper, reversible)
+
+    def get_reaction_index(self):
+        """ Get the positions of the reactions in the arrays
+
+        Returns:
+            :obj:`dict`: dictionary which maps the ids of the reactions to their positions
+        """
+        if self._reaction_index is None:
+            self._reaction_index = {rxn.id: i_rxn for i_rxn, rxn in enumerate(self.reactions)}
+        return self._reaction_index
+
+    def get_bounds(self, reaction_id):
+        """ Get the flux bounds of a reaction
+
+        Args:
+            reaction_id (:obj:`str`): id of the reaction
+
+        Returns:
+            :obj:`tuple` of :obj:`float`: lower and upper bounds of the flux of the reaction
+        """
+        i_rxn = self.get_reaction_index()[reaction_id]
+        return (float(self.lower[i_rxn]), float(self.upper[i_rxn]))
+
+    def clip(self, config=None):
+        """ Clip the flux bounds to the default flux range, and replace undefined bounds with the defaults
+
+        * reversible reactions: `lower = max(lower, flux_min_bound_reversible)`
+        * irreversible reactions: `lower = max(lower, flux_min_bound_irreversible)`
+        * all reactions: `upper = min(upper, flux_max_bound)`
+
+        Args:
+            config (:obj:`dict`, optional): wc_lang configuration; default: :obj:`wc_lang.config.core.get_config`
+
+        Returns:
+            :obj:`DfbaFluxBounds`: same flux bounds, but clipped
+        """
+        config = (config or wc_lang.config.core.get_config()['wc_lang'])['dfba']
+        default_lower = numpy.where(self.reversible,
+                                    config['flux_min_bound_reversible'],
+                                    config['flux_min_bound_irreversible'])
+
+        # `fmax` and `fmin` return the non-NaN argument, and therefore replace undefined bounds with the defaults
+        numpy.fmax(self.lower, default_lower, out=self.lower)
+        numpy.fmin(self.upper, config['flux_max_bound'], out=self.upper)
+        return self
+
+    def write(self, units=ReactionFluxBoundUnit['M s^-1']):
+        """ Set the flux bounds of the reactions to the values of the arrays
+
+        Args:
+            units (:obj:`ReactionFluxBoundUnit`, optional): units of the flux bounds
+        """
+        for rxn, lower, upper in zip(self.reactions, self.lower.tolist(), self.upper.tolist()):
+            rxn.flux_min = lower
+            rxn.flux_max = upper
+            rxn.flux_bound_units = units
+
+
+class DfbaLinearProgram(object):
+    """ Linear program of a dFBA submodel in standard form::
+
+        maximize    objective^T v
+        subject to  stoichiometry v = 0
+                    lower <= v <= upper
+
+    The variables are the fluxes of the reactions and the dFBA objective reactions of the submodel, and the
+    constraints are the mass balances of the species which participate in them. Undefined flux bounds of
+    reactions are unbounded, and the fluxes of dFBA objective reactions are non-negative.
+
+    The program can be written to MPS and CPLEX LP files, or its arrays can be passed directly to solvers.
+    To update the program at each time step, change :obj:`lower` and :obj:`upper` in place.
+
+    Attributes:
+        submodel (:obj:`wc_lang.core.Submodel`): submodel
+        variables (:obj:`list` of :obj:`wc_lang.core.Reaction` or :obj:`wc_lang.core.DfbaObjReaction`): reactions and
+            dFBA objective reactions
+        constraints (:obj:`list` of :obj:`wc_lang.core.Species`): species
+        stoichiometry (:obj:`scipy.sparse.csr_matrix`): stoichiometric matrix (constraints x variables)
+        lower (:obj:`numpy.ndarray`): lower bounds of the variables
+        upper (:obj:`numpy.ndarray`): upper bounds of the variables
+        objective (:obj:`numpy.ndarray`): coefficients of the variables in the objective
+    """
+
+    def __init__(self, submodel, variables, constraints, stoichiometry, lower, upper, objective):
+        """
+        Args:
+            submodel (:obj:`wc_lang.core.Submodel`): submodel
+            variables (:obj:`list` of :obj:`wc_lang.core.Reaction` or :obj:`wc_lang.core.DfbaObjReaction`): reactions
+                and dFBA objective reactions
+            constraints (:obj:`list` of :obj:`wc_lang.core.Species`): species
+            stoichiometry (:obj:`scipy.sparse.csr_matrix`): stoichiometric matrix (constraints x variables)
+            lower (:obj:`numpy.ndarray`): lower bounds of the variables
+            upper (:obj:`numpy.ndarray`): upper bounds of the variables
+            objective (:obj:`numpy.ndarray`): coefficients of the variables in the objective
+        """
+        self.submodel = submodel
+        self.variables = variables
+        self.constraints = constraints
+        self.stoichiometry = stoichiometry
+        self.lower = lower
+        self.upper = upper
+        self.objective = objective
+
+    @classmethod
+    def from_submodel(cls, submodel, bounds=None):
+        """ Generate the linear program of a dFBA submodel
+
+        Args:
+            submodel (:obj:`wc_lang.core.Submodel`): dFBA submodel
+            bounds (:obj:`DfbaFluxBounds`, optional): flux bounds of the reactions of the submodel;
+                default: the flux bounds of the reactions
+
+        Returns:
+            :obj:`DfbaLinearProgram`: linear program
+
+        Raises:
+            :obj:`ValueError`: if the objective of the submodel isn't a linear function of the fluxes of the
+                reactions and dFBA objective reactions of the submodel
+        """
+        if bounds is None:
+            bounds = DfbaFluxBounds.from_submodel(submodel)
+        rxns = bounds.reactions
+        dfba_obj_rxns = list(submodel.dfba_obj_reactions)
+        variables = rxns + dfba_obj_rxns
+        variable_index = {variable: i_variable for i_variable, variable in enumerate(variables)}
+
+        # stoichiometry
+        constraints = []
+        constraint_index = {}
+        rows = []
+        cols = []
+        vals = []
+
+        def add_entry(species, i_variable, coefficient):
+            i_constraint = constraint_index.get(species, None)
+            if i_constraint is None:
+                i_constraint = constraint_index[species] = len(constraints)
+                constraints.append(species)
+            rows.append(i_constraint)
+            cols.append(i_variable)
+            vals.append(coefficient)
+
+        for i_rxn, rxn in enumerate(rxns):
+            for part in rxn.participants:
+                add_entry(part.species, i_rxn, part.coefficient)
+        for i_dfba_obj_rxn, dfba_obj_rxn in enumerate(dfba_obj_rxns):
+            for dfba_obj_species in dfba_obj_rxn.dfba_obj_species:
+                add_entry(dfba_obj_species.species, len(rxns) + i_dfba_obj_rxn, dfba_obj_species.value)
+
+        stoichiometry = scipy.sparse.coo_matrix((vals, (rows, cols)), shape=(len(constraints), len(variables)),
+                                                dtype=numpy.float64).tocsr()
+
+        # bounds
+        lower = numpy.concatenate((numpy.where(numpy.isnan(bounds.lower), -numpy.inf, bounds.lower),
+                                   numpy.zeros(len(dfba_obj_rxns))))
+        upper = numpy.concatenate((numpy.where(numpy.isnan(bounds.upper), numpy.inf, bounds.upper),
+                                   numpy.full(len(dfba_obj_rxns), numpy.inf)))
+
+        # objective
+        objective = numpy.zeros(len(variables))
+        dfba_obj = submodel.dfba_obj
+        if dfba_obj and dfba_obj.expression:
+            parsed_expr = dfba_obj.expression._parsed_expression
+            if not parsed_expr.is_linear:
+                raise ValueError('The objective of submodel "{}" must be a linear function'.format(submodel.id))
+            for term_type in (Reaction, DfbaObjReaction):
+                for variable, coefficient in parsed_expr.lin_coeffs.get(term_type, {}).items():
+                    i_variable = variable_index.get(variable, None)
+                    if i_variable is None:
+                        raise ValueError('The objective of submodel "{}" must be a function of its reactions, not "{}"'.format(
+                            submodel.id, variable.id))
+                    objective[i_variable] += coefficient
+
+        return cls(submodel, variables, constraints, stoichiometry, lower, upper, objective)
+
+    def get_variable_names(self):
+        """ Get the names of the variables for LP files
+
+        Returns:
+            :obj:`list` of :obj:`str`: names of the variables
+        """
+        return [variable.id for variable in self.variables]
+
+    def get_constraint_names(self):
+        """ Get the names of the constraints for LP files
+
+        Returns:
+            :obj:`list` of :obj:`str`: names of the constraints
+        """
+        return [species.gen_sbml_id() for species in self.constraints]
+
+    def write(self, path):
+        """ Write the linear program to an MPS (`.mps`) or CPLEX LP (`.lp`) file
+
+        Args:
+            path (:obj:`str`): path
+
+        Raises:
+            :obj:`ValueError`: if the format of the file is not supported
+        """
+        if path.endswith('.mps'):
+            self.write_mps(path)
+        elif path.endswith('.lp'):
+            self.write_lp(path)
+        else:
+            raise ValueError('Unsupported format "{}"; the file must be an MPS (.mps) or LP (.lp) file'.format(path))
+
+    def write_mps(self, path):
+        """ Write the linear program to a free MPS file
+
+        Because the MPS format doesn't define the sense of the objective, the negated objective is minimized.
+
+        Args:
+            path (:obj:`str`): path
+        """
+        var_names = self.get_variable_names()
+        con_names = self.get_constraint_names()
+        stoichiometry = self.stoichiometry.tocsc()
+
+        lines = ['NAME {}'.format(self.submodel.id), 'ROWS', ' N obj']
+        for con_name in con_names:
+            lines.append(' E {}'.format(con_name))
+
+        lines.append('COLUMNS')
+        for i_var, var_name in enumerate(var_names):
+            start, end = stoichiometry.indptr[i_var], stoichiometry.indptr[i_var + 1]
+            if self.objective[i_var] or start == end:
+                lines.append(' {} obj {}'.format(var_name, format_number(-self.objective[i_var])))
+            for i_con, val in zip(stoichiometry.indices[start:end].tolist(), stoichiometry.data[start:end].tolist()):
+                lines.append(' {} {} {}'.format(var_name, con_names[i_con], format_number(val)))
+
+        lines.append('RHS')
+        lines.append('BOUNDS')
+        for var_name, lower, upper in zip(var_names, self.lower.tolist(), self.upper.tolist()):
+            if lower == upper:
+                lines.append(' FX bnd {} {}'.format(var_name, format_number(lower)))
+                continue
+            if lower == -numpy.inf and upper == numpy.inf:
+                lines.append(' FR bnd {}'.format(var_name))
+                continue
+            if lower == -numpy.inf:
+                lines.append(' MI bnd {}'.format(var_name))
+            else:
+                lines.append(' LO bnd {} {}'.format(var_name, format_number(lower)))
+            if upper != numpy.inf:
+                lines.append(' UP bnd {} {}'.format(var_name, format_number(upper)))
+        lines.append('ENDATA')
+
+        with open(path, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+    def write_lp(self, path):
+        """ Write the linear program to a CPLEX LP file
+
+        Args:
+            path (:obj:`str`): path
+        """
+        var_names = self.get_variable_names()
+        con_names = self.get_constraint_names()
+        stoichiometry = self.stoichiometry
+
+        lines = ['\\ dFBA submodel {}'.format(self.submodel.id), 'Maximize']
+        lines.append(' obj: ' + format_lp_terms(
+            [(coefficient, var_name) for var_name, coefficient in zip(var_names, self.objective.tolist()) if coefficient],
+            var_names))
+
+        lines.append('Subject To')
+        for i_con, con_name in enumerate(con_names):
+            start, end = stoichiometry.indptr[i_con], stoichiometry.indptr[i_con + 1]
+            terms = [(val, var_names[i_var])
+                     for i_var, val in zip(stoichiometry.indices[start:end].tolist(), stoichiometry.data[start:end].tolist())]
+            lines.append(' {}: {} = 0'.format(con_name, format_lp_terms(terms, var_names)))
+
+        lines.append('Bounds')
+        for var_name, lower, upper in zip(var_names, self.lower.tolist(), self.upper.tolist()):
+            if lower == -numpy.inf and upper == numpy.inf:
+                lines.append(' {} free'.format(var_name))
+            else:
+                lines.append(' {} <= {} <= {}'.format(format_number(lower), var_name, format_number(upper)))
+        lines.append('End')
+
+        with open(path, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
+
+
+def format_number(value):
+    """ Format a number for an MPS or LP file
+
+    Args:
+        value (:obj:`float`): number
+
+    Returns:
+        :obj:`str`: string representation of the number
+    """
+    if value == numpy.inf:
+        return '+inf'
+    if value == -numpy.inf:
+        return '-inf'
+    return repr(float(value))
+
+
+def format_lp_terms(terms, var_names):
+    """ Format a linear combination of variables for an LP file
+
+    Args:
+        terms (:obj:`list` of :obj:`tuple`): list of tuples of coefficients and names of variables
+        var_names (:obj:`list` of :obj:`str`): names of all of the variables, which are used to
+            represent an empty linear combination
+
+    Returns:
+        :obj:`str`: string representation of the linear combination
+    """
+    if not terms:
+        return '0 {}'.format(var_names[0]) if var_names else '0'
+    strs = []
+    for i_term, (coefficient, var_name) in enumerate(terms):
+        if i_term:
+            strs.append('-' if coefficient < 0 else '+')
+            strs.append('{} {}'.format(format_number(abs(coefficient)), var_name))
+        else:
+            strs.append('{} {}'.format(format_number(coefficient), var_name))
+    return ' '.join(strs)
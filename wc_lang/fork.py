@@ -0,0 +1,182 @@
+""" Copy-on-write variants of models for parameter sweeps
+
+A fork of a model records only the values of the attributes that it changes, and shares every other
+object and value with its base model. While a fork is active, its changes are applied to the base
+model, which can then be read, validated, simulated, and exported as a normal :obj:`wc_lang.core.Model`.
+When the fork is deactivated, the original values are restored. This enables thousands of variants
+of a model to be kept in memory at once::
+
+    base = wc_lang.io.Reader().run('model.xlsx')
+    variants = []
+    for value in values:
+        variant = ModelFork(base)
+        variant.set((('parameters', {'id': 'k_cat'}), 'value'), value)
+        variants.append(variant)
+
+    for variant in variants:
+        with variant as model:
+            ...
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from wc_lang.transform.change_value import resolve_attr_path
+import collections
+import json
+
+
+class ModelFork(object):
+    """ Copy-on-write variant of a model
+
+    Attributes:
+        base (:obj:`wc_lang.core.Model`): base model
+        parent (:obj:`ModelFork`): fork that this fork was derived from, or :obj:`None`
+        changes (:obj:`collections.OrderedDict`): dictionary which maps the string representation of
+            the path to each changed attribute to a tuple of the path and the new value
+        _original_values (:obj:`list` of :obj:`tuple`): objects, names, and original values of the changed
+            attributes while the fork is active
+    """
+
+    _active_forks = {}
+    # :obj:`dict`: dictionary which maps the Python ids of base models to their active forks
+
+    def __init__(self, base, parent=None):
+        """
+        Args:
+            base (:obj:`wc_lang.core.Model`): base model
+            parent (:obj:`ModelFork`, optional): fork that this fork is derived from
+        """
+        self.base = base
+        self.parent = parent
+        self.changes = collections.OrderedDict()
+        self._original_values = None
+
+    def set(self, attr_path, value):
+        """ Change the value of an attribute
+
+        Args:
+            attr_path (:obj:`list` of :obj:`list` of :obj:`str`): list that
+                represents the path to an attribute or nested attribute of a model
+                (see :obj:`wc_lang.transform.ChangeValueTransform`)
+            value (:obj:`object`): new value
+
+        Raises:
+            :obj:`ValueError`: if the fork is active or the path does not refer to an attribute of the base model
+        """
+        if self.is_active():
+            raise ValueError('The changes of an active fork cannot be modified')
+        resolve_attr_path(self.base, attr_path)
+        self.changes[get_attr_path_key(attr_path)] = (attr_path, value)
+
+    def get(self, attr_path):
+        """ Get the value of an attribute in the fork, without activating the fork
+
+        Args:
+            attr_path (:obj:`list` of :obj:`list` of :obj:`str`): list that
+                represents the path to an attribute or nested attribute of a model
+
+        Returns:
+            :obj:`object`: value of the attribute
+        """
+        key = get_attr_path_key(attr_path)
+        fork = self
+        while fork is not None:
+            if key in fork.changes:
+                return fork.changes[key][1]
+            fork = fork.parent
+        obj, attr_name = resolve_attr_path(self.base, attr_path)
+        return getattr(obj, attr_name)
+
+    def get_changes(self):
+        """ Get the changes of the fork, including the changes of the forks that it was derived from
+
+        Returns:
+            :obj:`list` of :obj:`tuple`: list of tuples of the path to each changed attribute and its new value
+        """
+        changes = collections.OrderedDict()
+        if self.parent:
+            for attr_path, value in self.parent.get_changes():
+                changes[get_attr_path_key(attr_path)] = (attr_path, value)
+        changes.update(self.changes)
+        return list(changes.values())
+
+    def fork(self):
+        """ Derive a fork from this fork
+
+        Returns:
+            :obj:`ModelFork`: fork which inherits the changes of this fork
+        """
+        return self.__class__(self.base, parent=self)
+
+    def is_active(self):
+        """ Determine whether the changes of the fork are applied to the base model
+
+        Returns:
+            :obj:`bool`: :obj:`True` if the fork is active
+        """
+        return self._original_values is not None
+
+    def activate(self):
+        """ Apply the changes of the fork to the base model
+
+        Returns:
+            :obj:`wc_lang.core.Model`: base model, with the changes of the fork
+
+        Raises:
+            :obj:`ValueError`: if another fork of the base model is already active
+        """
+        active_fork = self._active_forks.get(id(self.base), None)
+        if active_fork is not None:
+            if active_fork is self:
+                return self.base
+            raise ValueError('Another fork of the model is already active')
+
+        self._original_values = []
+        self._active_forks[id(self.base)] = self
+        try:
+            for attr_path, value in self.get_changes():
+                obj, attr_name = resolve_attr_path(self.base, attr_path)
+                self._original_values.append((obj, attr_name, getattr(obj, attr_name)))
+                setattr(obj, attr_name, value)
+        except Exception:
+            self.deactivate()
+            raise
+
+        return self.base
+
+    def deactivate(self):
+        """ Restore the original values of the attributes of the base model changed by the fork """
+        if not self.is_active():
+            return
+        for obj, attr_name, value in reversed(self._original_values):
+            setattr(obj, attr_name, value)
+        self._original_values = None
+        self._active_forks.pop(id(self.base))
+
+    def __enter__(self):
+        """ Apply the changes of the fork to the base model
+
+        Returns:
+            :obj:`wc_lang.core.Model`: base model, with the changes of the fork
+        """
+        return self.activate()
+
+    def __exit__(self, type, value, traceback):
+        """ Restore the original values of the attributes of the base model changed by the fork """
+        self.deactivate()
+
+
+def get_attr_path_key(attr_path):
+    """ Get a string representation of a path to an attribute which can be used as a dictionary key
+
+    Args:
+        attr_path (:obj:`list` of :obj:`list` of :obj:`str`): list that
+            represents the path to an attribute or nested attribute of a model
+
+    Returns:
+        :obj:`str`: string representation of the path
+    """
+    return json.dumps(attr_path, sort_keys=True, default=str)
@@ -5,6 +5,7 @@ Supported file types:
 * Comma separated values (.csv)
 * Excel (.xlsx)
 * Tab separated values (.tsv)
+* Compressed archives of tab separated values (.zip)
 
 :Author: Jonathan Karr <karr@mssm.edu>
 :Date: 2016-12-05
@@ -15,14 +16,27 @@ Supported file types:
 from wc_lang import core
 from wc_lang import util
 from wc_utils.util.string import indent_forest
+import collections
+import contextlib
+import functools
+import json
 import obj_model
 import os
+import shutil
+import tempfile
+import time
+import tracemalloc
 import wc_lang
 import wc_lang.config.core
+import zipfile
 
 
 class Writer(object):
-    """ Write model to file(s) """
+    """ Write model to file(s)
+
+    Attributes:
+        stats (:obj:`IoStats`): statistics of the last run, if it was profiled
+    """
 
     model_order = [
         core.Model, core.Taxon, core.Environment,
@@ -34,7 +48,10 @@ class Writer(object):
         core.Evidence, core.Reference,
     ]
 
-    def run(self, model, path, set_repo_metadata_from_path=True):
+    def __init__(self):
+        self.stats = None
+
+    def run(self, model, path, set_repo_metadata_from_path=True, profile=False):
         """ Write model to file(s)
 
         Args:
@@ -42,27 +59,67 @@ class Writer(object):
             path (:obj:`str`): path to file(s)
             set_repo_metadata_from_path (:obj:`bool`, optional): if :obj:`True`, set the Git repository metadata (URL,
                 branch, revision) for the model from the parent directory of :obj:`core_path`
+            profile (:obj:`bool`, optional): if :obj:`True`, record the time, numbers of rows, and memory allocated
+                by each phase of writing the model and by each worksheet in :obj:`stats`
         """
         config = wc_lang.config.core.get_config()['wc_lang']['io']
-        
-        self.validate_implicit_relationships()
-
-        # check that there is only 1 :obj:`Model`and that each relationship to :obj:`Model` is set. This is necessary to
-        # enable the relationships to :obj:`Model` to be implicit in the Excel output and added by :obj:`Reader.run`
-        for obj in model.get_related():
-            for attr in obj.Meta.attributes.values():
-                if isinstance(attr, obj_model.RelatedAttribute) and \
-                        attr.related_class == core.Model:
-                    if getattr(obj, attr.name) != model:
-                        raise ValueError('{}.{} must be set to the instance of `Model`'.format(obj.__class__.__name__, attr.name))
-
-        # set Git repository metadata from the parent directories of :obj:`core_path`
-        if set_repo_metadata_from_path:
-            util.set_git_repo_metadata_from_path(model, path)
-
-        # write objects
+        self.stats = IoStats() if profile else None
+        stats = self.stats or _NullIoStats()
+
+        with stats, util.metrics.timer('wc_lang_io_write_seconds'):
+            with stats.phase('check'):
+                self.validate_implicit_relationships()
+
+                # check that there is only 1 :obj:`Model`and that each relationship to :obj:`Model` is set. This is
+                # necessary to enable the relationships to :obj:`Model` to be implicit in the Excel output and added
+                # by :obj:`Reader.run`
+                related_objs = model.get_related()
+                for obj in related_objs:
+                    for attr in obj.Meta.attributes.values():
+                        if isinstance(attr, obj_model.RelatedAttribute) and \
+                                attr.related_class == core.Model:
+                            if getattr(obj, attr.name) != model:
+                                raise ValueError('{}.{} must be set to the instance of `Model`'.format(
+                                    obj.__class__.__name__, attr.name))
+                stats.count_rows(related_objs, self.model_order)
+                if util.metrics.enabled:
+                    for cls_name, count in collections.Counter(obj.__class__.__name__ for obj in related_objs).items():
+                        util.metrics.increment('wc_lang_io_objects_written_total', count, labels={'class': cls_name})
+
+            # set Git repository metadata from the parent directories of :obj:`core_path`
+            if set_repo_metadata_from_path:
+                with stats.phase('git_metadata'):
+                    util.set_git_repo_metadata_from_path(model, path)
+
+            # write objects
+            _, ext = os.path.splitext(path)
+            if ext == ModelArchive.EXT:
+                dirname = tempfile.mkdtemp()
+                try:
+                    with stats.phase('write'):
+                        self._write_objects(model, os.path.join(dirname, '*' + ModelArchive.MEMBER_EXT), config,
+                                            stats=stats)
+                    with stats.phase('pack'):
+                        ModelArchive(path).pack(dirname)
+                finally:
+                    shutil.rmtree(dirname)
+            else:
+                with stats.phase('write'):
+                    self._write_objects(model, path, config, stats=stats)
+
+    def _write_objects(self, model, path, config, stats=None):
+        """ Write the objects of a model to file(s) with :obj:`obj_model.io`
+
+        Args:
+            model (:obj:`core.Model`): model
+            path (:obj:`str`): path to file(s)
+            config (:obj:`dict`): I/O configuration
+            stats (:obj:`IoStats`, optional): statistics to record the time and memory of writing each worksheet
+        """
         _, ext = os.path.splitext(path)
         writer = obj_model.io.get_writer(ext)()
+        if stats is not None:
+            stats.instrument(writer, IoStats.WRITER_SHEET_PHASES)
 
         kwargs = {
             'validate': config['validate'],
@@ -94,13 +151,22 @@ class Writer(object):
 
 
 class Reader(object):
-    """ Read model from file(s) """
+    """ Read model from file(s)
 
-    def run(self, path):
+    Attributes:
+        stats (:obj:`IoStats`): statistics of the last run, if it was profiled
+    """
+
+    def __init__(self):
+        self.stats = None
+
+    def run(self, path, profile=False):
         """ Read model from file(s)
 
         Args:
             path (:obj:`str`): path to file(s)
+            profile (:obj:`bool`, optional): if :obj:`True`, record the time, numbers of rows, and memory allocated
+                by each phase of reading the model and by each worksheet in :obj:`stats`
 
         Returns:
             :obj:`core.Model`: model
@@ -109,12 +175,90 @@ class Reader(object):
             :obj:`ValueError`: if :obj:`path` defines multiple models
         """
         config = wc_lang.config.core.get_config()['wc_lang']['io']
+        self.stats = IoStats() if profile else None
+        stats = self.stats or _NullIoStats()
 
         Writer.validate_implicit_relationships()
 
-        # read objects from file
+        with stats, util.metrics.timer('wc_lang_io_read_seconds'):
+            # read objects from file
+            _, ext = os.path.splitext(path)
+            if ext == ModelArchive.EXT:
+                # only decompress the sheets which represent the classes of `wc_lang`
+                dirname = tempfile.mkdtemp()
+                try:
+                    with stats.phase('extract'):
+                        archive = ModelArchive(path)
+                        sheet_names = archive.get_sheet_names(models=Writer.model_order)
+                        pattern = archive.extract(dirname, sheet_names=sheet_names)
+                    with stats.phase('read'):
+                        objects = self._read_objects(pattern, config, stats=stats)
+                finally:
+                    shutil.rmtree(dirname)
+            else:
+                with stats.phase('read'):
+                    objects = self._read_objects(path, config, stats=stats)
+            stats.count_rows(obj for cls_objects in objects.values() for obj in cls_objects)
+            if util.metrics.enabled:
+                for cls, cls_objects in objects.items():
+                    util.metrics.increment('wc_lang_io_objects_read_total', len(cls_objects),
+                                           labels={'class': cls.__name__})
+
+            # check that file only has 0 or 1 models
+            if not objects[core.Model]:
+                for cls, cls_objects in objects.items():
+                    if cls_objects:
+                        raise ValueError('"{}" cannot contain instances of `{}` without an instance of `Model`'.format(
+                            path, cls.__name__))
+                return None
+
+            elif len(objects[core.Model]) > 1:
+                raise ValueError('"{}" should define one model'.format(path))
+
+            else:
+                model = objects[core.Model].pop()
+
+            # add implicit relationships to `Model`
+            with stats.phase('implicit_relationships'):
+                for cls, cls_objects in objects.items():
+                    for attr in cls.Meta.attributes.values():
+                        if isinstance(attr, obj_model.RelatedAttribute) and \
+                                attr.related_class == core.Model:
+                            for cls_obj in cls_objects:
+                                setattr(cls_obj, attr.name, model)
+
+            # validate
+            if config['validate']:
+                with stats.phase('validate'), util.metrics.timer('wc_lang_validation_seconds'):
+                    objs = [model]
+                    for cls_objs in objects.values():
+                        objs.extend(cls_objs)
+
+                    errors = obj_model.Validator().validate(objs)
+                if errors:
+                    if util.metrics.enabled:
+                        util.metrics.increment('wc_lang_validation_errors_total', len(errors.invalid_objects))
+                    raise ValueError(
+                        indent_forest(['The model cannot be loaded because it fails to validate:', [errors]]))
+
+            # return model
+            return model
+
+    def _read_objects(self, path, config, stats=None):
+        """ Read the objects of a model from file(s) with :obj:`obj_model.io`
+
+        Args:
+            path (:obj:`str`): path to file(s)
+            config (:obj:`dict`): I/O configuration
+            stats (:obj:`IoStats`, optional): statistics to record the time and memory of reading each worksheet
+
+        Returns:
+            :obj:`dict`: dictionary that maps classes to lists of their instances
+        """
         _, ext = os.path.splitext(path)
         reader = obj_model.io.get_reader(ext)()
+        if stats is not None:
+            stats.instrument(reader, IoStats.READER_SHEET_PHASES)
 
         kwargs = {}
         if isinstance(reader, obj_model.io.WorkbookReader):
@@ -126,47 +270,403 @@ class Reader(object):
                 kwargs['ignore_missing_attributes'] = True
                 kwargs['ignore_extra_attributes'] = True
                 kwargs['ignore_attribute_order'] = True
-        objects = reader.run(path, models=Writer.model_order, validate=False, **kwargs)
+        return reader.run(path, models=Writer.model_order, validate=False, **kwargs)
+
+
+class IoStats(object):
+    """ Wall times, numbers of rows, and memory allocations of the phases of reading or writing a model
+
+    The wall time and the net memory allocated by Python (measured with :obj:`tracemalloc`) are recorded for each
+    phase of :obj:`Reader.run` and :obj:`Writer.run` (e.g., reading the objects, adding the implicit relationships
+    to :obj:`core.Model`, validating the objects). Within the phases which :obj:`obj_model.io` carries out one
+    worksheet at a time (parsing and linking the rows of each sheet, writing each sheet), they are also recorded for
+    each sheet. Because tracing memory slows Python, the times are more accurate when :obj:`trace_memory` is
+    :obj:`False`.
+
+    Attributes:
+        trace_memory (:obj:`bool`): if :obj:`True`, record the memory allocated by each phase
+        time (:obj:`float`): wall time of the entire run (s)
+        peak_memory (:obj:`int`): peak memory traced during the run (bytes)
+        phases (:obj:`collections.OrderedDict`): dictionary which maps the name of each phase to its wall time (s)
+            and net memory allocated (bytes)
+        sheets (:obj:`collections.OrderedDict`): dictionary which maps the name of each worksheet to its number of
+            rows and the wall times and net memory allocated by the phases which process it
+    """
+
+    READER_SHEET_PHASES = collections.OrderedDict([('read_model', 'parse'), ('link_model', 'link')])
+    # :obj:`collections.OrderedDict`: dictionary which maps the names of the methods of :obj:`obj_model.io.Reader`
+    # which process one sheet at a time to the names of their phases
 
-        # check that file only has 0 or 1 models
-        if not objects[core.Model]:
-            for cls, cls_objects in objects.items():
-                if cls_objects:
-                    raise ValueError('"{}" cannot contain instances of `{}` without an instance of `Model`'.format(
-                        path, cls.__name__))
-            return None
+    WRITER_SHEET_PHASES = collections.OrderedDict([('write_model', 'write')])
+    # :obj:`collections.OrderedDict`: dictionary which maps the names of the methods of :obj:`obj_model.io.Writer`
+    # which process one sheet at a time to the names of their phases
 
-        elif len(objects[core.Model]) > 1:
-            raise ValueError('"{}" should define one model'.format(path))
+    def __init__(self, trace_memory=True):
+        """
+        Args:
+            trace_memory (:obj:`bool`, optional): if :obj:`True`, record the memory allocated by each phase
+        """
+        self.trace_memory = trace_memory
+        self.time = None
+        self.peak_memory = None
+        self.phases = collections.OrderedDict()
+        self.sheets = collections.OrderedDict()
+        self._start = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        """ Start recording a run """
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._start = time.time()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """ Stop recording a run """
+        self.time = time.time() - self._start
+        if self.trace_memory and tracemalloc.is_tracing():
+            _, self.peak_memory = tracemalloc.get_traced_memory()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        return False
+
+    @contextlib.contextmanager
+    def phase(self, name, sheet=None):
+        """ Record the wall time and memory allocated by a phase
 
+        Args:
+            name (:obj:`str`): name of the phase
+            sheet (:obj:`str`, optional): name of the worksheet processed by the phase
+        """
+        if sheet is None:
+            phases = self.phases
         else:
-            model = objects[core.Model].pop()
+            phases = self._get_sheet(sheet)['phases']
+        record = phases.setdefault(name, {'time': 0., 'memory': 0 if self.trace_memory else None})
+
+        memory = self._get_memory()
+        start = time.time()
+        try:
+            yield
+        finally:
+            record['time'] += time.time() - start
+            if memory is not None:
+                record['memory'] += self._get_memory() - memory
+
+    def count_rows(self, objs, models=None):
+        """ Record the number of rows of each worksheet, i.e. the number of instances of each class
+
+        Args:
+            objs (:obj:`iterable` of :obj:`obj_model.Model`): objects
+            models (:obj:`list` of :obj:`type`, optional): if provided, only count the instances of these classes
+        """
+        counts = collections.Counter(obj.__class__ for obj in objs)
+        for cls in (models or counts.keys()):
+            if cls in counts:
+                self._get_sheet(ModelArchive.get_sheet_name(cls))['rows'] = counts[cls]
+
+    def instrument(self, obj, method_phases):
+        """ Record the wall time and memory of each call of the methods of a :obj:`obj_model.io` reader or
+        writer which process one worksheet, i.e. one class, at a time
+
+        Methods which the reader or writer doesn't have are ignored.
+
+        Args:
+            obj (:obj:`object`): reader or writer
+            method_phases (:obj:`dict`): dictionary which maps the names of the methods to the names of
+                their phases
+        """
+        for method_name, phase in method_phases.items():
+            method = getattr(obj, method_name, None)
+            if method is not None:
+                setattr(obj, method_name, self._instrument_method(method, phase))
+
+    def _instrument_method(self, method, phase):
+        """ Wrap a method which processes one class at a time to record its time and memory under the sheet
+        of the class
+
+        Args:
+            method (:obj:`callable`): method
+            phase (:obj:`str`): name of the phase
+
+        Returns:
+            :obj:`callable`: wrapped method
+        """
+        @functools.wraps(method)
+        def instrumented_method(*args, **kwargs):
+            for arg in args:
+                if isinstance(arg, type) and issubclass(arg, obj_model.Model):
+                    with self.phase(phase, sheet=ModelArchive.get_sheet_name(arg)):
+                        return method(*args, **kwargs)
+            return method(*args, **kwargs)
+        return instrumented_method
+
+    def get_summary(self):
+        """ Get a textual summary of the statistics
+
+        Returns:
+            :obj:`str`: summary
+        """
+        lines = []
+        lines.append('Total: {}'.format(self._format(self.time, self.peak_memory)))
+        for name, record in self.phases.items():
+            lines.append('{}: {}'.format(name, self._format(record['time'], record['memory'])))
+        for name, sheet in self.sheets.items():
+            phases = ['{} {}'.format(phase, self._format(record['time'], record['memory']))
+                      for phase, record in sheet['phases'].items()]
+            lines.append('  {}: {} rows{}'.format(name, sheet['rows'] if sheet['rows'] is not None else '?',
+                                                  ''.join('; ' + phase for phase in phases)))
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _format(time, memory):
+        """ Format a time and an amount of memory
+
+        Args:
+            time (:obj:`float`): time (s)
+            memory (:obj:`int`): memory (bytes)
+
+        Returns:
+            :obj:`str`: formatted time and memory
+        """
+        if time is None:
+            return '?'
+        if memory is None:
+            return '{:.3f} s'.format(time)
+        return '{:.3f} s, {:.1f} MB'.format(time, memory / 2 ** 20)
+
+    def _get_sheet(self, name):
+        """ Get the statistics of a worksheet
+
+        Args:
+            name (:obj:`str`): sheet name
+
+        Returns:
+            :obj:`dict`: number of rows and statistics of the phases of the sheet
+        """
+        sheet = self.sheets.get(name, None)
+        if sheet is None:
+            sheet = self.sheets[name] = {'rows': None, 'phases': collections.OrderedDict()}
+        return sheet
+
+    def _get_memory(self):
+        """ Get the memory currently traced by :obj:`tracemalloc`
+
+        Returns:
+            :obj:`int`: memory (bytes), or :obj:`None` if memory isn't being traced
+        """
+        if self.trace_memory and tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[0]
+        return None
+
+
+class _NullIoStats(object):
+    """ Stand-in for :obj:`IoStats` which records nothing, so that unprofiled runs have almost no overhead """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+    def phase(self, name, sheet=None):
+        return self
+
+    def count_rows(self, objs, models=None):
+        pass
+
+    def instrument(self, obj, method_phases):
+        pass
+
 
-        # add implicit relationships to `Model`
-        for cls, cls_objects in objects.items():
-            for attr in cls.Meta.attributes.values():
-                if isinstance(attr, obj_model.RelatedAttribute) and \
-                        attr.related_class == core.Model:
-                    for cls_obj in cls_objects:
-                        setattr(cls_obj, attr.name, model)
+class ModelArchive(object):
+    """ Compressed, single-file container of the worksheets of a model
 
-        # validate
-        if config['validate']:
-            objs = [model]
-            for cls_objs in objects.values():
-                objs.extend(cls_objs)
+    Each worksheet is stored as a separate, deflate-compressed tab-separated member of a zip
+    archive. The archive also contains a JSON manifest which indexes the members by sheet
+    and class. This enables individual sheets to be read without decompressing the entire
+    archive.
 
-            errors = obj_model.Validator().validate(objs)
-            if errors:
-                raise ValueError(
-                    indent_forest(['The model cannot be loaded because it fails to validate:', [errors]]))
+    Attributes:
+        path (:obj:`str`): path to the archive
+    """
+
+    EXT = '.zip'
+    MEMBER_EXT = '.tsv'
+    MANIFEST_NAME = 'manifest.json'
+
+    def __init__(self, path):
+        """
+        Args:
+            path (:obj:`str`): path to the archive
+        """
+        self.path = path
+
+    @staticmethod
+    def get_sheet_name(cls):
+        """ Get the name of the worksheet which represents a class
+
+        Args:
+            cls (:obj:`type`): subclass of :obj:`obj_model.Model`
+
+        Returns:
+            :obj:`str`: sheet name
+        """
+        if cls.Meta.tabular_orientation == obj_model.TabularOrientation.column:
+            return cls.Meta.verbose_name
+        return cls.Meta.verbose_name_plural
+
+    def pack(self, dirname):
+        """ Pack the tab-separated worksheets in a directory into the archive
+
+        Args:
+            dirname (:obj:`str`): directory which contains the worksheets
+        """
+        cls_names = {self.get_sheet_name(cls): cls.__name__ for cls in Writer.model_order}
+
+        sheets = []
+        with zipfile.ZipFile(self.path, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for filename in sorted(os.listdir(dirname)):
+                sheet_name, ext = os.path.splitext(filename)
+                if ext != self.MEMBER_EXT:
+                    continue
+                archive.write(os.path.join(dirname, filename), arcname=filename)
+                info = archive.getinfo(filename)
+                sheets.append({
+                    'name': sheet_name,
+                    'member': filename,
+                    'model': cls_names.get(sheet_name, None),
+                    'size': info.file_size,
+                    'compressed_size': info.compress_size,
+                })
+
+            manifest = {
+                'language': 'wc_lang',
+                'version': wc_lang.__version__,
+                'sheets': sheets,
+            }
+            archive.writestr(self.MANIFEST_NAME, json.dumps(manifest, indent=2))
+
+    def get_manifest(self):
+        """ Get the manifest of the archive
+
+        Returns:
+            :obj:`dict`: manifest
+
+        Raises:
+            :obj:`ValueError`: if the archive does not have a manifest
+        """
+        with zipfile.ZipFile(self.path, 'r') as archive:
+            return self._read_manifest(archive)
+
+    def get_sheet_names(self, models=None):
+        """ Get the names of the worksheets in the archive
+
+        Args:
+            models (:obj:`list` of :obj:`type`, optional): if provided, only get the names of the
+                sheets which represent these classes
+
+        Returns:
+            :obj:`list` of :obj:`str`: sheet names
+        """
+        sheets = self.get_manifest()['sheets']
+        if models is None:
+            return [sheet['name'] for sheet in sheets]
+        cls_names = set(cls.__name__ for cls in models)
+        return [sheet['name'] for sheet in sheets if sheet['model'] in cls_names]
+
+    def read_sheet(self, sheet_name):
+        """ Decompress a single worksheet of the archive
+
+        Args:
+            sheet_name (:obj:`str`): sheet name
+
+        Returns:
+            :obj:`str`: tab-separated content of the sheet
+
+        Raises:
+            :obj:`ValueError`: if the archive does not contain the sheet
+        """
+        with zipfile.ZipFile(self.path, 'r') as archive:
+            members = self._get_members(self._read_manifest(archive))
+            return archive.read(self._get_member(sheet_name, members)).decode('utf-8')
+
+    def extract(self, dirname, sheet_names=None):
+        """ Decompress worksheets of the archive into a directory
 
-        # return model
-        return model
+        The archive is opened, and its manifest is read, once for all of the sheets.
+
+        Args:
+            dirname (:obj:`str`): directory to save the worksheets
+            sheet_names (:obj:`list` of :obj:`str`, optional): names of the sheets to decompress;
+                if :obj:`None`, decompress all sheets
 
+        Returns:
+            :obj:`str`: glob pattern of the paths to the decompressed worksheets
+
+        Raises:
+            :obj:`ValueError`: if the archive does not contain one of the sheets
+        """
+        with zipfile.ZipFile(self.path, 'r') as archive:
+            members = self._get_members(self._read_manifest(archive))
+            if sheet_names is None:
+                sheet_names = list(members.keys())
+            for sheet_name in sheet_names:
+                archive.extract(self._get_member(sheet_name, members), path=dirname)
+        return os.path.join(dirname, '*' + self.MEMBER_EXT)
+
+    def _read_manifest(self, archive):
+        """ Read the manifest of the archive
+
+        Args:
+            archive (:obj:`zipfile.ZipFile`): open archive
+
+        Returns:
+            :obj:`dict`: manifest
+
+        Raises:
+            :obj:`ValueError`: if the archive does not have a manifest
+        """
+        if self.MANIFEST_NAME not in archive.namelist():
+            raise ValueError('"{}" is not a model archive because it does not have a manifest'.format(self.path))
+        return json.loads(archive.read(self.MANIFEST_NAME).decode('utf-8'))
 
-def convert(source, destination):
-    """ Convert among Excel (.xlsx), comma separated (.csv), and tab separated (.tsv) file formats
+    @staticmethod
+    def _get_members(manifest):
+        """ Get the names of the members of the archive which contain each worksheet
+
+        Args:
+            manifest (:obj:`dict`): manifest of the archive
+
+        Returns:
+            :obj:`collections.OrderedDict`: dictionary which maps sheet names to member names
+        """
+        return collections.OrderedDict((sheet['name'], sheet['member']) for sheet in manifest['sheets'])
+
+    def _get_member(self, sheet_name, members):
+        """ Get the name of the member of the archive which contains a worksheet
+
+        Args:
+            sheet_name (:obj:`str`): sheet name
+            members (:obj:`dict`): dictionary which maps sheet names to member names (see :obj:`_get_members`)
+
+        Returns:
+            :obj:`str`: member name
+
+        Raises:
+            :obj:`ValueError`: if the archive does not contain the sheet
+        """
+        member = members.get(sheet_name, None)
+        if member is None:
+            raise ValueError('"{}" does not contain sheet "{}"'.format(self.path, sheet_name))
+        return member
+
+
+def convert(source, destination, profile=False):
+    """ Convert among Excel (.xlsx), comma separated (.csv), tab separated (.tsv), and compressed archive (.zip)
+    file formats
 
     Read a model from the `source` files(s) and write it to the `destination` files(s). A path to a
     delimiter separated set of models must be represented by a Unix glob pattern (with a \\*) that
@@ -175,9 +675,17 @@ def convert(source, destination):
     Args:
         source (:obj:`str`): path to source file(s)
         destination (:obj:`str`): path to save converted file
+        profile (:obj:`bool`, optional): if :obj:`True`, record statistics of reading and writing the model
+
+    Returns:
+        :obj:`tuple` of :obj:`IoStats`: statistics of reading and writing the model, or :obj:`None` if
+            :obj:`profile` is :obj:`False`
     """
-    model = Reader().run(source)
-    Writer().run(model, destination, set_repo_metadata_from_path=False)
+    reader = Reader()
+    writer = Writer()
+    model = reader.run(source, profile=profile)
+    writer.run(model, destination, set_repo_metadata_from_path=False, profile=profile)
+    return reader.stats, writer.stats
 
 
 def create_template(path, set_repo_metadata_from_path=True):
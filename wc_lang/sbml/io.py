@@ -10,19 +10,25 @@ Representations include
 :License: MIT
 """
 
+import collections
+import itertools
 import libsbml
+import math
+import multiprocessing
 import os
 import warnings
 from os.path import split, join
-from six import iteritems
+from xml.sax.saxutils import escape
 
 from obj_model import Validator
-from wc_lang.sbml.util import (init_sbml_model, create_sbml_doc_w_fbc)
+from wc_lang.sbml.util import (init_sbml_model, create_sbml_doc_w_fbc, xmlstr_to_str, get_sbml_id,
+                               SBMLMathTranslator,
+                               SBML_LEVEL, SBML_VERSION, FBC_VERSION)
 import wc_lang
 
 '''
-wc_lang to SBML mapping to support FBA modeling
-Individual wc_lang submodels that use dFBA are mapped to individual SBML documents and files.
+wc_lang to SBML mapping to support FBA, ODE, and SSA modeling
+Individual wc_lang submodels are mapped to individual SBML documents and files.
 
 WC                              SBML                                                                  Status
 -----                           -----                                                                 ------
@@ -36,8 +42,10 @@ Species                         Species
 DistributionInitConcentration   Distributions of initial concentrations are incorporated in Species   NA
 Reaction                        Reaction, with FbcReactionPlugin for DFBA submodels                   Implemented
 SpeciesCoefficient              SpeciesReference in a Reaction                                        Implemented
-RateLaw                         KineticLaw                                                            Ignored
-RateLawExpression
+RateLaw                         KineticLaw, for ODE and SSA submodels                                 Implemented
+RateLawExpression               Math of KineticLaw                                                    Implemented
+Observable                      Parameter, with an AssignmentRule                                     Implemented
+Function                        Parameter, with an AssignmentRule                                     Implemented
 DfbaObjSpecies
 DfbaObjReaction                 TBD
 Parameter                       Parameter                                                             Implemented
@@ -52,38 +60,38 @@ comments                notes
 references              notes, as a Python dict
 '''
 
-#   class Reader(object):
-#       """ Read model objects from an SBML representation """
-#
-#       @staticmethod
-#       def run(self, objects, models, path=None, get_related=True,
-#           title=None, description=None, keywords=None, version=None,
-#           language=None, creator=None):
-#           """ Write a list of model objects to a string or a file in an SBML format.
-#
-#           Warning: this is an unimplemented placeholder.
-#
-#           Args:
-#               objects (:obj:`list`): list of objects
-#               models (:obj:`list`): list of model, in the order that they should
-#                   appear as worksheets; all models which are not in `models` will
-#                   follow in alphabetical order
-#               path (:obj:`str`, optional): path of SBML file to write
-#               title (:obj:`str`, optional): title
-#               description (:obj:`str`, optional): description
-#               keywords (:obj:`str`, optional): keywords
-#               version (:obj:`str`, optional): version
-#               language (:obj:`str`, optional): language
-#               creator (:obj:`str`, optional): creator
-#           """
-#           pass
+class Reader(object):
+    """ Read a model from an SBML representation """
+
+    @staticmethod
+    def run(path):
+        """ Read a model from an SBML L3 FBC v2 file, such as a file created by :obj:`Writer`
+
+        Args:
+            path (:obj:`str`): path of SBML file to read
+
+        Returns:
+            :obj:`Model`: a `Model` with one dFBA `Submodel`
+
+        Raises:
+            :obj:`ValueError`: if the file can't be read or contains errors
+        """
+        sbml_document = libsbml.readSBMLFromFile(str(path))
+        errors = []
+        for i_error in range(sbml_document.getNumErrors()):
+            error = sbml_document.getError(i_error)
+            if error.isError() or error.isFatal():
+                errors.append(error.getMessage().strip())
+        if errors:
+            raise ValueError("SBML file '{}' could not be read:\n  {}".format(path, '\n  '.join(errors)))
+        return SBMLExchange.read(sbml_document)
 
 
 class Writer(object):
     """ Write an SBML representation of a model  """
 
     @staticmethod
-    def run(model, algorithms=None, path=None):
+    def run(model, algorithms=None, path=None, workers=1, stream=False):
         """ Write the `model`'s submodels in SBML.
 
         Each `Submodel` in `Model` `model` whose algorithm is in `algorithms`
@@ -91,11 +99,27 @@ class Writer(object):
         If `path` is None, then the SBML is returned in string(s), otherwise it's written to file(s)
         which are named `path + submodel.id + suffix`.
 
+        If `workers` is greater than 1 and `path` is set, the document of each submodel is built and written
+        to its file in a separate worker process forked from this process. The workers share the model with
+        this process without pickling it, and only return the path of each file to this process. If `path` is
+        None, the documents are built in this process because the SBML documents returned would otherwise have
+        to be re-parsed one after another in this process. On platforms which can't fork processes, the
+        documents are also built in this process.
+
+        If `stream` is `True` and `path` is set, the SBML of each submodel is streamed to its file by
+        :obj:`SBMLStreamWriter`, without building SBML documents.
+
+        Each object is validated at most once, even if it is shared by several submodels.
+
         Args:
             model (:obj:`Model`): a `Model`
             algorithms (:obj:`list`, optional): list of `SubmodelAlgorithm` attributes, defaulting
                 to `[SubmodelAlgorithm.dfba]`
             path (:obj:`str`, optional): prefix of path of SBML file(s) to write
+            workers (:obj:`int`, optional): number of worker processes used to write the files of the submodels;
+                default: build and write the documents in this process
+            stream (:obj:`bool`, optional): if :obj:`True` and `path` is set, stream the SBML of each submodel to its
+                file without building SBML documents
 
         Returns:
             :obj:`dict` of `str`:
@@ -104,55 +128,160 @@ class Writer(object):
         """
         if algorithms is None:
             algorithms = [wc_lang.SubmodelAlgorithm.dfba]
-        sbml_documents = {}
-        for submodel in model.get_submodels():
-            if submodel.algorithm in algorithms:
-                objects = [submodel] + \
-                    submodel.dfba_obj_reactions + \
-                    model.get_compartments() + \
-                    submodel.get_species() + \
-                    submodel.get_parameters() + \
-                    submodel.reactions
-                if submodel.dfba_obj:
-                    objects.append(submodel.dfba_obj)
-                sbml_documents[submodel.id] = SBMLExchange.write(objects)
-        if not sbml_documents:
+        submodels = [submodel for submodel in model.get_submodels() if submodel.algorithm in algorithms]
+        if not submodels:
             raise ValueError("No submodel.algorithm in algorithms '{}'.".format(algorithms))
+
         if path is None:
-            return sbml_documents
+            dests = [None] * len(submodels)
         else:
             ext = '.sbml'
             (dirname, basename) = split(path)
-            files = []
             if not os.access(dirname, os.W_OK):
                 raise ValueError("Writer.run() cannot write to directory '{}'.".format(dirname))
-            for id, sbml_doc in iteritems(sbml_documents):
-                dest = join(dirname, basename + '-' + id + ext)
-                dest = str(dest)
-                files.append(dest)
-                if not libsbml.writeSBMLToFile(sbml_doc, dest):
-                    raise ValueError("SBML document for submodel '{}' could not be written to '{}'.".format(
-                        id, dest))
-            return files
+            dests = [str(join(dirname, basename + '-' + submodel.id + ext)) for submodel in submodels]
+
+        validated_objects = set()
+        if (path is not None and workers > 1 and len(submodels) > 1
+                and 'fork' in multiprocessing.get_all_start_methods()):
+            # validate the objects once in this process, rather than once in each worker
+            for submodel in submodels:
+                SBMLExchange.validate(Writer.get_submodel_objects(submodel), validated_objects)
+
+            key = next(_worker_keys)
+            _worker_args[key] = (submodels, dests, stream, validated_objects)
+            try:
+                with multiprocessing.get_context('fork').Pool(min(workers, len(submodels))) as pool:
+                    results = pool.map(_write_submodel, [(key, i_submodel) for i_submodel in range(len(submodels))])
+            finally:
+                _worker_args.pop(key)
+            return results
+
+        if path is not None and stream:
+            for submodel, dest in zip(submodels, dests):
+                Writer.stream_submodel(submodel, dest, validated_objects)
+            return dests
+
+        sbml_documents = [Writer.write_submodel(submodel, validated_objects) for submodel in submodels]
+        if path is None:
+            return {submodel.id: sbml_doc for submodel, sbml_doc in zip(submodels, sbml_documents)}
+        for submodel, sbml_doc, dest in zip(submodels, sbml_documents, dests):
+            Writer.write_document(submodel, sbml_doc, dest)
+        return dests
+
+    @staticmethod
+    def write_submodel(submodel, validated_objects=None):
+        """ Convert a submodel into an SBML document
+
+        Args:
+            submodel (:obj:`Submodel`): submodel
+            validated_objects (:obj:`set`, optional): objects which have already been validated
+                (see :obj:`SBMLExchange.validate`)
+
+        Returns:
+            :obj:`libsbml.SBMLDocument`: an SBMLDocument containing `submodel`
+        """
+        return SBMLExchange.write(Writer.get_submodel_objects(submodel), validated_objects=validated_objects)
+
+    @staticmethod
+    def stream_submodel(submodel, dest, validated_objects=None):
+        """ Stream the SBML of a submodel to a file, without building an SBML document
+
+        Args:
+            submodel (:obj:`Submodel`): submodel
+            dest (:obj:`str`): path of the file
+            validated_objects (:obj:`set`, optional): objects which have already been validated
+                (see :obj:`SBMLExchange.validate`)
+        """
+        with open(dest, 'w') as file:
+            SBMLStreamWriter(file).write(Writer.get_submodel_objects(submodel), validated_objects=validated_objects)
+
+    @staticmethod
+    def get_submodel_objects(submodel):
+        """ Get the objects of a submodel which are written to SBML
+
+        Args:
+            submodel (:obj:`Submodel`): submodel
+
+        Returns:
+            :obj:`list`: objects
+        """
+        objects = [submodel] + \
+            submodel.dfba_obj_reactions + \
+            submodel.model.get_compartments() + \
+            submodel.get_species() + \
+            submodel.get_parameters() + \
+            submodel.get_observables() + \
+            submodel.get_functions() + \
+            submodel.reactions
+        if submodel.dfba_obj:
+            objects.append(submodel.dfba_obj)
+        return objects
+
+    @staticmethod
+    def write_document(submodel, sbml_doc, dest):
+        """ Write the SBML document of a submodel to a file
+
+        Args:
+            submodel (:obj:`Submodel`): submodel
+            sbml_doc (:obj:`libsbml.SBMLDocument`): SBML document of `submodel`
+            dest (:obj:`str`): path of the file
+
+        Raises:
+            :obj:`ValueError`: if the document could not be written
+        """
+        if not libsbml.writeSBMLToFile(sbml_doc, dest):
+            raise ValueError("SBML document for submodel '{}' could not be written to '{}'.".format(
+                submodel.id, dest))
+
+
+_worker_keys = itertools.count()
+# :obj:`itertools.count`: keys of the arguments of the parallel runs of :obj:`Writer`
+
+_worker_args = {}
+# :obj:`dict`: dictionary which maps keys to the submodels, destinations, streaming option, and validated objects
+# of each parallel run of :obj:`Writer`, which are inherited by the forked worker processes
+
+
+def _write_submodel(args):
+    """ Build the SBML document of a submodel and write it to its file in a worker process
+
+    Args:
+        args (:obj:`tuple`): key of the run and position of the submodel
+
+    Returns:
+        :obj:`str`: path of the file that the document was written to
+    """
+    key, i_submodel = args
+    submodels, dests, stream, validated_objects = _worker_args[key]
+    submodel = submodels[i_submodel]
+    dest = dests[i_submodel]
+    if stream:
+        Writer.stream_submodel(submodel, dest, validated_objects)
+    else:
+        Writer.write_document(submodel, Writer.write_submodel(submodel, validated_objects), dest)
+    return dest
 
 
 class SBMLExchange(object):
     """ Exchange `wc_lang` model to/from a libSBML SBML representation """
 
     @staticmethod
-    def write(objects):
+    def write(objects, validated_objects=None):
         """ Write the `wc_lang` model described by `objects` to a libSBML `SBMLDocument`.
 
         Warning: `wc_lang` and SBML semantics are not equivalent.
 
         Algorithm:
-            * validate objects
-            * (do not add related objects, as only certain model types can be written to SBML)
             * group objects by model class
+            * validate the objects which haven't already been validated
+            * (do not add related objects, as only certain model types can be written to SBML)
             * add objects to the SBML document in dependent order
 
         Args:
             objects (:obj:`list`): list of objects
+            validated_objects (:obj:`set`, optional): objects which have already been validated
+                (see :obj:`SBMLExchange.validate`)
 
         Returns:
             :obj:`SBMLDocument`: an SBMLDocument containing `objects`
@@ -166,18 +295,8 @@ class SBMLExchange(object):
         # Create the SBML Model object inside the SBMLDocument object.
         sbml_model = init_sbml_model(sbml_document)
 
-        error = Validator().run(objects)
-        if error:
-            warnings.warn('Some data will not be written because objects are not valid:\n  {}'.format(
-                str(error).replace('\n', '\n  ').rstrip()), UserWarning)
-
-        grouped_objects = {}
-        for obj in objects:
-            obj_class = obj.__class__
-            if obj_class not in grouped_objects:
-                grouped_objects[obj_class] = []
-            if obj not in grouped_objects[obj_class]:
-                grouped_objects[obj_class].append(obj)
+        grouped_objects = SBMLExchange.group_objects(objects)
+        SBMLExchange.validate(itertools.chain(*grouped_objects.values()), validated_objects)
 
         # dependencies among libSBML model classes constrain the order
         # in which wc_lang classes must be written to SBML:
@@ -185,6 +304,8 @@ class SBMLExchange(object):
         #     Compartment depends on nothing
         #     Parameter depends on nothing
         #     Compartment must precede Species
+        #     Species and Parameter must precede Observable and Function
+        #     Observable and Function must precede Reaction
         #     Compartment must precede Reaction
         #     Species must precede Reaction
         #     Species must precede DfbaObjReaction
@@ -196,21 +317,78 @@ class SBMLExchange(object):
             wc_lang.Compartment,
             wc_lang.Parameter,
             wc_lang.Species,
+            wc_lang.Observable,
+            wc_lang.Function,
             wc_lang.Reaction,
             wc_lang.DfbaObjReaction,
             wc_lang.DfbaObjective,
         ]
 
+        # share one translator among the objects whose expressions are written as SBML math, so that
+        # each expression is translated at most once
+        translator = SBMLMathTranslator()
+        math_models = (wc_lang.Observable, wc_lang.Function, wc_lang.Reaction)
+
         # add objects into libsbml.SBMLDocument
         for model in model_order:
             if model in grouped_objects:
-                for obj in grouped_objects[model]:
-                    obj.add_to_sbml_doc(sbml_document)
+                if model in math_models:
+                    for obj in grouped_objects[model]:
+                        obj.add_to_sbml_doc(sbml_document, translator=translator)
+                else:
+                    for obj in grouped_objects[model]:
+                        obj.add_to_sbml_doc(sbml_document)
 
         return sbml_document
 
     @staticmethod
-    def write_submodel(submodel):
+    def group_objects(objects):
+        """ Group objects by their classes, and remove duplicate objects
+
+        Args:
+            objects (:obj:`list`): list of objects
+
+        Returns:
+            :obj:`collections.OrderedDict`: dictionary which maps each class to a list of its unique objects,
+                in the order in which they first appear in `objects`
+        """
+        grouped_objects = collections.OrderedDict()
+        unique_objects = set()
+        for obj in objects:
+            if obj not in unique_objects:
+                unique_objects.add(obj)
+                obj_class = obj.__class__
+                if obj_class not in grouped_objects:
+                    grouped_objects[obj_class] = []
+                grouped_objects[obj_class].append(obj)
+        return grouped_objects
+
+    @staticmethod
+    def validate(objects, validated_objects=None):
+        """ Validate objects, and warn if any are invalid
+
+        To validate each object at most once per export session, pass the same set of `validated_objects` to
+        each call. Objects which are already in `validated_objects` are skipped, and the newly validated
+        objects are added to it, so invalid objects are only reported once.
+
+        Args:
+            objects (:obj:`list`): list of unique objects
+            validated_objects (:obj:`set`, optional): objects which have already been validated
+        """
+        if validated_objects is None:
+            validated_objects = set()
+        objects = [obj for obj in objects if obj not in validated_objects]
+        if not objects:
+            return
+        validated_objects.update(objects)
+
+        error = Validator().run(objects)
+        if error:
+            warnings.warn('Some data will not be written because objects are not valid:\n  {}'.format(
+                str(error).replace('\n', '\n  ').rstrip()), UserWarning)
+
+    @staticmethod
+    def write_submodel(submodel, validated_objects=None):
         """ Create a libSBML `SBMLDocument` containing `submodel`.
 
         To enable use of cobrapy to solve dFBA submodels, and avoid cumbersome SBML/libSBML
@@ -218,6 +396,8 @@ class SBMLExchange(object):
 
         Args:
             submodel (:obj:`Submodel`): a submodel
+            validated_objects (:obj:`set`, optional): objects which have already been validated
+                (see :obj:`SBMLExchange.validate`)
 
         Returns:
             :obj:`libsbml.SBMLDocument`: an SBMLDocument containing `submodel` as a libSBML model
@@ -230,16 +410,619 @@ class SBMLExchange(object):
             submodel.get_species() + \
             submodel.reactions + \
             submodel.dfba_obj_reactions + \
-            submodel.model.get_parameters()
+            submodel.model.get_parameters() + \
+            submodel.get_observables() + \
+            submodel.get_functions()
         if submodel.dfba_obj:
             objects.append(submodel.dfba_obj)
 
-        return SBMLExchange.write(objects)
+        return SBMLExchange.write(objects, validated_objects=validated_objects)
+
+    @staticmethod
+    def read(sbml_document):
+        """ Read a model in a libSBML `SBMLDocument` into a `wc_lang` model.
+
+        The SBML model is mapped to a `Model` with one dFBA `Submodel`. This inverts the mapping of
+        :obj:`write`: SBML reactions whose flux bounds are the parameters of dFBA objective reactions are
+        mapped to `DfbaObjReaction`\ s, SBML parameters whose ids start with `parameter_` are mapped to
+        `Parameter`\ s, and the active FBC objective is mapped to a `DfbaObjective`. All references among
+        the SBML objects are resolved through dictionaries.
+
+        Warning: `wc_lang` and SBML semantics are not equivalent.
+
+        Args:
+            sbml_document (:obj:`SBMLDocument`): an SBMLDocument
+
+        Returns:
+            :obj:`Model`: a `Model` with one dFBA `Submodel`
+
+        Raises:
+            :obj:`ValueError`: if the document doesn't contain a model, or an SBML object refers to an
+                undefined object
+        """
+        sbml_model = sbml_document.getModel()
+        if sbml_model is None:
+            raise ValueError('SBML document does not contain a model.')
+
+        submodel_id = sbml_model.getIdAttribute() or 'submodel'
+        model = wc_lang.Model(id=submodel_id, name=sbml_model.getName())
+        submodel = model.submodels.create(id=submodel_id, name=sbml_model.getName(),
+                                          algorithm=wc_lang.SubmodelAlgorithm.dfba,
+                                          comments=SBMLExchange.read_notes(sbml_model))
+
+        # compartments
+        compartments = {}
+        for sbml_compartment in sbml_model.getListOfCompartments():
+            compartment = wc_lang.Compartment(id=sbml_compartment.getIdAttribute(),
+                                              name=sbml_compartment.getName(),
+                                              comments=SBMLExchange.read_notes(sbml_compartment))
+            compartments[compartment.id] = compartment
+        model.compartments = list(compartments.values())
+
+        # species types, species, and their initial concentrations
+        concentration_units = {unit_meta['xml_id']: unit for unit, unit_meta in wc_lang.ConcentrationUnit.Meta.items()}
+        species_types = {}
+        species = {}
+        init_concentrations = []
+        for sbml_species in sbml_model.getListOfSpecies():
+            sbml_id = sbml_species.getIdAttribute()
+            compartment_id = sbml_species.getCompartment()
+            if compartment_id not in compartments:
+                raise ValueError("Species '{}' is in undefined compartment '{}'.".format(sbml_id, compartment_id))
+
+            sbml_id_suffix = '__{}__'.format(compartment_id)
+            if sbml_id.endswith(sbml_id_suffix) and len(sbml_id) > len(sbml_id_suffix):
+                species_type_id = sbml_id[0:-len(sbml_id_suffix)]
+            else:
+                species_type_id = sbml_id
+
+            species_type = species_types.get(species_type_id, None)
+            if species_type is None:
+                species_type = species_types[species_type_id] = wc_lang.SpeciesType(
+                    id=species_type_id, name=sbml_species.getName(),
+                    comments=SBMLExchange.read_notes(sbml_species))
+
+            spec = wc_lang.Species(id=wc_lang.Species.gen_id(species_type_id, compartment_id),
+                                   species_type=species_type, compartment=compartments[compartment_id])
+            species[sbml_id] = spec
+
+            if sbml_species.isSetInitialConcentration():
+                init_concentrations.append(wc_lang.DistributionInitConcentration(
+                    id=wc_lang.DistributionInitConcentration.gen_id(spec.id),
+                    species=spec,
+                    mean=sbml_species.getInitialConcentration(),
+                    units=concentration_units.get(sbml_species.getSubstanceUnits(), wc_lang.ConcentrationUnit.M)))
+        model.species_types = list(species_types.values())
+        model.species = list(species.values())
+        model.distribution_init_concentrations = init_concentrations
+
+        # reactions and dFBA objective reactions
+        sbml_parameters = {sbml_parameter.getIdAttribute(): sbml_parameter
+                           for sbml_parameter in sbml_model.getListOfParameters()}
+        flux_bound_parameter_ids = set()
+        species_coefficients = model.get_species_coefficient_pool()
+        reactions = {}
+        dfba_obj_reactions = {}
+        for sbml_reaction in sbml_model.getListOfReactions():
+            id = sbml_reaction.getIdAttribute()
+
+            participants = {}
+            for sbml_species_references, sign in [(sbml_reaction.getListOfReactants(), -1.),
+                                                  (sbml_reaction.getListOfProducts(), 1.)]:
+                for species_reference in sbml_species_references:
+                    spec = species.get(species_reference.getSpecies(), None)
+                    if spec is None:
+                        raise ValueError("Reaction '{}' refers to undefined species '{}'.".format(
+                            id, species_reference.getSpecies()))
+                    participants[spec] = participants.get(spec, 0.) + sign * species_reference.getStoichiometry()
+
+            fbc_reaction_plugin = sbml_reaction.getPlugin('fbc')
+            if fbc_reaction_plugin is not None:
+                lower_bound_id = fbc_reaction_plugin.getLowerFluxBound()
+                upper_bound_id = fbc_reaction_plugin.getUpperFluxBound()
+            else:
+                lower_bound_id = upper_bound_id = ''
+            flux_bound_parameter_ids.update((lower_bound_id, upper_bound_id))
+
+            if lower_bound_id == '_dfba_obj_reaction_{}_lower_bound'.format(id):
+                dfba_obj_reaction = wc_lang.DfbaObjReaction(id=id, name=sbml_reaction.getName(),
+                                                            comments=SBMLExchange.read_notes(sbml_reaction))
+                for spec, value in participants.items():
+                    dfba_obj_reaction.dfba_obj_species.create(
+                        id=wc_lang.DfbaObjSpecies.gen_id(id, spec.id), species=spec, value=value)
+                dfba_obj_reactions[id] = dfba_obj_reaction
+
+            else:
+                flux_min = SBMLExchange.read_parameter_value(sbml_parameters, lower_bound_id)
+                flux_max = SBMLExchange.read_parameter_value(sbml_parameters, upper_bound_id)
+                reactions[id] = wc_lang.Reaction(
+                    id=id, name=sbml_reaction.getName(),
+                    reversible=sbml_reaction.getReversible(),
+                    participants=[species_coefficients.get_or_create(spec, coefficient)
+                                  for spec, coefficient in participants.items() if coefficient],
+                    flux_min=flux_min, flux_max=flux_max,
+                    flux_bound_units=wc_lang.ReactionFluxBoundUnit['M s^-1']
+                    if flux_min is not None or flux_max is not None else None,
+                    comments=SBMLExchange.read_notes(sbml_reaction))
+        model.reactions = list(reactions.values())
+        submodel.reactions = list(reactions.values())
+        model.dfba_obj_reactions = list(dfba_obj_reactions.values())
+        submodel.dfba_obj_reactions = list(dfba_obj_reactions.values())
+
+        # parameters
+        parameter_units = {
+            'dimensionless_ud': 'dimensionless',
+            'second': 's',
+            'mmol_per_gDW_per_hr': 'mmol/gDCW/h',
+        }
+        # the variables of assignment rules are observables and functions, which aren't read
+        rule_variable_ids = set(sbml_rule.getVariable() for sbml_rule in sbml_model.getListOfRules()
+                                if sbml_rule.isAssignment())
+        parameters = []
+        for sbml_id, sbml_parameter in sbml_parameters.items():
+            if sbml_id in flux_bound_parameter_ids or sbml_id in rule_variable_ids:
+                continue
+            if sbml_id.startswith('parameter_'):
+                id = sbml_id[len('parameter_'):]
+            else:
+                id = sbml_id
+            parameters.append(wc_lang.Parameter(
+                id=id, name=sbml_parameter.getName(),
+                value=sbml_parameter.getValue() if sbml_parameter.isSetValue() else None,
+                units=parameter_units.get(sbml_parameter.getUnits(), sbml_parameter.getUnits()) or None))
+        model.parameters = parameters
+
+        # dFBA objective
+        fbc_model_plugin = sbml_model.getPlugin('fbc')
+        sbml_objective = fbc_model_plugin.getActiveObjective() if fbc_model_plugin is not None else None
+        if sbml_objective is not None:
+            # SBML objectives can be minimized or maximized, whereas dFBA objectives are maximized
+            sign = -1. if sbml_objective.getType() == 'minimize' else 1.
+            terms = []
+            for sbml_flux_objective in sbml_objective.getListOfFluxObjectives():
+                reaction_id = sbml_flux_objective.getReaction()
+                if reaction_id not in reactions and reaction_id not in dfba_obj_reactions:
+                    raise ValueError("Objective '{}' refers to undefined reaction '{}'.".format(
+                        sbml_objective.getIdAttribute(), reaction_id))
+                terms.append('({}) * {}'.format(repr(sign * sbml_flux_objective.getCoefficient()), reaction_id))
+
+            objs = {
+                wc_lang.Reaction: reactions,
+                wc_lang.DfbaObjReaction: dfba_obj_reactions,
+            }
+            expression, error = wc_lang.DfbaObjectiveExpression.deserialize(' + '.join(terms) or '0', objs)
+            if error:
+                raise ValueError("Objective '{}' could not be read:\n  {}".format(
+                    sbml_objective.getIdAttribute(), str(error).replace('\n', '\n  ').rstrip()))
+            model.dfba_objs.create(id=wc_lang.DfbaObjective.gen_id(submodel.id), submodel=submodel,
+                                   expression=expression)
+
+        return model
+
+    @staticmethod
+    def read_notes(sbml_object):
+        """ Read the notes of an SBML object
+
+        Args:
+            sbml_object (:obj:`libsbml.SBase`): an SBML object
+
+        Returns:
+            :obj:`str`: the text of the notes of the object, or an empty string if the object has no notes
+        """
+        if sbml_object.isSetNotes():
+            return xmlstr_to_str(sbml_object.getNotesString())
+        return ''
+
+    @staticmethod
+    def read_parameter_value(sbml_parameters, id):
+        """ Read the value of an SBML parameter, such as a flux bound
+
+        Args:
+            sbml_parameters (:obj:`dict`): dictionary which maps the ids of SBML parameters to the parameters
+            id (:obj:`str`): id of the parameter, or an empty string
+
+        Returns:
+            :obj:`float`: value of the parameter, or :obj:`None` if `id` is empty or the value isn't set
+
+        Raises:
+            :obj:`ValueError`: if the parameter is undefined
+        """
+        if not id:
+            return None
+        sbml_parameter = sbml_parameters.get(id, None)
+        if sbml_parameter is None:
+            raise ValueError("Flux bound '{}' is undefined.".format(id))
+        if sbml_parameter.isSetValue():
+            return sbml_parameter.getValue()
+        return None
+
+
+class SBMLStreamWriter(object):
+    """ Stream the SBML representation of a `wc_lang` model to a file
+
+    Unlike :obj:`SBMLExchange.write`, this doesn't build a libSBML `SBMLDocument`. Instead, the SBML L3 FBC v2
+    XML is generated directly from the `wc_lang` objects, and written to a file as it is generated. This
+    reduces the memory and time required to export very large submodels. The XML is equivalent to the XML of
+    the documents created by :obj:`SBMLExchange.write`.
+
+    Because SBML requires the flux bound parameters of the reactions to precede the reactions, the reactions
+    are iterated over twice, once to write their flux bound parameters and once to write the reactions.
+    The math of the kinetic laws and assignment rules is translated into MathML with
+    :obj:`wc_lang.sbml.util.SBMLMathTranslator`.
+
+    Attributes:
+        file (:obj:`io.TextIOBase`): file
+        translator (:obj:`SBMLMathTranslator`): translator of expressions into SBML math
+    """
+
+    SBML_NAMESPACE = 'http://www.sbml.org/sbml/level{}/version{}/core'.format(SBML_LEVEL, SBML_VERSION)
+    FBC_NAMESPACE = 'http://www.sbml.org/sbml/level{}/version{}/fbc/version{}'.format(
+        SBML_LEVEL, SBML_VERSION, FBC_VERSION)
+    XHTML_NAMESPACE = 'http://www.w3.org/1999/xhtml'
+
+    def __init__(self, file):
+        """
+        Args:
+            file (:obj:`io.TextIOBase`): file
+        """
+        self.file = file
+        self.translator = SBMLMathTranslator()
+
+    def write(self, objects, validated_objects=None):
+        """ Write the `wc_lang` model described by `objects` to the file
+
+        Args:
+            objects (:obj:`list`): list of objects
+            validated_objects (:obj:`set`, optional): objects which have already been validated
+                (see :obj:`SBMLExchange.validate`)
+
+        Raises:
+            :obj:`ValueError`: if the id of a flux bound parameter is already in use
+        """
+        grouped_objects = SBMLExchange.group_objects(objects)
+        SBMLExchange.validate(itertools.chain(*grouped_objects.values()), validated_objects)
+
+        submodels = grouped_objects.get(wc_lang.Submodel, [])
+        compartments = grouped_objects.get(wc_lang.Compartment, [])
+        parameters = grouped_objects.get(wc_lang.Parameter, [])
+        species = grouped_objects.get(wc_lang.Species, [])
+        observables = grouped_objects.get(wc_lang.Observable, [])
+        functions = grouped_objects.get(wc_lang.Function, [])
+        reactions = grouped_objects.get(wc_lang.Reaction, [])
+        dfba_obj_reactions = grouped_objects.get(wc_lang.DfbaObjReaction, [])
+        dfba_objs = grouped_objects.get(wc_lang.DfbaObjective, [])
+
+        write = self.file.write
+        write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        write('<sbml{}>\n'.format(format_xml_attrs([
+            ('xmlns', self.SBML_NAMESPACE),
+            ('xmlns:fbc', self.FBC_NAMESPACE),
+            ('level', SBML_LEVEL),
+            ('version', SBML_VERSION),
+            ('fbc:required', False),
+        ])))
+
+        # model
+        submodel = submodels[-1] if submodels else None
+        write('  <model{}>\n'.format(format_xml_attrs([
+            ('id', submodel.id if submodel else None),
+            ('name', submodel.name if submodel else None),
+            ('substanceUnits', 'mole'),
+            ('timeUnits', 'second'),
+            ('volumeUnits', 'litre'),
+            ('extentUnits', 'mole'),
+            ('fbc:strict', True),
+        ])))
+        if submodel and submodel.comments:
+            self.write_notes(submodel.comments, '    ')
+
+        self.write_unit_definitions()
+
+        # compartments
+        if compartments:
+            write('    <listOfCompartments>\n')
+            for compartment in compartments:
+                attrs = format_xml_attrs([
+                    ('id', compartment.id),
+                    ('name', compartment.name),
+                    ('spatialDimensions', 3),
+                    ('size', 1.),
+                    ('constant', False),
+                ])
+                if compartment.comments:
+                    write('      <compartment{}>\n'.format(attrs))
+                    self.write_notes(compartment.comments, '        ')
+                    write('      </compartment>\n')
+                else:
+                    write('      <compartment{}/>\n'.format(attrs))
+            write('    </listOfCompartments>\n')
+
+        # species
+        if species:
+            write('    <listOfSpecies>\n')
+            for spec in species:
+                init_concentration = spec.distribution_init_concentration
+                attrs = format_xml_attrs([
+                    ('id', spec.gen_sbml_id()),
+                    ('name', spec.species_type.name),
+                    ('compartment', spec.compartment.id),
+                    ('initialConcentration', init_concentration.mean if init_concentration else None),
+                    ('substanceUnits', wc_lang.ConcentrationUnit.Meta[init_concentration.units]['xml_id']
+                     if init_concentration else 'mole'),
+                    ('hasOnlySubstanceUnits', False),
+                    ('boundaryCondition', False),
+                    ('constant', False),
+                ])
+                if spec.species_type.comments:
+                    write('      <species{}>\n'.format(attrs))
+                    self.write_notes(spec.species_type.comments, '        ')
+                    write('      </species>\n')
+                else:
+                    write('      <species{}/>\n'.format(attrs))
+            write('    </listOfSpecies>\n')
+
+        # parameters, including the observables, the functions, and the flux bounds of the reactions
+        dfba_reactions = [rxn for rxn in reactions
+                          if rxn.submodel and rxn.submodel.algorithm == wc_lang.SubmodelAlgorithm.dfba]
+        rules = observables + functions
+        if parameters or rules or dfba_reactions or dfba_obj_reactions:
+            parameter_units = {
+                'dimensionless': 'dimensionless_ud',
+                's': 'second',
+                'mmol/gDCW/h': 'mmol_per_gDW_per_hr',
+            }
+            parameter_ids = set()
+            write('    <listOfParameters>\n')
+            for parameter in parameters:
+                self.write_parameter(parameter_ids, 'parameter_{}'.format(parameter.id), parameter.value,
+                                     parameter_units.get(parameter.units, 'dimensionless_ud'), name=parameter.name)
+            for obj in rules:
+                self.write_parameter(parameter_ids, get_sbml_id(obj), None, None, name=obj.name, constant=False)
+            for rxn in dfba_reactions:
+                self.write_parameter(parameter_ids, '_reaction_{}_lower_bound'.format(rxn.id), rxn.flux_min,
+                                     'mmol_per_gDW_per_hr')
+                self.write_parameter(parameter_ids, '_reaction_{}_upper_bound'.format(rxn.id), rxn.flux_max,
+                                     'mmol_per_gDW_per_hr')
+            for rxn in dfba_obj_reactions:
+                self.write_parameter(parameter_ids, '_dfba_obj_reaction_{}_lower_bound'.format(rxn.id), 0.,
+                                     'mmol_per_gDW_per_hr')
+                self.write_parameter(parameter_ids, '_dfba_obj_reaction_{}_upper_bound'.format(rxn.id), float('inf'),
+                                     'mmol_per_gDW_per_hr')
+            write('    </listOfParameters>\n')
+
+        # assignment rules of the observables and functions
+        if rules:
+            write('    <listOfRules>\n')
+            for obj in rules:
+                write('      <assignmentRule{}>\n'.format(format_xml_attrs([('variable', get_sbml_id(obj))])))
+                self.write_math(self.translator.get_infix(obj.expression), '        ')
+                write('      </assignmentRule>\n')
+            write('    </listOfRules>\n')
+
+        # reactions and dFBA objective reactions
+        if reactions or dfba_obj_reactions:
+            write('    <listOfReactions>\n')
+            for rxn in reactions:
+                kinetic_law = None
+                if rxn.submodel and rxn.submodel.algorithm == wc_lang.SubmodelAlgorithm.dfba:
+                    bound_ids = ('_reaction_{}_lower_bound'.format(rxn.id), '_reaction_{}_upper_bound'.format(rxn.id))
+                else:
+                    bound_ids = (None, None)
+                    if rxn.rate_laws:
+                        kinetic_law = self.translator.get_rate_law_infix(rxn)
+                self.write_reaction(rxn.id, rxn.name, rxn.reversible, rxn.comments,
+                                    [(part.species.gen_sbml_id(), part.coefficient) for part in rxn.participants],
+                                    *bound_ids, kinetic_law=kinetic_law)
+            for rxn in dfba_obj_reactions:
+                self.write_reaction(rxn.id, rxn.name, False, rxn.comments,
+                                    [(dfba_obj_species.species.gen_sbml_id(), dfba_obj_species.value)
+                                     for dfba_obj_species in rxn.dfba_obj_species],
+                                    '_dfba_obj_reaction_{}_lower_bound'.format(rxn.id),
+                                    '_dfba_obj_reaction_{}_upper_bound'.format(rxn.id))
+            write('    </listOfReactions>\n')
+
+        # dFBA objective
+        for dfba_obj in dfba_objs:
+            self.write_objective(dfba_obj)
+
+        write('  </model>\n')
+        write('</sbml>\n')
+
+    def write_unit_definitions(self):
+        """ Write the definitions of the units used by the model (see :obj:`wc_lang.sbml.util.init_sbml_model`) """
+        unit_defs = [
+            ('per_second', [('second', -1, 0, 1.)]),
+        ]
+        for unit_def_meta in wc_lang.ConcentrationUnit.Meta.values():
+            substance_unit = unit_def_meta['substance_units']
+            unit_defs.append((unit_def_meta['xml_id'], [
+                (substance_unit['kind'].lower(), substance_unit['exponent'], substance_unit['scale'], 1.),
+            ]))
+        unit_defs.append(('mmol_per_gDW_per_hr', [
+            ('mole', 1, -3, 1.),
+            ('gram', -1, 0, 1.),
+            ('second', -1, 0, 3600.),
+        ]))
+        unit_defs.append(('dimensionless_ud', [('dimensionless', 1, 0, 1.)]))
+
+        write = self.file.write
+        write('    <listOfUnitDefinitions>\n')
+        for id, units in unit_defs:
+            write('      <unitDefinition{}>\n'.format(format_xml_attrs([('id', id)])))
+            write('        <listOfUnits>\n')
+            for kind, exponent, scale, multiplier in units:
+                write('          <unit{}/>\n'.format(format_xml_attrs([
+                    ('kind', kind),
+                    ('exponent', float(exponent)),
+                    ('scale', scale),
+                    ('multiplier', multiplier),
+                ])))
+            write('        </listOfUnits>\n')
+            write('      </unitDefinition>\n')
+        write('    </listOfUnitDefinitions>\n')
+
+    def write_parameter(self, parameter_ids, id, value, units, name=None, constant=True):
+        """ Write a parameter
+
+        Args:
+            parameter_ids (:obj:`set` of :obj:`str`): ids of the parameters that have already been written
+            id (:obj:`str`): id
+            value (:obj:`float`): value
+            units (:obj:`str`): units
+            name (:obj:`str`, optional): name
+            constant (:obj:`bool`, optional): whether the parameter is constant
+
+        Raises:
+            :obj:`ValueError`: if `id` is already in use
+        """
+        if id in parameter_ids:
+            raise ValueError("warning: '{}' is already in use as a Parameter id.".format(id))
+        parameter_ids.add(id)
+        self.file.write('      <parameter{}/>\n'.format(format_xml_attrs([
+            ('id', id),
+            ('name', name),
+            ('value', value),
+            ('units', units),
+            ('constant', constant),
+        ])))
+
+    def write_reaction(self, id, name, reversible, comments, participants, lower_bound_id, upper_bound_id,
+                       kinetic_law=None):
+        """ Write a reaction
+
+        Args:
+            id (:obj:`str`): id
+            name (:obj:`str`): name
+            reversible (:obj:`bool`): reversibility
+            comments (:obj:`str`): comments
+            participants (:obj:`list` of :obj:`tuple`): id of the SBML species and coefficient of each participant
+            lower_bound_id (:obj:`str`): id of the parameter of the lower flux bound, or :obj:`None`
+            upper_bound_id (:obj:`str`): id of the parameter of the upper flux bound, or :obj:`None`
+            kinetic_law (:obj:`str`, optional): SBML infix of the kinetic law
+        """
+        write = self.file.write
+        write('      <reaction{}>\n'.format(format_xml_attrs([
+            ('id', id),
+            ('name', name),
+            ('reversible', reversible),
+            ('fast', False),
+            ('fbc:lowerFluxBound', lower_bound_id),
+            ('fbc:upperFluxBound', upper_bound_id),
+        ])))
+        if comments:
+            self.write_notes(comments, '        ')
+        reactants = [(species_id, -coefficient) for species_id, coefficient in participants if coefficient < 0]
+        products = [(species_id, coefficient) for species_id, coefficient in participants if coefficient > 0]
+        for tag, species_references in [('listOfReactants', reactants), ('listOfProducts', products)]:
+            if species_references:
+                write('        <{}>\n'.format(tag))
+                for species_id, stoichiometry in species_references:
+                    write('          <speciesReference{}/>\n'.format(format_xml_attrs([
+                        ('species', species_id),
+                        ('stoichiometry', stoichiometry),
+                        ('constant', True),
+                    ])))
+                write('        </{}>\n'.format(tag))
+        if kinetic_law is not None:
+            write('        <kineticLaw>\n')
+            self.write_math(kinetic_law, '          ')
+            write('        </kineticLaw>\n')
+        write('      </reaction>\n')
+
+    def write_objective(self, dfba_obj):
+        """ Write a dFBA objective as the active FBC objective
+
+        Args:
+            dfba_obj (:obj:`wc_lang.DfbaObjective`): dFBA objective
+        """
+        parsed_expression = dfba_obj.expression._parsed_expression
+        if not parsed_expression.is_linear:
+            warnings.warn("submodel '{}' can't add non-linear objective function to SBML FBC model".format(
+                dfba_obj.submodel.id), UserWarning)
+            return
+
+        write = self.file.write
+        write('    <fbc:listOfObjectives{}>\n'.format(format_xml_attrs([
+            ('fbc:activeObjective', wc_lang.DfbaObjective.ACTIVE_OBJECTIVE)])))
+        write('      <fbc:objective{}>\n'.format(format_xml_attrs([
+            ('fbc:id', wc_lang.DfbaObjective.ACTIVE_OBJECTIVE),
+            ('fbc:type', 'maximize'),
+        ])))
+        write('        <fbc:listOfFluxObjectives>\n')
+        for rxn_type, rxns in [(wc_lang.Reaction, dfba_obj.expression.reactions),
+                               (wc_lang.DfbaObjReaction, dfba_obj.expression.dfba_obj_reactions)]:
+            for rxn in rxns:
+                write('          <fbc:fluxObjective{}/>\n'.format(format_xml_attrs([
+                    ('fbc:reaction', rxn.id),
+                    ('fbc:coefficient', parsed_expression.lin_coeffs[rxn_type][rxn]),
+                ])))
+        write('        </fbc:listOfFluxObjectives>\n')
+        write('      </fbc:objective>\n')
+        write('    </fbc:listOfObjectives>\n')
+
+    def write_math(self, infix, indent):
+        """ Write math as MathML
+
+        Args:
+            infix (:obj:`str`): SBML infix of the math
+            indent (:obj:`str`): indentation
+
+        Raises:
+            :obj:`wc_lang.sbml.util.LibSBMLError`: if `infix` can't be translated into MathML
+        """
+        for line in self.translator.get_mathml(infix).split('\n'):
+            self.file.write('{}{}\n'.format(indent, line.rstrip()))
+
+    def write_notes(self, text, indent):
+        """ Write notes
+
+        Args:
+            text (:obj:`str`): text of the notes
+            indent (:obj:`str`): indentation
+        """
+        write = self.file.write
+        write('{}<notes>\n'.format(indent))
+        write('{}  <p xmlns="{}">{}</p>\n'.format(indent, self.XHTML_NAMESPACE, escape(text)))
+        write('{}</notes>\n'.format(indent))
+
+
+def format_xml_attrs(attrs):
+    """ Format the attributes of an XML element
+
+    Attributes whose values are :obj:`None` or empty strings are omitted. Booleans are formatted as `true`
+    or `false`, and floats are formatted as SBML doubles.
+
+    Args:
+        attrs (:obj:`list` of :obj:`tuple`): names and values of the attributes
+
+    Returns:
+        :obj:`str`: attributes, each preceded by a space
+    """
+    formatted_attrs = []
+    for name, value in attrs:
+        if value is None or value == '':
+            continue
+        if isinstance(value, bool):
+            value = 'true' if value else 'false'
+        elif isinstance(value, float):
+            value = format_sbml_double(value)
+        else:
+            value = escape(str(value), {'"': '&quot;'})
+        formatted_attrs.append(' {}="{}"'.format(name, value))
+    return ''.join(formatted_attrs)
+
+
+def format_sbml_double(value):
+    """ Format a float as an SBML double
+
+    Args:
+        value (:obj:`float`): value
 
-#       @staticmethod
-#       def read(document):
-#           """ Read a model in a libSBML `SBMLDocument` into a `wc_lang` model.
-#
-#           Warning: this is an unimplemented placeholder.
-#           """
-#           pass
+    Returns:
+        :obj:`str`: `INF`, `-INF`, `NaN`, or the shortest representation of the value
+    """
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return 'INF' if value > 0 else '-INF'
+    return repr(value)
@@ -5,6 +5,7 @@ Includes
 * Exception definitions for `wc_lang.sbml`
 * Higher level functions for creating SBML objects
 * Utilities for wrapping libSBML calls and initializing libSBML models
+* Translation of expressions into SBML math
 
 :Author: Arthur Goldberg <Arthur.Goldberg@mssm.edu>
 :Date: 2017-11-01
@@ -15,7 +16,9 @@ Includes
 from libsbml import (LIBSBML_OPERATION_SUCCESS, OperationReturnValue_toString,
                      SBMLNamespaces, SBMLDocument)
 from warnings import warn
+from xml.sax.saxutils import unescape
 import libsbml
+import re
 import six
 import wc_lang.core
 
@@ -127,25 +130,160 @@ class LibSBMLInterface(object):
             :obj:`LibSBMLError`: if a libSBML calls fails
             :obj:`ValueError`: if a `Parameter` with id `id` is already in use
         """
-        try:
-            wrap_libsbml(sbml_model.getParameter, id)
+        # getParameter() isn't wrapped in wrap_libsbml because it returns None if the id is not in use
+        if sbml_model.getParameter(id) is not None:
             raise ValueError("warning: '{}' is already in use as a Parameter id.".format(id))
-        except LibSBMLError as e:
-            sbml_parameter = wrap_libsbml(sbml_model.createParameter)
-            wrap_libsbml(sbml_parameter.setIdAttribute, id)
-            if not name is None:
-                wrap_libsbml(sbml_parameter.setName, name)
-            if not value is None:
-                wrap_libsbml(sbml_parameter.setValue, value)
-            if not units is None:
-                wrap_libsbml(sbml_parameter.setUnits, units)
-            wrap_libsbml(sbml_parameter.setConstant, constant)
-            return sbml_parameter
+        sbml_parameter = call_libsbml(sbml_model.createParameter)
+        call_libsbml(sbml_parameter.setIdAttribute, id)
+        if not name is None:
+            call_libsbml(sbml_parameter.setName, name)
+        if not value is None:
+            call_libsbml(sbml_parameter.setValue, value)
+        if not units is None:
+            call_libsbml(sbml_parameter.setUnits, units)
+        call_libsbml(sbml_parameter.setConstant, constant)
+        return sbml_parameter
 
+    @staticmethod
+    def _create_sbml_species(sbml_model, species):
+        """ Add SBML Species to an SBML model in bulk.
+
+        Args:
+            sbml_model (:obj:`libsbml.Model`): a libSBML Model
+            species (:obj:`list` of :obj:`tuple`): for each species, a tuple of its id, name, notes (or `None`),
+                compartment id, initial concentration, and substance units
+
+        Returns:
+            :obj:`list` of :obj:`libsbml.Species`: the new SBML Species
+
+        Raises:
+            :obj:`LibSBMLError`: if a libSBML calls fails
+        """
+        sbml_species_list = []
+        for id, name, notes, compartment_id, init_concentration, substance_units in species:
+            sbml_species = call_libsbml(sbml_model.createSpecies)
+            # initDefaults() isn't wrapped in call_libsbml because it returns None
+            sbml_species.initDefaults()
+            call_libsbml(sbml_species.setIdAttribute, id)
+            call_libsbml(sbml_species.setName, name)
+            if notes:
+                call_libsbml(sbml_species.setNotes, notes, True)
+            call_libsbml(sbml_species.setCompartment, compartment_id)
+            call_libsbml(sbml_species.setInitialConcentration, init_concentration)
+            call_libsbml(sbml_species.setSubstanceUnits, substance_units)
+            sbml_species_list.append(sbml_species)
+        return sbml_species_list
+
+    @staticmethod
+    def _create_sbml_reactions(sbml_model, reactions):
+        """ Add SBML Reactions, and their reactants and products, to an SBML model in bulk.
+
+        Args:
+            sbml_model (:obj:`libsbml.Model`): a libSBML Model
+            reactions (:obj:`list` of :obj:`tuple`): for each reaction, a tuple of its id, name, reversibility,
+                notes (or `None`), and participants (see :obj:`add_sbml_species_references`)
+
+        Returns:
+            :obj:`list` of :obj:`libsbml.Reaction`: the new SBML Reactions
+
+        Raises:
+            :obj:`LibSBMLError`: if a libSBML calls fails
+        """
+        sbml_reactions = []
+        for id, name, reversible, notes, participants in reactions:
+            sbml_reaction = call_libsbml(sbml_model.createReaction)
+            call_libsbml(sbml_reaction.setIdAttribute, id)
+            call_libsbml(sbml_reaction.setName, name)
+            call_libsbml(sbml_reaction.setReversible, reversible)
+            call_libsbml(sbml_reaction.setFast, False)
+            if notes:
+                call_libsbml(sbml_reaction.setNotes, notes, True)
+            LibSBMLInterface._add_sbml_species_references(sbml_reaction, participants)
+            sbml_reactions.append(sbml_reaction)
+        return sbml_reactions
+
+    @staticmethod
+    def _add_sbml_species_references(sbml_reaction, participants):
+        """ Add reactants and products to an SBML Reaction in bulk.
+
+        Participants with negative coefficients are added as reactants, participants with positive
+        coefficients are added as products, and participants with zero coefficients are ignored.
+
+        Args:
+            sbml_reaction (:obj:`libsbml.Reaction`): a libSBML Reaction
+            participants (:obj:`list` of :obj:`tuple`): for each participant, a tuple of the id of its
+                SBML Species and its coefficient
+
+        Returns:
+            :obj:`list` of :obj:`libsbml.SpeciesReference`: the new SBML SpeciesReferences
+
+        Raises:
+            :obj:`LibSBMLError`: if a libSBML calls fails
+        """
+        species_references = []
+        for species_id, coefficient in participants:
+            if coefficient < 0:
+                species_reference = call_libsbml(sbml_reaction.createReactant)
+                call_libsbml(species_reference.setStoichiometry, -coefficient)
+            elif 0 < coefficient:
+                species_reference = call_libsbml(sbml_reaction.createProduct)
+                call_libsbml(species_reference.setStoichiometry, coefficient)
+            else:
+                continue
+            call_libsbml(species_reference.setSpecies, species_id)
+            call_libsbml(species_reference.setConstant, True)
+            species_references.append(species_reference)
+        return species_references
+
+    @staticmethod
+    def _create_sbml_assignment_rule(sbml_model, id, math, name=None):
+        """ Add a non-constant SBML Parameter, and an SBML AssignmentRule which sets its value, to an SBML model.
+
+        Args:
+            sbml_model (:obj:`libsbml.Model`): a libSBML Model
+            id (:obj:`str`): the id of the new SBML Parameter
+            math (:obj:`libsbml.ASTNode`): the math of the new SBML AssignmentRule
+            name (:obj:`str`, optional): the name of the new SBML Parameter
+
+        Returns:
+            :obj:`libsbml.AssignmentRule`: the new SBML AssignmentRule
+
+        Raises:
+            :obj:`LibSBMLError`: if a libSBML calls fails
+            :obj:`ValueError`: if a `Parameter` with id `id` is already in use
+        """
+        LibSBMLInterface._create_sbml_parameter(sbml_model, id, None, None, name=name, constant=False)
+        sbml_rule = call_libsbml(sbml_model.createAssignmentRule)
+        call_libsbml(sbml_rule.setVariable, id)
+        call_libsbml(sbml_rule.setMath, math)
+        return sbml_rule
 
 create_sbml_doc_w_fbc = LibSBMLInterface._create_sbml_doc_w_fbc
 add_sbml_unit = LibSBMLInterface._add_sbml_unit
 create_sbml_parameter = LibSBMLInterface._create_sbml_parameter
+create_sbml_species = LibSBMLInterface._create_sbml_species
+create_sbml_reactions = LibSBMLInterface._create_sbml_reactions
+add_sbml_species_references = LibSBMLInterface._add_sbml_species_references
+create_sbml_assignment_rule = LibSBMLInterface._create_sbml_assignment_rule
+
+
+_metrics = None
+# :obj:`wc_lang.util.MetricsRegistry`: registry of the metrics of `wc_lang`, which is resolved on first use by
+# :obj:`get_metrics` and then shared by all of the calls to libSBML
+
+
+def get_metrics():
+    """ Get the registry of the metrics of `wc_lang`, :obj:`wc_lang.util.metrics`
+
+    Returns:
+        :obj:`wc_lang.util.MetricsRegistry`: registry
+    """
+    global _metrics
+    if _metrics is None:
+        # imported here because :obj:`wc_lang.util` depends on :obj:`wc_lang.core`
+        from wc_lang.util import metrics
+        _metrics = metrics
+    return _metrics
 
 
 def wrap_libsbml(method, *args, **kwargs):
@@ -158,6 +296,10 @@ def wrap_libsbml(method, *args, **kwargs):
     Set `returns_int` `True` to avoid raising false exceptions or warnings from methods that return
     integer values.
 
+    The description of the call which is included in errors is only formatted if the call fails,
+    or if `debug` is `True`. See :obj:`call_libsbml` for a variant with even less overhead for
+    methods which don't return integer values.
+
     Args:
         method (:obj:`obj`): a reference to the `libsbml` method to execute
         args (:obj:`list` of :obj:`obj`): a `list` of arguments to the `libsbml` method
@@ -176,39 +318,91 @@ def wrap_libsbml(method, *args, **kwargs):
         returns a known integer error code != `LIBSBML_OPERATION_SUCCESS`
     """
     # process kwargs
-    returns_int = False
-    if 'returns_int' in kwargs:
-        returns_int = kwargs['returns_int']
-        del kwargs['returns_int']
-    debug = False
-    if 'debug' in kwargs:
-        debug = kwargs['debug']
-        del kwargs['debug']
+    returns_int = kwargs.pop('returns_int', False)
+    debug = kwargs.pop('debug', False)
 
     # warn about unused kwargs
     for k in kwargs.keys():
         warn("wrap_libsbml: unknown kwargs key '{}'".format(k))
 
-    new_args = []
-    for arg in args:
-        # if on Python 2, convert unicode text to str(), because libSBML doesn't use SWIG_PYTHON_2_UNICODE
-        if six.PY2 and isinstance(arg, six.text_type):
-            new_args.append(str(arg))  # pragma: no cover # Python 2 only
-        else:
-            new_args.append(arg)
-    if new_args:
-        new_args_str = ', '.join([str(a) for a in new_args])
-        call_str = "method: {}; args: {}".format(method, new_args_str)
-    else:
-        call_str = "method: {}".format(method)
+    if six.PY2:
+        # convert unicode text to str(), because libSBML doesn't use SWIG_PYTHON_2_UNICODE
+        args = _convert_py2_args(args)  # pragma: no cover # Python 2 only
+
     if debug:
-        print('libSBML call:', call_str)
+        print('libSBML call:', get_libsbml_call_str(method, args))
+    if (_metrics or get_metrics()).enabled:
+        count_libsbml_call(method)
+    try:
+        rc = method(*args)
+    except BaseException as error:
+        raise LibSBMLError("Error '{}' in libSBML method call '{}'.".format(error, get_libsbml_call_str(method, args)))
+    return check_libsbml_return_value(method, args, rc, returns_int=returns_int, debug=debug)
+
+
+def call_libsbml(method, *args):
+    """ Call a libSBML method with minimal overhead
+
+    Successful calls are not checked beyond their return values; the checks and error messages of
+    :obj:`wrap_libsbml` are only used if the call fails. This is intended for the many calls which
+    are made when large submodels are exported. Unlike :obj:`wrap_libsbml`, integers other than
+    `LIBSBML_OPERATION_SUCCESS` are always interpreted as error codes, so this can't be used for
+    methods which return integer values.
+
+    Args:
+        method (:obj:`obj`): a reference to the `libsbml` method to execute
+        args (:obj:`list` of :obj:`obj`): a `list` of arguments to the `libsbml` method
+
+    Returns:
+        :obj:`obj` or `int`: the `libsbml` method's return value, or `LIBSBML_OPERATION_SUCCESS`
+
+    Raises:
+        :obj:`LibSBMLError`: if the `libsbml` call raises an exception, or returns None, or
+        returns a known integer error code != `LIBSBML_OPERATION_SUCCESS`
+    """
+    if six.PY2:
+        return wrap_libsbml(method, *args)  # pragma: no cover # Python 2 only
+
+    if (_metrics or get_metrics()).enabled:
+        count_libsbml_call(method)
     try:
-        rc = method(*tuple(new_args))
+        rc = method(*args)
     except BaseException as error:
-        raise LibSBMLError("Error '{}' in libSBML method call '{}'.".format(error, call_str))
+        raise LibSBMLError("Error '{}' in libSBML method call '{}'.".format(error, get_libsbml_call_str(method, args)))
+    if rc is not None and (type(rc) is not int or rc == LIBSBML_OPERATION_SUCCESS):
+        return rc
+    return check_libsbml_return_value(method, args, rc)
+
+
+def count_libsbml_call(method):
+    """ Count a call of a libSBML method in :obj:`wc_lang.util.metrics`
+
+    Args:
+        method (:obj:`obj`): the `libsbml` method
+    """
+    get_metrics().increment('wc_lang_sbml_libsbml_calls_total',
+                            labels={'method': getattr(method, '__name__', str(method))})
+
+
+def check_libsbml_return_value(method, args, rc, returns_int=False, debug=False):
+    """ Check the value returned by a libSBML method, and raise an informative exception if it
+    indicates an error
+
+    Args:
+        method (:obj:`obj`): the `libsbml` method that was executed
+        args (:obj:`tuple` of :obj:`obj`): the arguments to the `libsbml` method
+        rc (:obj:`obj`): the value returned by the `libsbml` method
+        returns_int (:obj:`bool`, optional): whether the method returns an integer
+        debug (:obj:`bool`, optional): whether to print debug output
+
+    Returns:
+        :obj:`obj` or `int`: `rc`
+
+    Raises:
+        :obj:`LibSBMLError`: if `rc` is None, or a known integer error code != `LIBSBML_OPERATION_SUCCESS`
+    """
     if rc == None:
-        raise LibSBMLError("libSBML returned None when executing '{}'.".format(call_str))
+        raise LibSBMLError("libSBML returned None when executing '{}'.".format(get_libsbml_call_str(method, args)))
     elif type(rc) is int:
         # if `method` returns an int value, do not interpret rc as an error code
         if returns_int:
@@ -227,13 +421,14 @@ def wrap_libsbml(method, *args, **kwargs):
                     print("libSBML returns:", rc)
                 warn("wrap_libsbml: unknown error code {} returned by '{}'."
                      "\nPerhaps an integer value is being returned; if so, to avoid this warning "
-                     "pass 'returns_int=True' to wrap_libsbml().".format(error_code, call_str))
+                     "pass 'returns_int=True' to wrap_libsbml().".format(
+                         error_code, get_libsbml_call_str(method, args)))
                 return rc
             else:
                 raise LibSBMLError("LibSBML returned error code '{}' when executing '{}'."
                                    "\nWARNING: if this libSBML call returns an int value, then this error may be "
                                    "incorrect; to avoid this error pass 'returns_int=True' to wrap_libsbml().".format(
-                                       error_code, call_str))
+                                       error_code, get_libsbml_call_str(method, args)))
     else:
         # return data provided by libSBML method
         if debug:
@@ -241,6 +436,33 @@ def wrap_libsbml(method, *args, **kwargs):
         return rc
 
 
+def get_libsbml_call_str(method, args):
+    """ Get a description of a call to a libSBML method for error messages and debug output
+
+    Args:
+        method (:obj:`obj`): a reference to a `libsbml` method
+        args (:obj:`tuple` of :obj:`obj`): the arguments to the `libsbml` method
+
+    Returns:
+        :obj:`str`: description of the call
+    """
+    if args:
+        return "method: {}; args: {}".format(method, ', '.join([str(a) for a in args]))
+    return "method: {}".format(method)
+
+
+def _convert_py2_args(args):  # pragma: no cover # Python 2 only
+    """ Convert unicode arguments to :obj:`str` for libSBML on Python 2
+
+    Args:
+        args (:obj:`tuple` of :obj:`obj`): arguments to a `libsbml` method
+
+    Returns:
+        :obj:`tuple` of :obj:`obj`: arguments, with unicode text converted to :obj:`str`
+    """
+    return tuple(str(arg) if isinstance(arg, six.text_type) else arg for arg in args)
+
+
 def init_sbml_model(sbml_document):
     """ Create and initialize an SMBL model.
 
@@ -309,3 +531,146 @@ def str_to_xmlstr(str):
     """
     # TODO: GET libSBML to do this XML crap, but none of the obvious methods work
     return "<p xmlns=\"http://www.w3.org/1999/xhtml\">{}</p>".format(str)
+
+
+def xmlstr_to_str(xml_str):
+    """ Convert an XML string stored as a Note in an SBML Document, such as a string created by
+    :obj:`str_to_xmlstr`, to a Python string.
+
+    Args:
+        xml_str (:obj:`str`): an XML string
+
+    Returns:
+        :obj:`str`: the text of the XML string
+    """
+    return unescape(re.sub(r'<[^>]*>', '', xml_str)).strip()
+
+
+def get_sbml_id(obj):
+    """ Get the SBML id of an object which can be used in the expressions of rate laws, functions, and observables
+
+    Args:
+        obj (:obj:`wc_lang.core.Species`, :obj:`wc_lang.core.Parameter`, :obj:`wc_lang.core.Observable`,
+            :obj:`wc_lang.core.Function`, or :obj:`wc_lang.core.Compartment`): object
+
+    Returns:
+        :obj:`str`: SBML id of `obj`
+    """
+    if isinstance(obj, wc_lang.core.Species):
+        return obj.gen_sbml_id()
+    if isinstance(obj, wc_lang.core.Parameter):
+        return 'parameter_{}'.format(obj.id)
+    if isinstance(obj, wc_lang.core.Observable):
+        return 'observable_{}'.format(obj.id)
+    if isinstance(obj, wc_lang.core.Function):
+        return 'function_{}'.format(obj.id)
+    return obj.id
+
+
+class SBMLMathTranslator(object):
+    """ Translate the expressions of rate laws, functions, and observables into SBML math
+
+    Expressions are translated into SBML L3 infix from the tokens of their cached parsed expressions, by
+    mapping the tokens which refer to objects to the SBML ids of the objects (see :obj:`get_sbml_id`) and
+    `**` to `^`, and the infix is parsed into libSBML ASTs. Tokens which are function names or numbers are
+    copied as is, even if they are equal to the id of an object. The infix of each expression is cached, so
+    that each expression, including each expression which is shared by several rate laws, is translated at
+    most once per export.
+
+    Attributes:
+        _infix (:obj:`dict`): dictionary which maps expressions to their SBML infix
+        _parser_settings (:obj:`libsbml.L3ParserSettings`): settings of the libSBML L3 infix parser
+    """
+
+    OPERATORS = {'**': '^'}
+    # :obj:`dict`: dictionary which maps Python operators to SBML L3 infix operators
+
+    def __init__(self):
+        self._infix = {}
+        self._parser_settings = libsbml.L3ParserSettings()
+        # `log` is the natural logarithm in Python
+        self._parser_settings.setParseLog(libsbml.L3P_PARSE_LOG_AS_LN)
+
+    def get_infix(self, expression):
+        """ Get the SBML infix of an expression
+
+        Args:
+            expression (:obj:`wc_lang.core.RateLawExpression`, :obj:`wc_lang.core.FunctionExpression`, or
+                :obj:`wc_lang.core.ObservableExpression`): expression
+
+        Returns:
+            :obj:`str`: SBML L3 infix
+        """
+        infix = self._infix.get(expression, None)
+        metrics = _metrics or get_metrics()
+        if metrics.enabled:
+            metrics.count_cache_lookup('sbml.math_translator', infix is not None)
+        if infix is None:
+            parsed_expression = expression._parsed_expression
+            if parsed_expression is None:
+                raise ValueError("Expression '{}' must be parsed to be translated to SBML".format(
+                    expression.expression))
+
+            infix_tokens = []
+            for token in parsed_expression._obj_model_tokens:
+                if token.model is not None:
+                    infix_tokens.append(get_sbml_id(token.model))
+                else:
+                    infix_tokens.append(self.OPERATORS.get(token.token_string, token.token_string))
+            infix = ' '.join(infix_tokens)
+
+            self._infix[expression] = infix
+        return infix
+
+    def get_rate_law_infix(self, reaction):
+        """ Get the SBML infix of the net rate of a reaction, which is the difference of the forward and backward
+        rate laws of the reaction
+
+        Args:
+            reaction (:obj:`wc_lang.core.Reaction`): reaction
+
+        Returns:
+            :obj:`str`: SBML L3 infix, or :obj:`None` if the reaction doesn't have a forward rate law
+        """
+        forward = reaction.rate_laws.get_one(direction=wc_lang.core.RateLawDirection.forward)
+        if forward is None or forward.expression is None:
+            return None
+        infix = self.get_infix(forward.expression)
+
+        backward = reaction.rate_laws.get_one(direction=wc_lang.core.RateLawDirection.backward)
+        if backward is not None and backward.expression is not None:
+            infix = '({}) - ({})'.format(infix, self.get_infix(backward.expression))
+        return infix
+
+    def parse(self, infix):
+        """ Parse SBML infix into a libSBML AST
+
+        Args:
+            infix (:obj:`str`): SBML L3 infix
+
+        Returns:
+            :obj:`libsbml.ASTNode`: AST
+
+        Raises:
+            :obj:`LibSBMLError`: if `infix` can't be parsed
+        """
+        ast = libsbml.parseL3FormulaWithSettings(infix, self._parser_settings)
+        if ast is None:
+            raise LibSBMLError("Expression '{}' could not be translated to SBML: {}".format(
+                infix, libsbml.getLastParseL3Error()))
+        return ast
+
+    def get_mathml(self, infix):
+        """ Translate SBML infix into MathML
+
+        Args:
+            infix (:obj:`str`): SBML L3 infix
+
+        Returns:
+            :obj:`str`: MathML `math` element, without an XML declaration
+
+        Raises:
+            :obj:`LibSBMLError`: if `infix` can't be parsed
+        """
+        mathml = libsbml.writeMathMLToString(self.parse(infix))
+        return re.sub(r'^<\?xml[^>]*\?>\s*', '', mathml).strip()
@@ -0,0 +1,438 @@
+""" Long-running server which handles requests to validate, transform, convert, and compare models
+
+Requests and responses are JSON-encoded dictionaries, one per line, which are read from and written to
+a stream (e.g., stdin and stdout) or a local Unix socket. Each request has a `command` and the arguments
+of the command, and, optionally, an `id` which is copied to the response::
+
+    {"id": 1, "command": "validate", "path": "model.xlsx"}
+    {"id": 2, "command": "transform", "source": "model.xlsx", "dest": "transformed.xlsx",
+        "transforms": ["SplitReversibleReactions"]}
+    {"id": 3, "command": "difference", "path_1": "model-1.xlsx", "path_2": "model-2.xlsx"}
+    {"id": 4, "command": "convert", "source": "model.xlsx", "dest": "model.zip"}
+    {"id": 5, "command": "shutdown"}
+
+Each response has a `status` (`ok` or `error`) and either a `result` or an `error` message::
+
+    {"id": 1, "status": "ok", "result": {"valid": true}}
+    {"id": 2, "status": "error", "error": "Model is invalid: ..."}
+
+Requests are handled concurrently by a pool of worker threads, and therefore responses may be returned in a
+different order than their requests. Models are read once and cached by their path and the modification times
+and sizes of their files. The least recently used models are evicted when the cache is full.
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from concurrent import futures
+from wc_lang import transform
+from wc_lang.io import Reader, Writer
+from wc_lang.util import metrics
+import collections
+import glob
+import json
+import os
+import socket
+import socketserver
+import threading
+
+
+class Server(object):
+    """ Server which handles requests to validate, transform, convert, and compare models
+
+    Attributes:
+        workers (:obj:`int`): number of worker threads
+        cache_size (:obj:`int`): maximum number of models to cache
+        _cache (:obj:`collections.OrderedDict`): dictionary which maps paths to tuples of their versions (see
+            :obj:`get_version`), the models read from them, and the errors raised while reading them, in order
+            from the least to the most recently used
+        _cache_lock (:obj:`threading.Lock`): lock for :obj:`_cache` and :obj:`_path_locks`
+        _path_locks (:obj:`dict`): dictionary which maps paths to locks which ensure that each version of each
+            file is read once, even if it is requested by several threads at once
+        _pool (:obj:`futures.ThreadPoolExecutor`): pool of worker threads
+        _socket_server (:obj:`socketserver.UnixStreamServer`): Unix socket server
+        _shutdown (:obj:`threading.Event`): event which is set when a shutdown is requested
+    """
+
+    COMMANDS = ('validate', 'transform', 'difference', 'convert', 'shutdown')
+    # :obj:`tuple` of :obj:`str`: supported commands
+
+    DEFAULT_CACHE_SIZE = 16
+    # :obj:`int`: default maximum number of models to cache
+
+    def __init__(self, workers=None, cache_size=None):
+        """
+        Args:
+            workers (:obj:`int`, optional): number of worker threads; default: 5 times the number of CPUs
+            cache_size (:obj:`int`, optional): maximum number of models to cache; default:
+                :obj:`DEFAULT_CACHE_SIZE`
+        """
+        self.workers = workers or 5 * (os.cpu_count() or 1)
+        self.cache_size = cache_size or self.DEFAULT_CACHE_SIZE
+        self._cache = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._path_locks = {}
+        self._pool = futures.ThreadPoolExecutor(max_workers=self.workers)
+        self._socket_server = None
+        self._shutdown = threading.Event()
+
+    @staticmethod
+    def get_version(path):
+        """ Get the version of the file(s) of a model
+
+        Args:
+            path (:obj:`str`): path to model, or a glob pattern of the paths of the delimiter-separated files of
+                a model (e.g., `model-*.tsv`)
+
+        Returns:
+            :obj:`tuple`: tuple of the paths of the files of the model, their modification times (ns),
+                and their sizes
+
+        Raises:
+            :obj:`ValueError`: if no files match the path
+        """
+        filenames = sorted(glob.glob(path))
+        if not filenames:
+            raise ValueError('No files match "{}"'.format(path))
+        version = []
+        for filename in filenames:
+            stat = os.stat(filename)
+            version.append((filename, stat.st_mtime_ns, stat.st_size))
+        return tuple(version)
+
+    def read_model(self, path):
+        """ Read a model, or get it from the cache if its files haven't been modified since they were last read
+
+        A model is considered modified if any file has been added to or removed from the model, or if the
+        modification time (ns) or the size of any of its files has changed.
+
+        Args:
+            path (:obj:`str`): path to model, or a glob pattern of the paths of the delimiter-separated files of
+                a model (e.g., `model-*.tsv`)
+
+        Returns:
+            :obj:`wc_lang.core.Model`: model
+
+        Raises:
+            :obj:`ValueError`: if no files match the path or the model is invalid
+        """
+        path = os.path.abspath(path)
+        version = self.get_version(path)
+
+        with self._cache_lock:
+            cached = self._cache.get(path, None)
+            if cached is not None:
+                self._cache.move_to_end(path)
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+
+        hit = cached is not None and cached[0] == version
+        if metrics.enabled:
+            metrics.count_cache_lookup('server.models', hit)
+        if not hit:
+            with path_lock:
+                # another thread may have read the file while this thread waited for the lock
+                with self._cache_lock:
+                    cached = self._cache.get(path, None)
+                if cached is None or cached[0] != version:
+                    try:
+                        cached = (version, Reader().run(path), None)
+                    except ValueError as exception:
+                        cached = (version, None, str(exception))
+                    with self._cache_lock:
+                        self._cache[path] = cached
+                        self._cache.move_to_end(path)
+                        while len(self._cache) > self.cache_size:
+                            evicted_path, _ = self._cache.popitem(last=False)
+                            self._path_locks.pop(evicted_path, None)
+
+        _, model, error = cached
+        if error:
+            raise ValueError(error)
+        return model
+
+    def clear_cache(self):
+        """ Clear the cache of models """
+        with self._cache_lock:
+            self._cache.clear()
+            self._path_locks.clear()
+
+    def handle(self, request):
+        """ Handle a request
+
+        Args:
+            request (:obj:`dict`): request
+
+        Returns:
+            :obj:`dict`: response
+        """
+        response = {}
+        if isinstance(request, dict) and 'id' in request:
+            response['id'] = request['id']
+
+        try:
+            if not isinstance(request, dict) or request.get('command', None) not in self.COMMANDS:
+                raise ValueError('Request must have a command: {}'.format(', '.join(self.COMMANDS)))
+            args = dict(request)
+            args.pop('id', None)
+            command = args.pop('command')
+            response['result'] = getattr(self, 'run_' + command)(**args)
+            response['status'] = 'ok'
+        except Exception as exception:
+            response['status'] = 'error'
+            response['error'] = str(exception)
+
+        return response
+
+    def handle_line(self, line):
+        """ Handle a JSON-encoded request
+
+        Args:
+            line (:obj:`str`): JSON-encoded request
+
+        Returns:
+            :obj:`str`: JSON-encoded response
+        """
+        return self.handle_parsed_line(*parse_request(line))
+
+    def handle_parsed_line(self, request, error=None):
+        """ Handle a request parsed from a line by :obj:`parse_request`
+
+        Args:
+            request (:obj:`object`): request
+            error (:obj:`str`, optional): error message if the line couldn't be parsed
+
+        Returns:
+            :obj:`str`: JSON-encoded response
+        """
+        if error:
+            return json.dumps({'status': 'error', 'error': error})
+        return json.dumps(self.handle(request))
+
+    def run_validate(self, path):
+        """ Validate a model
+
+        Args:
+            path (:obj:`str`): path to model
+
+        Returns:
+            :obj:`dict`: result
+
+        Raises:
+            :obj:`ValueError`: if the model is invalid
+        """
+        try:
+            self.read_model(path)
+        except ValueError as exception:
+            raise ValueError('Model is invalid: ' + str(exception))
+        return {'valid': True}
+
+    def run_transform(self, source, dest, transforms):
+        """ Apply one, or more, transforms to a model and save the result
+
+        Args:
+            source (:obj:`str`): path to model
+            dest (:obj:`str`): path to save transformed model
+            transforms (:obj:`list` of :obj:`str`): ids of transforms
+
+        Returns:
+            :obj:`dict`: result
+
+        Raises:
+            :obj:`ValueError`: if no transforms are selected or a transform is not supported
+        """
+        if not transforms:
+            raise ValueError('Please select at least one transform')
+        available_transforms = transform.get_transforms()
+        for id in transforms:
+            if id not in available_transforms:
+                raise ValueError('Transform "{}" is not supported'.format(id))
+
+        # transform a copy of the cached model
+        model = self.read_model(source).copy()
+        for id in transforms:
+            available_transforms[id]().run(model)
+        Writer().run(model, dest, set_repo_metadata_from_path=False)
+        return {'dest': dest}
+
+    def run_difference(self, path_1, path_2):
+        """ Get the difference between two models
+
+        Args:
+            path_1 (:obj:`str`): path to first model
+            path_2 (:obj:`str`): path to second model
+
+        Returns:
+            :obj:`dict`: result
+        """
+        model_1 = self.read_model(path_1)
+        model_2 = self.read_model(path_2)
+        return {'difference': model_1.difference(model_2)}
+
+    def run_convert(self, source, dest):
+        """ Convert a model to another format
+
+        Args:
+            source (:obj:`str`): path to model
+            dest (:obj:`str`): path to save converted model
+
+        Returns:
+            :obj:`dict`: result
+        """
+        Writer().run(self.read_model(source), dest, set_repo_metadata_from_path=False)
+        return {'dest': dest}
+
+    def run_shutdown(self):
+        """ Request that the server shutdown after the pending requests have been handled
+
+        Returns:
+            :obj:`dict`: result
+        """
+        self._shutdown.set()
+        if self._socket_server:
+            threading.Thread(target=self._socket_server.shutdown).start()
+        return {}
+
+    def serve_stream(self, in_file, out_file):
+        """ Handle JSON-encoded requests read from a stream, one per line, until the end of the
+        stream or a shutdown request
+
+        Args:
+            in_file (:obj:`io.TextIOBase`): stream to read requests from (e.g., stdin)
+            out_file (:obj:`io.TextIOBase`): stream to write responses to (e.g., stdout)
+        """
+        out_lock = threading.Lock()
+
+        def write_response(future):
+            with out_lock:
+                out_file.write(future.result() + '\n')
+                out_file.flush()
+
+        pending = []
+        for line in iter(in_file.readline, ''):
+            if not line.strip():
+                continue
+            request, error = parse_request(line)
+            future = self._pool.submit(self.handle_parsed_line, request, error)
+            future.add_done_callback(write_response)
+            pending.append(future)
+            if self._shutdown.is_set() or is_shutdown_request(request):
+                break
+        futures.wait(pending)
+
+    def serve_socket(self, path):
+        """ Handle JSON-encoded requests received over a local Unix socket, one per line, until a
+        shutdown request
+
+        Args:
+            path (:obj:`str`): path to the Unix socket
+        """
+        server = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            def handle(self):
+                server.serve_stream(TextStream(self.rfile), TextStream(self.wfile))
+
+        if os.path.exists(path):
+            os.remove(path)
+        self._socket_server = socketserver.ThreadingUnixStreamServer(path, RequestHandler)
+        try:
+            self._socket_server.serve_forever()
+        finally:
+            self._socket_server.server_close()
+            self._socket_server = None
+            os.remove(path)
+
+    def close(self):
+        """ Wait for the pending requests and shutdown the pool of worker threads """
+        self._pool.shutdown(wait=True)
+
+
+class TextStream(object):
+    """ Text interface to a binary socket stream
+
+    Attributes:
+        stream (:obj:`io.BufferedIOBase`): binary stream
+    """
+
+    def __init__(self, stream):
+        """
+        Args:
+            stream (:obj:`io.BufferedIOBase`): binary stream
+        """
+        self.stream = stream
+
+    def readline(self):
+        """ Read a line
+
+        Returns:
+            :obj:`str`: line
+        """
+        return self.stream.readline().decode()
+
+    def write(self, text):
+        """ Write text
+
+        Args:
+            text (:obj:`str`): text
+        """
+        self.stream.write(text.encode())
+
+    def flush(self):
+        """ Flush the stream """
+        self.stream.flush()
+
+
+def parse_request(line):
+    """ Parse a JSON-encoded request
+
+    Args:
+        line (:obj:`str`): JSON-encoded request
+
+    Returns:
+        :obj:`tuple`:
+
+            * :obj:`object`: request, or :obj:`None` if the line isn't valid JSON
+            * :obj:`str`: error message, or :obj:`None` if the line is valid JSON
+    """
+    try:
+        return json.loads(line), None
+    except ValueError as exception:
+        return None, 'Request is not valid JSON: {}'.format(str(exception))
+
+
+def is_shutdown_request(request):
+    """ Determine if a request is a shutdown request
+
+    Args:
+        request (:obj:`object`): request parsed by :obj:`parse_request`
+
+    Returns:
+        :obj:`bool`: :obj:`True` if the request is a shutdown request
+    """
+    return isinstance(request, dict) and request.get('command', None) == 'shutdown'
+
+
+def send_request(path, request):
+    """ Send a request to a server listening on a local Unix socket and wait for its response
+
+    Args:
+        path (:obj:`str`): path to the Unix socket
+        request (:obj:`dict`): request
+
+    Returns:
+        :obj:`dict`: response
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        stream = sock.makefile('rwb')
+        stream.write((json.dumps(request) + '\n').encode())
+        stream.flush()
+        sock.shutdown(socket.SHUT_WR)
+        response = json.loads(stream.readline().decode())
+        stream.close()
+    finally:
+        sock.close()
+    return response
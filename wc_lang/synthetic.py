@@ -0,0 +1,488 @@
+""" Generate synthetic models of configurable sizes, e.g., for benchmarking
+
+The generated models are valid. The species types have empirical formulas and charges, and the
+reactions are element and charge balanced. Each reaction either binds two species types into a
+complex (`a + b <=> a_b`) or transports a species type between compartments. The reactions of ODE
+and SSA submodels have mass-action rate laws, some of which are modulated by functions of observables,
+and the reactions of dFBA submodels have flux bounds and a dFBA objective. The generator is seeded, so
+that the same options always produce the same model::
+
+    model = SyntheticModelGenerator(n_submodels={SubmodelAlgorithm.dfba: 1, SubmodelAlgorithm.ssa: 4},
+                                    n_species_types=3000, n_reactions=2000, seed=0).run()
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+from wc_lang.core import (Model, SubmodelAlgorithm, SpeciesTypeType, CompartmentBiologicalType,
+                          DistributionInitConcentration, ConcentrationUnit, Species, Parameter, ParameterType,
+                          Observable, ObservableExpression, Function, FunctionExpression,
+                          Reaction, RateLaw, RateLawDirection, RateLawExpression, RateLawType, ReactionFluxBoundUnit,
+                          DfbaObjReaction, DfbaObjSpecies, DfbaObjective, DfbaObjectiveExpression, EvidenceType)
+from wc_utils.util.chem import EmpiricalFormula
+import collections
+import random
+import wc_lang
+import wc_lang.config.core
+
+
+class SyntheticModelGenerator(object):
+    """ Generate synthetic models of configurable sizes
+
+    Attributes:
+        n_submodels (:obj:`dict`): dictionary which maps each :obj:`SubmodelAlgorithm` to the number of
+            submodels which use the algorithm
+        n_compartments (:obj:`int`): number of compartments
+        n_species_types (:obj:`int`): number of species types; each species type is represented by a
+            species in each compartment
+        n_reactions (:obj:`int`): number of reactions of each submodel
+        n_observables (:obj:`int`): number of observables
+        n_functions (:obj:`int`): number of functions
+        function_depth (:obj:`int`): maximum depth of the nesting of the functions
+        n_parameters (:obj:`int`): number of parameters, in addition to the densities of the compartments
+            and the parameters of the rate laws and functions
+        n_evidence (:obj:`int`): number of evidence for the parameters
+        seed (:obj:`int`): seed for the random number generator
+        _random (:obj:`random.Random`): random number generator
+    """
+
+    ELEMENTS = collections.OrderedDict([
+        ('C', (1, 20)),
+        ('H', (2, 40)),
+        ('N', (0, 5)),
+        ('O', (0, 10)),
+        ('P', (0, 2)),
+    ])
+    # :obj:`collections.OrderedDict`: dictionary which maps the elements of the species types to the
+    # minimum and maximum numbers of their atoms
+
+    ATOMIC_WEIGHTS = {'C': 12.011, 'H': 1.008, 'N': 14.007, 'O': 15.999, 'P': 30.974}
+    # :obj:`dict`: dictionary which maps the elements of the species types to their standard atomic weights
+
+    def __init__(self, n_submodels=None, n_compartments=2, n_species_types=30, n_reactions=20,
+                 n_observables=5, n_functions=5, function_depth=2, n_parameters=5, n_evidence=5, seed=None):
+        """
+        Args:
+            n_submodels (:obj:`dict`, optional): dictionary which maps each :obj:`SubmodelAlgorithm` to the
+                number of submodels which use the algorithm; default: one submodel of each algorithm
+            n_compartments (:obj:`int`, optional): number of compartments
+            n_species_types (:obj:`int`, optional): number of species types
+            n_reactions (:obj:`int`, optional): number of reactions of each submodel
+            n_observables (:obj:`int`, optional): number of observables
+            n_functions (:obj:`int`, optional): number of functions
+            function_depth (:obj:`int`, optional): maximum depth of the nesting of the functions
+            n_parameters (:obj:`int`, optional): number of additional parameters
+            n_evidence (:obj:`int`, optional): number of evidence
+            seed (:obj:`int`, optional): seed for the random number generator
+
+        Raises:
+            :obj:`ValueError`: if the options are invalid
+        """
+        if n_submodels is None:
+            n_submodels = {algorithm: 1 for algorithm in SubmodelAlgorithm}
+        if n_compartments < 1:
+            raise ValueError('At least one compartment is required')
+        if any(n_submodels.values()) and n_reactions and \
+                n_species_types < 3 and (n_species_types < 1 or n_compartments < 2):
+            raise ValueError('At least three species types, or one species type and two compartments, '
+                             'are required to generate reactions')
+        if n_observables and n_species_types < 1:
+            raise ValueError('At least one species type is required to generate observables')
+        if n_functions and not n_observables:
+            raise ValueError('At least one observable is required to generate functions')
+        if function_depth < 1:
+            raise ValueError('The depth of the functions must be at least 1')
+
+        self.n_submodels = n_submodels
+        self.n_compartments = n_compartments
+        self.n_species_types = n_species_types
+        self.n_reactions = n_reactions
+        self.n_observables = n_observables
+        self.n_functions = n_functions
+        self.function_depth = function_depth
+        self.n_parameters = n_parameters
+        self.n_evidence = n_evidence
+        self.seed = seed
+        self._random = None
+
+    def run(self, path=None):
+        """ Generate a model
+
+        Args:
+            path (:obj:`str`, optional): path to write the model to with :obj:`wc_lang.io.Writer`
+
+        Returns:
+            :obj:`Model`: model
+        """
+        self._random = random.Random(self.seed)
+
+        model = Model(id='synthetic_model', name='Synthetic model', version='0.0.1',
+                      wc_lang_version=wc_lang.__version__)
+        compartments = self.gen_compartments(model)
+        complexes, species_types = self.gen_species_types(model)
+        species = self.gen_species(model, species_types, compartments)
+        observables = self.gen_observables(model, species)
+        functions = self.gen_functions(model, observables)
+        parameters = self.gen_parameters(model)
+        self.gen_evidence(model, parameters)
+        self.gen_submodels(model, complexes, species_types, compartments, species, functions)
+
+        if path:
+            import wc_lang.io
+            wc_lang.io.Writer().run(model, path, set_repo_metadata_from_path=False)
+
+        return model
+
+    def gen_compartments(self, model):
+        """ Generate the compartments of a model, with an extracellular compartment which contains
+        the other compartments
+
+        Args:
+            model (:obj:`Model`): model
+
+        Returns:
+            :obj:`list` of :obj:`wc_lang.core.Compartment`: compartments
+        """
+        extracellular_id = wc_lang.config.core.get_config()['wc_lang']['EXTRACELLULAR_COMPARTMENT_ID']
+        compartments = []
+        for i_comp in range(self.n_compartments):
+            if i_comp == 0:
+                id = extracellular_id
+                biological_type = CompartmentBiologicalType.extracellular
+            else:
+                id = 'c_{}'.format(i_comp)
+                biological_type = CompartmentBiologicalType.cellular
+            density = model.parameters.create(id='density_{}'.format(id), value=self._random.uniform(1000., 1200.),
+                                              units='g l^-1')
+            compartments.append(model.compartments.create(
+                id=id, name='compartment {}'.format(i_comp), biological_type=biological_type,
+                parent_compartment=compartments[0] if compartments else None,
+                mean_init_volume=self._random.uniform(1e-15, 1e-14), std_init_volume=0.,
+                init_density=density))
+        return compartments
+
+    def gen_species_types(self, model):
+        """ Generate the species types of a model
+
+        The species types are generated in triples of two species types and their complex, whose
+        empirical formula and charge are the sums of those of the two species types.
+
+        Args:
+            model (:obj:`Model`): model
+
+        Returns:
+            :obj:`tuple`:
+
+                * :obj:`list` of :obj:`tuple`: triples of species types and their complexes
+                * :obj:`list` of :obj:`wc_lang.core.SpeciesType`: species types
+        """
+        complexes = []
+        species_types = []
+        n_complexes = self.n_species_types // 3
+        for i_complex in range(n_complexes):
+            a = self.gen_species_type(model, 'st_{}'.format(3 * i_complex))
+            b = self.gen_species_type(model, 'st_{}'.format(3 * i_complex + 1))
+            a_b = self.gen_species_type(model, 'st_{}'.format(3 * i_complex + 2),
+                                        elements=self.add_elements(a[1], b[1]), charge=a[2] + b[2])
+            complexes.append((a[0], b[0], a_b[0]))
+            species_types.extend([a[0], b[0], a_b[0]])
+        for i_species_type in range(3 * n_complexes, self.n_species_types):
+            species_types.append(self.gen_species_type(model, 'st_{}'.format(i_species_type))[0])
+        return complexes, species_types
+
+    def gen_species_type(self, model, id, elements=None, charge=None):
+        """ Generate a species type
+
+        Args:
+            model (:obj:`Model`): model
+            id (:obj:`str`): id
+            elements (:obj:`collections.OrderedDict`, optional): dictionary which maps elements to the numbers
+                of their atoms; default: random numbers of atoms
+            charge (:obj:`int`, optional): charge; default: random charge
+
+        Returns:
+            :obj:`tuple`:
+
+                * :obj:`wc_lang.core.SpeciesType`: species type
+                * :obj:`collections.OrderedDict`: dictionary which maps elements to the numbers of their atoms
+                * :obj:`int`: charge
+        """
+        if elements is None:
+            elements = collections.OrderedDict((element, self._random.randint(*bounds))
+                                               for element, bounds in self.ELEMENTS.items())
+        if charge is None:
+            charge = self._random.randint(-2, 1)
+        formula = ''.join('{}{}'.format(element, count) for element, count in elements.items() if count)
+        species_type = model.species_types.create(
+            id=id, name='species type {}'.format(id), type=SpeciesTypeType.metabolite,
+            empirical_formula=EmpiricalFormula(formula),
+            molecular_weight=sum(self.ATOMIC_WEIGHTS[element] * count for element, count in elements.items()),
+            charge=charge)
+        return species_type, elements, charge
+
+    @staticmethod
+    def add_elements(elements_1, elements_2):
+        """ Add the numbers of the atoms of two species types
+
+        Args:
+            elements_1 (:obj:`collections.OrderedDict`): dictionary which maps elements to the numbers of their atoms
+            elements_2 (:obj:`collections.OrderedDict`): dictionary which maps elements to the numbers of their atoms
+
+        Returns:
+            :obj:`collections.OrderedDict`: dictionary which maps elements to the sums of the numbers of their atoms
+        """
+        return collections.OrderedDict((element, elements_1[element] + elements_2[element]) for element in elements_1)
+
+    def gen_species(self, model, species_types, compartments):
+        """ Generate a species for each species type in each compartment, and their initial concentrations
+
+        Args:
+            model (:obj:`Model`): model
+            species_types (:obj:`list` of :obj:`wc_lang.core.SpeciesType`): species types
+            compartments (:obj:`list` of :obj:`wc_lang.core.Compartment`): compartments
+
+        Returns:
+            :obj:`dict`: dictionary which maps pairs of species types and compartments to species
+        """
+        species = collections.OrderedDict()
+        for species_type in species_types:
+            for compartment in compartments:
+                spec = model.species.create(id=Species.gen_id(species_type.id, compartment.id),
+                                            species_type=species_type, compartment=compartment)
+                model.distribution_init_concentrations.create(
+                    id=DistributionInitConcentration.gen_id(spec.id), species=spec,
+                    mean=self._random.uniform(1e-6, 1e-3), std=0., units=ConcentrationUnit.M)
+                species[(species_type, compartment)] = spec
+        return species
+
+    def gen_observables(self, model, species):
+        """ Generate observables, each of which is a linear function of one to three species
+
+        Args:
+            model (:obj:`Model`): model
+            species (:obj:`dict`): dictionary which maps pairs of species types and compartments to species
+
+        Returns:
+            :obj:`list` of :obj:`Observable`: observables
+        """
+        species = list(species.values())
+        observables = []
+        for i_obs in range(self.n_observables):
+            obs_species = self._random.sample(species, min(len(species), self._random.randint(1, 3)))
+            expression, error = ObservableExpression.deserialize(
+                ' + '.join('{} * {}'.format(self._random.randint(1, 4), spec.id) for spec in obs_species),
+                {Species: {spec.id: spec for spec in obs_species}})
+            assert error is None, str(error)
+            observables.append(model.observables.create(id='obs_{}'.format(i_obs), name='observable {}'.format(i_obs),
+                                                        expression=expression))
+        return observables
+
+    def gen_functions(self, model, observables):
+        """ Generate dimensionless functions
+
+        The functions are generated in chains of depth :obj:`function_depth`. The first function of each chain
+        is the ratio of an observable and a parameter, and each other function is the product of the previous
+        function of the chain and a parameter.
+
+        Args:
+            model (:obj:`Model`): model
+            observables (:obj:`list` of :obj:`Observable`): observables
+
+        Returns:
+            :obj:`list` of :obj:`Function`: functions
+        """
+        functions = []
+        for i_func in range(self.n_functions):
+            if i_func % self.function_depth == 0:
+                obs = self._random.choice(observables)
+                param = model.parameters.create(id='K_func_{}'.format(i_func), type=ParameterType.K_m,
+                                                value=self._random.uniform(1., 1e3), units='molecule')
+                expression, error = FunctionExpression.deserialize(
+                    '{} / {}'.format(obs.id, param.id),
+                    {Observable: {obs.id: obs}, Parameter: {param.id: param}})
+            else:
+                prev_func = functions[-1]
+                param = model.parameters.create(id='f_func_{}'.format(i_func), type=ParameterType.other,
+                                                value=self._random.uniform(0.5, 2.), units='dimensionless')
+                expression, error = FunctionExpression.deserialize(
+                    '{} * {}'.format(prev_func.id, param.id),
+                    {Function: {prev_func.id: prev_func}, Parameter: {param.id: param}})
+            assert error is None, str(error)
+            functions.append(model.functions.create(id='func_{}'.format(i_func), name='function {}'.format(i_func),
+                                                    expression=expression, units='dimensionless'))
+        return functions
+
+    def gen_parameters(self, model):
+        """ Generate additional parameters
+
+        Args:
+            model (:obj:`Model`): model
+
+        Returns:
+            :obj:`list` of :obj:`Parameter`: parameters
+        """
+        return [model.parameters.create(id='param_{}'.format(i_param), name='parameter {}'.format(i_param),
+                                        value=self._random.uniform(0., 1.), std=0., units='dimensionless')
+                for i_param in range(self.n_parameters)]
+
+    def gen_evidence(self, model, parameters):
+        """ Generate evidence for parameters
+
+        Args:
+            model (:obj:`Model`): model
+            parameters (:obj:`list` of :obj:`Parameter`): parameters
+
+        Returns:
+            :obj:`list` of :obj:`wc_lang.core.Evidence`: evidence
+        """
+        evidences = []
+        for i_ev in range(self.n_evidence):
+            evidence = model.evidences.create(id='ev_{}'.format(i_ev), name='evidence {}'.format(i_ev),
+                                              type=self._random.choice(list(EvidenceType)),
+                                              temperature=37., ph=7.5)
+            if parameters:
+                param = self._random.choice(parameters)
+                evidence.value = str(param.value)
+                evidence.units = param.units
+                param.evidence.append(evidence)
+            evidences.append(evidence)
+        return evidences
+
+    def gen_submodels(self, model, complexes, species_types, compartments, species, functions):
+        """ Generate submodels and their reactions
+
+        Args:
+            model (:obj:`Model`): model
+            complexes (:obj:`list` of :obj:`tuple`): triples of species types and their complexes
+            species_types (:obj:`list` of :obj:`wc_lang.core.SpeciesType`): species types
+            compartments (:obj:`list` of :obj:`wc_lang.core.Compartment`): compartments
+            species (:obj:`dict`): dictionary which maps pairs of species types and compartments to species
+            functions (:obj:`list` of :obj:`Function`): functions
+
+        Returns:
+            :obj:`list` of :obj:`wc_lang.core.Submodel`: submodels
+        """
+        submodels = []
+        for algorithm in SubmodelAlgorithm:
+            for i_submodel in range(self.n_submodels.get(algorithm, 0)):
+                submodel = model.submodels.create(id='{}_{}'.format(algorithm.name, i_submodel),
+                                                  name='{} submodel {}'.format(algorithm.name, i_submodel),
+                                                  algorithm=algorithm)
+                reactions = [self.gen_reaction(model, submodel, '{}_rxn_{}'.format(submodel.id, i_rxn),
+                                               complexes, species_types, compartments, species, functions)
+                             for i_rxn in range(self.n_reactions)]
+                if algorithm == SubmodelAlgorithm.dfba:
+                    self.gen_dfba_obj(model, submodel, reactions)
+                submodels.append(submodel)
+        return submodels
+
+    def gen_reaction(self, model, submodel, id, complexes, species_types, compartments, species, functions):
+        """ Generate a balanced reaction, and its rate laws or flux bounds
+
+        Args:
+            model (:obj:`Model`): model
+            submodel (:obj:`wc_lang.core.Submodel`): submodel
+            id (:obj:`str`): id
+            complexes (:obj:`list` of :obj:`tuple`): triples of species types and their complexes
+            species_types (:obj:`list` of :obj:`wc_lang.core.SpeciesType`): species types
+            compartments (:obj:`list` of :obj:`wc_lang.core.Compartment`): compartments
+            species (:obj:`dict`): dictionary which maps pairs of species types and compartments to species
+            functions (:obj:`list` of :obj:`Function`): functions
+
+        Returns:
+            :obj:`wc_lang.core.Reaction`: reaction
+        """
+        if complexes and (len(compartments) < 2 or self._random.random() < 0.5):
+            # binding: a + b <=> a_b
+            a, b, a_b = self._random.choice(complexes)
+            compartment = self._random.choice(compartments)
+            reactants = [species[(a, compartment)], species[(b, compartment)]]
+            products = [species[(a_b, compartment)]]
+        else:
+            # transport: a[c_i] <=> a[c_j]
+            species_type = self._random.choice(species_types)
+            comp_1, comp_2 = self._random.sample(compartments, 2)
+            reactants = [species[(species_type, comp_1)]]
+            products = [species[(species_type, comp_2)]]
+
+        reversible = self._random.random() < 0.5
+        rxn = model.reactions.create(id=id, name='reaction {}'.format(id), submodel=submodel, reversible=reversible)
+        pool = model.get_species_coefficient_pool()
+        rxn.participants = [pool.get_or_create(spec, -1.) for spec in reactants] + \
+            [pool.get_or_create(spec, 1.) for spec in products]
+
+        if submodel.algorithm == SubmodelAlgorithm.dfba:
+            flux_max = self._random.uniform(1., 1e3)
+            rxn.flux_min = -flux_max if reversible else 0.
+            rxn.flux_max = flux_max
+            rxn.flux_bound_units = ReactionFluxBoundUnit['M s^-1']
+        else:
+            self.gen_rate_law(model, rxn, RateLawDirection.forward, reactants, functions)
+            if reversible:
+                self.gen_rate_law(model, rxn, RateLawDirection.backward, products, functions)
+
+        return rxn
+
+    def gen_rate_law(self, model, rxn, direction, reactants, functions):
+        """ Generate a mass-action rate law, which is modulated by a function for half of the rate laws
+
+        Args:
+            model (:obj:`Model`): model
+            rxn (:obj:`wc_lang.core.Reaction`): reaction
+            direction (:obj:`RateLawDirection`): direction
+            reactants (:obj:`list` of :obj:`Species`): species which are consumed in `direction`
+            functions (:obj:`list` of :obj:`Function`): functions
+
+        Returns:
+            :obj:`RateLaw`: rate law
+        """
+        k = model.parameters.create(id='k_{}_{}'.format(rxn.id, direction.name), type=ParameterType.k_cat,
+                                    value=self._random.uniform(1e-3, 1.),
+                                    units='molecule^-{} s^-1'.format(len(reactants)))
+        terms = [k.id] + [spec.id for spec in reactants]
+        objs = {
+            Parameter: {k.id: k},
+            Species: {spec.id: spec for spec in reactants},
+        }
+        if functions and self._random.random() < 0.5:
+            func = self._random.choice(functions)
+            terms.append(func.id)
+            objs[Function] = {func.id: func}
+
+        expression, error = RateLawExpression.deserialize(' * '.join(terms), objs)
+        assert error is None, str(error)
+        return model.rate_laws.create(id=RateLaw.gen_id(rxn.id, direction.name), reaction=rxn,
+                                      direction=direction, type=RateLawType['mass-action'],
+                                      expression=expression)
+
+    def gen_dfba_obj(self, model, submodel, reactions):
+        """ Generate a dFBA objective reaction which consumes some of the products of the reactions of
+        a dFBA submodel, and an objective which maximizes its flux
+
+        Args:
+            model (:obj:`Model`): model
+            submodel (:obj:`wc_lang.core.Submodel`): submodel
+            reactions (:obj:`list` of :obj:`wc_lang.core.Reaction`): reactions of the submodel
+
+        Returns:
+            :obj:`DfbaObjective`: dFBA objective
+        """
+        dfba_obj_rxn = model.dfba_obj_reactions.create(id='biomass_{}'.format(submodel.id),
+                                                       name='biomass of {}'.format(submodel.id),
+                                                       submodel=submodel)
+        products = []
+        for rxn in reactions:
+            for part in rxn.participants:
+                if part.coefficient > 0 and part.species not in products:
+                    products.append(part.species)
+        for spec in self._random.sample(products, min(len(products), 5)):
+            dfba_obj_rxn.dfba_obj_species.create(id=DfbaObjSpecies.gen_id(dfba_obj_rxn.id, spec.id), species=spec,
+                                                 value=-self._random.uniform(1e-3, 1.))
+
+        expression, error = DfbaObjectiveExpression.deserialize(
+            dfba_obj_rxn.id, {Reaction: {}, DfbaObjReaction: {dfba_obj_rxn.id: dfba_obj_rxn}})
+        assert error is None, str(error)
+        return model.dfba_objs.create(id=DfbaObjective.gen_id(submodel.id), submodel=submodel,
+                                      expression=expression)
@@ -1,5 +1,6 @@
-from .core import Transform, get_transforms
-from .change_value import ChangeValueTransform
+from .core import Transform, SubmodelTransform, UndoLog, get_transforms
+from .pipeline import TransformContext, TransformPipeline, SubmodelTransformExecutor
+from .change_value import ChangeValueTransform, ChangeValuesTransform
 from .create_implicit_dist_zero_init_concs \
     import CreateImplicitDistributionZeroInitConcentrationsTransform
 from .create_implicit_dfba_ex_rxns import CreateImplicitDfbaExchangeReactionsTransform
@@ -9,6 +9,7 @@
 from .core import Transform
 from wc_lang.core import Model
 import json
+import six
 
 
 class ChangeValueTransform(Transform):
@@ -97,3 +98,269 @@ class ChangeValueTransform(Transform):
             return False
 
         return self.attr_path == other.attr_path and self.value == other.value
+
+
+class ChangeValuesTransform(Transform):
+    """ Change the values of multiple attributes of a model
+
+    The paths to the attributes can be resolved once into handles to the objects which have the attributes
+    (see :obj:`resolve`), which can then be used to apply many vectors of values (e.g., for each point of a
+    parameter sweep or sensitivity analysis) without resolving the paths again. The paths are resolved with
+    shared indexes of the related objects, rather than with a linear search for each step of each path::
+
+        transform = ChangeValuesTransform(attr_paths)
+        handles = transform.resolve(model)
+        for values in sweep:
+            handles.apply(values)
+            ...
+
+    Attributes:
+        attr_paths (:obj:`list` of :obj:`list` of :obj:`list` of :obj:`str`): list of paths to attributes
+            or nested attributes of a model (see :obj:`ChangeValueTransform`)
+        values (:obj:`list` of :obj:`object`): new values
+    """
+
+    class Meta(object):
+        id = 'ChangeValues'
+        label = 'Change the values of multiple attributes of a model'
+
+    def __init__(self, attr_paths=None, values=None):
+        """
+        Args:
+            attr_paths (:obj:`list` of :obj:`list` of :obj:`list` of :obj:`str`, optional): list of paths to
+                attributes or nested attributes of a model
+            values (:obj:`list` of :obj:`object`, optional): new values
+        """
+        self.attr_paths = list(attr_paths or [])
+        self.values = list(values or [])
+
+    @classmethod
+    def from_pairs(cls, changes):
+        """ Create a transform from a table of changes
+
+        Args:
+            changes (:obj:`list` of :obj:`tuple`): list of pairs of paths to attributes and new values
+
+        Returns:
+            :obj:`ChangeValuesTransform`: transform
+        """
+        transform = cls()
+        for attr_path, value in changes:
+            transform.attr_paths.append(attr_path)
+            transform.values.append(value)
+        return transform
+
+    def run(self, model):
+        """ Change the values of multiple attributes of a model
+
+        Args:
+            model (:obj:`Model`): model
+
+        Returns:
+            :obj:`Model`: same model, but with different values of attributes
+        """
+        self.resolve(model).apply(self.values)
+        return model
+
+    def resolve(self, model):
+        """ Resolve the paths to the attributes into handles to the objects which have the attributes
+
+        Args:
+            model (:obj:`Model`): model
+
+        Returns:
+            :obj:`ResolvedAttrPaths`: handles to the attributes
+
+        Raises:
+            :obj:`ValueError`: if a path does not refer to an attribute of the model
+        """
+        index = {}
+        return ResolvedAttrPaths([resolve_attr_path(model, attr_path, index=index) for attr_path in self.attr_paths])
+
+    def attr_paths_to_str(self):
+        """ Generate a string representation of `attr_paths`, with one line per path generated by
+        :obj:`ChangeValueTransform.attr_path_to_str`
+
+        Returns:
+            :obj:`str`: string representation of `attr_paths`
+        """
+        return '\n'.join(ChangeValueTransform(attr_path).attr_path_to_str() for attr_path in self.attr_paths)
+
+    @staticmethod
+    def attr_paths_from_str(str):
+        """ Generate `attr_paths` from its string representation
+
+        Args:
+            str (:obj:`str`): string representation of `attr_paths`
+
+        Returns:
+            :obj:`list`: `attr_paths`
+        """
+        if not str:
+            return []
+        return [ChangeValueTransform.attr_path_from_str(line) for line in str.split('\n')]
+
+    def __eq__(self, other):
+        """ Compare two :obj:`ChangeValuesTransform` objects
+
+        Args:
+            other (:obj:`Object`): other object
+
+        Returns:
+            :obj:`bool`: true if :obj:`ChangeValuesTransform` objects are semantically equal
+        """
+        if other.__class__ is not self.__class__:
+            return False
+
+        return self.attr_paths == other.attr_paths and self.values == other.values
+
+
+class ResolvedAttrPaths(object):
+    """ Handles to attributes of a model
+
+    Attributes:
+        handles (:obj:`list` of :obj:`tuple`): list of tuples of objects and the names of their attributes
+    """
+
+    def __init__(self, handles):
+        """
+        Args:
+            handles (:obj:`list` of :obj:`tuple`): list of tuples of objects and the names of their attributes
+        """
+        self.handles = handles
+
+    def __len__(self):
+        """ Get the number of attributes
+
+        Returns:
+            :obj:`int`: number of attributes
+        """
+        return len(self.handles)
+
+    def get_values(self):
+        """ Get the values of the attributes
+
+        Returns:
+            :obj:`list` of :obj:`object`: values
+        """
+        return [getattr(obj, attr_name) for obj, attr_name in self.handles]
+
+    def apply(self, values):
+        """ Set the values of the attributes
+
+        Args:
+            values (:obj:`list` of :obj:`object`): values, in the same order as the handles
+
+        Raises:
+            :obj:`ValueError`: if the number of values is not equal to the number of attributes
+        """
+        if len(values) != len(self.handles):
+            raise ValueError('The number of values ({}) must be equal to the number of attributes ({})'.format(
+                len(values), len(self.handles)))
+        for (obj, attr_name), value in zip(self.handles, values):
+            setattr(obj, attr_name, value)
+
+
+def resolve_attr_path(model, attr_path, index=None):
+    """ Resolve a path to an attribute of a model to the object which has the attribute and the name of the attribute
+
+    Args:
+        model (:obj:`Model`): model
+        attr_path (:obj:`list` of :obj:`list` of :obj:`str`): list that
+            represents the path to an attribute or nested attribute of a model (see :obj:`ChangeValueTransform`)
+        index (:obj:`dict`, optional): indexes of the related objects of the model by the values of the
+            attributes of the filters of the steps of paths, which are built on demand and can be shared among
+            calls to resolve multiple paths of the same model, as long as the model is not changed between
+            the calls
+
+    Returns:
+        :obj:`tuple`:
+
+            * :obj:`obj_model.Model`: object which has the attribute
+            * :obj:`str`: name of the attribute
+
+    Raises:
+        :obj:`ValueError`: if the path does not refer to an attribute of the model
+    """
+    if isinstance(attr_path, six.string_types):
+        attr_path = [attr_path]
+    if index is None:
+        index = {}
+
+    obj = model
+    for step in attr_path[:-1]:
+        if isinstance(step, six.string_types):
+            obj = getattr(obj, step, None)
+        else:
+            attr_name, filters = step
+            obj = get_related_obj(obj, attr_name, filters, index)
+        if obj is None:
+            raise ValueError('Attribute path {} does not refer to an object of the model'.format(
+                json.dumps(attr_path, default=str)))
+
+    attr_name = attr_path[-1]
+    if not isinstance(attr_name, six.string_types) or attr_name not in obj.Meta.attributes:
+        raise ValueError('Attribute path {} does not refer to an attribute of the model'.format(
+            json.dumps(attr_path, default=str)))
+
+    return (obj, attr_name)
+
+
+def get_related_obj(obj, attr_name, filters, index):
+    """ Get the related object of an object which matches filters, using an index of the related objects by
+    the values of the attributes of the filters
+
+    Args:
+        obj (:obj:`obj_model.Model`): object
+        attr_name (:obj:`str`): name of the related attribute
+        filters (:obj:`dict`): dictionary of the names of attributes and their values
+        index (:obj:`dict`): indexes of the related objects by the values of the attributes of filters
+
+    Returns:
+        :obj:`obj_model.Model`: related object which matches the filters, or :obj:`None` if no related
+            object matches the filters
+    """
+    related_objs = getattr(obj, attr_name, None)
+    if related_objs is None:
+        return None
+
+    keys = tuple(sorted(filters.keys()))
+    index_key = (id(obj), attr_name, keys)
+    if index_key not in index:
+        index[index_key] = index_related_objs(related_objs, keys)
+    related_objs_by_values = index[index_key]
+
+    try:
+        matches = related_objs_by_values.get(tuple(filters[key] for key in keys), [])
+    except (AttributeError, TypeError):
+        # the related objects or the values of the filters can't be indexed
+        matches = None
+
+    if matches is None or len(matches) > 1:
+        # defer to :obj:`get_one` for its semantics (e.g., its error for multiple matching objects)
+        return related_objs.get_one(**filters)
+    if matches:
+        return matches[0]
+    return None
+
+
+def index_related_objs(related_objs, keys):
+    """ Index related objects by the values of attributes
+
+    Args:
+        related_objs (:obj:`list` of :obj:`obj_model.Model`): related objects
+        keys (:obj:`tuple` of :obj:`str`): names of the attributes
+
+    Returns:
+        :obj:`dict`: dictionary which maps tuples of the values of the attributes to lists of the related
+            objects which have the values, or :obj:`None` if the related objects can't be indexed by the values
+            of the attributes
+    """
+    related_objs_by_values = {}
+    try:
+        for related_obj in related_objs:
+            values = tuple(getattr(related_obj, key) for key in keys)
+            related_objs_by_values.setdefault(values, []).append(related_obj)
+    except (AttributeError, TypeError):
+        return None
+    return related_objs_by_values
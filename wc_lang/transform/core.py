@@ -6,10 +6,15 @@
 :License: MIT
 """
 
+from .pipeline import TransformContext
 from abc import ABCMeta, abstractmethod
 from six import with_metaclass
 from wc_lang import Model
+import inspect
+import obj_model
+import obj_model.core
 import sys
+import threading
 
 
 def get_transforms():
@@ -22,7 +27,7 @@ def get_transforms():
     transforms = {}
     for attr_name in dir(module):
         attr = getattr(module, attr_name)
-        if isinstance(attr, type) and issubclass(attr, Transform) and attr is not Transform:
+        if isinstance(attr, type) and issubclass(attr, Transform) and not inspect.isabstract(attr):
             transforms[attr.Meta.id] = attr
 
     return transforms
@@ -41,3 +46,371 @@ class Transform(with_metaclass(ABCMeta, object)):
             :obj:`Model`: transformed model
         """
         pass  # pragma: no cover
+
+    def run_with_context(self, model, context):
+        """ Transform a model using the indexes of the model shared by the transforms of a pipeline
+
+        Transforms which can use the shared indexes should override this method, and invalidate the
+        indexes of the objects that they change.
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`wc_lang.transform.pipeline.TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`Model`: transformed model
+        """
+        context.invalidate()
+        return self.run(model)
+
+    def run_with_undo_log(self, model):
+        """ Transform a model and record the objects that the transform creates and the attributes that it changes
+        so that the transform can be rolled back
+
+        Args:
+            model (:obj:`Model`): model
+
+        Returns:
+            :obj:`UndoLog`: log of the changes made by the transform
+        """
+        with UndoLog() as undo_log:
+            self.run(model)
+        return undo_log
+
+    def is_applicable(self, model, context):
+        """ Determine whether the transform could change a model, or whether its preconditions are
+        already met and it can be skipped
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`wc_lang.transform.pipeline.TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`bool`: :obj:`True` if the transform could change the model
+        """
+        return True
+
+
+class SubmodelTransform(Transform):
+    """ Transform which changes each submodel independently of the other submodels
+
+    Submodel-local transforms are split into two steps. First, :obj:`get_submodel_edits` computes the
+    edits of each submodel from the submodel, without changing the model. Second, :obj:`apply_edits`
+    applies the edits of all of the submodels to the model. Because the edits of each submodel
+    only depend on the submodel, the edits of the submodels can be computed in parallel worker processes
+    (see :obj:`wc_lang.transform.pipeline.SubmodelTransformExecutor`). Therefore, the edits must be
+    picklable, and must refer to the objects of the model by their positions (e.g., the position of a
+    reaction in `context.get_submodel_reactions(submodel)`) rather than by reference.
+
+    Transforms which compute the edits to determine whether they are applicable should cache them with
+    :obj:`wc_lang.transform.pipeline.TransformContext.cache_submodel_edits` so that the next run of the
+    transform applies them rather than computing them again.
+    """
+
+    def run(self, model):
+        """ Transform a model
+
+        Args:
+            model (:obj:`Model`): model
+
+        Returns:
+            :obj:`Model`: same model, but transformed
+        """
+        return self.run_with_context(model, TransformContext(model))
+
+    def run_with_context(self, model, context):
+        """ Transform a model, computing the edits of the submodels in this process
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`wc_lang.transform.pipeline.TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`Model`: same model, but transformed
+        """
+        edits = context.pop_submodel_edits(self)
+        if edits is None:
+            edits = self.get_edits(model, context)
+        self.apply_edits(model, edits, context)
+        return model
+
+    def get_edits(self, model, context):
+        """ Compute the edits of all of the submodels in this process without changing the model
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`wc_lang.transform.pipeline.TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`list` of :obj:`tuple`: list of tuples of submodels and their edits
+        """
+        return [(submodel, self.get_submodel_edits(model, submodel, context))
+                for submodel in self.get_submodels(model, context)]
+
+    @abstractmethod
+    def get_submodels(self, model, context):
+        """ Get the submodels changed by the transform
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`wc_lang.transform.pipeline.TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`list` of :obj:`wc_lang.core.Submodel`: submodels
+        """
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def get_submodel_edits(self, model, submodel, context):
+        """ Compute the edits of a submodel without changing the model
+
+        Args:
+            model (:obj:`Model`): model
+            submodel (:obj:`wc_lang.core.Submodel`): submodel
+            context (:obj:`wc_lang.transform.pipeline.TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`list`: picklable edits of the submodel
+        """
+        pass  # pragma: no cover
+
+    @abstractmethod
+    def apply_edits(self, model, edits, context):
+        """ Apply the edits of the submodels to a model
+
+        Args:
+            model (:obj:`Model`): model
+            edits (:obj:`list` of :obj:`tuple`): list of tuples of submodels and their edits, in the order
+                of :obj:`get_submodels`
+            context (:obj:`wc_lang.transform.pipeline.TransformContext`): indexes of the model
+        """
+        pass  # pragma: no cover
+
+
+class UndoLog(object):
+    """ Log of the objects created and the attributes changed while the log is recording, which can be used to roll
+    back the changes in time proportional to the number of changes
+
+    While any log is recording, :obj:`obj_model.Model.__init__`, :obj:`obj_model.Model.__setattr__`, and the methods
+    which mutate related managers (e.g., `append` and `remove` of many-to-many relationships) are wrapped with
+    hooks which are shared by all logs. The hooks are installed when the first log starts recording and removed when
+    the last log stops recording. Each hook only dispatches the changes to the logs which are recording in the
+    current thread. Therefore, a log only records the changes made by the thread which opened it, and logs can be
+    used concurrently in multiple threads.
+
+    After a rollback, the related objects of the changed objects are restored, but their order may differ from
+    their original order.
+
+    Attributes:
+        created (:obj:`list` of :obj:`obj_model.Model`): objects created while the log was recording
+        changes (:obj:`list` of :obj:`tuple`): objects, names of attributes, and original values of the attributes
+            changed while the log was recording
+        _created_ids (:obj:`set` of :obj:`int`): Python ids of the created objects
+        _changed_keys (:obj:`set` of :obj:`tuple`): Python ids of the changed objects and the names of the changed
+            attributes
+        _changed_manager_ids (:obj:`set` of :obj:`int`): Python ids of the related managers whose original
+            values have been recorded
+    """
+
+    _MISSING = object()
+    # :obj:`object`: sentinel for attributes which were not set before they were changed
+
+    MANAGER_METHOD_NAMES = ('add', 'append', 'clear', 'cut', 'discard', 'extend', 'insert', 'pop', 'remove',
+                            'reverse', 'sort', '__delitem__', '__iadd__', '__setitem__')
+    # :obj:`tuple` of :obj:`str`: names of the methods which mutate related managers
+
+    _hooks_lock = threading.Lock()
+    # :obj:`threading.Lock`: lock for installing and removing the hooks
+
+    _hooks_users = 0
+    # :obj:`int`: number of logs which are recording in any thread
+
+    _hooks_originals = []
+    # :obj:`list` of :obj:`tuple`: classes, names, and original values of the wrapped methods
+
+    _thread_state = threading.local()
+    # :obj:`threading.local`: logs which are recording in each thread (`logs`)
+
+    def __init__(self):
+        self.created = []
+        self.changes = []
+        self._created_ids = set()
+        self._changed_keys = set()
+        self._changed_manager_ids = set()
+
+    def __len__(self):
+        """ Get the number of created objects and changed attributes
+
+        Returns:
+            :obj:`int`: number of created objects and changed attributes
+        """
+        return len(self.created) + len(self.changes)
+
+    def __enter__(self):
+        """ Start recording the changes made by this thread
+
+        Returns:
+            :obj:`UndoLog`: this log
+        """
+        with UndoLog._hooks_lock:
+            if UndoLog._hooks_users == 0:
+                UndoLog._install_hooks()
+            UndoLog._hooks_users += 1
+
+        if getattr(UndoLog._thread_state, 'logs', None) is None:
+            UndoLog._thread_state.logs = []
+        UndoLog._thread_state.logs.append(self)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        """ Stop recording changes """
+        UndoLog._thread_state.logs.remove(self)
+
+        with UndoLog._hooks_lock:
+            UndoLog._hooks_users -= 1
+            if UndoLog._hooks_users == 0:
+                UndoLog._remove_hooks()
+
+    @staticmethod
+    def _get_recording_logs():
+        """ Get the logs which are recording in the current thread
+
+        Returns:
+            :obj:`list` of :obj:`UndoLog`: logs which are recording in the current thread
+        """
+        return getattr(UndoLog._thread_state, 'logs', None)
+
+    @classmethod
+    def _install_hooks(cls):
+        """ Wrap the constructor and :obj:`obj_model.Model.__setattr__` of the objects of models, and the methods
+        which mutate related managers, with hooks which dispatch their changes to the logs of the current thread
+        """
+        orig_init = obj_model.Model.__init__
+        orig_setattr = obj_model.Model.__setattr__
+
+        def __init__(obj, *args, **kwargs):
+            for log in cls._get_recording_logs() or ():
+                log._record_creation(obj)
+            orig_init(obj, *args, **kwargs)
+
+        def __setattr__(obj, attr_name, value, *args, **kwargs):
+            for log in cls._get_recording_logs() or ():
+                log._record_change(obj, attr_name)
+            orig_setattr(obj, attr_name, value, *args, **kwargs)
+
+        originals = [(obj_model.Model, '__init__', orig_init), (obj_model.Model, '__setattr__', orig_setattr)]
+        obj_model.Model.__init__ = __init__
+        obj_model.Model.__setattr__ = __setattr__
+
+        # wrap the methods defined by each class of related managers, as well as the methods that the base class of
+        # the related managers inherits from :obj:`list`
+        manager_classes = [obj_model.core.RelatedManager]
+        for manager_cls in manager_classes:
+            manager_classes.extend(subclass for subclass in manager_cls.__subclasses__()
+                                   if subclass not in manager_classes)
+            for method_name in cls.MANAGER_METHOD_NAMES:
+                if method_name in manager_cls.__dict__:
+                    orig_method = manager_cls.__dict__[method_name]
+                elif manager_cls is obj_model.core.RelatedManager and hasattr(manager_cls, method_name):
+                    orig_method = cls._MISSING
+                else:
+                    continue
+                originals.append((manager_cls, method_name, orig_method))
+                setattr(manager_cls, method_name, cls._wrap_manager_method(getattr(manager_cls, method_name)))
+
+        UndoLog._hooks_originals = originals
+
+    @classmethod
+    def _wrap_manager_method(cls, method):
+        """ Wrap a method which mutates related managers with a hook which records the original values of the
+        related managers
+
+        Args:
+            method (:obj:`types.FunctionType`): method
+
+        Returns:
+            :obj:`types.FunctionType`: wrapped method
+        """
+        def wrapped_method(manager, *args, **kwargs):
+            for log in cls._get_recording_logs() or ():
+                log._record_manager_change(manager)
+            return method(manager, *args, **kwargs)
+        wrapped_method.__name__ = method.__name__
+        return wrapped_method
+
+    @classmethod
+    def _remove_hooks(cls):
+        """ Restore the original methods wrapped by :obj:`_install_hooks` """
+        for owner_cls, method_name, orig_method in reversed(UndoLog._hooks_originals):
+            if orig_method is cls._MISSING:
+                delattr(owner_cls, method_name)
+            else:
+                setattr(owner_cls, method_name, orig_method)
+        UndoLog._hooks_originals = []
+
+    def _record_creation(self, obj):
+        """ Record the creation of an object
+
+        Args:
+            obj (:obj:`obj_model.Model`): object
+        """
+        if id(obj) not in self._created_ids:
+            self._created_ids.add(id(obj))
+            self.created.append(obj)
+
+    def _record_change(self, obj, attr_name):
+        """ Record the original value of an attribute before it is changed for the first time
+
+        Args:
+            obj (:obj:`obj_model.Model`): object
+            attr_name (:obj:`str`): name of the attribute
+        """
+        key = (id(obj), attr_name)
+        if id(obj) in self._created_ids or key in self._changed_keys:
+            return
+        self._changed_keys.add(key)
+
+        value = obj.__dict__.get(attr_name, self._MISSING)
+        if isinstance(value, list):
+            value = list(value)
+        self.changes.append((obj, attr_name, value))
+
+    def _record_manager_change(self, manager):
+        """ Record the original value of the attribute of a related manager before it is mutated for the first time
+
+        Args:
+            manager (:obj:`obj_model.core.RelatedManager`): related manager
+        """
+        if id(manager) in self._changed_manager_ids:
+            return
+        self._changed_manager_ids.add(id(manager))
+
+        obj = manager.object
+        for attr_name, value in obj.__dict__.items():
+            if value is manager:
+                self._record_change(obj, attr_name)
+                break
+
+    def rollback(self):
+        """ Roll back the recorded changes: remove the relationships of the created objects and restore the
+        original values of the changed attributes """
+        for obj in reversed(self.created):
+            attr_names = [attr_name for attr_name, attr in obj.Meta.attributes.items()
+                          if isinstance(attr, obj_model.RelatedAttribute)] + list(obj.Meta.related_attributes.keys())
+            for attr_name in attr_names:
+                if isinstance(getattr(obj, attr_name), list):
+                    setattr(obj, attr_name, [])
+                else:
+                    setattr(obj, attr_name, None)
+
+        for obj, attr_name, value in reversed(self.changes):
+            if value is self._MISSING:
+                obj.__dict__.pop(attr_name, None)
+            else:
+                setattr(obj, attr_name, value)
+
+        self.created = []
+        self.changes = []
+        self._created_ids = set()
+        self._changed_keys = set()
+        self._changed_manager_ids = set()
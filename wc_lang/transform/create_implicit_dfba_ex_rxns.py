@@ -7,12 +7,11 @@
 :License: MIT
 """
 
-from .core import Transform
+from .core import SubmodelTransform
 from wc_lang.core import SubmodelAlgorithm, ReactionFluxBoundUnit
-import wc_lang.config.core
 
 
-class CreateImplicitDfbaExchangeReactionsTransform(Transform):
+class CreateImplicitDfbaExchangeReactionsTransform(SubmodelTransform):
     """ Create implicit exchange reactions for dFBA submodels.
 
     To enable FBA to represent a closed system, create implicit forward exchange reactions
@@ -26,49 +25,129 @@ class CreateImplicitDfbaExchangeReactionsTransform(Transform):
         id = 'CreateImplicitDfbaExchangeReactions'
         label = 'Create implicit exchange reactions for dFBA submodels'
 
-    def run(self, model):
-        """ Transform model
+    def get_submodels(self, model, context):
+        """ Get the dFBA submodels
 
         Args:
             model (:obj:`Model`): model
+            context (:obj:`TransformContext`): indexes of the model
 
         Returns:
-            :obj:`Model`: same model, but transformed
+            :obj:`list` of :obj:`Submodel`: dFBA submodels
         """
-        config = wc_lang.config.core.get_config()['wc_lang']
-        ext_comp = model.compartments.get_one(id=config['EXTRACELLULAR_COMPARTMENT_ID'])
-        rxn_id_template = config['dfba']['exchange_reaction_id_template']
+        return [submodel for submodel in model.submodels if submodel.algorithm == SubmodelAlgorithm.dfba]
+
+    def get_submodel_edits(self, model, submodel, context):
+        """ Get the exchange reactions which are missing from a dFBA submodel
+
+        Args:
+            model (:obj:`Model`): model
+            submodel (:obj:`Submodel`): dFBA submodel
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`list` of :obj:`tuple`: list of tuples of the position of an extracellular species in the
+                species of the submodel, and the id of its missing exchange reaction
+        """
+        ext_comp = context.get_extracellular_compartment()
+        rxn_id_template = context.config['dfba']['exchange_reaction_id_template']
+
+        edits = []
+        rxn_ids = set(rxn.id for rxn in context.get_submodel_reactions(submodel))
+        for i_species, species in enumerate(context.get_submodel_species(submodel)):
+            if species.compartment == ext_comp:
+                rxn_id = rxn_id_template.format(submodel.id,
+                                                species.species_type.id,
+                                                species.compartment.id)
+                if rxn_id not in rxn_ids:
+                    edits.append((i_species, rxn_id))
+        return edits
+
+    def apply_edits(self, model, edits, context):
+        """ Create the missing exchange reactions of the dFBA submodels
+
+        Args:
+            model (:obj:`Model`): model
+            edits (:obj:`list` of :obj:`tuple`): list of tuples of dFBA submodels and their missing exchange reactions
+            context (:obj:`TransformContext`): indexes of the model
+        """
+        config = context.config
         rxn_name_template = config['dfba']['exchange_reaction_name_template']
         ex_flux_bound_carbon = config['dfba']['ex_flux_bound_carbon']
         ex_flux_bound_no_carbon = config['dfba']['ex_flux_bound_no_carbon']
 
-        for submodel in model.submodels:
-            if submodel.algorithm == SubmodelAlgorithm.dfba:
-                for species in submodel.get_species():
-                    if species.compartment == ext_comp:
-
-                        rxn = submodel.reactions.create(
-                            model=model,
-                            id=rxn_id_template.format(submodel.id,
-                                                      species.species_type.id,
-                                                      species.compartment.id),
-                            name=rxn_name_template.format(submodel.name,
-                                                          species.species_type.name,
-                                                          species.compartment.name),
-                            reversible=True)
-
-                        part = species.species_coefficients.get_one(coefficient=1.)
-                        if part:
-                            rxn.participants.append(part)
-                        else:
-                            rxn.participants.create(species=species, coefficient=1.)
-
-                        if species.species_type.has_carbon():
-                            rxn.flux_min = -ex_flux_bound_carbon
-                            rxn.flux_max = ex_flux_bound_carbon
-                        else:
-                            rxn.flux_min = -ex_flux_bound_no_carbon
-                            rxn.flux_max = ex_flux_bound_no_carbon
-                        rxn.flux_bound_units = ReactionFluxBoundUnit['M s^-1']
-
-        return model
+        species_coefficients = context.get_species_coefficient_pool()
+        species_type_has_carbon = {}
+        for submodel, species, rxn_id in self.get_missing_exchange_reactions_from_edits(edits, context):
+            rxn = submodel.reactions.create(
+                model=model,
+                id=rxn_id,
+                name=rxn_name_template.format(submodel.name,
+                                              species.species_type.name,
+                                              species.compartment.name),
+                reversible=True)
+
+            rxn.participants.append(species_coefficients.get_or_create(species, 1.))
+
+            has_carbon = species_type_has_carbon.get(species.species_type, None)
+            if has_carbon is None:
+                has_carbon = species_type_has_carbon[species.species_type] = species.species_type.has_carbon()
+            if has_carbon:
+                rxn.flux_min = -ex_flux_bound_carbon
+                rxn.flux_max = ex_flux_bound_carbon
+            else:
+                rxn.flux_min = -ex_flux_bound_no_carbon
+                rxn.flux_max = ex_flux_bound_no_carbon
+            rxn.flux_bound_units = ReactionFluxBoundUnit['M s^-1']
+
+        context.invalidate('submodel_reactions')
+
+    def is_applicable(self, model, context):
+        """ Determine whether any dFBA submodel is missing an exchange reaction
+
+        If so, the missing reactions are cached in the context to be created by the next run of the transform.
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`bool`: :obj:`True` if any dFBA submodel is missing an exchange reaction
+        """
+        edits = self.get_edits(model, context)
+        if any(submodel_edits for _, submodel_edits in edits):
+            context.cache_submodel_edits(self, edits)
+            return True
+        return False
+
+    def get_missing_exchange_reactions(self, model, context):
+        """ Get the exchange reactions which are missing from the dFBA submodels
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`list` of :obj:`tuple`: list of tuples of a dFBA submodel, an extracellular species,
+                and the id of the missing exchange reaction
+        """
+        return self.get_missing_exchange_reactions_from_edits(self.get_edits(model, context), context)
+
+    @staticmethod
+    def get_missing_exchange_reactions_from_edits(edits, context):
+        """ Get the species referenced by the edits of the dFBA submodels
+
+        Args:
+            edits (:obj:`list` of :obj:`tuple`): list of tuples of dFBA submodels and their missing exchange reactions
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`list` of :obj:`tuple`: list of tuples of a dFBA submodel, an extracellular species,
+                and the id of the missing exchange reaction
+        """
+        missing = []
+        for submodel, submodel_edits in edits:
+            species = context.get_submodel_species(submodel)
+            for i_species, rxn_id in submodel_edits:
+                missing.append((submodel, species[i_species], rxn_id))
+        return missing
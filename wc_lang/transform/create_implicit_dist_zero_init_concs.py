@@ -8,6 +8,7 @@
 """
 
 from .core import Transform
+from .pipeline import TransformContext
 from wc_lang.core import DistributionInitConcentration, ConcentrationUnit
 
 
@@ -28,7 +29,19 @@ class CreateImplicitDistributionZeroInitConcentrationsTransform(Transform):
         Returns:
             :obj:`Model`: same model, but transformed
         """
-        for species in model.get_species():
+        return self.run_with_context(model, TransformContext(model))
+
+    def run_with_context(self, model, context):
+        """ Transform model
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`Model`: same model, but transformed
+        """
+        for species in context.get_species():
             if species.distribution_init_concentration is None:
                 species.distribution_init_concentration = DistributionInitConcentration(
                     id=DistributionInitConcentration.gen_id(species.id),
@@ -37,3 +50,15 @@ class CreateImplicitDistributionZeroInitConcentrationsTransform(Transform):
                     mean=0.0, std=0.0, units=ConcentrationUnit.M)
 
         return model
+
+    def is_applicable(self, model, context):
+        """ Determine whether any species doesn't have a distribution of its initial concentration
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`bool`: :obj:`True` if any species doesn't have a distribution of its initial concentration
+        """
+        return any(species.distribution_init_concentration is None for species in context.get_species())
@@ -0,0 +1,312 @@
+""" Run sequences of transforms with shared indexes of a model
+
+:Author: Jonathan Karr <karr@mssm.edu>
+:Date: 2018-11-20
+:Copyright: 2018, Karr Lab
+:License: MIT
+"""
+
+import itertools
+import multiprocessing
+import time
+import wc_lang
+import wc_lang.config.core
+
+
+class TransformContext(object):
+    """ Indexes of a model which are shared by the transforms of a pipeline
+
+    The indexes are computed on first use and cached until they are invalidated by a transform
+    which changes the objects that they index.
+
+    Attributes:
+        model (:obj:`wc_lang.core.Model`): model
+        config (:obj:`dict`): wc_lang configuration
+        _cache (:obj:`dict`): dictionary of indexes
+    """
+
+    def __init__(self, model, config=None):
+        """
+        Args:
+            model (:obj:`wc_lang.core.Model`): model
+            config (:obj:`dict`, optional): wc_lang configuration; default: :obj:`wc_lang.config.core.get_config`
+        """
+        self.model = model
+        self.config = config or wc_lang.config.core.get_config()['wc_lang']
+        self._cache = {}
+
+    def get_extracellular_compartment(self):
+        """ Get the extracellular compartment
+
+        Returns:
+            :obj:`wc_lang.core.Compartment`: extracellular compartment, or :obj:`None` if the model
+                doesn't have an extracellular compartment
+        """
+        metrics = wc_lang.util.metrics
+        if metrics.enabled:
+            metrics.count_cache_lookup('transform_context.extracellular_compartment',
+                                       'extracellular_compartment' in self._cache)
+        if 'extracellular_compartment' not in self._cache:
+            self._cache['extracellular_compartment'] = self.model.compartments.get_one(
+                id=self.config['EXTRACELLULAR_COMPARTMENT_ID'])
+        return self._cache['extracellular_compartment']
+
+    def get_species(self):
+        """ Get the species of the model
+
+        Returns:
+            :obj:`list` of :obj:`wc_lang.core.Species`: species
+        """
+        metrics = wc_lang.util.metrics
+        if metrics.enabled:
+            metrics.count_cache_lookup('transform_context.species', 'species' in self._cache)
+        if 'species' not in self._cache:
+            self._cache['species'] = self.model.get_species()
+        return self._cache['species']
+
+    def get_submodel_species(self, submodel):
+        """ Get the species of a submodel
+
+        Returns:
+            :obj:`list` of :obj:`wc_lang.core.Species`: species
+        """
+        submodel_species = self._cache.setdefault('submodel_species', {})
+        metrics = wc_lang.util.metrics
+        if metrics.enabled:
+            metrics.count_cache_lookup('transform_context.submodel_species', submodel in submodel_species)
+        if submodel not in submodel_species:
+            submodel_species[submodel] = submodel.get_species()
+        return submodel_species[submodel]
+
+    def get_submodel_reactions(self, submodel):
+        """ Get the reactions of a submodel
+
+        Returns:
+            :obj:`list` of :obj:`wc_lang.core.Reaction`: reactions
+        """
+        submodel_reactions = self._cache.setdefault('submodel_reactions', {})
+        metrics = wc_lang.util.metrics
+        if metrics.enabled:
+            metrics.count_cache_lookup('transform_context.submodel_reactions', submodel in submodel_reactions)
+        if submodel not in submodel_reactions:
+            submodel_reactions[submodel] = list(submodel.reactions)
+        return submodel_reactions[submodel]
+
+    def get_species_coefficient_pool(self):
+        """ Get the canonical, indexed pool of the participants of the reactions of the model
+
+        Returns:
+            :obj:`wc_lang.core.SpeciesCoefficientPool`: pool of participants
+        """
+        return self.model.get_species_coefficient_pool()
+
+    def cache_submodel_edits(self, transform, edits):
+        """ Cache the edits of the submodels computed by a submodel-local transform, e.g., to determine whether
+        the transform is applicable, so that they can be reused by the next run of the transform
+
+        Args:
+            transform (:obj:`wc_lang.transform.core.SubmodelTransform`): transform
+            edits (:obj:`list` of :obj:`tuple`): list of tuples of submodels and their edits
+        """
+        self._cache.setdefault('submodel_edits', {})[transform] = edits
+
+    def pop_submodel_edits(self, transform):
+        """ Get and remove the cached edits of the submodels computed by a submodel-local transform
+
+        Args:
+            transform (:obj:`wc_lang.transform.core.SubmodelTransform`): transform
+
+        Returns:
+            :obj:`list` of :obj:`tuple`: list of tuples of submodels and their edits, or :obj:`None` if the
+                edits are not cached
+        """
+        return self._cache.get('submodel_edits', {}).pop(transform, None)
+
+    def invalidate(self, *names):
+        """ Invalidate indexes
+
+        Because the edits of submodels refer to the objects of the model by their positions in the indexes,
+        the cached edits of submodels (see :obj:`cache_submodel_edits`) are invalidated with any index.
+
+        Args:
+            *names (:obj:`str`): names of the indexes to invalidate (`extracellular_compartment`, `species`,
+                `submodel_species`, `submodel_reactions`); default: all indexes
+        """
+        if names:
+            for name in names:
+                self._cache.pop(name, None)
+            self._cache.pop('submodel_edits', None)
+        else:
+            self._cache.clear()
+
+
+class TransformPipeline(object):
+    """ Run a sequence of transforms with shared indexes of a model
+
+    The transforms are instantiated once, share a :obj:`TransformContext`, and are skipped if their
+    preconditions are already met (see :obj:`wc_lang.transform.core.Transform.is_applicable`). The wall
+    time and the numbers of objects after each transform are recorded in :obj:`stats`.
+
+    Attributes:
+        transforms (:obj:`list` of :obj:`wc_lang.transform.core.Transform`): transforms
+        workers (:obj:`int`): number of worker processes for the submodel-local transforms
+        stats (:obj:`list` of :obj:`dict`): id, status (`run` or `skipped`), wall time (s), and
+            numbers of objects after each transform of the last run
+    """
+
+    def __init__(self, transforms, workers=1):
+        """
+        Args:
+            transforms (:obj:`list` of :obj:`wc_lang.transform.core.Transform` or :obj:`type`): transforms, or
+                classes of transforms
+            workers (:obj:`int`, optional): number of worker processes for the submodel-local transforms
+                (see :obj:`SubmodelTransformExecutor`); default: run all transforms in this process
+        """
+        self.transforms = [transform() if isinstance(transform, type) else transform for transform in transforms]
+        self.workers = workers
+        self.stats = []
+
+    def run(self, model, context=None):
+        """ Transform a model
+
+        Args:
+            model (:obj:`wc_lang.core.Model`): model
+            context (:obj:`TransformContext`, optional): indexes of the model
+
+        Returns:
+            :obj:`wc_lang.core.Model`: same model, but transformed
+        """
+        from .core import SubmodelTransform
+
+        context = context or TransformContext(model)
+        executor = SubmodelTransformExecutor(self.workers) if self.workers > 1 else None
+        metrics = wc_lang.util.metrics
+        self.stats = []
+        for transform in self.transforms:
+            start = time.time()
+            if transform.is_applicable(model, context):
+                if executor and isinstance(transform, SubmodelTransform):
+                    executor.run(transform, model, context)
+                else:
+                    transform.run_with_context(model, context)
+                status = 'run'
+            else:
+                status = 'skipped'
+            duration = time.time() - start
+            self.stats.append({
+                'id': transform.Meta.id,
+                'status': status,
+                'time': duration,
+                'counts': get_object_counts(model),
+            })
+            if metrics.enabled:
+                metrics.record_time('wc_lang_transform_seconds', duration,
+                                    labels={'transform': transform.Meta.id, 'status': status})
+        return model
+
+    def get_stats_summary(self):
+        """ Get a textual summary of the wall times and numbers of objects after each transform of the last run
+
+        Returns:
+            :obj:`str`: summary
+        """
+        lines = []
+        for stats in self.stats:
+            lines.append('{}: {} in {:.3f} s ({})'.format(
+                stats['id'], stats['status'], stats['time'],
+                ', '.join('{} {}'.format(count, name.replace('_', ' ')) for name, count in stats['counts'].items())))
+        return '\n'.join(lines)
+
+
+class SubmodelTransformExecutor(object):
+    """ Run submodel-local transforms (:obj:`wc_lang.transform.core.SubmodelTransform`) by computing the
+    edits of the submodels in parallel worker processes, and then applying the edits to the model in this
+    process in the order of the submodels
+
+    The workers are forked from this process, and therefore share the model with this process without
+    pickling it; only the edits are returned to this process. On platforms which can't fork processes,
+    the edits are computed in this process.
+
+    Attributes:
+        workers (:obj:`int`): number of worker processes
+    """
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers (:obj:`int`, optional): number of worker processes; default: number of CPUs
+        """
+        self.workers = workers or multiprocessing.cpu_count()
+
+    def run(self, transform, model, context=None):
+        """ Transform a model
+
+        Args:
+            transform (:obj:`wc_lang.transform.core.SubmodelTransform`): transform
+            model (:obj:`wc_lang.core.Model`): model
+            context (:obj:`TransformContext`, optional): indexes of the model
+
+        Returns:
+            :obj:`wc_lang.core.Model`: same model, but transformed
+        """
+        context = context or TransformContext(model)
+
+        # reuse the edits computed to determine whether the transform is applicable
+        edits = context.pop_submodel_edits(transform)
+        if edits is not None:
+            transform.apply_edits(model, edits, context)
+            return model
+
+        submodels = transform.get_submodels(model, context)
+        if self.workers > 1 and len(submodels) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+            key = next(_worker_keys)
+            _worker_args[key] = (transform, model, context, submodels)
+            try:
+                with multiprocessing.get_context('fork').Pool(min(self.workers, len(submodels))) as pool:
+                    edits = pool.map(_get_submodel_edits, [(key, i_submodel) for i_submodel in range(len(submodels))])
+            finally:
+                _worker_args.pop(key)
+        else:
+            edits = [transform.get_submodel_edits(model, submodel, context) for submodel in submodels]
+
+        transform.apply_edits(model, list(zip(submodels, edits)), context)
+        return model
+
+
+_worker_keys = itertools.count()
+# :obj:`itertools.count`: keys of the arguments of the runs of :obj:`SubmodelTransformExecutor`
+
+_worker_args = {}
+# :obj:`dict`: dictionary which maps keys to the transform, model, context, and submodels of each run of
+# :obj:`SubmodelTransformExecutor`, which are inherited by the forked worker processes
+
+
+def _get_submodel_edits(args):
+    """ Compute the edits of a submodel in a worker process
+
+    Args:
+        args (:obj:`tuple`): key of the run and position of the submodel
+
+    Returns:
+        :obj:`list`: edits of the submodel
+    """
+    key, i_submodel = args
+    transform, model, context, submodels = _worker_args[key]
+    return transform.get_submodel_edits(model, submodels[i_submodel], context)
+
+
+def get_object_counts(model):
+    """ Get the numbers of the types of objects which are created and deleted by the transforms
+
+    Args:
+        model (:obj:`wc_lang.core.Model`): model
+
+    Returns:
+        :obj:`dict`: numbers of submodels, species, distributions of initial concentrations, and reactions
+    """
+    return {
+        'submodels': len(model.submodels),
+        'species': len(model.species),
+        'distribution_init_concentrations': len(model.distribution_init_concentrations),
+        'reactions': len(model.reactions),
+    }
@@ -8,6 +8,7 @@
 """
 
 from .core import Transform
+from .pipeline import TransformContext, TransformPipeline
 from . import create_implicit_dist_zero_init_concs
 from . import create_implicit_dfba_ex_rxns
 from . import set_finite_dfba_flux_bounds
@@ -47,6 +48,7 @@ class PrepareForWcSimTransform(Transform):
             transforms (:obj:`list` of :obj:`Transform`, optional): list of transforms
         """
         self.transforms = transforms or list(self.DEFAULT_TRANSFORMS)
+        self._pipeline = TransformPipeline(self.transforms)
 
     def run(self, model):
         """ Transform model
@@ -57,5 +59,16 @@ class PrepareForWcSimTransform(Transform):
         Returns:
             :obj:`Model`: same model, but transformed
         """
-        for transform in self.transforms:
-            transform().run(model)
+        return self.run_with_context(model, TransformContext(model))
+
+    def run_with_context(self, model, context):
+        """ Transform model
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`Model`: same model, but transformed
+        """
+        return self._pipeline.run(model, context=context)
@@ -7,13 +7,11 @@
 :License: MIT
 """
 
-from .core import Transform
-from math import isnan
+from .core import SubmodelTransform
 from wc_lang.core import SubmodelAlgorithm, ReactionFluxBoundUnit
-import wc_lang.config.core
 
 
-class SetFiniteDfbaFluxBoundsTransform(Transform):
+class SetFiniteDfbaFluxBoundsTransform(SubmodelTransform):
     """ Clip the flux bounds for the reactions in dFBA submodels to the
     default flux range because some linear programming solvers require
     finite minimum and maximum flux bounds.
@@ -38,38 +36,95 @@ class SetFiniteDfbaFluxBoundsTransform(Transform):
         label = ('Clip the flux bounds for the reactions in dFBA submodels'
                  ' to the default flux range')
 
-    def run(self, model):
-        """ Transform model
+    def get_submodels(self, model, context):
+        """ Get the dFBA submodels
 
         Args:
             model (:obj:`Model`): model
+            context (:obj:`TransformContext`): indexes of the model
 
         Returns:
-            :obj:`Model`: same model, but transformed
+            :obj:`list` of :obj:`Submodel`: dFBA submodels
         """
-        config = wc_lang.config.core.get_config()['wc_lang']
-        flux_min_bound_reversible = config['dfba']['flux_min_bound_reversible']
-        flux_min_bound_irreversible = config['dfba']['flux_min_bound_irreversible']
-        flux_max_bound = config['dfba']['flux_max_bound']
-
-        for submodel in model.submodels:
-            if submodel.algorithm == SubmodelAlgorithm.dfba:
-                for rxn in submodel.reactions:
-                    if rxn.reversible:
-                        flux_min = flux_min_bound_reversible
-                    else:
-                        flux_min = flux_min_bound_irreversible
-                    flux_max = flux_max_bound
-
-                    if rxn.flux_min is None or isnan(rxn.flux_min):
-                        rxn.flux_min = flux_min
-                    else:
-                        rxn.flux_min = max(rxn.flux_min, flux_min)
-
-                    if rxn.flux_max is None or isnan(rxn.flux_max):
-                        rxn.flux_max = flux_max
-                    else:
-                        rxn.flux_max = min(rxn.flux_max, flux_max)
-
-                    rxn.flux_bound_units = ReactionFluxBoundUnit['M s^-1']
-        return model
+        return [submodel for submodel in model.submodels if submodel.algorithm == SubmodelAlgorithm.dfba]
+
+    def get_submodel_edits(self, model, submodel, context):
+        """ Get the clipped flux bounds of the reactions of a dFBA submodel
+
+        Args:
+            model (:obj:`Model`): model
+            submodel (:obj:`Submodel`): dFBA submodel
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`tuple` of :obj:`numpy.ndarray`: clipped minimum and maximum flux bounds, and reversibilities
+                of the reactions of the submodel, in the order of `context.get_submodel_reactions(submodel)`
+        """
+        from wc_lang.dfba import DfbaFluxBounds
+        bounds = DfbaFluxBounds.from_submodel(submodel, reactions=context.get_submodel_reactions(submodel))
+        bounds.clip(context.config)
+        return (bounds.lower, bounds.upper, bounds.reversible)
+
+    def apply_edits(self, model, edits, context):
+        """ Set the flux bounds of the reactions of the dFBA submodels
+
+        Args:
+            model (:obj:`Model`): model
+            edits (:obj:`list` of :obj:`tuple`): list of tuples of dFBA submodels and the clipped flux bounds
+                of their reactions
+            context (:obj:`TransformContext`): indexes of the model
+        """
+        from wc_lang.dfba import DfbaFluxBounds
+        for submodel, (flux_mins, flux_maxs, reversible) in edits:
+            DfbaFluxBounds(context.get_submodel_reactions(submodel), flux_mins, flux_maxs, reversible).write(
+                units=ReactionFluxBoundUnit['M s^-1'])
+
+    def is_applicable(self, model, context):
+        """ Determine whether the flux bounds of any reaction of a dFBA submodel are not clipped to the
+        default flux range
+
+        If so, the clipped bounds are cached in the context to be set by the next run of the transform.
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`bool`: :obj:`True` if the flux bounds of any reaction of a dFBA submodel are not clipped
+        """
+        units = ReactionFluxBoundUnit['M s^-1']
+        edits = self.get_edits(model, context)
+        for rxn, flux_min, flux_max in self.get_bounds_from_edits(edits, context):
+            if rxn.flux_min != flux_min or rxn.flux_max != flux_max or rxn.flux_bound_units != units:
+                context.cache_submodel_edits(self, edits)
+                return True
+        return False
+
+    def get_bounds(self, model, context):
+        """ Get the clipped flux bounds of the reactions of the dFBA submodels
+
+        Args:
+            model (:obj:`Model`): model
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`list` of :obj:`tuple`: list of tuples of a reaction, and its clipped minimum and maximum flux bounds
+        """
+        return self.get_bounds_from_edits(self.get_edits(model, context), context)
+
+    @staticmethod
+    def get_bounds_from_edits(edits, context):
+        """ Get the reactions referenced by the edits of the dFBA submodels
+
+        Args:
+            edits (:obj:`list` of :obj:`tuple`): list of tuples of dFBA submodels and the clipped flux bounds
+                of their reactions
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`list` of :obj:`tuple`: list of tuples of a reaction, and its clipped minimum and maximum flux bounds
+        """
+        bounds = []
+        for submodel, (flux_mins, flux_maxs, _) in edits:
+            bounds.extend(zip(context.get_submodel_reactions(submodel), flux_mins.tolist(), flux_maxs.tolist()))
+        return bounds
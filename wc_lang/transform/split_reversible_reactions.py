@@ -6,104 +6,150 @@
 :License: MIT
 """
 
-from .core import Transform
+from .core import SubmodelTransform
 from wc_lang import Model, Reaction, RateLawDirection, SubmodelAlgorithm
 import copy
 import re
 
 
-class SplitReversibleReactionsTransform(Transform):
+class SplitReversibleReactionsTransform(SubmodelTransform):
     """ Split reversible reactions in non-dFBA submodels into separate forward and backward reactions """
 
     class Meta(object):
         id = 'SplitReversibleReactions'
         label = 'Split reversible reactions into separate forward and backward reactions'
 
-    def run(self, model):
-        """ Split reversible reactions in non-dFBA submodels into separate forward and backward reactions
+    def get_submodels(self, model, context):
+        """ Get the non-dFBA submodels
 
         Args:
             model (:obj:`Model`): model definition
+            context (:obj:`TransformContext`): indexes of the model
 
         Returns:
-            :obj:`Model`: same model definition, but with reversible reactions split into separate forward and backward reactions
+            :obj:`list` of :obj:`Submodel`: non-dFBA submodels
         """
-        for submodel in model.submodels:
-            if submodel.algorithm != SubmodelAlgorithm.dFBA:
-                for rxn in list(submodel.reactions):
-                    if rxn.reversible:
-                        # remove reversible reaction
-                        model.reactions.remove(rxn)
-                        submodel.reactions.remove(rxn)
-
-                        # create separate forward and reverse reactions
-                        rxn_for = submodel.reactions.create(
-                            model=model,
-                            id='{}_forward'.format(rxn.id),
-                            name='{} (forward)'.format(rxn.name),
-                            reversible=False,
-                            evidence=rxn.evidence,
-                            db_refs=rxn.db_refs,
-                            comments=rxn.comments,
-                            references=rxn.references,
-                        )
-                        rxn_bck = submodel.reactions.create(
-                            model=model,
-                            id='{}_backward'.format(rxn.id),
-                            name='{} (backward)'.format(rxn.name),
-                            reversible=False,
-                            evidence=rxn.evidence,
-                            db_refs=rxn.db_refs,
-                            comments=rxn.comments,
-                            references=rxn.references,
-                        )
-
-                        rxn.evidence = []
-                        rxn.db_refs = []
-                        rxn.references = []
-
-                        # copy participants and negate for backward reaction
-                        for part in rxn.participants:
-                            rxn_for.participants.append(part)
-
-                            part_back = part.species.species_coefficients.get_one(coefficient=-1 * part.coefficient)
-                            if part_back:
-                                rxn_bck.participants.append(part_back)
-                            else:
-                                rxn_bck.participants.create(species=part.species, coefficient=-1 * part.coefficient)
-
-                        rxn.participants = []
-
-                        # copy rate laws
-                        law_for = rxn.rate_laws.get_one(direction=RateLawDirection.forward)
-                        law_bck = rxn.rate_laws.get_one(direction=RateLawDirection.backward)
-
-                        if law_for:
-                            law_for.reaction = rxn_for
-                            law_for.direction = RateLawDirection.forward
-                            law_for.id = law_for.gen_id(law_for.reaction.id, law_for.direction.name)
-                        if law_bck:
-                            law_bck.reaction = rxn_bck
-                            law_bck.direction = RateLawDirection.forward
-                            law_bck.id = law_bck.gen_id(law_bck.reaction.id, law_bck.direction.name)
-
-                        # copy dFBA objective: unreachable because only non-dFBA reactions are split
-                        if rxn.dfba_obj_expression:
-                            dfba_obj_expr = rxn.dfba_obj_expression # pragma: no cover
-                            parsed_expr = dfba_obj_expr._parsed_expression # pragma: no cover
-
-                            dfba_obj_expr.expression = parsed_expr.expression = re.sub(
-                                r'\b' + rxn.id + r'\b',
-                                '({} - {})'.format(rxn_for.id, rxn_bck.id),
-                                dfba_obj_expr.expression)  # pragma: no cover
-
-                            parsed_expr._objs[Reaction].pop(rxn.id)  # pragma: no cover
-                            parsed_expr._objs[Reaction][rxn_for.id] = rxn_for  # pragma: no cover
-                            parsed_expr._objs[Reaction][rxn_bck.id] = rxn_bck  # pragma: no cover
-                            parsed_expr.tokenize()  # pragma: no cover
-
-                            rxn.dfba_obj_expression = None  # pragma: no cover
-                            rxn_for.dfba_obj_expression = dfba_obj_expr  # pragma: no cover
-                            rxn_bck.dfba_obj_expression = dfba_obj_expr  # pragma: no cover
-
-        return model
+        return [submodel for submodel in model.submodels if submodel.algorithm != SubmodelAlgorithm.dFBA]
+
+    def get_submodel_edits(self, model, submodel, context):
+        """ Get the reversible reactions of a non-dFBA submodel
+
+        Args:
+            model (:obj:`Model`): model definition
+            submodel (:obj:`Submodel`): non-dFBA submodel
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`list` of :obj:`int`: positions of the reversible reactions in the reactions of the submodel
+        """
+        return [i_rxn for i_rxn, rxn in enumerate(context.get_submodel_reactions(submodel)) if rxn.reversible]
+
+    def apply_edits(self, model, edits, context):
+        """ Split the reversible reactions of the non-dFBA submodels into separate forward and backward reactions
+
+        Args:
+            model (:obj:`Model`): model definition
+            edits (:obj:`list` of :obj:`tuple`): list of tuples of non-dFBA submodels and the positions of their
+                reversible reactions
+            context (:obj:`TransformContext`): indexes of the model
+        """
+        species_coefficients = context.get_species_coefficient_pool()
+        split_rxns = set()
+        new_model_rxns = []
+        for submodel, i_rxns in edits:
+            submodel_rxns = context.get_submodel_reactions(submodel)
+            new_submodel_rxns = []
+            for i_rxn in i_rxns:
+                rxn = submodel_rxns[i_rxn]
+                split_rxns.add(rxn)
+
+                # create separate forward and reverse reactions
+                rxn_for = Reaction(
+                    id='{}_forward'.format(rxn.id),
+                    name='{} (forward)'.format(rxn.name),
+                    reversible=False,
+                    evidence=rxn.evidence,
+                    db_refs=rxn.db_refs,
+                    comments=rxn.comments,
+                    references=rxn.references,
+                )
+                rxn_bck = Reaction(
+                    id='{}_backward'.format(rxn.id),
+                    name='{} (backward)'.format(rxn.name),
+                    reversible=False,
+                    evidence=rxn.evidence,
+                    db_refs=rxn.db_refs,
+                    comments=rxn.comments,
+                    references=rxn.references,
+                )
+                new_submodel_rxns.extend((rxn_for, rxn_bck))
+
+                rxn.evidence = []
+                rxn.db_refs = []
+                rxn.references = []
+
+                # copy participants and negate for backward reaction
+                for part in rxn.participants:
+                    rxn_for.participants.append(part)
+
+                    rxn_bck.participants.append(species_coefficients.get_or_create(part.species, -1 * part.coefficient))
+
+                rxn.participants = []
+
+                # copy rate laws
+                law_for = rxn.rate_laws.get_one(direction=RateLawDirection.forward)
+                law_bck = rxn.rate_laws.get_one(direction=RateLawDirection.backward)
+
+                if law_for:
+                    law_for.reaction = rxn_for
+                    law_for.direction = RateLawDirection.forward
+                    law_for.id = law_for.gen_id(law_for.reaction.id, law_for.direction.name)
+                if law_bck:
+                    law_bck.reaction = rxn_bck
+                    law_bck.direction = RateLawDirection.forward
+                    law_bck.id = law_bck.gen_id(law_bck.reaction.id, law_bck.direction.name)
+
+                # copy dFBA objective: unreachable because only non-dFBA reactions are split
+                if rxn.dfba_obj_expression:
+                    dfba_obj_expr = rxn.dfba_obj_expression # pragma: no cover
+                    parsed_expr = dfba_obj_expr._parsed_expression # pragma: no cover
+
+                    dfba_obj_expr.expression = parsed_expr.expression = re.sub(
+                        r'\b' + rxn.id + r'\b',
+                        '({} - {})'.format(rxn_for.id, rxn_bck.id),
+                        dfba_obj_expr.expression)  # pragma: no cover
+
+                    parsed_expr._objs[Reaction].pop(rxn.id)  # pragma: no cover
+                    parsed_expr._objs[Reaction][rxn_for.id] = rxn_for  # pragma: no cover
+                    parsed_expr._objs[Reaction][rxn_bck.id] = rxn_bck  # pragma: no cover
+                    parsed_expr.tokenize()  # pragma: no cover
+
+                    rxn.dfba_obj_expression = None  # pragma: no cover
+                    rxn_for.dfba_obj_expression = dfba_obj_expr  # pragma: no cover
+                    rxn_bck.dfba_obj_expression = dfba_obj_expr  # pragma: no cover
+
+            # replace the reversible reactions of the submodel with one bulk update of its list of reactions
+            if new_submodel_rxns:
+                submodel.reactions = [rxn for rxn in submodel.reactions if rxn not in split_rxns] + new_submodel_rxns
+                new_model_rxns.extend(new_submodel_rxns)
+
+        # replace the reversible reactions of the model with one bulk update of its list of reactions
+        if split_rxns:
+            model.reactions = [rxn for rxn in model.reactions if rxn not in split_rxns] + new_model_rxns
+
+        context.invalidate('submodel_reactions')
+
+    def is_applicable(self, model, context):
+        """ Determine whether any non-dFBA submodel has a reversible reaction
+
+        Args:
+            model (:obj:`Model`): model definition
+            context (:obj:`TransformContext`): indexes of the model
+
+        Returns:
+            :obj:`bool`: :obj:`True` if any non-dFBA submodel has a reversible reaction
+        """
+        for submodel in self.get_submodels(model, context):
+            if any(rxn.reversible for rxn in context.get_submodel_reactions(submodel)):
+                return True
+        return False
@@ -6,9 +6,18 @@
 :License: MIT
 """
 
+from abc import ABCMeta, abstractmethod
 from obj_model import get_models as base_get_models
+from six import with_metaclass
 from wc_lang import core
 from wc_utils.util import git
+import collections
+import hashlib
+import json
+import math
+import obj_model
+import threading
+import time
 
 
 def get_model_size(model):
@@ -75,3 +84,648 @@ def set_git_repo_metadata_from_path(model, path='.'):
     model.url = md.url
     model.branch = md.branch
     model.revision = md.revision
+
+
+def get_object_key(obj):
+    """ Get a key which identifies an object within a model: the name of its class and its
+    serialized primary attribute (e.g., its id)
+
+    Args:
+        obj (:obj:`obj_model.Model`): object
+
+    Returns:
+        :obj:`tuple` of :obj:`str`: name of the class and the serialized primary attribute of the object
+    """
+    return (obj.__class__.__name__, obj.serialize())
+
+
+def get_object_content(obj):
+    """ Get the content of an object: the serialized values of its attributes, with the values
+    of its related attributes represented by the serialized primary attributes of the related objects
+
+    Args:
+        obj (:obj:`obj_model.Model`): object
+
+    Returns:
+        :obj:`dict`: dictionary which maps the names of the attributes of the object to their serialized values
+    """
+    content = {}
+    for attr_name, attr in obj.Meta.attributes.items():
+        value = getattr(obj, attr_name)
+        if isinstance(attr, obj_model.RelatedAttribute):
+            if value is None:
+                content[attr_name] = None
+            elif isinstance(value, list):
+                content[attr_name] = sorted(related_obj.serialize() for related_obj in value)
+            else:
+                content[attr_name] = value.serialize()
+        elif isinstance(value, float) and math.isnan(value):
+            content[attr_name] = 'NaN'
+        else:
+            content[attr_name] = attr.serialize(value)
+    return content
+
+
+def get_object_hashes(model):
+    """ Get the content and a hash of the content of each object in a model
+
+    Args:
+        model (:obj:`core.Model`): model
+
+    Returns:
+        :obj:`dict`: dictionary which maps the key of each object (see :obj:`get_object_key`) to a tuple
+            of its content (see :obj:`get_object_content`) and the hash of its content
+    """
+    hashes = {}
+    for key, obj in get_objects_by_key(model).items():
+        content = get_object_content(obj)
+        hashes[key] = (content, get_content_hash(content))
+    return hashes
+
+
+def get_objects_by_key(model):
+    """ Get a dictionary of the objects of a model, keyed by :obj:`get_object_key`
+
+    Args:
+        model (:obj:`core.Model`): model
+
+    Returns:
+        :obj:`dict`: dictionary which maps the key of each object to the object
+    """
+    return {get_object_key(obj): obj for obj in model.get_related()}
+
+
+def get_content_hash(content):
+    """ Get a hash of the content of an object
+
+    Args:
+        content (:obj:`dict`): content of an object (see :obj:`get_object_content`)
+
+    Returns:
+        :obj:`str`: hash
+    """
+    return hashlib.sha1(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_model_difference(model_1, model_2):
+    """ Get the structural difference between two models
+
+    Rather than recursively comparing the graphs of related objects, as :obj:`obj_model.Model.difference`
+    does, the objects of the models are matched by their types and primary attributes, and the content of
+    each object is hashed once so that only the attributes of the objects whose hashes differ are compared.
+    This scales linearly with the sizes of the models.
+
+    Args:
+        model_1 (:obj:`core.Model`): first model
+        model_2 (:obj:`core.Model`): second model
+
+    Returns:
+        :obj:`dict`: dictionary with three keys
+
+            * added (:obj:`list` of :obj:`dict`): type and id of each object of :obj:`model_2`
+              which is not in :obj:`model_1`
+            * removed (:obj:`list` of :obj:`dict`): type and id of each object of :obj:`model_1`
+              which is not in :obj:`model_2`
+            * changed (:obj:`list` of :obj:`dict`): type and id of each object whose attributes
+              changed, and a dictionary which maps the name of each changed attribute to its values
+              in :obj:`model_1` and :obj:`model_2`
+    """
+    hashes_1 = get_object_hashes(model_1)
+    hashes_2 = get_object_hashes(model_2)
+
+    difference = {
+        'added': [],
+        'removed': [],
+        'changed': [],
+    }
+    for key in sorted(set(hashes_2.keys()) - set(hashes_1.keys())):
+        difference['added'].append({'type': key[0], 'id': key[1]})
+    for key in sorted(set(hashes_1.keys()) - set(hashes_2.keys())):
+        difference['removed'].append({'type': key[0], 'id': key[1]})
+    for key in sorted(set(hashes_1.keys()) & set(hashes_2.keys())):
+        content_1, hash_1 = hashes_1[key]
+        content_2, hash_2 = hashes_2[key]
+        if hash_1 == hash_2:
+            continue
+        attributes = {}
+        for attr_name in sorted(set(content_1.keys()) | set(content_2.keys())):
+            value_1 = content_1.get(attr_name, None)
+            value_2 = content_2.get(attr_name, None)
+            if value_1 != value_2:
+                attributes[attr_name] = [value_1, value_2]
+        difference['changed'].append({'type': key[0], 'id': key[1], 'attributes': attributes})
+
+    return difference
+
+
+def format_model_difference(difference):
+    """ Get a textual representation of the structural difference between two models
+
+    Args:
+        difference (:obj:`dict`): difference between two models (see :obj:`get_model_difference`)
+
+    Returns:
+        :obj:`str`: textual representation of the difference; empty if the models are identical
+    """
+    lines = []
+    if difference['added']:
+        lines.append('Added:')
+        for obj in difference['added']:
+            lines.append('  {}: "{}"'.format(obj['type'], obj['id']))
+    if difference['removed']:
+        lines.append('Removed:')
+        for obj in difference['removed']:
+            lines.append('  {}: "{}"'.format(obj['type'], obj['id']))
+    if difference['changed']:
+        lines.append('Changed:')
+        for obj in difference['changed']:
+            lines.append('  {}: "{}"'.format(obj['type'], obj['id']))
+            for attr_name, (value_1, value_2) in obj['attributes'].items():
+                lines.append('    `{}`: {} != {}'.format(attr_name, value_1, value_2))
+    return '\n'.join(lines)
+
+
+MERGE_ROOT_KEY = (core.Model.__name__, None)
+# :obj:`tuple`: key of the root :obj:`core.Model` of each model in a three-way merge, which matches the roots of
+# the models even if their ids are different
+
+
+def merge_models(base, ours, theirs):
+    """ Merge the changes from a common ancestor (:obj:`base`) to another model (:obj:`theirs`) into a model
+    (:obj:`ours`)
+
+    The objects of the models are matched by their types and primary attributes (see :obj:`get_object_key`), and
+    the change sets from :obj:`base` to :obj:`ours` and :obj:`theirs` are computed from the content of each object
+    (see :obj:`get_object_content`). Objects which were only added, removed, or changed in :obj:`theirs` are added,
+    removed, or changed in :obj:`ours` in bulk, without reading or writing workbooks. Attributes which were changed
+    differently in both models and objects which were removed from one model and changed in the other are
+    reported as conflicts and left unchanged in :obj:`ours`.
+
+    Args:
+        base (:obj:`core.Model`): common ancestor of :obj:`ours` and :obj:`theirs`
+        ours (:obj:`core.Model`): model to merge the changes into; modified in place
+        theirs (:obj:`core.Model`): model whose changes should be merged
+
+    Returns:
+        :obj:`list` of :obj:`dict`: list of conflicts; each conflict has the type and id of the object, the name of
+            the attribute (:obj:`None` if the object was removed from one model), and the serialized values of the
+            attribute (:obj:`None` if the object was removed) in :obj:`base`, :obj:`ours`, and :obj:`theirs`
+    """
+    base_objs = _get_merge_objects(base)
+    ours_objs = _get_merge_objects(ours)
+    theirs_objs = _get_merge_objects(theirs)
+
+    base_contents = {key: get_object_content(obj) for key, obj in base_objs.items()}
+    ours_contents = {key: get_object_content(obj) for key, obj in ours_objs.items()}
+    theirs_contents = {key: get_object_content(obj) for key, obj in theirs_objs.items()}
+    theirs_keys = {id(obj): key for key, obj in theirs_objs.items()}
+
+    conflicts = []
+
+    def add_conflict(key, attr_name, base_value, ours_value, theirs_value):
+        conflicts.append({
+            'type': key[0],
+            'id': ours_objs.get(key, theirs_objs.get(key, base_objs.get(key))).serialize(),
+            'attribute': attr_name,
+            'base': base_value,
+            'ours': ours_value,
+            'theirs': theirs_value,
+        })
+
+    # determine the objects which were added, and the attributes which were changed, in theirs
+    changes = []
+    for key, theirs_content in theirs_contents.items():
+        base_content = base_contents.get(key, None)
+        ours_content = ours_contents.get(key, None)
+
+        if base_content is None:
+            if ours_content is None:
+                # added in theirs
+                ours_objs[key] = theirs_objs[key].__class__()
+                changes.extend((key, attr_name) for attr_name in theirs_content.keys())
+            else:
+                # added in both
+                for attr_name, theirs_value in theirs_content.items():
+                    if ours_content[attr_name] != theirs_value:
+                        add_conflict(key, attr_name, None, ours_content[attr_name], theirs_value)
+
+        elif get_content_hash(base_content) != get_content_hash(theirs_content):
+            if ours_content is None:
+                # removed in ours, changed in theirs
+                add_conflict(key, None, base_content, None, theirs_content)
+            else:
+                for attr_name, theirs_value in theirs_content.items():
+                    base_value = base_content[attr_name]
+                    ours_value = ours_content[attr_name]
+                    if theirs_value == base_value or theirs_value == ours_value:
+                        continue
+                    if ours_value == base_value:
+                        changes.append((key, attr_name))
+                    else:
+                        # changed differently in both
+                        add_conflict(key, attr_name, base_value, ours_value, theirs_value)
+
+    # apply the changes from theirs to ours
+    for key, attr_name in changes:
+        theirs_obj = theirs_objs[key]
+        attr = theirs_obj.Meta.attributes[attr_name]
+        value = getattr(theirs_obj, attr_name)
+
+        if isinstance(attr, obj_model.RelatedAttribute):
+            related_keys = [theirs_keys[id(related_obj)] for related_obj in (value if isinstance(value, list) else [value])
+                            if related_obj is not None]
+            missing_keys = [related_key for related_key in related_keys if related_key not in ours_objs]
+            if missing_keys:
+                # refers to objects which were removed from ours
+                add_conflict(key, attr_name, base_contents.get(key, {}).get(attr_name, None),
+                             ours_contents.get(key, {}).get(attr_name, None), theirs_contents[key][attr_name])
+                continue
+            if isinstance(value, list):
+                value = [ours_objs[related_key] for related_key in related_keys]
+            elif value is not None:
+                value = ours_objs[related_keys[0]]
+
+        setattr(ours_objs[key], attr_name, value)
+
+    # remove the objects which were removed from theirs and unchanged in ours
+    for key, base_content in base_contents.items():
+        if key in theirs_contents or key not in ours_contents:
+            continue
+        if get_content_hash(base_content) != get_content_hash(ours_contents[key]):
+            # changed in ours, removed in theirs
+            add_conflict(key, None, base_content, ours_contents[key], None)
+            continue
+        _cut_relations(ours_objs.pop(key))
+
+    return conflicts
+
+
+def _get_merge_objects(model):
+    """ Get a dictionary of the objects of a model, keyed by :obj:`get_object_key`, with the root of the model
+    keyed by :obj:`MERGE_ROOT_KEY`
+
+    Args:
+        model (:obj:`core.Model`): model
+
+    Returns:
+        :obj:`dict`: dictionary which maps the key of each object to the object
+    """
+    objs = get_objects_by_key(model)
+    objs.pop(get_object_key(model))
+    objs[MERGE_ROOT_KEY] = model
+    return objs
+
+
+def _cut_relations(obj):
+    """ Remove all of the relationships of an object to other objects
+
+    Args:
+        obj (:obj:`obj_model.Model`): object
+    """
+    attr_names = [attr_name for attr_name, attr in obj.Meta.attributes.items()
+                  if isinstance(attr, obj_model.RelatedAttribute)] + list(obj.Meta.related_attributes.keys())
+    for attr_name in attr_names:
+        if isinstance(getattr(obj, attr_name), list):
+            setattr(obj, attr_name, [])
+        else:
+            setattr(obj, attr_name, None)
+
+
+class MetricsSink(with_metaclass(ABCMeta, object)):
+    """ Interface for the destinations of the metrics of a :obj:`MetricsRegistry`, e.g., a monitoring system """
+
+    @abstractmethod
+    def record(self, type, name, value, labels):
+        """ Record a measurement of a metric
+
+        Args:
+            type (:obj:`str`): type of the metric (`counter`, `timer`, or `histogram`)
+            name (:obj:`str`): name of the metric
+            value (:obj:`float`): increment of a counter, duration (s) measured by a timer, or value
+                observed by a histogram
+            labels (:obj:`dict`): dictionary which maps the names of the labels of the measurement to their values
+        """
+        pass  # pragma: no cover
+
+
+class MetricsRegistry(object):
+    """ Registry of counters, timers, and histograms of the hot paths of `wc_lang`
+
+    `wc_lang.io`, `wc_lang.core.Validator`, `wc_lang.transform`, and `wc_lang.sbml` report into the registry
+    :obj:`metrics`. Measurements are forwarded to the sinks attached to the registry. The instrumented code
+    checks :obj:`enabled` before computing measurements and labels, so that reporting costs almost nothing
+    when no sink is attached.
+
+    Attributes:
+        sinks (:obj:`list` of :obj:`MetricsSink`): sinks
+        enabled (:obj:`bool`): :obj:`True` if at least one sink is attached
+    """
+
+    def __init__(self):
+        self.sinks = []
+        self.enabled = False
+
+    def add_sink(self, sink):
+        """ Attach a sink
+
+        Args:
+            sink (:obj:`MetricsSink`): sink
+        """
+        self.sinks.append(sink)
+        self.enabled = True
+
+    def remove_sink(self, sink):
+        """ Detach a sink
+
+        Args:
+            sink (:obj:`MetricsSink`): sink
+        """
+        self.sinks.remove(sink)
+        self.enabled = bool(self.sinks)
+
+    def increment(self, name, value=1, labels=None):
+        """ Increment a counter
+
+        Args:
+            name (:obj:`str`): name of the counter
+            value (:obj:`float`, optional): increment
+            labels (:obj:`dict`, optional): labels of the increment
+        """
+        self._record('counter', name, value, labels)
+
+    def observe(self, name, value, labels=None):
+        """ Observe a value of a histogram
+
+        Args:
+            name (:obj:`str`): name of the histogram
+            value (:obj:`float`): value
+            labels (:obj:`dict`, optional): labels of the value
+        """
+        self._record('histogram', name, value, labels)
+
+    def count_cache_lookup(self, cache, hit):
+        """ Count a lookup of a cache as a hit or a miss
+
+        Args:
+            cache (:obj:`str`): name of the cache
+            hit (:obj:`bool`): :obj:`True` if the cache contained the value
+        """
+        self.increment('wc_lang_cache_lookups_total', labels={'cache': cache, 'result': 'hit' if hit else 'miss'})
+
+    def record_time(self, name, duration, labels=None):
+        """ Record a duration measured by a timer
+
+        Args:
+            name (:obj:`str`): name of the timer
+            duration (:obj:`float`): duration (s)
+            labels (:obj:`dict`, optional): labels of the duration
+        """
+        self._record('timer', name, duration, labels)
+
+    def timer(self, name, labels=None):
+        """ Get a context manager which measures the duration of a block
+
+        Args:
+            name (:obj:`str`): name of the timer
+            labels (:obj:`dict`, optional): labels of the duration
+
+        Returns:
+            :obj:`MetricsTimer`: context manager
+        """
+        if not self.enabled:
+            return _null_metrics_timer
+        return MetricsTimer(self, name, labels)
+
+    def _record(self, type, name, value, labels):
+        """ Forward a measurement to the sinks
+
+        Args:
+            type (:obj:`str`): type of the metric (`counter`, `timer`, or `histogram`)
+            name (:obj:`str`): name of the metric
+            value (:obj:`float`): value
+            labels (:obj:`dict`): labels of the measurement
+        """
+        for sink in self.sinks:
+            sink.record(type, name, value, labels or {})
+
+
+class MetricsTimer(object):
+    """ Context manager which reports the duration of a block to a :obj:`MetricsRegistry`
+
+    Attributes:
+        registry (:obj:`MetricsRegistry`): registry
+        name (:obj:`str`): name of the timer
+        labels (:obj:`dict`): labels of the duration
+        _start (:obj:`float`): start time
+    """
+
+    def __init__(self, registry, name, labels=None):
+        """
+        Args:
+            registry (:obj:`MetricsRegistry`): registry
+            name (:obj:`str`): name of the timer
+            labels (:obj:`dict`, optional): labels of the duration
+        """
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.time()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.registry.record_time(self.name, time.time() - self._start, labels=self.labels)
+        return False
+
+
+class _NullMetricsTimer(object):
+    """ Timer which reports nothing, used when no sink is attached to the registry """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        return False
+
+
+_null_metrics_timer = _NullMetricsTimer()
+
+
+class MemoryMetricsSink(MetricsSink):
+    """ Sink which aggregates metrics in memory, and which can dump them as JSON or in the Prometheus text
+    exposition format, e.g., to be collected by a monitoring system
+
+    Counters are summed. Timers and histograms are aggregated into their numbers of values, sums, minima,
+    maxima, and cumulative counts of the values which are less than or equal to each bucket bound.
+
+    Attributes:
+        buckets (:obj:`list` of :obj:`float`): upper bounds of the buckets of the timers and histograms
+        counters (:obj:`collections.OrderedDict`): dictionary which maps the names and labels of the counters to
+            their values
+        timers (:obj:`collections.OrderedDict`): dictionary which maps the names and labels of the timers to their
+            aggregated durations
+        histograms (:obj:`collections.OrderedDict`): dictionary which maps the names and labels of the histograms to
+            their aggregated values
+        _lock (:obj:`threading.Lock`): lock for the aggregated metrics
+    """
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1., 2.5, 5., 10., 30., 60., 300.)
+    # :obj:`tuple` of :obj:`float`: default upper bounds of the buckets of the timers and histograms
+
+    def __init__(self, buckets=None):
+        """
+        Args:
+            buckets (:obj:`list` of :obj:`float`, optional): upper bounds of the buckets of the timers and
+                histograms; default: :obj:`DEFAULT_BUCKETS`
+        """
+        self.buckets = sorted(buckets or self.DEFAULT_BUCKETS)
+        self.counters = collections.OrderedDict()
+        self.timers = collections.OrderedDict()
+        self.histograms = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, type, name, value, labels):
+        """ Record a measurement of a metric
+
+        Args:
+            type (:obj:`str`): type of the metric (`counter`, `timer`, or `histogram`)
+            name (:obj:`str`): name of the metric
+            value (:obj:`float`): value
+            labels (:obj:`dict`): labels of the measurement
+
+        Raises:
+            :obj:`ValueError`: if the type of the metric is not supported
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            if type == 'counter':
+                self.counters[key] = self.counters.get(key, 0) + value
+            elif type in ('timer', 'histogram'):
+                metrics = self.timers if type == 'timer' else self.histograms
+                metric = metrics.get(key, None)
+                if metric is None:
+                    metric = metrics[key] = {
+                        'count': 0, 'sum': 0., 'min': value, 'max': value, 'buckets': [0] * len(self.buckets)}
+                metric['count'] += 1
+                metric['sum'] += value
+                metric['min'] = min(metric['min'], value)
+                metric['max'] = max(metric['max'], value)
+                for i_bucket, bound in enumerate(self.buckets):
+                    if value <= bound:
+                        metric['buckets'][i_bucket] += 1
+            else:
+                raise ValueError('Unsupported metric type "{}"'.format(type))
+
+    def clear(self):
+        """ Clear the aggregated metrics """
+        with self._lock:
+            self.counters.clear()
+            self.timers.clear()
+            self.histograms.clear()
+
+    def to_json(self):
+        """ Get the aggregated metrics as JSON
+
+        Returns:
+            :obj:`str`: JSON-encoded dictionary with lists of the counters, timers, and histograms
+        """
+        with self._lock:
+            dump = {'counters': [], 'timers': [], 'histograms': []}
+            for (name, labels), value in self.counters.items():
+                dump['counters'].append({'name': name, 'labels': dict(labels), 'value': value})
+            for group, metrics in (('timers', self.timers), ('histograms', self.histograms)):
+                for (name, labels), metric in metrics.items():
+                    dump[group].append({
+                        'name': name,
+                        'labels': dict(labels),
+                        'count': metric['count'],
+                        'sum': metric['sum'],
+                        'min': metric['min'],
+                        'max': metric['max'],
+                        'buckets': [{'le': bound, 'count': count}
+                                    for bound, count in zip(self.buckets, metric['buckets'])],
+                    })
+        return json.dumps(dump, indent=2)
+
+    def to_prometheus(self):
+        """ Get the aggregated metrics in the Prometheus text exposition format
+
+        Counters are exported as Prometheus counters, and timers and histograms are exported as
+        Prometheus histograms.
+
+        Returns:
+            :obj:`str`: metrics in the Prometheus text exposition format
+        """
+        lines = []
+        typed_names = set()
+
+        def add_type(name, type):
+            if name not in typed_names:
+                typed_names.add(name)
+                lines.append('# TYPE {} {}'.format(name, type))
+
+        # group the measurements of each metric, as required by the format
+        def by_name(item):
+            return item[0][0]
+
+        with self._lock:
+            for (name, labels), value in sorted(self.counters.items(), key=by_name):
+                add_type(name, 'counter')
+                lines.append('{}{} {}'.format(name, self._format_prometheus_labels(labels), value))
+
+            for metrics in (self.timers, self.histograms):
+                for (name, labels), metric in sorted(metrics.items(), key=by_name):
+                    add_type(name, 'histogram')
+                    for bound, count in zip(self.buckets, metric['buckets']):
+                        lines.append('{}_bucket{} {}'.format(
+                            name, self._format_prometheus_labels(labels + (('le', repr(float(bound))),)), count))
+                    lines.append('{}_bucket{} {}'.format(
+                        name, self._format_prometheus_labels(labels + (('le', '+Inf'),)), metric['count']))
+                    lines.append('{}_sum{} {}'.format(name, self._format_prometheus_labels(labels), metric['sum']))
+                    lines.append('{}_count{} {}'.format(name, self._format_prometheus_labels(labels), metric['count']))
+
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def dump(self, path, format=None):
+        """ Save the aggregated metrics to a file
+
+        Args:
+            path (:obj:`str`): path to save the metrics
+            format (:obj:`str`, optional): format (`json` or `prometheus`); default: `json` if the extension of
+                :obj:`path` is `.json`, otherwise `prometheus`
+
+        Raises:
+            :obj:`ValueError`: if the format is not supported
+        """
+        if format is None:
+            format = 'json' if path.endswith('.json') else 'prometheus'
+        if format == 'json':
+            content = self.to_json()
+        elif format == 'prometheus':
+            content = self.to_prometheus()
+        else:
+            raise ValueError('Unsupported metrics format "{}"'.format(format))
+        with open(path, 'w') as file:
+            file.write(content)
+
+    @staticmethod
+    def _format_prometheus_labels(labels):
+        """ Format the labels of a measurement in the Prometheus text exposition format
+
+        Args:
+            labels (:obj:`tuple` of :obj:`tuple`): names and values of the labels
+
+        Returns:
+            :obj:`str`: formatted labels
+        """
+        if not labels:
+            return ''
+        return '{' + ','.join('{}="{}"'.format(
+            name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+            for name, value in labels) + '}'
+
+
+metrics = MetricsRegistry()
+# :obj:`MetricsRegistry`: registry of the metrics of the hot paths of `wc_lang`